@@ -8,7 +8,7 @@ from django.contrib import admin
 from django.contrib.auth import get_user_model
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 
-from .models import Course, CourseEnrollmentRequest, Homework, Submission, UserProfile
+from .models import AutotestResult, Course, CourseEnrollmentRequest, Homework, Job, SimilarityMatch, Submission, UserProfile
 
 User = get_user_model()
 
@@ -68,7 +68,7 @@ class HomeworkAdmin(admin.ModelAdmin):
     list_filter = ["course", "created_at", "due_date"]
     search_fields = ["title", "description", "course__title"]
     ordering = ["-created_at"]
-    fields = ["course", "title", "description", "due_date"]
+    fields = ["course", "title", "description", "due_date", "test_file", "test_timeout"]
 
     def get_queryset(self, request):
         qs = super().get_queryset(request)
@@ -114,11 +114,24 @@ class SubmissionAdmin(admin.ModelAdmin):
         "homework__course__title",
     ]
     ordering = ["-submitted_at"]
-    readonly_fields = ["submitted_at"]
+    readonly_fields = [
+        "submitted_at",
+        "file_check",
+        "file_check_message",
+        "test_status",
+        "tests_passed",
+        "tests_total",
+        "tested_at",
+        "test_output",
+    ]
 
     fieldsets = (
-        ("Информация о работе", {"fields": ("homework", "student", "solution_file", "submitted_at")}),
+        (
+            "Информация о работе",
+            {"fields": ("homework", "student", "solution_file", "submitted_at", "file_check", "file_check_message")},
+        ),
         ("Проверка", {"fields": ("grade", "feedback")}),
+        ("Автопроверка", {"fields": ("test_status", "tests_passed", "tests_total", "tested_at", "test_output")}),
     )
 
     def get_course(self, obj):
@@ -156,3 +169,45 @@ class CourseEnrollmentRequestAdmin(admin.ModelAdmin):
         if not request.user.is_superuser and request.user.is_staff:
             qs = qs.filter(course__teachers=request.user)
         return qs
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    """Админка для фоновых задач"""
+
+    list_display = ["name", "status", "attempts", "max_attempts", "run_after", "locked_by", "finished_at"]
+    list_filter = ["status", "name"]
+    search_fields = ["name", "locked_by"]
+    ordering = ["-created_at"]
+    readonly_fields = ["created_at", "finished_at", "locked_by", "locked_until", "result", "last_error"]
+
+
+@admin.register(AutotestResult)
+class AutotestResultAdmin(admin.ModelAdmin):
+    """Админка для кеша результатов автопроверки"""
+
+    list_display = [
+        "solution_hash",
+        "solution_extension",
+        "tests_hash",
+        "status",
+        "tests_passed",
+        "tests_total",
+        "hits",
+        "last_used_at",
+    ]
+    list_filter = ["status"]
+    search_fields = ["solution_hash", "tests_hash"]
+    ordering = ["-last_used_at"]
+    readonly_fields = ["created_at", "last_used_at", "hits"]
+
+
+@admin.register(SimilarityMatch)
+class SimilarityMatchAdmin(admin.ModelAdmin):
+    """Админка для найденных похожих решений"""
+
+    list_display = ["homework", "first", "second", "score", "shared", "updated_at"]
+    list_filter = ["homework__course"]
+    search_fields = ["first__student__username", "second__student__username", "homework__title"]
+    ordering = ["-score"]
+    raw_id_fields = ["homework", "first", "second"]
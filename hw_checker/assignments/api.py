@@ -0,0 +1,475 @@
+"""
+JSON API (версия 1) для интеграций.
+
+Повторяет данные HTML-страниц: курсы пользователя, задания курса,
+отправки, таблицу оценок и заявки на зачисление. Доступ - по сессии, как
+у страниц; набор данных зависит от роли: преподаватель видит свои курсы
+целиком, студент - курсы, на которые записан, и только свои работы и
+заявки. Чужой курс неотличим от несуществующего (404).
+
+- Списки разбиваются на страницы keyset-пагинацией (pagination.py):
+  ответ содержит ``next_cursor`` и ``next`` - ссылку на следующую страницу.
+- ``?fields=id,title`` выбирает поля ответа. Каждое поле ресурса знает,
+  какие столбцы или подзапросы ему нужны, поэтому queryset строится
+  через values() только из них: ненужные счетчики не вычисляются, а
+  большие текстовые поля не читаются.
+- Ответ получает ETag из состояния курсов, от которых он зависит
+  (число курсов и Course.modified_at, см. conditional.py), пользователя и
+  адреса запроса. Запрос с совпадающим If-None-Match получает 304 после
+  одного агрегирующего запроса, без выполнения представления.
+"""
+
+from functools import wraps
+
+from django.db.models import F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.http import JsonResponse
+from django.urls import reverse
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition, require_GET
+
+from .conditional import courses_state, teacher_courses, weak_etag
+from .gradebook import Gradebook
+from .models import Course, CourseEnrollmentRequest, Homework, Submission
+from .pagination import InvalidCursor, keyset_paginate
+from .permissions import get_user_role, has_course_role
+from .queries import count_subquery
+
+# Размер страницы по умолчанию и максимальный (?limit=)
+API_PAGE_SIZE = 50
+API_MAX_PAGE_SIZE = 200
+
+
+class ApiError(Exception):
+    """Ошибка запроса к API (ответ {"error": ...} с кодом status)"""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+class ApiField:
+    """
+    Поле ресурса API.
+
+    Args:
+        expression: Выражение для values() (None - столбец модели с тем же
+            именем); функция от пользователя, если выражение зависит от него
+        value: Функция от строки values(), если поле вычисляется в Python
+        requires: Столбцы модели, нужные функции value
+        role: Роль, которой доступно поле (None - всем)
+        default: Входит ли поле в ответ, если ?fields= не указан
+    """
+
+    def __init__(self, expression=None, value=None, requires=(), role=None, default=True):
+        self.expression = expression
+        self.value = value
+        self.requires = requires
+        self.role = role
+        self.default = default
+
+
+class ApiResource:
+    """Набор полей ресурса и построение по нему queryset и ответа"""
+
+    def __init__(self, fields, ordering):
+        self.fields = fields
+        self.ordering = ordering
+
+    def select(self, request, role):
+        """Поля ответа по параметру ?fields= с учетом роли"""
+        available = [name for name, field in self.fields.items() if field.role in (None, role)]
+        return requested_fields(request, available, [name for name in available if self.fields[name].default])
+
+    def values(self, queryset, names, user):
+        """queryset.values() только со столбцами и выражениями выбранных полей (и полей сортировки)"""
+        columns = {field.lstrip("-") for field in self.ordering}
+        expressions = {}
+        for name in names:
+            field = self.fields[name]
+            if field.value is not None:
+                columns.update(field.requires)
+            elif field.expression is None:
+                columns.add(name)
+            else:
+                expression = field.expression
+                expressions[name] = expression(user) if callable(expression) else expression
+        return queryset.values(*sorted(columns), **expressions)
+
+    def serialize(self, row, names):
+        """Словарь ответа из строки values()"""
+        return {name: self.fields[name].value(row) if self.fields[name].value else row[name] for name in names}
+
+
+def requested_fields(request, available, default):
+    """
+    Поля из параметра ?fields= (через запятую) или поля по умолчанию.
+
+    Raises:
+        ApiError: Если запрошено неизвестное или недоступное поле
+    """
+    raw = request.GET.get("fields")
+    if not raw:
+        return default
+    names = list(dict.fromkeys(name.strip() for name in raw.split(",") if name.strip()))
+    unknown = [name for name in names if name not in available]
+    if unknown or not names:
+        raise ApiError(f"Неизвестные поля: {', '.join(unknown)}. Доступны: {', '.join(available)}")
+    return names
+
+
+def api_error(message, status):
+    """JSON-ответ с ошибкой"""
+    return JsonResponse({"error": message}, status=status)
+
+
+def member_courses(request, *args, **kwargs):
+    """
+    Курсы, данные которых пользователь видит в API.
+
+    Преподавателю - его курсы, студенту - курсы, на которые он записан,
+    по которым у него есть отправки или подана заявка.
+    """
+    user = request.user
+    if get_user_role(user) == "teacher":
+        return teacher_courses(request)
+    return Course.objects.filter(
+        Q(students=user)
+        | Q(pk__in=Submission.objects.filter(student=user).values("homework__course_id"))
+        | Q(pk__in=CourseEnrollmentRequest.objects.filter(student=user).values("course_id"))
+    )
+
+
+def member_course(request, pk):
+    """Курс из URL среди курсов пользователя"""
+    return member_courses(request).filter(pk=pk)
+
+
+def homework_course(request, pk):
+    """Курс задания из URL среди курсов пользователя"""
+    return member_courses(request).filter(homeworks=pk)
+
+
+def api_view(courses):
+    """
+    Декоратор представления API.
+
+    Только GET; неавторизованный запрос получает 401, ApiError -
+    JSON с ошибкой. Ответы приватные (зависят от пользователя) и получают
+    ETag по состоянию курсов, от которых зависят данные ответа; при
+    совпадении If-None-Match представление не выполняется.
+
+    Args:
+        courses: Функция (request, *args, **kwargs) -> queryset курсов
+    """
+
+    def etag_func(request, *args, **kwargs):
+        user = request.user
+        if not user.is_authenticated:
+            return None
+        count, last_modified = courses_state(courses(request, *args, **kwargs))
+        parts = [
+            user.pk,
+            get_user_role(user),
+            user.username,
+            request.get_full_path(),
+            count,
+            last_modified.isoformat() if last_modified else "",
+        ]
+        return weak_etag(parts)
+
+    def decorator(view_func):
+        def api_response(request, *args, **kwargs):
+            if not request.user.is_authenticated:
+                return api_error("Требуется авторизация", 401)
+            try:
+                return view_func(request, *args, **kwargs)
+            except ApiError as error:
+                return api_error(str(error), error.status)
+
+        conditional_view = condition(etag_func=etag_func)(api_response)
+
+        @wraps(view_func)
+        def wrapped_view(request, *args, **kwargs):
+            response = conditional_view(request, *args, **kwargs)
+            patch_cache_control(response, private=True, no_cache=True)
+            return response
+
+        return require_GET(wrapped_view)
+
+    return decorator
+
+
+def course_for_member(request, pk):
+    """
+    id курса, если пользователь его преподаватель или студент, и роль пользователя.
+
+    Raises:
+        ApiError: 404, если курса нет или пользователь с ним не связан
+    """
+    role = get_user_role(request.user)
+    if role is None or not has_course_role(request, pk, role):
+        raise ApiError("Курс не найден", 404)
+    return pk, role
+
+
+def page_size(request):
+    """Размер страницы из ?limit="""
+    raw = request.GET.get("limit")
+    if raw is None:
+        return API_PAGE_SIZE
+    if not raw.isdigit() or not 1 <= int(raw) <= API_MAX_PAGE_SIZE:
+        raise ApiError(f"limit должен быть числом от 1 до {API_MAX_PAGE_SIZE}")
+    return int(raw)
+
+
+def paginate(request, queryset, ordering):
+    """Страница queryset по параметрам ?cursor= и ?limit="""
+    try:
+        return keyset_paginate(queryset, ordering, cursor=request.GET.get("cursor"), per_page=page_size(request))
+    except InvalidCursor as exc:
+        raise ApiError("Некорректный курсор") from exc
+
+
+def page_links(request, page):
+    """Курсор и ссылка на следующую страницу (с теми же параметрами запроса)"""
+    next_url = None
+    if page is not None and page.has_next:
+        params = request.GET.copy()
+        params["cursor"] = page.next_cursor
+        next_url = f"{request.path}?{params.urlencode()}"
+    return {"next_cursor": page.next_cursor if page is not None else None, "next": next_url}
+
+
+def paginated_response(request, resource, queryset, role):
+    """Страница ресурса: {"results": [...], "next_cursor": ..., "next": ...}"""
+    names = resource.select(request, role)
+    page = paginate(request, resource.values(queryset, names, request.user), resource.ordering)
+    return JsonResponse({"results": [resource.serialize(row, names) for row in page], **page_links(request, page)})
+
+
+# ============= Ресурсы =============
+
+
+COURSE_RESOURCE = ApiResource(
+    {
+        "id": ApiField(),
+        "title": ApiField(),
+        "description": ApiField(default=False),
+        "created_at": ApiField(),
+        "homeworks_count": ApiField(count_subquery(Homework.objects.filter(course_id=OuterRef("pk")))),
+        "students_count": ApiField(count_subquery(Course.students.through.objects.filter(course_id=OuterRef("pk")))),
+        "pending_requests_count": ApiField(
+            count_subquery(CourseEnrollmentRequest.objects.filter(course_id=OuterRef("pk"), status="pending")),
+            role="teacher",
+        ),
+    },
+    ordering=["title", "id"],
+)
+
+
+def own_submission(field):
+    """Поле отправки текущего студента по заданию (подзапрос)"""
+
+    def expression(user):
+        submissions = Submission.objects.filter(homework_id=OuterRef("pk"), student_id=user.pk)
+        return Subquery(submissions.values(field)[:1])
+
+    return expression
+
+
+HOMEWORK_RESOURCE = ApiResource(
+    {
+        "id": ApiField(),
+        "course_id": ApiField(),
+        "title": ApiField(),
+        "description": ApiField(default=False),
+        "due_date": ApiField(),
+        "created_at": ApiField(),
+        "submitted_count": ApiField(Coalesce(F("grade_stats__submitted_count"), 0), role="teacher"),
+        "graded_count": ApiField(Coalesce(F("grade_stats__graded_count"), 0), role="teacher"),
+        "submission_id": ApiField(own_submission("pk"), role="student"),
+        "grade": ApiField(own_submission("grade"), role="student"),
+    },
+    ordering=["due_date", "id"],
+)
+
+
+def download_url(row):
+    """Ссылка на файл решения"""
+    return reverse("download_submission", kwargs={"pk": row["id"]})
+
+
+SUBMISSION_RESOURCE = ApiResource(
+    {
+        "id": ApiField(),
+        "homework_id": ApiField(),
+        "course_id": ApiField(F("homework__course_id")),
+        "student_id": ApiField(),
+        "student_username": ApiField(F("student__username")),
+        "submitted_at": ApiField(),
+        "grade": ApiField(),
+        "feedback": ApiField(),
+        "file_check": ApiField(),
+        "file_check_message": ApiField(),
+        "test_status": ApiField(),
+        "tests_passed": ApiField(),
+        "tests_total": ApiField(),
+        "test_output": ApiField(default=False),
+        "download_url": ApiField(value=download_url, requires=["id"]),
+    },
+    ordering=["-submitted_at", "-id"],
+)
+
+ENROLLMENT_REQUEST_RESOURCE = ApiResource(
+    {
+        "id": ApiField(),
+        "course_id": ApiField(),
+        "student_id": ApiField(),
+        "student_username": ApiField(F("student__username")),
+        "status": ApiField(),
+        "message": ApiField(),
+        "created_at": ApiField(),
+        "processed_at": ApiField(),
+    },
+    ordering=["-created_at", "-id"],
+)
+
+GRADEBOOK_FIELDS = ["student_id", "username", "full_name", "grades", "total", "average", "completed"]
+GRADEBOOK_ORDERING = ["last_name", "first_name", "id"]
+
+
+# ============= Представления =============
+
+
+@api_view(member_courses)
+def api_courses(request):
+    """Курсы пользователя: преподаваемые или те, на которые он записан"""
+    role = get_user_role(request.user)
+    if role == "teacher":
+        courses = request.user.teaching_courses.all()
+    elif role == "student":
+        courses = request.user.enrolled_courses.all()
+    else:
+        courses = Course.objects.none()
+    return paginated_response(request, COURSE_RESOURCE, courses, role)
+
+
+@api_view(member_course)
+def api_course(request, pk):
+    """Курс пользователя"""
+    course_id, role = course_for_member(request, pk)
+    names = COURSE_RESOURCE.select(request, role)
+    row = COURSE_RESOURCE.values(Course.objects.filter(pk=course_id), names, request.user).get()
+    return JsonResponse(COURSE_RESOURCE.serialize(row, names))
+
+
+@api_view(member_course)
+def api_course_homeworks(request, pk):
+    """Задания курса (студенту - со своей отправкой и оценкой)"""
+    course_id, role = course_for_member(request, pk)
+    return paginated_response(request, HOMEWORK_RESOURCE, Homework.objects.filter(course_id=course_id), role)
+
+
+@api_view(member_courses)
+def api_submissions(request):
+    """
+    Отправки: преподавателю - по всем его курсам, студенту - свои.
+
+    Фильтры: ?status=pending|graded, ?course=<id>, ?homework=<id>.
+    """
+    role = get_user_role(request.user)
+    if role == "teacher":
+        submissions = Submission.objects.filter(homework__course__teachers=request.user)
+    else:
+        submissions = Submission.objects.filter(student=request.user)
+
+    status = request.GET.get("status")
+    if status == "pending":
+        submissions = submissions.filter(grade__isnull=True)
+    elif status == "graded":
+        submissions = submissions.filter(grade__isnull=False)
+    elif status:
+        raise ApiError("status должен быть pending или graded")
+    for param, lookup in (("course", "homework__course_id"), ("homework", "homework_id")):
+        value = request.GET.get(param)
+        if value:
+            if not value.isdigit():
+                raise ApiError(f"{param} должен быть числом")
+            submissions = submissions.filter(**{lookup: value})
+    return paginated_response(request, SUBMISSION_RESOURCE, submissions, role)
+
+
+@api_view(homework_course)
+def api_homework_submissions(request, pk):
+    """Отправки по заданию: преподавателю - все, студенту - своя"""
+    course_id = Homework.objects.filter(pk=pk).values_list("course_id", flat=True).first()
+    if course_id is None:
+        raise ApiError("Задание не найдено", 404)
+    _, role = course_for_member(request, course_id)
+    submissions = Submission.objects.filter(homework_id=pk)
+    if role != "teacher":
+        submissions = submissions.filter(student=request.user)
+    return paginated_response(request, SUBMISSION_RESOURCE, submissions, role)
+
+
+@api_view(member_course)
+def api_course_grades(request, pk):
+    """
+    Таблица оценок курса: преподавателю - по странице студентов, студенту - своя строка.
+
+    Оценки строки - словарь {id задания: оценка или null}. Для страницы
+    выполняется три запроса: задания, студенты страницы и их отправки.
+    """
+    course_id, role = course_for_member(request, pk)
+    names = requested_fields(request, GRADEBOOK_FIELDS, GRADEBOOK_FIELDS)
+
+    course = Course(pk=course_id)
+    homeworks = list(course.homeworks.order_by("due_date", "pk").only("pk", "title"))
+    if role == "teacher":
+        page = paginate(request, course.students.only("pk", "username", "first_name", "last_name"), GRADEBOOK_ORDERING)
+        students = page.object_list
+    else:
+        page = None
+        students = [request.user]
+
+    submissions = Submission.objects.filter(homework__course_id=course_id, student__in=[s.pk for s in students])
+    gradebook = Gradebook(students, homeworks, submissions.order_by().values_list("student_id", "homework_id", "id", "grade"))
+
+    results = []
+    for row in gradebook.rows():
+        values = {
+            "student_id": row.student.pk,
+            "username": row.student.username,
+            "full_name": row.student.get_full_name(),
+            "grades": {str(cell.homework.pk): cell.grade for cell in row.grades},
+            "total": row.total,
+            "average": row.average,
+            "completed": row.completed,
+        }
+        results.append({name: values[name] for name in names})
+
+    homeworks = [{"id": hw.pk, "title": hw.title} for hw in homeworks]
+    return JsonResponse({"homeworks": homeworks, "results": results, **page_links(request, page)})
+
+
+@api_view(member_courses)
+def api_enrollment_requests(request):
+    """Заявки на зачисление: преподавателю - заявки его курсов, студенту - свои (?status=, ?course=)"""
+    role = get_user_role(request.user)
+    if role == "teacher":
+        requests = CourseEnrollmentRequest.objects.filter(course__teachers=request.user)
+    else:
+        requests = CourseEnrollmentRequest.objects.filter(student=request.user)
+
+    status = request.GET.get("status")
+    if status:
+        if status not in dict(CourseEnrollmentRequest.STATUS_CHOICES):
+            raise ApiError("status должен быть pending, approved или rejected")
+        requests = requests.filter(status=status)
+    course = request.GET.get("course")
+    if course:
+        if not course.isdigit():
+            raise ApiError("course должен быть числом")
+        requests = requests.filter(course_id=course)
+    return paginated_response(request, ENROLLMENT_REQUEST_RESOURCE, requests, role)
@@ -18,3 +18,7 @@ class AssignmentsConfig(AppConfig):
 
     default_auto_field = "django.db.models.BigAutoField"
     name = "assignments"
+
+    def ready(self):
+        """Подключает обработчики сигналов моделей (signals.py)"""
+        from . import signals  # noqa: F401  pylint: disable=import-outside-toplevel,unused-import
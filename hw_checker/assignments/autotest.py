@@ -0,0 +1,192 @@
+"""
+Автопроверка отправок с кешем результатов.
+
+Результат запуска тестов определяется только содержимым решения и его
+расширением (оно выбирает способ размещения в песочнице), содержимым
+тестов и параметрами песочницы (см. sandbox.runner_version). Поэтому он
+кешируется в модели AutotestResult по ключу из хешей и расширения:
+при перепроверке задания после правки тестов заново выполняются только
+решения, ключ которых изменился, а одинаковые решения разных студентов
+проверяются один раз.
+
+Результаты со статусом "timeout" не кешируются: превышение времени
+зависит от нагрузки на машину, а не только от входных данных.
+"""
+
+import hashlib
+import os
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.db import connection
+from django.db.models import F
+from django.utils import timezone
+
+from .models import AutotestResult, Homework, Submission, touch_courses
+from .sandbox import AUTOTEST_EXTENSIONS, run_tests, runner_version
+from .storage import is_content_name
+
+# Размер блока чтения файла при хешировании
+HASH_CHUNK_SIZE = 64 * 1024
+
+# Результаты, не использованные дольше этого срока, вытесняются
+RESULT_TTL = timedelta(days=30)
+
+# Предел числа записей кеша (вытесняются давно не использованные)
+MAX_RESULTS = 100_000
+
+# Статусы, которые зависят не только от входных данных проверки
+UNCACHED_STATUSES = {"timeout"}
+
+
+def file_digest(field_file):
+    """SHA-256 файла; для контентно-адресуемых имен хеш берется из имени"""
+    if is_content_name(field_file.name):
+        return os.path.splitext(os.path.basename(field_file.name))[0]
+    digest = hashlib.sha256()
+    with field_file.open("rb") as f:
+        for chunk in f.chunks(HASH_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def cached_report(result):
+    """Отчет о проверке из записи кеша"""
+    return {
+        "status": result.status,
+        "passed": result.tests_passed,
+        "total": result.tests_total,
+        "output": result.output,
+        "duration": result.duration,
+    }
+
+
+def check_submission(submission, use_cache=True, tests_hash=None):
+    """
+    Проверяет отправку тестами задания, используя кеш результатов.
+
+    Args:
+        submission: Отправка (с загруженным homework)
+        use_cache: Искать результат в кеше (при False тесты запускаются
+            всегда, а новый результат заменяет закешированный)
+        tests_hash: Заранее вычисленный хеш тестов (при перепроверке всего задания)
+
+    Returns:
+        tuple: (отчет о проверке, взят ли он из кеша)
+    """
+    homework = submission.homework
+    key = {
+        "solution_hash": file_digest(submission.solution_file),
+        "solution_extension": os.path.splitext(submission.solution_file.name)[1].lower(),
+        "tests_hash": tests_hash or file_digest(homework.test_file),
+        "runner_version": runner_version(homework.test_timeout),
+    }
+    if use_cache:
+        result = AutotestResult.objects.filter(**key).first()
+        if result is not None:
+            AutotestResult.objects.filter(pk=result.pk).update(hits=F("hits") + 1, last_used_at=timezone.now())
+            return cached_report(result), True
+
+    with submission.solution_file.open("rb") as solution, homework.test_file.open("rb") as tests:
+        report = run_tests(submission.solution_file.name, solution, tests, timeout=homework.test_timeout)
+
+    if report["status"] not in UNCACHED_STATUSES:
+        fields = {
+            "status": report["status"],
+            "tests_passed": report["passed"],
+            "tests_total": report["total"],
+            "output": report["output"],
+            "duration": report["duration"],
+            "last_used_at": timezone.now(),
+        }
+        AutotestResult.objects.update_or_create(**key, defaults=fields)
+    return report, False
+
+
+def save_test_result(submission, report):
+    """
+    Записывает итог проверки в отправку.
+
+    Итог не записывается, если за время проверки решение заменили.
+    """
+    updated = Submission.objects.filter(pk=submission.pk, solution_file=submission.solution_file.name).update(
+        test_status=report["status"],
+        tests_passed=report["passed"],
+        tests_total=report["total"],
+        test_output=report["output"],
+        tested_at=timezone.now(),
+    )
+    if updated:
+        # update() не вызывает сигналы: итог проверки виден на страницах и в API курса
+        touch_courses(Homework.objects.filter(pk=submission.homework_id).values("course_id"))
+    return updated
+
+
+def evict_test_results(ttl=RESULT_TTL, max_results=MAX_RESULTS):
+    """
+    Вытесняет из кеша давно не использованные результаты.
+
+    Сверх max_results удаляются записи за пределами среза в порядке
+    использования: граница по last_used_at удалила бы и свежие записи с тем
+    же временем.
+
+    Returns:
+        int: Число удаленных записей
+    """
+    deleted, _ = AutotestResult.objects.filter(last_used_at__lt=timezone.now() - ttl).delete()
+    extra = list(AutotestResult.objects.order_by("-last_used_at", "-pk").values_list("pk", flat=True)[max_results:])
+    if extra:
+        evicted, _ = AutotestResult.objects.filter(pk__in=extra).delete()
+        deleted += evicted
+    return deleted
+
+
+def regrade_homework(homework, use_cache=True, concurrency=1):
+    """
+    Перепроверяет все решения задания, которые можно проверить тестами.
+
+    Args:
+        homework: Задание с файлом тестов
+        use_cache: Использовать кеш результатов
+        concurrency: Число одновременных проверок (потоки, каждый со своим
+            соединением с БД; сами тесты выполняются отдельными процессами)
+
+    Returns:
+        dict: checked, hits, executed, hit_rate, statuses и elapsed_s
+    """
+    submissions = [
+        submission
+        for submission in homework.submissions.select_related("homework").exclude(solution_file="")
+        if os.path.splitext(submission.solution_file.name)[1].lower() in AUTOTEST_EXTENSIONS
+    ]
+    tests_hash = file_digest(homework.test_file)
+
+    def check(submission):
+        report, cached = check_submission(submission, use_cache=use_cache, tests_hash=tests_hash)
+        save_test_result(submission, report)
+        return report["status"], cached
+
+    def check_in_thread(submission):
+        try:
+            return check(submission)
+        finally:
+            connection.close()
+
+    started = time.perf_counter()
+    if concurrency > 1:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            outcomes = list(pool.map(check_in_thread, submissions))
+    else:
+        outcomes = [check(submission) for submission in submissions]
+
+    hits = sum(cached for _, cached in outcomes)
+    return {
+        "checked": len(outcomes),
+        "hits": hits,
+        "executed": len(outcomes) - hits,
+        "hit_rate": round(hits / len(outcomes), 3) if outcomes else 0.0,
+        "statuses": dict(Counter(status for status, _ in outcomes)),
+        "elapsed_s": round(time.perf_counter() - started, 3),
+    }
@@ -0,0 +1,62 @@
+"""
+Бэкенды аутентификации для системы проверки домашних заданий.
+
+Содержит бэкенд, который загружает пользователя сессии вместе с профилем,
+чтобы проверки роли (``user.profile.is_student`` и т.п.) не выполняли
+отдельный запрос к UserProfile, и перенос сессий, созданных стандартным
+ModelBackend, на этот бэкенд.
+"""
+
+from django.apps import apps as global_apps
+from django.contrib.auth import BACKEND_SESSION_KEY, get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.sessions.backends.db import SessionStore
+
+User = get_user_model()
+
+PROFILE_BACKEND = "assignments.backends.ProfileModelBackend"
+
+LEGACY_BACKEND = "django.contrib.auth.backends.ModelBackend"
+
+
+class ProfileModelBackend(ModelBackend):
+    """ModelBackend, подгружающий профиль пользователя через select_related."""
+
+    def get_user(self, user_id):
+        try:
+            user = User.objects.select_related("profile").get(pk=user_id)
+        except User.DoesNotExist:
+            return None
+        return user if self.user_can_authenticate(user) else None
+
+    async def aget_user(self, user_id):
+        # request.auser() в асинхронных представлениях
+        try:
+            user = await User.objects.select_related("profile").aget(pk=user_id)
+        except User.DoesNotExist:
+            return None
+        return user if self.user_can_authenticate(user) else None
+
+
+def migrate_session_backends(apps=global_apps, old=LEGACY_BACKEND, new=PROFILE_BACKEND):
+    """
+    Переписывает путь бэкенда в сохраненных сессиях.
+
+    Django загружает пользователя сессии бэкендом, путь которого записан
+    при входе, и разлогинивает пользователя, если этого пути нет в
+    AUTHENTICATION_BACKENDS.
+
+    Returns:
+        int: Число перенесенных сессий
+    """
+    session_model = apps.get_model("sessions", "Session")
+    store = SessionStore()
+    migrated = 0
+    for session in session_model.objects.iterator():
+        data = store.decode(session.session_data)
+        if data.get(BACKEND_SESSION_KEY) == old:
+            data[BACKEND_SESSION_KEY] = new
+            session.session_data = store.encode(data)
+            session.save(update_fields=["session_data"])
+            migrated += 1
+    return migrated
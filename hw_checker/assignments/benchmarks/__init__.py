@@ -0,0 +1,47 @@
+"""
+Генерация синтетических данных и замеры производительности.
+
+Модули пакета:
+- dataset - заполнение БД синтетическим набором курсов, студентов, заданий,
+  отправок и заявок заданного масштаба (bulk_create, без сигналов)
+- indexes - сравнение планов и времени "горячих" запросов представлений
+  без индексов моделей и с ними
+- views - прогон всех URL приложения от лица студента и преподавателя с
+  замером числа запросов, p50/p95 времени ответа и пикового расхода
+  памяти и сравнение такого отчета с эталонным по порогам регрессии
+- autotest - пропускная способность автопроверки: сотни решений,
+  проверяемых в песочнице одновременно, как перед сроком сдачи
+- similarity - масштабирование антиплагиата на синтетических решениях со
+  списанными (переименованными и дополненными) копиями
+- load - нагрузочный тест асинхронных страниц через WSGI- и ASGI-обработчики
+- grading - выставление оценок по одной работе и одним CSV-файлом
+- measure и command - общие части: перцентили, отдельная тестовая БД и
+  базовый класс management-команд ``benchmark_*``
+"""
+
+from .autotest import run_autotest_benchmark
+from .dataset import SEED_PASSWORD, SeedResult, seed_dataset
+from .grading import run_bulk_grading_benchmark
+from .indexes import run_index_benchmark
+from .load import run_load_benchmark
+from .measure import benchmark_database, percentile
+from .similarity import run_similarity_benchmark, synthetic_submissions
+from .views import compare_reports, run_view_benchmark, url_kwargs, view_names
+
+__all__ = [
+    "SEED_PASSWORD",
+    "SeedResult",
+    "benchmark_database",
+    "compare_reports",
+    "percentile",
+    "run_autotest_benchmark",
+    "run_bulk_grading_benchmark",
+    "run_index_benchmark",
+    "run_load_benchmark",
+    "run_similarity_benchmark",
+    "run_view_benchmark",
+    "seed_dataset",
+    "synthetic_submissions",
+    "url_kwargs",
+    "view_names",
+]
@@ -0,0 +1,81 @@
+"""
+Пропускная способность песочницы автопроверки.
+"""
+
+import io
+import random
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from ..sandbox import run_tests
+from .measure import percentile
+
+AUTOTEST_TESTS = b"""import unittest
+
+import solution
+
+
+class SolutionTest(unittest.TestCase):
+    def test_sum(self):
+        self.assertEqual(solution.total(range(1000)), 499500)
+
+    def test_empty(self):
+        self.assertEqual(solution.total([]), 0)
+"""
+
+AUTOTEST_SOLUTIONS = {
+    "passed": b"def total(values):\n    return sum(values)\n",
+    "failed": b"def total(values):\n    return len(values)\n",
+    "timeout": b"def total(values):\n    while True:\n        pass\n",
+}
+
+
+def run_autotest_benchmark(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+    submissions=300, concurrency=8, timeout=5, failed_rate=0.2, timeout_rate=0.0, seed=0
+):
+    """
+    Замеряет пропускную способность автопроверки.
+
+    Решения проверяются параллельно concurrency потоками; каждая проверка
+    выполняется отдельным процессом песочницы, поэтому concurrency
+    соответствует числу воркеров ``run_workers --processes``. БД не нужна.
+
+    Args:
+        submissions: Число решений
+        concurrency: Число одновременных проверок
+        timeout: Предел времени одной проверки, сек
+        failed_rate: Доля решений с ошибкой
+        timeout_rate: Доля зависающих решений
+        seed: Зерно генератора случайных чисел
+
+    Returns:
+        dict: Время прогона, пропускная способность, p50/p95 длительности
+        проверки и число проверок по статусам
+    """
+    rng = random.Random(seed)
+    kinds = rng.choices(
+        list(AUTOTEST_SOLUTIONS),
+        weights=[1 - failed_rate - timeout_rate, failed_rate, timeout_rate],
+        k=submissions,
+    )
+
+    def check(kind):
+        return run_tests("solution.py", io.BytesIO(AUTOTEST_SOLUTIONS[kind]), io.BytesIO(AUTOTEST_TESTS), timeout=timeout)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        reports = list(pool.map(check, kinds))
+    elapsed = time.perf_counter() - started
+
+    durations = [report["duration"] for report in reports]
+    return {
+        "submissions": submissions,
+        "concurrency": concurrency,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_per_s": round(submissions / elapsed, 2),
+        "p50_s": percentile(durations, 0.5),
+        "p95_s": percentile(durations, 0.95),
+        "expected": dict(Counter(kinds)),
+        "statuses": dict(Counter(report["status"] for report in reports)),
+    }
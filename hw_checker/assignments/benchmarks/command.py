@@ -0,0 +1,35 @@
+"""
+Базовый класс management-команд замеров ``benchmark_*``.
+"""
+
+import json
+
+from django.core.management.base import BaseCommand
+
+
+class BenchmarkCommand(BaseCommand):  # pylint: disable=abstract-method
+    """
+    Команда замера с JSON-отчетом.
+
+    Подклассы добавляют свои аргументы в add_arguments (вызывая
+    super().add_arguments) и сохраняют отчет методом save_report. Замеры
+    на синтетических данных выполняются в отдельной БД (benchmark_database).
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument("--output", help="Путь для сохранения JSON-отчета")
+
+    @staticmethod
+    def add_scale_arguments(parser, courses, students, homeworks):
+        """Аргументы масштаба синтетических данных (см. seed_dataset)"""
+        parser.add_argument("--courses", type=int, default=courses, help="Число курсов")
+        parser.add_argument("--students", type=int, default=students, help="Число студентов (записаны на все курсы)")
+        parser.add_argument("--homeworks", type=int, default=homeworks, help="Число заданий на курс")
+
+    def save_report(self, report, path):
+        """Сохраняет отчет в JSON, если путь задан"""
+        if not path:
+            return
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2, sort_keys=True)
+        self.stdout.write(self.style.SUCCESS(f"Отчет сохранен в {path}"))
@@ -0,0 +1,153 @@
+"""
+Заполнение БД синтетическими данными заданного масштаба.
+"""
+
+import random
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.utils import timezone
+
+from ..dashboard_cache import invalidate_dashboards
+from ..file_refs import rebuild_file_refs
+from ..grade_stats import rebuild_grade_stats
+from ..models import Course, CourseEnrollmentRequest, Homework, Submission, UserProfile
+
+User = get_user_model()
+
+# Пароль всех сгенерированных пользователей
+SEED_PASSWORD = "bench-password"
+
+
+class SeedResult:
+    """Сгенерированный набор данных (объекты с заполненными pk)"""
+
+    def __init__(self, teachers, students, courses, homeworks):
+        self.teachers = teachers
+        self.students = students
+        self.courses = courses
+        self.homeworks = homeworks
+
+
+def _seed_users(prefix, teachers, students):
+    """Преподаватели и студенты с профилями"""
+    password = make_password(SEED_PASSWORD)
+    teacher_objs = User.objects.bulk_create(
+        [User(username=f"{prefix}_teacher{i}", password=password) for i in range(teachers)]
+    )
+    student_objs = User.objects.bulk_create(
+        [
+            User(username=f"{prefix}_student{i}", password=password, first_name=f"Имя{i}", last_name=f"Фамилия{i:05d}")
+            for i in range(students)
+        ]
+    )
+    UserProfile.objects.bulk_create(
+        [UserProfile(user=user, role="teacher") for user in teacher_objs]
+        + [UserProfile(user=user, role="student") for user in student_objs]
+    )
+    return teacher_objs, student_objs
+
+
+def _seed_courses(prefix, teacher_objs, student_objs, homeworks, now):
+    """Курсы (по преподавателю на курс, все студенты записаны) и их задания"""
+    course_objs = Course.objects.bulk_create(
+        [Course(title=f"Курс {prefix} {i:04d}", description="Синтетический курс") for i in range(len(teacher_objs))]
+    )
+    Course.teachers.through.objects.bulk_create(
+        [Course.teachers.through(course=course, user=teacher) for course, teacher in zip(course_objs, teacher_objs)]
+    )
+    Course.students.through.objects.bulk_create(
+        [Course.students.through(course=course, user=student) for course in course_objs for student in student_objs],
+        batch_size=5000,
+    )
+    homework_objs = Homework.objects.bulk_create(
+        [
+            Homework(
+                course=course,
+                title=f"Задание {j}",
+                description="Синтетическое задание",
+                due_date=now + timedelta(days=j - homeworks // 2),
+            )
+            for course in course_objs
+            for j in range(homeworks)
+        ],
+        batch_size=5000,
+    )
+    return course_objs, homework_objs
+
+
+def _seed_submissions(rng, homework_objs, student_objs, submission_rate, graded_rate):
+    """Отправки со случайными оценками, разнесенные по последним 30 дням"""
+    now = timezone.now()
+    submissions = []
+    for hw in homework_objs:
+        for student in student_objs:
+            if rng.random() < submission_rate:
+                grade = rng.randint(0, 100) if rng.random() < graded_rate else None
+                submissions.append(
+                    Submission(homework=hw, student=student, solution_file="submissions/bench.txt", grade=grade)
+                )
+    Submission.objects.bulk_create(submissions, batch_size=5000)
+    # auto_now_add ставит всем отправкам одно время - разносим их по последним 30 дням
+    for submission in submissions:
+        submission.submitted_at = now - timedelta(minutes=rng.randint(0, 30 * 24 * 60))
+    Submission.objects.bulk_update(submissions, ["submitted_at"], batch_size=1000)
+
+
+def _seed_enrollment_requests(course_objs, teacher_objs, student_objs, now):
+    """Заявки каждого студента на каждый курс с чередующимися статусами"""
+    statuses = ["pending", "approved", "rejected"]
+    CourseEnrollmentRequest.objects.bulk_create(
+        [
+            CourseEnrollmentRequest(
+                course=course,
+                student=student,
+                status=statuses[i % 3],
+                processed_at=None if i % 3 == 0 else now,
+                processed_by=None if i % 3 == 0 else teacher,
+            )
+            for course, teacher in zip(course_objs, teacher_objs)
+            for i, student in enumerate(student_objs)
+        ],
+        batch_size=5000,
+    )
+
+
+def seed_dataset(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+    courses=10, students=100, homeworks=10, submission_rate=0.8, graded_rate=0.5, seed=0
+):
+    """
+    Заполняет БД синтетическими данными.
+
+    Каждый студент записан на все курсы; по каждому заданию студент сдает
+    работу с вероятностью submission_rate, а работа оценена с вероятностью
+    graded_rate. У каждого студента есть заявка на каждый курс; статусы
+    заявок чередуются (pending / approved / rejected). Статистика оценок
+    пересобирается после вставки.
+
+    Args:
+        courses: Число курсов
+        students: Число студентов
+        homeworks: Число заданий на курс
+        submission_rate: Доля сданных работ
+        graded_rate: Доля оцененных среди сданных
+        seed: Зерно генератора случайных чисел
+
+    Returns:
+        SeedResult: Созданные объекты
+    """
+    rng = random.Random(seed)
+    now = timezone.now()
+    prefix = f"bench{User.objects.count()}"
+
+    teacher_objs, student_objs = _seed_users(prefix, courses, students)
+    course_objs, homework_objs = _seed_courses(prefix, teacher_objs, student_objs, homeworks, now)
+    _seed_submissions(rng, homework_objs, student_objs, submission_rate, graded_rate)
+    _seed_enrollment_requests(course_objs, teacher_objs, student_objs, now)
+
+    rebuild_grade_stats()
+    rebuild_file_refs()
+    # bulk_create не вызывает сигналы: id пользователей могли встречаться в прежних данных
+    invalidate_dashboards(user.pk for user in [*teacher_objs, *student_objs])
+    return SeedResult(teacher_objs, student_objs, course_objs, homework_objs)
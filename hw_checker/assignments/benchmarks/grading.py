@@ -0,0 +1,84 @@
+"""
+Выставление оценок по одной работе и одним CSV-файлом.
+"""
+
+import io
+import random
+import time
+
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..dashboard_cache import invalidate_dashboards
+from ..grade_stats import rebuild_grade_stats, verify_grade_stats
+from .dataset import seed_dataset
+
+
+def grade_one_by_one(client, _homework, grades):
+    """Открывает страницу проверки и отправляет форму для каждой работы; возвращает число HTTP-запросов"""
+    requests = 0
+    for pk, grade in grades.items():
+        url = reverse("teacher_grade_submission", kwargs={"pk": pk})
+        client.get(url)
+        client.post(url, {"grade": grade, "feedback": "Проверено"})
+        requests += 2
+    return requests
+
+
+def grade_with_csv(client, homework, grades):
+    """Скачивает CSV-шаблон и загружает его заполненным; возвращает число HTTP-запросов"""
+    url = reverse("teacher_bulk_grade", kwargs={"pk": homework.pk})
+    client.get(url, {"format": "csv"})
+    rows = [f"{pk},{grade},Проверено" for pk, grade in grades.items()]
+    upload = io.BytesIO("\n".join(["submission,grade,feedback", *rows]).encode())
+    upload.name = "grades.csv"
+    client.post(url, {"grades_file": upload})
+    return 2
+
+
+def run_bulk_grading_benchmark(students=500, seed=0):
+    """
+    Сравнивает выставление оценок всему потоку по одной работе и списком.
+
+    Создает курс с одним заданием, которое сдали все студенты, и выставляет
+    одни и те же оценки двумя способами от лица преподавателя: открытием
+    страницы проверки и отправкой формы для каждой работы и загрузкой
+    одного заполненного CSV-шаблона. Перед каждым прогоном оценки
+    сбрасываются.
+
+    Args:
+        students: Число студентов (отправок)
+        seed: Зерно генератора случайных чисел
+
+    Returns:
+        dict: {"single": метрики, "bulk": метрики, "speedup": ускорение};
+        метрики - requests, queries, elapsed_s и consistent (оценки и
+        статистика совпадают с ожидаемыми)
+    """
+    data = seed_dataset(courses=1, students=students, homeworks=1, submission_rate=1.0, graded_rate=0.0, seed=seed)
+    homework = data.homeworks[0]
+    rng = random.Random(seed)
+    grades = {pk: rng.randint(0, 100) for pk in homework.submissions.order_by("pk").values_list("pk", flat=True)}
+
+    report = {}
+    for mode, run in (("single", grade_one_by_one), ("bulk", grade_with_csv)):
+        homework.submissions.update(grade=None, feedback="")
+        rebuild_grade_stats()
+        invalidate_dashboards(user.pk for user in [*data.teachers, *data.students])
+        client = Client()
+        client.force_login(data.teachers[0])
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            requests = run(client, homework, grades)
+            elapsed = time.perf_counter() - started
+        stored = dict(homework.submissions.values_list("pk", "grade"))
+        report[mode] = {
+            "requests": requests,
+            "queries": len(queries),
+            "elapsed_s": round(elapsed, 3),
+            "consistent": stored == grades and not verify_grade_stats(),
+        }
+    report["speedup"] = round(report["single"]["elapsed_s"] / max(report["bulk"]["elapsed_s"], 1e-6), 1)
+    return report
@@ -0,0 +1,89 @@
+"""
+Влияние индексов моделей на "горячие" запросы представлений.
+"""
+
+import statistics
+import time
+
+from django.db import connection
+
+from ..models import CourseEnrollmentRequest, Homework, Submission
+
+# Модели, индексы которых сравниваются в run_index_benchmark
+INDEXED_MODELS = (Homework, Submission, CourseEnrollmentRequest)
+
+
+def hot_queries(data):
+    """
+    Запросы, повторяющие запросы представлений на сгенерированных данных.
+
+    Returns:
+        dict: {имя: функция без аргументов, возвращающая queryset}
+    """
+    course = data.courses[0]
+    homework = data.homeworks[0]
+    student = data.students[0]
+    teacher = data.teachers[0]
+    return {
+        "manage_students.pending": lambda: CourseEnrollmentRequest.objects.filter(course=course, status="pending").order_by(
+            "-created_at"
+        ),
+        "manage_students.processed": lambda: CourseEnrollmentRequest.objects.filter(
+            course=course, status__in=["approved", "rejected"]
+        ).order_by("-processed_at")[:20],
+        "my_submissions": lambda: Submission.objects.filter(student=student).order_by("-submitted_at"),
+        "teacher_all_submissions.pending": lambda: Submission.objects.filter(
+            homework__course__in=teacher.teaching_courses.all(), grade__isnull=True
+        ).order_by("-submitted_at", "-id")[:50],
+        "teacher_homework_submissions": lambda: homework.submissions.order_by("-submitted_at"),
+        "gradebook.homeworks": lambda: Homework.objects.filter(course=course).order_by("due_date"),
+        "course_detail.homeworks": lambda: Homework.objects.filter(course=course).order_by("-created_at"),
+    }
+
+
+def measure_queries(queries, repeat=5):
+    """
+    Замеряет план и время выполнения запросов.
+
+    Returns:
+        dict: {имя: {"plan": str, "median_ms": float}}
+    """
+    report = {}
+    for name, build in queries.items():
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            list(build())
+            timings.append((time.perf_counter() - started) * 1000)
+        report[name] = {"plan": build().explain(), "median_ms": round(statistics.median(timings), 3)}
+    return report
+
+
+def set_model_indexes(enabled):
+    """Создает (enabled=True) или удаляет индексы, объявленные в Meta.indexes моделей"""
+    with connection.schema_editor() as schema_editor:
+        for model in INDEXED_MODELS:
+            for index in model._meta.indexes:
+                if enabled:
+                    schema_editor.add_index(model, index)
+                else:
+                    schema_editor.remove_index(model, index)
+
+
+def run_index_benchmark(data, repeat=5):
+    """
+    Сравнивает горячие запросы без индексов моделей и с ними.
+
+    Индексы временно удаляются и затем восстанавливаются.
+
+    Returns:
+        dict: {имя запроса: {"before": {...}, "after": {...}}}
+    """
+    queries = hot_queries(data)
+    set_model_indexes(False)
+    try:
+        before = measure_queries(queries, repeat)
+    finally:
+        set_model_indexes(True)
+    after = measure_queries(queries, repeat)
+    return {name: {"before": before[name], "after": after[name]} for name in queries}
@@ -0,0 +1,166 @@
+"""
+Нагрузочный тест асинхронных страниц: WSGI (пул потоков) против ASGI (цикл событий).
+"""
+
+import asyncio
+import contextvars
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connection, connections
+from django.test import AsyncClient, Client
+from django.urls import reverse
+
+from asgiref.sync import ThreadSensitiveContext, sync_to_async
+
+from .measure import percentile
+
+# Страницы нагрузочного теста (асинхронные представления) по ролям
+LOAD_VIEWS = {
+    "student": ["student_dashboard", "my_submissions"],
+    "teacher": ["teacher_dashboard", "teacher_all_submissions"],
+}
+
+
+def session_cookies(users):
+    """Сессионные cookie после входа каждого из пользователей"""
+    cookies = []
+    for user in users:
+        client = Client()
+        client.force_login(user)
+        cookies.append(client.cookies[settings.SESSION_COOKIE_NAME].value)
+    return cookies
+
+
+def load_plan(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+    data, users=500, requests_per_user=4, accounts=20, teacher_rate=0.2, seed=0
+):
+    """
+    Виртуальные пользователи нагрузочного теста.
+
+    Вход выполняется один раз для accounts учетных записей, виртуальные
+    пользователи используют их сессии по кругу. Каждый пользователь
+    запрашивает страницы своей роли поочередно.
+
+    Returns:
+        list: По элементу на пользователя: (сессионная cookie, список URL)
+    """
+    rng = random.Random(seed)
+    sessions = {"student": session_cookies(data.students[:accounts]), "teacher": session_cookies(data.teachers[:accounts])}
+
+    plan = []
+    for index in range(users):
+        role = "teacher" if rng.random() < teacher_rate else "student"
+        urls = [reverse(name) for name in LOAD_VIEWS[role]]
+        cookie = sessions[role][index % len(sessions[role])]
+        plan.append((cookie, [urls[(index + step) % len(urls)] for step in range(requests_per_user)]))
+    return plan
+
+
+def summarize_load(results, elapsed):
+    """Пропускная способность и задержки по результатам (статус, мс) всех запросов"""
+    timings = [duration for _, duration in results]
+    return {
+        "requests": len(results),
+        "errors": sum(status != 200 for status, _ in results),
+        "elapsed_s": round(elapsed, 3),
+        "rps": round(len(results) / elapsed, 1),
+        "p50_ms": round(percentile(timings, 0.5), 3),
+        "p95_ms": round(percentile(timings, 0.95), 3),
+    }
+
+
+def run_wsgi_load(plan, threads=32):
+    """
+    Прогоняет пользователей через WSGI-обработчик пулом из threads потоков.
+
+    Как и у WSGI-сервера, одновременно обслуживается не больше threads
+    запросов, остальные пользователи ждут свободный поток.
+    """
+    session_cookie = settings.SESSION_COOKIE_NAME
+
+    def run_user(user):
+        cookie, urls = user
+        client = Client()
+        client.cookies[session_cookie] = cookie
+        results = []
+        try:
+            for url in urls:
+                started = time.perf_counter()
+                response = client.get(url)
+                results.append((response.status_code, (time.perf_counter() - started) * 1000))
+        finally:
+            connection.close()
+        return results
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        results = [result for user_results in pool.map(run_user, plan) for result in user_results]
+    return summarize_load(results, time.perf_counter() - started)
+
+
+def run_asgi_load(plan):
+    """
+    Прогоняет пользователей через ASGI-обработчик в одном цикле событий.
+
+    Все пользователи выполняются одновременно. Как и ASGI-сервер Django,
+    каждый запрос выполняет синхронные части (middleware, ORM, шаблоны) в
+    собственном потоке (ThreadSensitiveContext), а пока запрос ждет, цикл
+    событий обслуживает остальных.
+    """
+    session_cookie = settings.SESSION_COOKIE_NAME
+
+    async def get(client, url):
+        async with ThreadSensitiveContext():
+            try:
+                return await client.get(url)
+            finally:
+                await sync_to_async(connections.close_all)()
+
+    async def run_user(cookie, urls):
+        client = AsyncClient()
+        client.cookies[session_cookie] = cookie
+        results = []
+        for url in urls:
+            started = time.perf_counter()
+            response = await get(client, url)
+            results.append((response.status_code, (time.perf_counter() - started) * 1000))
+        return results
+
+    async def run_all():
+        return await asyncio.gather(*(run_user(cookie, urls) for cookie, urls in plan))
+
+    # Цикл событий запускается в пустом контексте: иначе задачи унаследуют
+    # соединения с БД текущего потока (они хранятся в контекстных переменных)
+    started = time.perf_counter()
+    results = [result for user_results in contextvars.Context().run(asyncio.run, run_all()) for result in user_results]
+    return summarize_load(results, time.perf_counter() - started)
+
+
+def run_load_benchmark(data, users=500, requests_per_user=4, threads=32, seed=0):
+    """
+    Сравнивает пропускную способность асинхронных страниц под WSGI и ASGI.
+
+    Обработчики Django вызываются в процессе тестовыми клиентами, без сети
+    и сервера, поэтому замер показывает накладные расходы обработчиков и
+    представлений. Для замера с настоящими серверами (gunicorn, uvicorn)
+    используйте внешний генератор нагрузки на тех же страницах.
+
+    Args:
+        data: Результат seed_dataset
+        users: Число одновременных пользователей
+        requests_per_user: Число запросов каждого пользователя
+        threads: Число потоков WSGI-сервера
+        seed: Зерно генератора случайных чисел
+
+    Returns:
+        dict: {"wsgi": метрики, "asgi": метрики}; метрики - requests, errors,
+        elapsed_s, rps, p50_ms и p95_ms
+    """
+    plan = load_plan(data, users=users, requests_per_user=requests_per_user, seed=seed)
+    return {
+        "wsgi": run_wsgi_load(plan, threads=threads),
+        "asgi": run_asgi_load(plan),
+    }
@@ -0,0 +1,33 @@
+"""
+Общие части замеров: перцентили и отдельная тестовая БД.
+"""
+
+import math
+from contextlib import contextmanager
+
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+
+def percentile(values, fraction):
+    """Перцентиль по методу ближайшего ранга"""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+@contextmanager
+def benchmark_database():
+    """
+    Отдельная тестовая БД (как при запуске тестов) на время замера.
+
+    Тестовое окружение (locmem-почта, счетчики шаблонов тестового клиента)
+    включается на то же время; рабочая БД не затрагивается.
+    """
+    old_name = connection.settings_dict["NAME"]
+    setup_test_environment()
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
@@ -0,0 +1,140 @@
+"""
+Масштабирование антиплагиата на синтетических решениях.
+"""
+
+import random
+import time
+
+from ..similarity import document_fingerprints, find_similar_pairs
+
+SYNTHETIC_OPERATORS = ["+", "-", "*", "//", "%", "**", "<<", "&", "|", "^"]
+SYNTHETIC_COMPARISONS = ["<", ">", "==", "!=", "<=", ">="]
+
+
+def synthetic_expression(rng, names, depth=0):
+    """Случайное арифметическое выражение над именами и числами"""
+    if depth >= 2 or rng.random() < 0.3:
+        return rng.choice(names) if rng.random() < 0.6 else str(rng.randint(0, 99))
+    kind = rng.random()
+    left = synthetic_expression(rng, names, depth + 1)
+    right = synthetic_expression(rng, names, depth + 1)
+    if kind < 0.6:
+        return f"({left} {rng.choice(SYNTHETIC_OPERATORS)} {right})"
+    if kind < 0.8:
+        return f"{rng.choice(names)}({left}, {right})"
+    return f"[{left}, {right}][{rng.randint(0, 1)}]"
+
+
+def synthetic_statements(rng, count):
+    """Случайная программа как список операторов с подстановками имен {0}..{5}"""
+    names = [f"{{{index}}}" for index in range(6)]
+    statements = []
+    for _ in range(count):
+        kind = rng.random()
+        target = rng.choice(names)
+        expression = synthetic_expression(rng, names)
+        if kind < 0.5:
+            statements.append(f"{target} = {expression}")
+        elif kind < 0.7:
+            condition = f"{rng.choice(names)} {rng.choice(SYNTHETIC_COMPARISONS)} {synthetic_expression(rng, names)}"
+            statements.append(f"if {condition}:\n    {target} = {expression}\nelse:\n    {target} = {rng.choice(names)}")
+        elif kind < 0.9:
+            statements.append(f"for {target} in range({expression}):\n    {rng.choice(names)} += {target}")
+        else:
+            statements.append(f"return {expression}")
+    return statements
+
+
+def render_synthetic(statements, names):
+    """Текст программы с заданными именами переменных"""
+    body = "\n".join(statement.format(*names) for statement in statements)
+    return ("def solve(" + ", ".join(names[:2]) + "):\n" + "\n".join("    " + line for line in body.splitlines())).encode()
+
+
+def synthetic_submissions(count, copy_rate=0.05, statements=40, seed=0):
+    """
+    Синтетические решения .py с "списанными" копиями.
+
+    Копия - переименованные переменные, добавленные комментарии и несколько
+    собственных операторов поверх чужого решения.
+
+    Returns:
+        tuple: (список байтов решений, множество пар индексов (оригинал, копия))
+    """
+    rng = random.Random(seed)
+    documents, programs, copies = [], [], set()
+    for index in range(count):
+        names = [f"{rng.choice('abcdefghxyz')}{rng.randint(0, 999)}_{slot}" for slot in range(6)]
+        is_copy = bool(programs) and rng.random() < copy_rate
+        if is_copy:
+            original = rng.randrange(len(programs))
+            program = list(programs[original])
+            for _ in range(statements // 10):
+                program.insert(rng.randrange(len(program)), synthetic_statements(rng, 1)[0])
+            copies.add((original, index))
+        else:
+            program = synthetic_statements(rng, statements)
+        programs.append(program)
+        text = render_synthetic(program, names)
+        if is_copy:
+            text = b"# my own solution\n" + text.replace(b"\n", b"  # step\n", 5)
+        documents.append(text)
+    return documents, copies
+
+
+def copy_groups(size, copies):
+    """
+    Группы решений, связанных списыванием.
+
+    Копия копии тоже похожа на оригинал, поэтому пара внутри группы не
+    считается ложной.
+
+    Returns:
+        dict: {индекс решения: множество индексов его группы}
+    """
+    related = {index: {index} for index in range(size)}
+    for original, copy in sorted(copies, key=lambda pair: pair[1]):
+        related[copy] |= related[original]
+        for member in related[copy]:
+            related[member] = related[copy]
+    return related
+
+
+def run_similarity_benchmark(sizes=(250, 500, 1000), copy_rate=0.05, seed=0):
+    """
+    Замеряет время антиплагиата для заданий разного размера.
+
+    Для каждого размера вычисляются отпечатки всех решений и похожие пары.
+    Число обновлений счетчиков пар показывает, что работа растет примерно
+    линейно, а не квадратично; полнота показывает долю найденных копий.
+
+    Returns:
+        list: По элементу на размер: documents, fingerprint_s, pairs_s,
+        total_s, pair_updates, all_pairs (n*(n-1)/2), copies, recall и
+        false_pairs (найденные пары, не являющиеся копиями)
+    """
+    report = []
+    for size in sizes:
+        documents, copies = synthetic_submissions(size, copy_rate=copy_rate, seed=seed)
+        started = time.perf_counter()
+        fingerprints = {index: document_fingerprints("solution.py", data) for index, data in enumerate(documents)}
+        fingerprinted = time.perf_counter()
+        pairs, updates = find_similar_pairs(fingerprints)
+        finished = time.perf_counter()
+
+        related = copy_groups(size, copies)
+        found = {(pair.first, pair.second) for pair in pairs}
+        report.append(
+            {
+                "documents": size,
+                "fingerprint_s": round(fingerprinted - started, 3),
+                "pairs_s": round(finished - fingerprinted, 3),
+                "total_s": round(finished - started, 3),
+                "pair_updates": updates,
+                "all_pairs": size * (size - 1) // 2,
+                "copies": len(copies),
+                "recall": round(len(copies & found) / len(copies), 3) if copies else 1.0,
+                "false_pairs": sum(1 for first, second in found if second not in related[first]),
+            }
+        )
+    return report
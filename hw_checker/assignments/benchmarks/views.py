@@ -0,0 +1,181 @@
+"""
+Замер всех представлений приложения от лица студента и преподавателя.
+
+Параметры URL выводятся из шаблонов маршрутов: ``<int:pk>`` - объект,
+названный предыдущим сегментом пути (``course/``, ``homeworks/``), а
+``<int:course_pk>``, ``<uuid:upload_id>`` и т.п. - объект из имени
+параметра. Новый маршрут попадает в замер без правки этого модуля, если
+ссылается на уже известный вид объекта (см. route_objects).
+"""
+
+import re
+import time
+import tracemalloc
+
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .. import urls as assignment_urls
+from ..models import CourseEnrollmentRequest, Submission, UploadSession
+from .measure import percentile
+
+# Параметр маршрута и предшествующий ему сегмент пути
+ROUTE_PARAMETER = re.compile(r"(?:([\w-]+)/)?<(?:\w+:)?(\w+)>")
+
+
+def route_objects(data):
+    """
+    pk объектов каждого вида, на которые ссылаются параметры маршрутов.
+
+    Для маршрутов порционной загрузки при необходимости создается
+    незавершенная загрузка первого студента.
+
+    Returns:
+        dict: {вид объекта: pk}
+    """
+    course = data.courses[0]
+    homework = data.homeworks[0]
+    student = data.students[0]
+    submission = Submission.objects.filter(homework__course=course).order_by("pk").first()
+    enrollment_request = CourseEnrollmentRequest.objects.filter(course=course, status="pending").order_by("pk").first()
+    upload = UploadSession.objects.filter(student=student).first() or UploadSession.objects.create(
+        homework=homework, student=student, filename="bench.txt", size=1
+    )
+    return {
+        "course": course.pk,
+        "homework": homework.pk,
+        "submission": submission.pk,
+        "request": enrollment_request.pk,
+        "student": student.pk,
+        "upload": upload.pk,
+    }
+
+
+def url_kwargs(data):
+    """
+    Параметры URL для каждого маршрута приложения на сгенерированных данных.
+
+    Returns:
+        dict: {имя маршрута: kwargs для reverse}
+
+    Raises:
+        KeyError: Если параметр маршрута ссылается на неизвестный вид объекта
+    """
+    objects = route_objects(data)
+    kwargs = {}
+    for pattern in assignment_urls.urlpatterns:
+        params = {}
+        for segment, name in ROUTE_PARAMETER.findall(str(pattern.pattern)):
+            kind = segment.removesuffix("s") if name == "pk" else name.rsplit("_", 1)[0]
+            if kind not in objects:
+                raise KeyError(f"Маршрут {pattern.name}: неизвестный вид объекта параметра {name}")
+            params[name] = objects[kind]
+        kwargs[pattern.name] = params
+    return kwargs
+
+
+def view_names():
+    """Имена всех маршрутов приложения assignments"""
+    return [pattern.name for pattern in assignment_urls.urlpatterns]
+
+
+def measure_view(client, url, iterations, login=None):
+    """
+    Замеряет GET-запрос к url.
+
+    Args:
+        client: Тестовый клиент с открытой сессией
+        url: Адрес
+        iterations: Число повторов
+        login: Функция повторного входа (для маршрутов, закрывающих сессию)
+
+    Returns:
+        dict: status, queries, p50_ms, p95_ms, peak_kb
+    """
+    timings = []
+    peak = 0
+    queries = 0
+    status = None
+    for _ in range(iterations):
+        if login:
+            login()
+        tracemalloc.start()
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            response = client.get(url)
+            if response.streaming:
+                # Потоковый ответ формируется при чтении тела
+                for _ in response.streaming_content:
+                    pass
+            timings.append((time.perf_counter() - started) * 1000)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+        queries = max(queries, len(captured))
+        status = response.status_code
+    if login:
+        login()
+    return {
+        "status": status,
+        "queries": queries,
+        "p50_ms": round(percentile(timings, 0.5), 3),
+        "p95_ms": round(percentile(timings, 0.95), 3),
+        "peak_kb": round(peak / 1024, 1),
+    }
+
+
+def run_view_benchmark(data, iterations=5):
+    """
+    Прогоняет все маршруты приложения от лица студента и преподавателя.
+
+    Маршруты запрашиваются методом GET, поэтому изменяющие данные действия
+    (удаление, одобрение заявок, загрузка файлов) лишь перенаправляют или
+    отвечают 405 и данные не меняют.
+
+    Args:
+        data: Результат seed_dataset
+        iterations: Число повторов каждого запроса
+
+    Returns:
+        dict: {"имя маршрута:роль": метрики measure_view}
+    """
+    kwargs = url_kwargs(data)
+    users = {"student": data.students[0], "teacher": data.teachers[0]}
+    report = {}
+    for role, user in users.items():
+        client = Client()
+        client.force_login(user)
+        for name in view_names():
+            url = reverse(name, kwargs=kwargs[name])
+            login = (lambda c=client, u=user: c.force_login(u)) if name == "logout" else None
+            report[f"{name}:{role}"] = measure_view(client, url, iterations, login=login)
+    return report
+
+
+def compare_reports(baseline, current, query_slack=0, latency_tolerance=0.5, memory_tolerance=0.5):
+    """
+    Сравнивает отчет run_view_benchmark с эталонным.
+
+    Args:
+        baseline: Эталонный отчет (например, с предыдущего коммита)
+        current: Текущий отчет
+        query_slack: Допустимый прирост числа запросов (абсолютный)
+        latency_tolerance: Допустимый относительный рост p95 (0.5 = +50%)
+        memory_tolerance: Допустимый относительный рост пиковой памяти
+
+    Returns:
+        list: Описания регрессий (пустой список, если регрессий нет)
+    """
+    regressions = []
+    for key, now in sorted(current.items()):
+        before = baseline.get(key)
+        if before is None:
+            continue
+        if now["queries"] > before["queries"] + query_slack:
+            regressions.append(f"{key}: запросов {before['queries']} -> {now['queries']}")
+        if now["p95_ms"] > before["p95_ms"] * (1 + latency_tolerance):
+            regressions.append(f"{key}: p95 {before['p95_ms']} мс -> {now['p95_ms']} мс")
+        if now["peak_kb"] > before["peak_kb"] * (1 + memory_tolerance):
+            regressions.append(f"{key}: память {before['peak_kb']} КБ -> {now['peak_kb']} КБ")
+    return regressions
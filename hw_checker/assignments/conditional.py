@@ -0,0 +1,158 @@
+"""
+Условные GET-запросы к страницам курсов и dashboard.
+
+Страница зависит от набора курсов: dashboard и сводные страницы студента
+и преподавателя - от всех его курсов, страницы курса - от одного курса.
+Состояние набора вычисляется одним агрегирующим запросом:
+
+- число курсов (пользователя отчислили или курс удален);
+- последняя отметка изменения курса (Course.modified_at, см. signals.py);
+- для страниц, которые показывают просроченные задания, - последний уже
+  наступивший срок сдачи: после него задание становится просроченным,
+  хотя данные не менялись.
+
+Из состояния, пользователя (имя и роль в шапке страницы) и CSRF-cookie
+(токен форм страницы) строится слабый ETag. Декоратор course_condition
+передает его django.views.decorators.http.condition: при совпадении
+If-None-Match браузер получает 304 без выполнения представления. Ответ
+помечается "Cache-Control: private, no-cache", чтобы браузер перепроверял
+страницу и при переходе "назад".
+
+Last-Modified не отправляется: когда пользователь теряет курс (его
+отчислили или курс удален), последнее изменение оставшихся курсов может
+не измениться, и клиент, присылающий только If-Modified-Since, получил
+бы устаревшую страницу. Число курсов, имя и CSRF-cookie учитывает только
+ETag.
+
+Если у пользователя есть непоказанные сообщения (messages), валидаторы не
+вычисляются и страница рендерится полностью, иначе сообщение не было бы
+показано.
+"""
+
+import hashlib
+from functools import wraps
+from inspect import iscoroutinefunction
+
+from django.contrib import messages
+from django.db.models import Count, Max, Q
+from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+
+from asgiref.sync import sync_to_async
+
+from .models import Course
+from .permissions import get_user_role
+
+
+def student_courses(request, *args, **kwargs):
+    """Курсы, на которые зачислен пользователь запроса"""
+    return Course.objects.filter(students=request.user)
+
+
+def teacher_courses(request, *args, **kwargs):
+    """Курсы, которые ведет пользователь запроса"""
+    return Course.objects.filter(teachers=request.user)
+
+
+def url_course(url_kwarg="pk"):
+    """Функция, возвращающая курс из параметра URL ``url_kwarg``"""
+
+    def courses(request, *args, **kwargs):
+        return Course.objects.filter(pk=kwargs[url_kwarg])
+
+    return courses
+
+
+def courses_state(courses, deadlines=False):
+    """
+    Состояние набора курсов одним запросом.
+
+    Args:
+        courses: Queryset курсов
+        deadlines: Учитывать наступившие сроки сдачи заданий
+
+    Returns:
+        tuple: (число курсов, время последнего изменения или наступившего срока сдачи либо None)
+    """
+    aggregates = {"count": Count("pk", distinct=True), "modified": Max("modified_at")}
+    if deadlines:
+        aggregates["deadline"] = Max("homeworks__due_date", filter=Q(homeworks__due_date__lte=timezone.now()))
+    state = courses.aggregate(**aggregates)
+    return state["count"], max(filter(None, (state["modified"], state.get("deadline"))), default=None)
+
+
+def weak_etag(parts):
+    """Слабый ETag из значений, от которых зависит ответ"""
+    digest = hashlib.blake2b("\x1f".join(map(str, parts)).encode(), digest_size=16).hexdigest()
+    return f'W/"{digest}"'
+
+
+def page_etag(request, courses, deadlines, *args, **kwargs):
+    """
+    ETag страницы.
+
+    Args:
+        request: Запрос
+        courses: Функция (request, *args, **kwargs) -> queryset курсов, от которых зависит страница
+        deadlines: Учитывать наступившие сроки сдачи заданий
+
+    Returns:
+        str: ETag или None, если есть непоказанные сообщения
+    """
+    if len(messages.get_messages(request)):
+        return None
+    count, last_modified = courses_state(courses(request, *args, **kwargs), deadlines)
+    user = request.user
+    parts = [
+        user.pk,
+        get_user_role(user),
+        user.username,
+        user.first_name,
+        request.META.get("CSRF_COOKIE", ""),
+        count,
+        last_modified.isoformat() if last_modified else "",
+    ]
+    return weak_etag(parts)
+
+
+def with_etag(view_func, etag):
+    """Представление, которое отвечает 304 при совпадении If-None-Match с уже вычисленным etag"""
+    return condition(etag_func=lambda request, *args, **kwargs: etag)(view_func)
+
+
+def course_condition(courses, deadlines=False):
+    """
+    Декоратор условного GET для страниц, зависящих от курсов.
+
+    Ставится после проверок доступа, чтобы 304 не получил посторонний.
+    ETag вычисляется до вызова condition и передается ему в замыкании;
+    для асинхронных представлений запросы к БД выполняются в потоке.
+
+    Args:
+        courses: Функция (request, *args, **kwargs) -> queryset курсов
+        deadlines: Страница показывает просроченные задания
+    """
+
+    def decorator(view_func):
+        if iscoroutinefunction(view_func):
+
+            @wraps(view_func)
+            async def wrapped_view(request, *args, **kwargs):
+                etag = await sync_to_async(page_etag)(request, courses, deadlines, *args, **kwargs)
+                response = await with_etag(view_func, etag)(request, *args, **kwargs)
+                patch_cache_control(response, private=True, no_cache=True)
+                return response
+
+        else:
+
+            @wraps(view_func)
+            def wrapped_view(request, *args, **kwargs):
+                etag = page_etag(request, courses, deadlines, *args, **kwargs)
+                response = with_etag(view_func, etag)(request, *args, **kwargs)
+                patch_cache_control(response, private=True, no_cache=True)
+                return response
+
+        return wrapped_view
+
+    return decorator
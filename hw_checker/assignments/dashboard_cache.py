@@ -0,0 +1,99 @@
+"""
+Кеш dashboard студента и преподавателя.
+
+Для каждого пользователя кешируются две записи на роль:
+
+- статистика (счетчики курсов, заданий и работ) - словарь, который
+  представление вычисляет при промахе кеша;
+- отрендеренный список курсов - фрагмент шаблона (тег ``{% cache %}``),
+  ключ которого строится make_template_fragment_key по id пользователя.
+
+Записи удаляются точечно: сигналы моделей (см. signals.py) определяют
+пользователей, чьи dashboard зависят от изменения (студент и
+преподаватели курса при оценке работы, все участники курса при изменении
+курса, его заданий или состава), и вызывают invalidate_dashboards.
+Удаление повторяется после фиксации транзакции, чтобы параллельный
+запрос не закешировал данные, прочитанные до нее.
+
+Бэкенд кеша задается настройкой CACHES (по умолчанию память процесса);
+если сайт обслуживают несколько процессов, нужен общий бэкенд (файлы или
+Redis), иначе удаление записи видно только в процессе, где оно выполнено.
+"""
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.utils import make_template_fragment_key
+from django.db import transaction
+
+# Роли, для которых кешируется dashboard, и имена фрагментов шаблонов со списком курсов
+FRAGMENTS = {
+    "student": "student_courses",
+    "teacher": "teacher_courses",
+}
+
+
+def cache_alias():
+    """Алиас кеша dashboard (настройка DASHBOARD_CACHE_ALIAS)"""
+    return getattr(settings, "DASHBOARD_CACHE_ALIAS", "default")
+
+
+def cache_timeout():
+    """Время жизни записей, сек (настройка DASHBOARD_CACHE_TIMEOUT)"""
+    return getattr(settings, "DASHBOARD_CACHE_TIMEOUT", 300)
+
+
+def dashboard_cache():
+    """Кеш dashboard"""
+    return caches[cache_alias()]
+
+
+def stats_key(role, user_id):
+    """Ключ статистики dashboard пользователя"""
+    return f"dashboard:{role}:{user_id}"
+
+
+def dashboard_keys(user_ids):
+    """Все ключи dashboard пользователей (статистика и фрагменты обеих ролей)"""
+    keys = []
+    for user_id in user_ids:
+        for role, fragment in FRAGMENTS.items():
+            keys.append(stats_key(role, user_id))
+            keys.append(make_template_fragment_key(fragment, [user_id]))
+    return keys
+
+
+def invalidate_dashboards(user_ids):
+    """Удаляет кеш dashboard пользователей (сейчас и после фиксации транзакции)"""
+    keys = dashboard_keys(set(user_ids))
+    if not keys:
+        return
+    cache = dashboard_cache()
+    cache.delete_many(keys)
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def fragment_context():
+    """Параметры тега {% cache %} для шаблонов dashboard"""
+    return {"dashboard_cache_alias": cache_alias(), "dashboard_cache_timeout": cache_timeout()}
+
+
+async def acached_stats(role, user_id, compute):
+    """
+    Статистика dashboard из кеша.
+
+    Args:
+        role: "student" или "teacher"
+        user_id: id пользователя
+        compute: Асинхронная функция без аргументов, вычисляющая статистику при промахе
+
+    Returns:
+        dict: Статистика
+    """
+    cache = dashboard_cache()
+    key = stats_key(role, user_id)
+    stats = await cache.aget(key)
+    if stats is None:
+        stats = await compute()
+        await cache.aset(key, stats, cache_timeout())
+    return stats
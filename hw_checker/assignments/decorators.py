@@ -5,21 +5,25 @@
 - Ограничения доступа только для студентов
 - Ограничения доступа только для преподавателей
 - Универсальной проверки роли пользователя
+- Проверки принадлежности пользователя к курсу
 """
 
 from functools import wraps
 
+from django.contrib import messages
 from django.contrib.auth.decorators import user_passes_test
+from django.http import Http404
 from django.shortcuts import redirect
 
+from .models import Course
+from .permissions import get_user_role, has_course_role
+
 
 def student_required(function=None, redirect_url="/"):
     """
     Декоратор для ограничения доступа только для студентов
     """
-    actual_decorator = user_passes_test(
-        lambda u: u.is_authenticated and hasattr(u, "profile") and u.profile.is_student, login_url=redirect_url
-    )
+    actual_decorator = user_passes_test(lambda u: get_user_role(u) == "student", login_url=redirect_url)
     if function:
         return actual_decorator(function)
     return actual_decorator
@@ -29,9 +33,7 @@ def teacher_required(function=None, redirect_url="/"):
     """
     Декоратор для ограничения доступа только для преподавателей
     """
-    actual_decorator = user_passes_test(
-        lambda u: u.is_authenticated and hasattr(u, "profile") and u.profile.is_teacher, login_url=redirect_url
-    )
+    actual_decorator = user_passes_test(lambda u: get_user_role(u) == "teacher", login_url=redirect_url)
     if function:
         return actual_decorator(function)
     return actual_decorator
@@ -59,3 +61,32 @@ def role_required(role):
         return wrapped_view
 
     return decorator
+
+
+def course_role_required(role, url_kwarg="pk"):
+    """
+    Декоратор для проверки, что пользователь - преподаватель или студент курса.
+
+    Курс определяется по параметру URL ``url_kwarg``. Проверка стоит один
+    EXISTS-запрос и кэшируется на запросе. Для несуществующего курса
+    возвращается 404, для чужого - редирект на dashboard роли с сообщением.
+
+    Args:
+        role: "teacher" или "student"
+        url_kwarg: Имя параметра URL с id курса
+    """
+
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapped_view(request, *args, **kwargs):
+            course_id = kwargs[url_kwarg]
+            if not has_course_role(request, course_id, role):
+                if not Course.objects.filter(pk=course_id).exists():
+                    raise Http404("Курс не найден")
+                messages.error(request, "У вас нет доступа к этому курсу")
+                return redirect(f"{role}_dashboard")
+            return view_func(request, *args, **kwargs)
+
+        return wrapped_view
+
+    return decorator
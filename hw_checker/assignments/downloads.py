@@ -0,0 +1,164 @@
+"""
+Отдача файлов решений с проверкой прав.
+
+Права проверяет Django, а передачу байтов по возможности выполняет
+фронтенд-сервер: в зависимости от настройки SENDFILE_BACKEND ответ
+содержит заголовок ``X-Sendfile`` (Apache, lighttpd) или
+``X-Accel-Redirect`` (nginx) и не занимает воркер на время скачивания.
+Без фронтенд-сервера файл отдается потоково самим Django с поддержкой
+запросов диапазонов (Range) и условных запросов (ETag / Last-Modified).
+"""
+
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import content_disposition_header, http_date, parse_http_date_safe
+
+from .storage import is_content_name
+
+# Размер блока при отдаче диапазона
+RANGE_CHUNK_SIZE = 64 * 1024
+
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def sendfile_backend():
+    """Способ передачи файла: None, "x-sendfile" или "x-accel-redirect" """
+    backend = getattr(settings, "SENDFILE_BACKEND", None)
+    if backend not in (None, "x-sendfile", "x-accel-redirect"):
+        raise ValueError(f"Неизвестный SENDFILE_BACKEND: {backend!r}")
+    return backend
+
+
+def file_etag(name, stat):
+    """ETag файла: хеш содержимого для контентно-адресуемых имен, иначе размер и время изменения"""
+    if is_content_name(name):
+        return f'"{os.path.splitext(os.path.basename(name))[0]}"'
+    return f'"{stat.st_size:x}-{int(stat.st_mtime):x}"'
+
+
+def parse_range(header, size):
+    """
+    Разбирает заголовок Range с одним диапазоном байтов.
+
+    Returns:
+        tuple | None: (start, end) включительно; None, если диапазон не задан
+        или не поддерживается (несколько диапазонов) - тогда отдается весь файл
+
+    Raises:
+        ValueError: Если диапазон невыполним для файла размера size
+    """
+    match = RANGE_RE.match(header.replace(" ", "")) if header else None
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Последние N байтов
+        length = int(last)
+        if length == 0:
+            raise ValueError(header)
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError(header)
+    return start, end
+
+
+def range_matches(request, etag, last_modified):
+    """Проверяет If-Range: диапазон отдается, только если файл не изменился"""
+    if_range = request.headers.get("If-Range")
+    if not if_range:
+        return True
+    if if_range.startswith('"') or if_range.startswith("W/"):
+        return if_range == etag
+    since = parse_http_date_safe(if_range)
+    return since is not None and int(last_modified) <= since
+
+
+def iter_file_range(path, start, length, chunk_size=RANGE_CHUNK_SIZE):
+    """Читает length байтов файла начиная со start блоками"""
+    with open(path, "rb") as f:
+        f.seek(start)
+        while length > 0:
+            chunk = f.read(min(chunk_size, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def serve_file(request, storage, name, download_name):
+    """
+    Отдает файл из хранилища как вложение.
+
+    Args:
+        request: HTTP-запрос
+        storage: Файловое хранилище (FileSystemStorage)
+        name: Имя файла в хранилище
+        download_name: Имя файла, предлагаемое браузеру
+
+    Returns:
+        HttpResponse: 200/206/304/412/416 ответ или ответ с заголовком для фронтенд-сервера
+
+    Raises:
+        Http404: Если файла нет в хранилище
+    """
+    path = storage.path(name)
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        raise Http404("Файл не найден")
+
+    etag = file_etag(name, stat)
+    last_modified = int(stat.st_mtime)
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is not None:
+        return response
+
+    content_type = mimetypes.guess_type(download_name)[0] or "application/octet-stream"
+    backend = sendfile_backend()
+    if backend == "x-sendfile":
+        response = HttpResponse(content_type=content_type)
+        response["X-Sendfile"] = path
+    elif backend == "x-accel-redirect":
+        response = HttpResponse(content_type=content_type)
+        prefix = getattr(settings, "SENDFILE_URL_PREFIX", "/protected-media/")
+        response["X-Accel-Redirect"] = quote(prefix.rstrip("/") + "/" + name)
+    else:
+        response = _python_response(request, path, stat.st_size, content_type, etag, last_modified)
+
+    response["Content-Disposition"] = content_disposition_header(True, download_name)
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(last_modified)
+    response["Accept-Ranges"] = "bytes"
+    # Файлы решений закрыты правами доступа: общие кеши их хранить не должны
+    response["Cache-Control"] = "private, no-cache"
+    return response
+
+
+def _python_response(request, path, size, content_type, etag, last_modified):
+    """Потоковая отдача файла Django: весь файл или один диапазон байтов"""
+    try:
+        byte_range = parse_range(request.headers.get("Range"), size) if range_matches(request, etag, last_modified) else None
+    except ValueError:
+        response = HttpResponse(status=416)
+        response["Content-Range"] = f"bytes */{size}"
+        return response
+
+    if byte_range is None:
+        return FileResponse(open(path, "rb"), content_type=content_type)
+
+    start, end = byte_range
+    length = end - start + 1
+    response = StreamingHttpResponse(iter_file_range(path, start, length), status=206, content_type=content_type)
+    response["Content-Range"] = f"bytes {start}-{end}/{size}"
+    response["Content-Length"] = str(length)
+    return response
@@ -0,0 +1,221 @@
+"""
+Массовое зачисление студентов на курс.
+
+Преподаватель может одобрить или отклонить сразу несколько заявок и
+зачислить список группы из CSV-файла или вставленного текста (логины или
+email). Число запросов к БД не зависит от числа студентов: пользователи
+находятся одним запросом, связи курс-студент создаются одним bulk_create
+по промежуточной таблице, заявки обновляются одним UPDATE. Все изменения
+выполняются в одной транзакции.
+
+bulk_create и update не вызывают сигналы m2m_changed и post_save, поэтому
+кеш dashboard затронутых студентов и преподавателей курса сбрасывается, а
+отметка изменения курса обновляется здесь же.
+"""
+
+import csv
+import io
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.functions import Lower
+from django.utils import timezone
+
+from .dashboard_cache import invalidate_dashboards
+from .models import Course, CourseEnrollmentRequest, touch_courses
+
+User = get_user_model()
+
+# Предел числа строк списка группы
+MAX_ROSTER_ROWS = 5000
+
+# Колонки CSV, из которых берутся логины и email
+ROSTER_COLUMNS = ("username", "email")
+
+
+class RosterImportError(ValueError):
+    """Список группы нельзя разобрать"""
+
+
+def parse_roster(text):
+    """
+    Логины и email из списка группы.
+
+    Принимается CSV с колонками username и/или email (разделитель - запятая
+    или точка с запятой) или просто список: по одному логину или email в
+    строке (берется первая ячейка).
+
+    Returns:
+        list: Идентификаторы студентов без повторов в исходном порядке
+
+    Raises:
+        RosterImportError: Если список пуст или слишком длинный
+    """
+    text = text.lstrip("\ufeff")
+    try:
+        dialect = csv.Sniffer().sniff(text.split("\n", 1)[0], delimiters=",;")
+    except csv.Error:
+        dialect = csv.excel
+    rows = [[cell.strip() for cell in row] for row in csv.reader(io.StringIO(text), dialect=dialect)]
+    rows = [row for row in rows if any(row)]
+
+    header = [cell.lower() for cell in rows[0]] if rows else []
+    columns = [header.index(name) for name in ROSTER_COLUMNS if name in header]
+    if columns:
+        rows = rows[1:]
+    else:
+        columns = [0]
+
+    identifiers = []
+    for row in rows:
+        identifier = next((row[i] for i in columns if i < len(row) and row[i]), "")
+        if identifier:
+            identifiers.append(identifier)
+    identifiers = list(dict.fromkeys(identifiers))
+
+    if not identifiers:
+        raise RosterImportError("Список студентов пуст")
+    if len(identifiers) > MAX_ROSTER_ROWS:
+        raise RosterImportError(f"Слишком много студентов: {len(identifiers)} (не больше {MAX_ROSTER_ROWS})")
+    return identifiers
+
+
+def resolve_students(identifiers):
+    """
+    Находит пользователей по логинам и email одним запросом.
+
+    Email сравнивается без учета регистра. Email, который указан у
+    нескольких пользователей, считается неоднозначным.
+
+    Returns:
+        tuple: ({идентификатор: id студента}, ненайденные идентификаторы,
+        идентификаторы пользователей без роли студента)
+    """
+    usernames = [identifier for identifier in identifiers if "@" not in identifier]
+    emails = {identifier.lower() for identifier in identifiers if "@" in identifier}
+    users = list(
+        User.objects.annotate(email_lower=Lower("email"))
+        .filter(Q(username__in=usernames) | Q(email_lower__in=emails))
+        .values_list("pk", "username", "email_lower", "profile__role")
+    )
+
+    by_username = {username: (pk, role) for pk, username, _, role in users}
+    by_email = {}
+    for pk, _, email, role in users:
+        if email in emails:
+            by_email.setdefault(email, []).append((pk, role))
+
+    resolved = {}
+    unknown = []
+    not_students = []
+    for identifier in identifiers:
+        if "@" in identifier:
+            matches = by_email.get(identifier.lower(), [])
+            user = matches[0] if len(matches) == 1 else None
+        else:
+            user = by_username.get(identifier)
+        if user is None:
+            unknown.append(identifier)
+        elif user[1] != "student":
+            not_students.append(identifier)
+        else:
+            resolved[identifier] = user[0]
+    return resolved, unknown, not_students
+
+
+def enroll_students(course, student_ids):
+    """
+    Зачисляет студентов на курс одним bulk_create (без сигналов).
+
+    Returns:
+        set: id студентов, которые не были зачислены раньше
+    """
+    through = Course.students.through
+    enrolled = set(through.objects.filter(course_id=course.pk, user_id__in=student_ids).values_list("user_id", flat=True))
+    added = set(student_ids) - enrolled
+    through.objects.bulk_create(
+        [through(course_id=course.pk, user_id=student_id) for student_id in sorted(added)], ignore_conflicts=True
+    )
+    return added
+
+
+def course_teacher_ids(course):
+    """id преподавателей курса"""
+    return set(Course.teachers.through.objects.filter(course_id=course.pk).values_list("user_id", flat=True))
+
+
+def process_enrollment_requests(course, request_ids, approve, teacher):
+    """
+    Одобряет или отклоняет выбранные заявки курса на рассмотрении.
+
+    Заявки других курсов и уже обработанные заявки пропускаются.
+
+    Args:
+        course: Курс
+        request_ids: id выбранных заявок
+        approve: True - одобрить (и зачислить студентов), False - отклонить
+        teacher: Преподаватель, обработавший заявки
+
+    Returns:
+        int: Число обработанных заявок
+    """
+    with transaction.atomic():
+        pending = CourseEnrollmentRequest.objects.filter(course=course, status="pending", pk__in=request_ids)
+        requests = dict(pending.select_for_update().values_list("pk", "student_id"))
+        if not requests:
+            return 0
+        CourseEnrollmentRequest.objects.filter(pk__in=requests).update(
+            status="approved" if approve else "rejected", processed_at=timezone.now(), processed_by=teacher
+        )
+        students = set(requests.values())
+        if approve:
+            enroll_students(course, students)
+            # Все участники курса видят новое число студентов
+            students |= set(Course.students.through.objects.filter(course_id=course.pk).values_list("user_id", flat=True))
+        invalidate_dashboards(students | course_teacher_ids(course))
+        touch_courses([course.pk])
+    return len(requests)
+
+
+def import_roster(course, identifiers, teacher):
+    """
+    Зачисляет на курс студентов из списка группы.
+
+    Найденные студенты зачисляются, их заявки на этот курс, ожидающие
+    рассмотрения, одобряются. Ненайденные логины и email, а также
+    пользователи без роли студента пропускаются и возвращаются в отчете.
+
+    Args:
+        course: Курс
+        identifiers: Логины и email из parse_roster
+        teacher: Преподаватель, импортирующий список
+
+    Returns:
+        dict: enrolled - число новых студентов курса, already - уже
+        зачисленных, approved_requests - одобренных заявок, unknown и
+        not_students - пропущенные идентификаторы
+    """
+    resolved, unknown, not_students = resolve_students(identifiers)
+    student_ids = set(resolved.values())
+
+    added = set()
+    approved = 0
+    if student_ids:
+        with transaction.atomic():
+            added = enroll_students(course, student_ids)
+            approved = CourseEnrollmentRequest.objects.filter(
+                course=course, status="pending", student_id__in=student_ids
+            ).update(status="approved", processed_at=timezone.now(), processed_by=teacher)
+            if added or approved:
+                members = Course.students.through.objects.filter(course_id=course.pk).values_list("user_id", flat=True)
+                invalidate_dashboards({*members, *course_teacher_ids(course)})
+                touch_courses([course.pk])
+
+    return {
+        "enrolled": len(added),
+        "already": len(student_ids) - len(added),
+        "approved_requests": approved,
+        "unknown": unknown,
+        "not_students": not_students,
+    }
@@ -0,0 +1,80 @@
+"""
+Представления для массового зачисления студентов на курс.
+
+Одобрение и отклонение выбранных заявок и зачисление по списку группы;
+сама обработка выполняется в enrollment.py.
+"""
+
+from django.contrib import messages
+from django.contrib.auth.decorators import login_required
+from django.shortcuts import get_object_or_404, redirect
+
+from .decorators import course_role_required, teacher_required
+from .enrollment import RosterImportError, import_roster, parse_roster, process_enrollment_requests
+from .forms import RosterImportForm
+from .models import Course
+
+
+def short_list(items, limit=20):
+    """Первые limit элементов через запятую и число остальных"""
+    text = ", ".join(items[:limit])
+    if len(items) > limit:
+        text += f" и еще {len(items) - limit}"
+    return text
+
+
+@login_required
+@teacher_required
+@course_role_required("teacher")
+def process_enrollment_requests_bulk(request, pk):
+    """Одобрить или отклонить выбранные заявки на зачисление (поля action и request_ids)"""
+    course = get_object_or_404(Course, pk=pk)
+
+    if request.method == "POST":
+        action = request.POST.get("action")
+        request_ids = [value for value in request.POST.getlist("request_ids") if value.isdigit()]
+        if action not in ("approve", "reject"):
+            messages.error(request, "Неизвестное действие")
+        elif not request_ids:
+            messages.warning(request, "Не выбрано ни одной заявки")
+        else:
+            processed = process_enrollment_requests(course, request_ids, action == "approve", request.user)
+            if action == "approve":
+                messages.success(request, f"Одобрено заявок: {processed}")
+            else:
+                messages.info(request, f"Отклонено заявок: {processed}")
+
+    return redirect("manage_students", pk=course.pk)
+
+
+@login_required
+@teacher_required
+@course_role_required("teacher")
+def import_course_roster(request, pk):
+    """Зачисление студентов на курс по списку группы (CSV-файл или список логинов/email)"""
+    course = get_object_or_404(Course, pk=pk)
+
+    if request.method == "POST":
+        form = RosterImportForm(request.POST, request.FILES)
+        if not form.is_valid():
+            for errors in form.errors.values():
+                messages.error(request, " ".join(errors))
+            return redirect("manage_students", pk=course.pk)
+
+        try:
+            report = import_roster(course, parse_roster(form.cleaned_data["roster"]), request.user)
+        except RosterImportError as error:
+            messages.error(request, str(error))
+            return redirect("manage_students", pk=course.pk)
+
+        messages.success(
+            request,
+            f"Зачислено студентов: {report['enrolled']}, уже были на курсе: {report['already']}, "
+            f"одобрено заявок: {report['approved_requests']}",
+        )
+        if report["unknown"]:
+            messages.warning(request, f"Не найдены: {short_list(report['unknown'])}")
+        if report["not_students"]:
+            messages.warning(request, f"Не студенты: {short_list(report['not_students'])}")
+
+    return redirect("manage_students", pk=course.pk)
@@ -0,0 +1,350 @@
+"""
+Потоковая выгрузка работ студентов и таблицы оценок.
+
+Архив всех работ по заданию формируется генератором: zipfile пишет в
+неперематываемый буфер, который опустошается после каждого прочитанного
+блока файла, поэтому в памяти одновременно находится не больше одного
+блока (плюс метаданные записей), независимо от числа и размера работ.
+
+Таблица оценок курса (студент × задание и итоги студента) выгружается в
+CSV или XLSX так же потоково. Студенты вместе с отправками читаются
+одним курсором (iterator(chunk_size=...)) и группируются по студенту,
+поэтому в памяти находится одна строка таблицы и блок выходных байтов,
+а не вся матрица, как у Gradebook. XLSX - ZIP-архив с XML-листом,
+который пишется построчно через тот же буфер.
+
+Имена, логины и отзывы задают пользователи, поэтому текстовые ячейки CSV,
+которые табличный редактор принял бы за формулу (начинаются с =, +, -,
+@, табуляции или перевода каретки), экранируются апострофом. В XLSX
+строки пишутся как inlineStr и формулами не бывают.
+"""
+
+import csv
+import io
+import os
+import re
+import zipfile
+from itertools import groupby
+from operator import itemgetter
+from xml.sax.saxutils import escape
+
+from django.db.models import FilteredRelation, Q
+from django.utils import timezone
+from django.utils.text import get_valid_filename
+
+from .gradebook import submission_status
+
+# Размер блока чтения файла работы
+EXPORT_CHUNK_SIZE = 64 * 1024
+
+# Имя файла с оценками внутри архива
+MANIFEST_NAME = "grades.csv"
+
+MANIFEST_HEADER = ["Логин", "Студент", "Дата отправки", "Файл", "Оценка", "Статус", "Отзыв"]
+
+# Число строк, читаемых из БД за раз при выгрузке таблицы оценок
+GRADEBOOK_CHUNK_SIZE = 2000
+
+# Порядок студентов в таблице оценок (как в Gradebook, id - для однозначности)
+GRADEBOOK_STUDENT_ORDERING = ["last_name", "first_name", "pk"]
+
+# Первые символы ячейки, с которых табличный редактор начинает формулу
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+# Символы, недопустимые в XML 1.0
+XML_INVALID_CHARS = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+XLSX_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    "</Types>"
+)
+
+XLSX_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+    "</Relationships>"
+)
+
+XLSX_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="Оценки" sheetId="1" r:id="rId1"/></sheets>'
+    "</workbook>"
+)
+
+XLSX_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>'
+    "</Relationships>"
+)
+
+XLSX_SHEET_HEADER = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+)
+
+XLSX_SHEET_FOOTER = "</sheetData></worksheet>"
+
+
+class _StreamBuffer:
+    """
+    Неперематываемый файловый объект для zipfile.
+
+    Накапливает записанные байты до очередного вызова drain(). Отсутствие
+    tell()/seek() переключает zipfile в потоковый режим с дескрипторами
+    данных после каждой записи.
+    """
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        """Отдает накопленные байты (если они есть) и очищает буфер"""
+        if self._chunks:
+            data = b"".join(self._chunks)
+            self._chunks.clear()
+            yield data
+
+
+def looks_like_formula(text):
+    """
+    Текст начинается с формулы, возможно после апострофов.
+
+    Текст, который уже начинается с апострофа перед формулой, тоже
+    экранируется: иначе csv_unescape снял бы его собственный апостроф.
+    """
+    return text.lstrip("'").startswith(FORMULA_PREFIXES)
+
+
+def csv_cell(value):
+    """Значение ячейки CSV: текст, похожий на формулу, экранируется апострофом"""
+    if isinstance(value, str) and looks_like_formula(value):
+        return "'" + value
+    return value
+
+
+def csv_row(values):
+    """Строка CSV с экранированными формулами (см. csv_cell)"""
+    return [csv_cell(value) for value in values]
+
+
+def csv_unescape(value):
+    """Снимает экранирование csv_cell при разборе загруженного CSV"""
+    if value.startswith("'") and looks_like_formula(value):
+        return value[1:]
+    return value
+
+
+def submission_archive_name(submission):
+    """Имя файла работы в архиве: логин студента, время отправки и исходное расширение"""
+    submitted_at = timezone.localtime(submission.submitted_at)
+    extension = os.path.splitext(submission.solution_file.name)[1]
+    return get_valid_filename(f"{submission.student.username}_{submitted_at:%Y%m%d-%H%M%S}{extension}")
+
+
+def _manifest_csv(rows):
+    """Манифест оценок в CSV (с BOM, чтобы Excel распознал UTF-8)"""
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(MANIFEST_HEADER)
+    writer.writerows(map(csv_row, rows))
+    return output.getvalue().encode("utf-8-sig")
+
+
+def stream_homework_archive(homework, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Генерирует ZIP-архив всех работ по заданию блоками байтов.
+
+    В архив попадают файлы работ и манифест grades.csv с оценками. Работы,
+    файл которых отсутствует в хранилище, попадают только в манифест с
+    пустым именем файла.
+
+    Args:
+        homework: Домашнее задание
+        chunk_size: Размер блока чтения файлов
+
+    Yields:
+        bytes: Очередной фрагмент архива
+    """
+    submissions = homework.submissions.select_related("student").order_by("student__username")
+    buffer = _StreamBuffer()
+    manifest = []
+
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for submission in submissions.iterator():
+            name = submission_archive_name(submission)
+            try:
+                source = submission.solution_file.open("rb")
+            except (OSError, ValueError):
+                name = ""
+            else:
+                with source:
+                    info = zipfile.ZipInfo(name, date_time=timezone.localtime(submission.submitted_at).timetuple()[:6])
+                    info.compress_type = zipfile.ZIP_DEFLATED
+                    # Известный заранее размер позволяет zipfile решить, нужен ли ZIP64
+                    info.file_size = source.size
+                    with archive.open(info, "w") as target:
+                        for chunk in source.chunks(chunk_size):
+                            target.write(chunk)
+                            yield from buffer.drain()
+                yield from buffer.drain()
+
+            manifest.append(
+                [
+                    submission.student.username,
+                    submission.student.get_full_name(),
+                    timezone.localtime(submission.submitted_at).strftime("%Y-%m-%d %H:%M:%S"),
+                    name,
+                    "" if submission.grade is None else submission.grade,
+                    submission_status(submission),
+                    submission.feedback,
+                ]
+            )
+
+        archive.writestr(MANIFEST_NAME, _manifest_csv(manifest))
+    yield from buffer.drain()
+
+
+def gradebook_rows(course, chunk_size=GRADEBOOK_CHUNK_SIZE):
+    """
+    Строки таблицы оценок курса: заголовок, затем по строке на студента.
+
+    Студенты курса читаются одним курсором вместе с их отправками по
+    заданиям курса (LEFT JOIN через FilteredRelation) в порядке
+    GRADEBOOK_STUDENT_ORDERING, поэтому строки студента идут подряд, а
+    состав студентов и их отправки берутся из одного снимка БД. Отправки
+    отчисленных студентов не читаются.
+
+    Args:
+        course: Курс
+        chunk_size: Число строк, читаемых из БД за раз
+
+    Yields:
+        list: Заголовок ["Логин", "Студент", задания..., "Сумма", "Средняя",
+        "Оценено"], затем строки студентов (пустая ячейка - работа не
+        сдана или не оценена)
+    """
+    homeworks = list(course.homeworks.order_by("due_date", "pk").values_list("pk", "title"))
+    columns = {homework_id: j for j, (homework_id, _) in enumerate(homeworks)}
+    yield ["Логин", "Студент", *(title for _, title in homeworks), "Сумма", "Средняя", "Оценено"]
+
+    rows = (
+        course.students.annotate(
+            course_submission=FilteredRelation("submissions", condition=Q(submissions__homework_id__in=list(columns)))
+        )
+        .order_by(*GRADEBOOK_STUDENT_ORDERING)
+        .values_list("pk", "username", "first_name", "last_name", "course_submission__homework_id", "course_submission__grade")
+        .iterator(chunk_size=chunk_size)
+    )
+
+    for (_, username, first_name, last_name), student_rows in groupby(rows, key=itemgetter(0, 1, 2, 3)):
+        grades = [""] * len(homeworks)
+        for *_, homework_id, grade in student_rows:
+            if homework_id is not None and grade is not None:
+                grades[columns[homework_id]] = grade
+        graded = [grade for grade in grades if grade != ""]
+        total = sum(graded)
+        average = round(total / len(graded), 1) if graded else 0
+        yield [username, f"{first_name} {last_name}".strip(), *grades, total, average, len(graded)]
+
+
+def stream_gradebook_csv(course, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Генерирует CSV таблицы оценок курса блоками байтов (UTF-8 с BOM для Excel).
+
+    Yields:
+        bytes: Очередной блок CSV (не меньше chunk_size, кроме последнего)
+    """
+    output = io.StringIO()
+    output.write("\ufeff")
+    writer = csv.writer(output)
+    for row in gradebook_rows(course):
+        writer.writerow(csv_row(row))
+        if output.tell() >= chunk_size:
+            yield output.getvalue().encode("utf-8")
+            output.seek(0)
+            output.truncate()
+    yield output.getvalue().encode("utf-8")
+
+
+def xlsx_column(index):
+    """Буквенное имя столбца листа по номеру с нуля (0 - A, 26 - AA)"""
+    name = ""
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        name = chr(ord("A") + remainder) + name
+    return name
+
+
+def xlsx_row(number, values):
+    """XML строки листа: числа - числовые ячейки, остальное - строки"""
+    cells = []
+    for j, value in enumerate(values):
+        ref = f"{xlsx_column(j)}{number}"
+        if value == "" or value is None:
+            continue
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            cells.append(f'<c r="{ref}"><v>{value}</v></c>')
+        else:
+            text = escape(XML_INVALID_CHARS.sub("", str(value)))
+            cells.append(f'<c r="{ref}" t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>')
+    return f'<row r="{number}">{"".join(cells)}</row>'
+
+
+def stream_gradebook_xlsx(course, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Генерирует XLSX таблицы оценок курса блоками байтов.
+
+    Служебные части книги записываются целиком, лист - построчно в
+    потоковую запись архива; сжатые данные отдаются, когда их накопится
+    не меньше chunk_size.
+
+    Yields:
+        bytes: Очередной фрагмент файла
+    """
+    buffer = _StreamBuffer()
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("[Content_Types].xml", XLSX_CONTENT_TYPES)
+        archive.writestr("_rels/.rels", XLSX_ROOT_RELS)
+        archive.writestr("xl/workbook.xml", XLSX_WORKBOOK)
+        archive.writestr("xl/_rels/workbook.xml.rels", XLSX_WORKBOOK_RELS)
+        yield from buffer.drain()
+
+        # Размер листа заранее неизвестен: force_zip64 снимает предел 4 ГБ
+        info = zipfile.ZipInfo("xl/worksheets/sheet1.xml", date_time=timezone.localtime().timetuple()[:6])
+        info.compress_type = zipfile.ZIP_DEFLATED
+        with archive.open(info, "w", force_zip64=True) as sheet:
+            pending = [XLSX_SHEET_HEADER]
+            size = len(XLSX_SHEET_HEADER)
+            for number, row in enumerate(gradebook_rows(course), start=1):
+                xml = xlsx_row(number, row)
+                pending.append(xml)
+                size += len(xml)
+                if size >= chunk_size:
+                    sheet.write("".join(pending).encode("utf-8"))
+                    pending.clear()
+                    size = 0
+                    yield from buffer.drain()
+            pending.append(XLSX_SHEET_FOOTER)
+            sheet.write("".join(pending).encode("utf-8"))
+    yield from buffer.drain()
@@ -0,0 +1,125 @@
+"""
+Учет ссылок на файлы решений и перенос старых файлов в контентно-адресуемое хранилище.
+
+Счетчики ссылок (StoredFile) поддерживаются сигналами ``Submission``. Этот
+модуль пересчитывает их напрямую из таблицы отправок, переносит файлы,
+сохраненные до появления ContentAddressedStorage, и удаляет файлы, на
+которые не ссылается ни одна отправка.
+"""
+
+from collections import Counter
+
+from django.apps import apps as global_apps
+from django.db import transaction
+
+from .storage import get_submission_storage, is_content_name
+
+
+def compute_file_refs(apps=global_apps):
+    """
+    Считает ссылки на файлы по таблице отправок.
+
+    Returns:
+        Counter: {путь файла: число отправок}
+    """
+    submission_model = apps.get_model("assignments", "Submission")
+    names = submission_model.objects.exclude(solution_file="").values_list("solution_file", flat=True)
+    return Counter(names.iterator())
+
+
+def rebuild_file_refs(apps=global_apps):
+    """
+    Полностью пересобирает счетчики ссылок из таблицы отправок.
+
+    Returns:
+        int: Число учтенных файлов
+    """
+    stored_file_model = apps.get_model("assignments", "StoredFile")
+    refs = compute_file_refs(apps)
+    with transaction.atomic():
+        stored_file_model.objects.all().delete()
+        stored_file_model.objects.bulk_create(
+            [stored_file_model(name=name, ref_count=count) for name, count in refs.items()], batch_size=1000
+        )
+    return len(refs)
+
+
+def convert_legacy_files(dry_run=False):
+    """
+    Переносит файлы отправок со старыми именами в контентно-адресуемое хранилище.
+
+    Отправки со ссылкой на один и тот же старый файл получают одно новое
+    имя; одинаковые по содержимому файлы сливаются в один. Старые файлы
+    удаляются, счетчики ссылок пересобираются.
+
+    Args:
+        dry_run: Только найти отправки для переноса, ничего не меняя
+
+    Returns:
+        dict: converted - число перенесенных файлов, missing - старые имена
+        отсутствующих в хранилище файлов, renamed - {старое имя: новое имя}
+    """
+    submission_model = global_apps.get_model("assignments", "Submission")
+    storage = get_submission_storage()
+    legacy = sorted(
+        {
+            name
+            for name in submission_model.objects.exclude(solution_file="").values_list("solution_file", flat=True)
+            if not is_content_name(name)
+        }
+    )
+
+    renamed, missing = {}, []
+    for name in legacy:
+        if not storage.exists(name):
+            missing.append(name)
+            continue
+        if dry_run:
+            renamed[name] = None
+            continue
+        with storage.open(name, "rb") as f:
+            new_name = storage.save(name, f)
+        # Обновление в обход сигналов: счетчики пересобираются ниже целиком
+        submission_model.objects.filter(solution_file=name).update(solution_file=new_name)
+        renamed[name] = new_name
+
+    if not dry_run:
+        rebuild_file_refs()
+        for name, new_name in renamed.items():
+            if new_name != name:
+                storage.delete(name)
+    return {"converted": len(renamed), "missing": missing, "renamed": renamed}
+
+
+def collect_orphan_files(prefix="submissions", dry_run=False):
+    """
+    Удаляет из хранилища файлы решений, на которые нет ссылок.
+
+    Args:
+        prefix: Каталог файлов решений в хранилище
+        dry_run: Только найти такие файлы
+
+    Returns:
+        list: Пути удаленных (найденных) файлов
+    """
+    stored_file_model = global_apps.get_model("assignments", "StoredFile")
+    submission_model = global_apps.get_model("assignments", "Submission")
+    storage = get_submission_storage()
+    referenced = set(stored_file_model.objects.filter(ref_count__gt=0).values_list("name", flat=True))
+    referenced.update(submission_model.objects.values_list("solution_file", flat=True))
+
+    orphans = []
+    pending = [prefix]
+    while pending:
+        directory = pending.pop()
+        if not storage.exists(directory):
+            continue
+        dirs, files = storage.listdir(directory)
+        pending.extend(f"{directory}/{name}" for name in dirs)
+        orphans.extend(f"{directory}/{name}" for name in files if f"{directory}/{name}" not in referenced)
+
+    if not dry_run:
+        for name in orphans:
+            storage.delete(name)
+        stored_file_model.objects.filter(ref_count=0).delete()
+    return sorted(orphans)
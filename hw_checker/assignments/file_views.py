@@ -0,0 +1,186 @@
+"""
+Представления для загрузки и скачивания файлов.
+
+- Порционная загрузка решения с возобновлением (uploads.py).
+- Скачивание файла решения и файла тестов задания (downloads.py).
+- Потоковая выгрузка всех работ по заданию ZIP-архивом и таблицы оценок
+  курса в CSV или XLSX (exports.py).
+"""
+
+from django.contrib import messages
+from django.contrib.auth.decorators import login_required
+from django.http import JsonResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404, redirect
+from django.urls import reverse
+from django.utils.http import content_disposition_header
+from django.views.decorators.http import require_GET, require_POST
+
+from .decorators import course_role_required, student_required, teacher_required
+from .downloads import serve_file
+from .exports import stream_gradebook_csv, stream_gradebook_xlsx, stream_homework_archive, submission_archive_name
+from .models import Course, Homework, Submission, UploadSession
+from .permissions import is_course_student, is_course_teacher
+from .uploads import UPLOAD_CHUNK_SIZE, UploadError, append_chunk, commit_upload, start_upload
+
+
+def upload_state(upload):
+    """Состояние загрузки и адреса ее API для ответа клиенту"""
+    kwargs = {"upload_id": upload.pk}
+    return {
+        "upload_id": str(upload.pk),
+        "offset": upload.received,
+        "size": upload.size,
+        "chunk_size": UPLOAD_CHUNK_SIZE,
+        "status_url": reverse("submission_upload", kwargs=kwargs),
+        "append_url": reverse("append_submission_upload", kwargs=kwargs),
+        "commit_url": reverse("commit_submission_upload", kwargs=kwargs),
+    }
+
+
+def upload_error_response(error):
+    """JSON-ответ с ошибкой загрузки"""
+    payload = {"error": str(error)}
+    if error.offset is not None:
+        payload["offset"] = error.offset
+    return JsonResponse(payload, status=error.status)
+
+
+@login_required
+@student_required
+@require_POST
+def start_submission_upload(request, pk):
+    """Начало порционной загрузки решения (параметры filename и size)"""
+    homework = get_object_or_404(Homework, pk=pk)
+    if not is_course_student(request, homework.course_id):
+        return JsonResponse({"error": "У вас нет доступа к этому заданию"}, status=403)
+
+    try:
+        size = int(request.POST.get("size", ""))
+    except ValueError:
+        return JsonResponse({"error": "Не указан размер файла"}, status=400)
+
+    try:
+        upload = start_upload(homework, request.user, request.POST.get("filename"), size)
+    except UploadError as error:
+        return upload_error_response(error)
+    return JsonResponse(upload_state(upload), status=201)
+
+
+@login_required
+@student_required
+@require_GET
+def submission_upload(request, upload_id):
+    """Состояние загрузки: сколько байтов уже принято (для возобновления)"""
+    upload = get_object_or_404(UploadSession, pk=upload_id, student=request.user)
+    return JsonResponse(upload_state(upload))
+
+
+@login_required
+@student_required
+@require_POST
+def append_submission_upload(request, upload_id):
+    """Прием очередной порции: тело запроса - байты файла начиная со смещения ?offset="""
+    upload = get_object_or_404(UploadSession, pk=upload_id, student=request.user)
+    try:
+        offset = int(request.GET.get("offset", ""))
+    except ValueError:
+        return JsonResponse({"error": "Не указано смещение порции", "offset": upload.received}, status=400)
+
+    try:
+        received = append_chunk(upload, offset, request)
+    except UploadError as error:
+        return upload_error_response(error)
+    return JsonResponse({"upload_id": str(upload.pk), "offset": received, "size": upload.size})
+
+
+@login_required
+@student_required
+@require_POST
+def commit_submission_upload(request, upload_id):
+    """Завершение загрузки и сохранение отправки"""
+    upload = get_object_or_404(UploadSession.objects.select_related("homework"), pk=upload_id, student=request.user)
+    replaced = Submission.objects.filter(homework_id=upload.homework_id, student=request.user).exists()
+
+    try:
+        submission = commit_upload(upload)
+    except UploadError as error:
+        return upload_error_response(error)
+
+    if replaced:
+        messages.success(request, "Работа успешно переотправлена! Оценка сброшена.")
+    else:
+        messages.success(request, "Работа успешно отправлена!")
+    return JsonResponse(
+        {"submission_id": submission.pk, "redirect": reverse("course_detail", kwargs={"pk": upload.homework.course_id})}
+    )
+
+
+@login_required
+def download_submission(request, pk):
+    """Скачивание файла решения (студент-автор или преподаватель курса)"""
+    submission = get_object_or_404(Submission.objects.select_related("homework", "student"), pk=pk)
+
+    # Проверка доступа
+    if submission.student_id != request.user.pk and not is_course_teacher(request, submission.homework.course_id):
+        messages.error(request, "У вас нет доступа к этой работе")
+        return redirect("dashboard")
+
+    return serve_file(
+        request,
+        submission.solution_file.storage,
+        submission.solution_file.name,
+        submission_archive_name(submission),
+    )
+
+
+@login_required
+@teacher_required
+def teacher_homework_download(request, pk):
+    """Потоковая выгрузка всех работ по заданию одним ZIP-архивом"""
+    homework = get_object_or_404(Homework, pk=pk)
+
+    # Проверка доступа
+    if not is_course_teacher(request, homework.course_id):
+        messages.error(request, "У вас нет доступа к этому заданию")
+        return redirect("teacher_dashboard")
+
+    response = StreamingHttpResponse(stream_homework_archive(homework), content_type="application/zip")
+    response["Content-Disposition"] = content_disposition_header(True, f"homework_{homework.pk}_submissions.zip")
+    return response
+
+
+@login_required
+@teacher_required
+def teacher_homework_tests(request, pk):
+    """Скачивание файла тестов задания (преподаватель курса)"""
+    homework = get_object_or_404(Homework.objects.exclude(test_file=""), pk=pk)
+
+    # Проверка доступа
+    if not is_course_teacher(request, homework.course_id):
+        messages.error(request, "У вас нет доступа к этому заданию")
+        return redirect("teacher_dashboard")
+
+    return serve_file(request, homework.test_file.storage, homework.test_file.name, f"homework_{homework.pk}_tests.py")
+
+
+# Форматы выгрузки таблицы оценок: генератор и тип содержимого
+GRADEBOOK_EXPORTS = {
+    "csv": (stream_gradebook_csv, "text/csv; charset=utf-8"),
+    "xlsx": (stream_gradebook_xlsx, "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+}
+
+
+@login_required
+@teacher_required
+@course_role_required("teacher", url_kwarg="course_pk")
+def teacher_grades_export(request, course_pk):
+    """Потоковая выгрузка таблицы оценок курса в CSV или XLSX (?format=)"""
+    course = get_object_or_404(Course, pk=course_pk)
+    export_format = request.GET.get("format", "csv")
+    if export_format not in GRADEBOOK_EXPORTS:
+        export_format = "csv"
+
+    stream, content_type = GRADEBOOK_EXPORTS[export_format]
+    response = StreamingHttpResponse(stream(course), content_type=content_type)
+    response["Content-Disposition"] = content_disposition_header(True, f"course_{course.pk}_grades.{export_format}")
+    return response
@@ -5,13 +5,16 @@
 - Регистрации пользователей с выбором роли
 - Создания и редактирования домашних заданий
 - Отправки работ студентами
-- Выставления оценок преподавателями
+- Выставления оценок преподавателями (по одной работе и списком)
+- Зачисления студентов списком группы
 """
 
 from django import forms
 from django.contrib.auth import get_user_model
 from django.contrib.auth.forms import UserCreationForm
+from django.urls import reverse
 
+from .grading import MAX_GRADE, MAX_GRADE_ROWS, MIN_GRADE
 from .models import Homework, Submission, UserProfile
 
 User = get_user_model()
@@ -58,25 +61,66 @@ class RegisterForm(UserCreationForm):  # pylint: disable=too-many-ancestors
         return user
 
 
+class ProtectedFileInput(forms.ClearableFileInput):
+    """
+    Поле файла, ссылка на текущий файл которого ведет на представление
+    скачивания с проверкой доступа, а не на MEDIA_URL (он не обслуживается).
+
+    Attributes:
+        download_url: URL скачивания текущего файла (задается формой)
+    """
+
+    template_name = "assignments/widgets/protected_file_input.html"
+    download_url = None
+
+    def get_context(self, name, value, attrs):
+        context = super().get_context(name, value, attrs)
+        context["widget"]["download_url"] = self.download_url
+        return context
+
+
 class HomeworkForm(forms.ModelForm):
     """Форма создания домашнего задания"""
 
     class Meta:
         model = Homework
-        fields = ["title", "description", "due_date"]
+        fields = ["title", "description", "due_date", "test_file", "test_timeout"]
         widgets = {
             "title": forms.TextInput(attrs={"class": "form-control", "placeholder": "Введите название задания"}),
             "description": forms.Textarea(
                 attrs={"class": "form-control", "rows": 5, "placeholder": "Опишите задание подробно"}
             ),
             "due_date": forms.DateTimeInput(attrs={"class": "form-control", "type": "datetime-local"}),
+            "test_file": ProtectedFileInput(attrs={"class": "form-control", "accept": ".py"}),
+            "test_timeout": forms.NumberInput(attrs={"class": "form-control", "min": 1, "max": 300}),
         }
         labels = {
             "title": "Название задания",
             "description": "Описание",
             "due_date": "Срок сдачи",
+            "test_file": "Тесты (необязательно)",
+            "test_timeout": "Время на тесты, сек",
+        }
+        help_texts = {
+            "test_file": "Модуль unittest (.py). Решения .py импортируются тестами как модуль solution, "
+            "архивы .zip распаковываются рядом с тестами",
         }
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields["test_timeout"].required = False
+        if self.instance.pk:
+            self.fields["test_file"].widget.download_url = reverse("teacher_homework_tests", args=[self.instance.pk])
+
+    def clean_test_timeout(self):
+        """Ограничиваем время на тесты: воркер занят проверкой все это время"""
+        timeout = self.cleaned_data["test_timeout"]
+        if timeout is None:
+            return Homework._meta.get_field("test_timeout").default
+        if not 1 <= timeout <= 300:
+            raise forms.ValidationError("Время на тесты должно быть от 1 до 300 секунд")
+        return timeout
+
 
 class SubmissionForm(forms.ModelForm):
     """Форма отправки работы студентом"""
@@ -116,3 +160,63 @@ class GradeForm(forms.ModelForm):
             "grade": "Оценка",
             "feedback": "Отзыв",
         }
+
+
+class BulkGradeRowForm(forms.Form):
+    """Строка таблицы массового выставления оценок"""
+
+    submission = forms.IntegerField(widget=forms.HiddenInput)
+    grade = forms.IntegerField(
+        required=False,
+        min_value=MIN_GRADE,
+        max_value=MAX_GRADE,
+        label="Оценка",
+        widget=forms.NumberInput(attrs={"class": "form-control form-control-sm", "min": MIN_GRADE, "max": MAX_GRADE}),
+    )
+    feedback = forms.CharField(
+        required=False,
+        label="Отзыв",
+        widget=forms.Textarea(attrs={"class": "form-control form-control-sm", "rows": 1}),
+    )
+
+
+BulkGradeFormSet = forms.formset_factory(BulkGradeRowForm, extra=0, max_num=MAX_GRADE_ROWS, absolute_max=MAX_GRADE_ROWS)
+
+
+class GradeFileForm(forms.Form):
+    """Загрузка файла с оценками (CSV или JSON)"""
+
+    grades_file = forms.FileField(
+        label="Файл с оценками",
+        help_text="CSV или JSON с колонками submission или username, grade и feedback",
+        widget=forms.ClearableFileInput(attrs={"class": "form-control", "accept": ".csv,.json"}),
+    )
+
+
+class RosterImportForm(forms.Form):
+    """Список группы для зачисления: CSV-файл или логины/email по одному в строке"""
+
+    roster_file = forms.FileField(
+        required=False,
+        label="CSV-файл",
+        help_text="Колонки username и/или email",
+        widget=forms.ClearableFileInput(attrs={"class": "form-control", "accept": ".csv,.txt"}),
+    )
+    roster = forms.CharField(
+        required=False,
+        label="Или вставьте список",
+        help_text="По одному логину или email в строке",
+        widget=forms.Textarea(attrs={"class": "form-control", "rows": 4}),
+    )
+
+    def clean(self):
+        cleaned_data = super().clean()
+        roster_file = cleaned_data.get("roster_file")
+        if roster_file:
+            try:
+                cleaned_data["roster"] = roster_file.read().decode("utf-8-sig")
+            except UnicodeDecodeError:
+                self.add_error("roster_file", "Файл должен быть в кодировке UTF-8")
+        elif not cleaned_data.get("roster", "").strip():
+            raise forms.ValidationError("Загрузите файл или вставьте список студентов")
+        return cleaned_data
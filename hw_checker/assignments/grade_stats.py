@@ -0,0 +1,111 @@
+"""
+Пересборка и проверка агрегированной статистики оценок.
+
+Статистика (CourseGradeStats, HomeworkGradeStats, StudentCourseGradeStats)
+поддерживается инкрементально сигналами ``Submission``. Этот модуль
+вычисляет эталонные значения напрямую из таблицы отправок, чтобы
+пересобрать статистику или найти расхождения.
+
+Массовые изменения отправок без сигналов (QuerySet.update(), bulk_update(),
+bulk_create()) статистику не обновляют: после них нужно прибавить
+приращения через apply_submission_stats или вызвать rebuild_grade_stats.
+"""
+
+from django.apps import apps as global_apps
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import Coalesce
+
+# Модель статистики -> поля отправки, по которым она группируется (ключи
+# совпадают с key_fields моделей; здесь они нужны историческим моделям миграций)
+GROUPINGS = {
+    "CourseGradeStats": {"course_id": "homework__course_id"},
+    "HomeworkGradeStats": {"homework_id": "homework_id"},
+    "StudentCourseGradeStats": {"course_id": "homework__course_id", "student_id": "student_id"},
+}
+
+
+def compute_grade_stats(apps=global_apps):
+    """
+    Вычисляет эталонную статистику по таблице отправок.
+
+    Args:
+        apps: Реестр приложений (в миграциях передается исторический)
+
+    Returns:
+        dict: {имя модели: {ключ строки (кортеж): (submitted, graded, grade_sum)}}
+    """
+    submission_model = apps.get_model("assignments", "Submission")
+    result = {}
+    for model_name, grouping in GROUPINGS.items():
+        rows = (
+            submission_model.objects.order_by()
+            .values(*grouping.values())
+            .annotate(submitted=Count("id"), graded=Count("grade"), grade_sum=Coalesce(Sum("grade"), 0))
+        )
+        result[model_name] = {
+            tuple(row[source] for source in grouping.values()): (row["submitted"], row["graded"], row["grade_sum"])
+            for row in rows
+        }
+    return result
+
+
+def stored_grade_stats(apps=global_apps):
+    """
+    Читает сохраненную статистику в том же формате, что и compute_grade_stats.
+
+    Пустые строки (все счетчики равны нулю) не учитываются.
+    """
+    result = {}
+    for model_name, grouping in GROUPINGS.items():
+        model = apps.get_model("assignments", model_name)
+        fields = list(grouping)
+        rows = model.objects.values_list(*fields, "submitted_count", "graded_count", "grade_sum")
+        result[model_name] = {tuple(row[: len(fields)]): tuple(row[len(fields) :]) for row in rows if any(row[len(fields) :])}
+    return result
+
+
+def verify_grade_stats(apps=global_apps):
+    """
+    Сравнивает сохраненную статистику с эталонной.
+
+    Returns:
+        list: Расхождения в виде кортежей (имя модели, ключ, ожидаемое, сохраненное)
+    """
+    expected = compute_grade_stats(apps)
+    stored = stored_grade_stats(apps)
+    mismatches = []
+    for model_name in GROUPINGS:
+        for key in sorted(expected[model_name].keys() | stored[model_name].keys()):
+            want = expected[model_name].get(key, (0, 0, 0))
+            have = stored[model_name].get(key, (0, 0, 0))
+            if want != have:
+                mismatches.append((model_name, key, want, have))
+    return mismatches
+
+
+def rebuild_grade_stats(apps=global_apps):
+    """
+    Полностью пересобирает статистику из таблицы отправок.
+
+    Returns:
+        dict: Число созданных строк по каждой модели статистики
+    """
+    expected = compute_grade_stats(apps)
+    created = {}
+    with transaction.atomic():
+        for model_name, grouping in GROUPINGS.items():
+            model = apps.get_model("assignments", model_name)
+            model.objects.all().delete()
+            objs = [
+                model(
+                    submitted_count=submitted,
+                    graded_count=graded,
+                    grade_sum=grade_sum,
+                    **dict(zip(grouping, key)),
+                )
+                for key, (submitted, graded, grade_sum) in expected[model_name].items()
+            ]
+            model.objects.bulk_create(objs, batch_size=1000)
+            created[model_name] = len(objs)
+    return created
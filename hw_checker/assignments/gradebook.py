@@ -0,0 +1,195 @@
+"""
+Движок сводной таблицы оценок (gradebook) для курса и отчет об оценках студента.
+
+Загружает студентов, задания и все отправки курса фиксированным числом
+запросов (по одному на каждую сущность) и раскладывает отправки в плотную
+матрицу студент × задание, хранящуюся в плоских массивах. Итоги по строкам
+(сумма, средняя, число оцененных работ) считаются одним проходом по срезам
+массивов, поэтому стоимость построения не зависит от числа запросов к БД.
+
+Отчет студента по всем курсам (student_grade_report) строится аналогично:
+курсы, их задания и отправки студента загружаются тремя запросами и
+группируются в памяти.
+"""
+
+from array import array
+from collections import namedtuple
+
+from .models import Homework, Submission
+
+# Коды статуса ячейки
+MISSING = 0
+SUBMITTED = 1
+GRADED = 2
+
+STATUS_NAMES = {
+    MISSING: "missing",
+    SUBMITTED: "submitted",
+    GRADED: "graded",
+}
+
+GradebookCell = namedtuple("GradebookCell", ["homework", "submission_id", "grade", "status"])
+GradebookRow = namedtuple("GradebookRow", ["student", "grades", "total", "average", "completed"])
+
+
+class Gradebook:
+    """
+    Матрица оценок студент × задание для одного курса.
+
+    Ячейка (i, j) хранится по индексу ``i * len(homeworks) + j`` в массивах:
+
+    - ``grades`` — оценка (0, если работа не оценена)
+    - ``statuses`` — код статуса (MISSING / SUBMITTED / GRADED)
+    - ``submission_ids`` — id отправки (0, если работы нет)
+
+    Attributes:
+        students: Список студентов (строки матрицы)
+        homeworks: Список заданий (столбцы матрицы)
+        totals: Сумма оценок по каждому студенту
+        completed: Число оцененных работ по каждому студенту
+        averages: Средняя оценка по каждому студенту (0, если оценок нет)
+    """
+
+    def __init__(self, students, homeworks, submissions):
+        """
+        Args:
+            students: Последовательность студентов
+            homeworks: Последовательность заданий
+            submissions: Итерируемое кортежей (student_id, homework_id, submission_id, grade)
+        """
+        self.students = list(students)
+        self.homeworks = list(homeworks)
+
+        width = len(self.homeworks)
+        size = len(self.students) * width
+        self.grades = array("q", bytes(8 * size))
+        self.statuses = bytearray(size)
+        self.submission_ids = array("q", bytes(8 * size))
+
+        row_index = {student.pk: i for i, student in enumerate(self.students)}
+        col_index = {hw.pk: j for j, hw in enumerate(self.homeworks)}
+
+        for student_id, homework_id, submission_id, grade in submissions:
+            i = row_index.get(student_id)
+            j = col_index.get(homework_id)
+            # Отправки отчисленных студентов в таблицу не попадают
+            if i is None or j is None:
+                continue
+            pos = i * width + j
+            self.submission_ids[pos] = submission_id
+            if grade is None:
+                self.statuses[pos] = SUBMITTED
+            else:
+                self.statuses[pos] = GRADED
+                self.grades[pos] = grade
+
+        self._compute_summary()
+
+    @classmethod
+    def for_course(cls, course):
+        """
+        Строит таблицу оценок курса за три запроса к БД.
+
+        Args:
+            course: Курс
+
+        Returns:
+            Gradebook: Заполненная таблица оценок
+        """
+        students = course.students.all().order_by("last_name", "first_name")
+        homeworks = course.homeworks.all().order_by("due_date")
+        submissions = (
+            Submission.objects.filter(homework__course=course)
+            .order_by()
+            .values_list("student_id", "homework_id", "id", "grade")
+        )
+        return cls(students, homeworks, submissions.iterator())
+
+    def _compute_summary(self):
+        """Считает сумму, число оцененных работ и среднюю по каждой строке"""
+        width = len(self.homeworks)
+        self.totals = []
+        self.completed = []
+        self.averages = []
+        for start in range(0, len(self.students) * width, width):
+            end = start + width
+            total = sum(self.grades[start:end])
+            graded = self.statuses.count(GRADED, start, end)
+            self.totals.append(total)
+            self.completed.append(graded)
+            self.averages.append(round(total / graded, 1) if graded else 0)
+
+    @property
+    def size(self):
+        """Общее число ячеек таблицы"""
+        return len(self.students) * len(self.homeworks)
+
+    def rows(self):
+        """
+        Итерирует строки таблицы в формате, удобном для шаблона.
+
+        Yields:
+            GradebookRow: Строка с ячейками и итогами студента
+        """
+        width = len(self.homeworks)
+        for i, student in enumerate(self.students):
+            start = i * width
+            cells = [
+                GradebookCell(
+                    homework=hw,
+                    submission_id=self.submission_ids[start + j] or None,
+                    grade=self.grades[start + j] if self.statuses[start + j] == GRADED else None,
+                    status=STATUS_NAMES[self.statuses[start + j]],
+                )
+                for j, hw in enumerate(self.homeworks)
+            ]
+            yield GradebookRow(
+                student=student,
+                grades=cells,
+                total=self.totals[i],
+                average=self.averages[i],
+                completed=self.completed[i],
+            )
+
+
+def submission_status(submission):
+    """Текстовый статус работы для отчета студента"""
+    if submission is None:
+        return "Не сдано"
+    if submission.grade is not None:
+        return "Оценено"
+    return "На проверке"
+
+
+def student_grade_report(student):
+    """
+    Строит отчет об оценках студента по всем его курсам за три запроса к БД.
+
+    Args:
+        student: Студент
+
+    Returns:
+        list: Список словарей {"course": курс, "homeworks": [...]}, где каждый
+        элемент homeworks содержит задание, отправку, оценку и статус
+    """
+    courses = list(student.enrolled_courses.all())
+    course_ids = [course.pk for course in courses]
+    homeworks = Homework.objects.filter(course_id__in=course_ids).order_by("due_date")
+    submissions = {
+        submission.homework_id: submission
+        for submission in Submission.objects.filter(student=student, homework__course_id__in=course_ids)
+    }
+
+    homeworks_by_course = {course_id: [] for course_id in course_ids}
+    for hw in homeworks:
+        submission = submissions.get(hw.pk)
+        homeworks_by_course[hw.course_id].append(
+            {
+                "homework": hw,
+                "submission": submission,
+                "grade": submission.grade if submission else None,
+                "status": submission_status(submission),
+            }
+        )
+
+    return [{"course": course, "homeworks": homeworks_by_course[course.pk]} for course in courses]
@@ -0,0 +1,283 @@
+"""
+Массовое выставление оценок по заданию.
+
+Оценки приходят строками (отправка, оценка, отзыв) из таблицы на странице
+задания, из загруженного CSV/JSON-файла или из JSON-тела запроса API.
+Все строки проверяются вместе: если хотя бы одна строка ошибочна, не
+сохраняется ни одна. Измененные отправки записываются одним bulk_update
+в транзакции.
+
+bulk_update не вызывает сигналы Submission, поэтому статистика оценок и
+кеш dashboard и отметка изменения курса обновляются здесь же: приращения
+счетчиков суммируются по заданию, курсу и студентам. Файлы решений не меняются, поэтому учет
+ссылок на файлы не затрагивается.
+"""
+
+import csv
+import io
+import json
+import os
+from collections import Counter
+
+from django.db import transaction
+
+from .dashboard_cache import invalidate_dashboards
+from .exports import csv_row, csv_unescape
+from .models import Course, CourseGradeStats, HomeworkGradeStats, StudentCourseGradeStats, Submission, touch_courses
+
+# Допустимый диапазон оценки
+MIN_GRADE = 0
+MAX_GRADE = 100
+
+# Предел числа строк в одном запросе
+MAX_GRADE_ROWS = 5000
+
+# Колонки файла оценок: отправка задается id или логином студента
+GRADE_FILE_COLUMNS = ["submission", "username", "grade", "feedback"]
+
+# Текстовые колонки шаблона (grade_rows_csv): экранирование csv_cell снимается только в них
+GRADE_TEXT_COLUMNS = {"username", "feedback"}
+
+# Размер пакета bulk_update
+GRADE_BATCH_SIZE = 500
+
+
+class GradeImportError(ValueError):
+    """Файл или тело запроса с оценками нельзя разобрать"""
+
+
+def parse_csv_rows(text):
+    """Строки CSV с заголовком (разделитель - запятая или точка с запятой)"""
+    try:
+        dialect = csv.Sniffer().sniff(text.split("\n", 1)[0], delimiters=",;")
+    except csv.Error:
+        dialect = csv.excel
+    reader = csv.DictReader(io.StringIO(text), dialect=dialect)
+    if not reader.fieldnames or not {"submission", "username"} & set(reader.fieldnames) or "grade" not in reader.fieldnames:
+        raise GradeImportError("В файле нужны колонки grade и submission или username")
+    return [
+        {
+            key: (csv_unescape(value or "") if key in GRADE_TEXT_COLUMNS else value or "").strip()
+            for key, value in row.items()
+            if key in GRADE_FILE_COLUMNS
+        }
+        for row in reader
+    ]
+
+
+def parse_json_rows(data):
+    """Строки из JSON: список объектов или объект с ключом "grades" """
+    if isinstance(data, dict):
+        data = data.get("grades")
+    if not isinstance(data, list) or not all(isinstance(row, dict) for row in data):
+        raise GradeImportError('Ожидается список объектов или объект {"grades": [...]}')
+    return [{key: row[key] for key in GRADE_FILE_COLUMNS if key in row} for row in data]
+
+
+def parse_grade_file(uploaded_file):
+    """
+    Разбирает загруженный файл оценок (.csv или .json).
+
+    Returns:
+        list: Строки {"submission" или "username", "grade", "feedback"}
+
+    Raises:
+        GradeImportError: Если формат файла не поддерживается или файл поврежден
+    """
+    ext = os.path.splitext(uploaded_file.name)[1].lower()
+    try:
+        text = uploaded_file.read().decode("utf-8-sig")
+    except UnicodeDecodeError as exc:
+        raise GradeImportError("Файл должен быть в кодировке UTF-8") from exc
+    if ext == ".csv":
+        return parse_csv_rows(text)
+    if ext == ".json":
+        try:
+            return parse_json_rows(json.loads(text))
+        except json.JSONDecodeError as exc:
+            raise GradeImportError(f"Некорректный JSON: {exc}") from exc
+    raise GradeImportError("Поддерживаются файлы .csv и .json")
+
+
+def parse_grade(value):
+    """
+    Оценка из строки таблицы (пустое значение - оценка снимается).
+
+    Raises:
+        ValueError: Если оценка не целое число из допустимого диапазона
+    """
+    if value is None or value == "":
+        return None
+    if isinstance(value, bool):
+        raise ValueError(value)
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    grade = int(value) if isinstance(value, int) else int(str(value).strip())
+    if not MIN_GRADE <= grade <= MAX_GRADE:
+        raise ValueError(value)
+    return grade
+
+
+def resolve_submission(row, submissions, by_username):
+    """
+    Отправка строки оценок: по id отправки или по логину студента.
+
+    Args:
+        row: Строка {"submission" или "username", ...}
+        submissions: {id: отправка задания}
+        by_username: {логин студента: отправка задания}
+
+    Returns:
+        tuple: (отправка или None, текст ошибки или None)
+    """
+    submission_id = row.get("submission")
+    if submission_id not in (None, ""):
+        try:
+            submission = submissions.get(int(submission_id))
+        except (TypeError, ValueError):
+            submission = None
+        if submission is None:
+            return None, f"отправка {submission_id} не относится к заданию"
+        return submission, None
+
+    submission = by_username.get(str(row.get("username") or "").strip())
+    if submission is None:
+        return None, f"нет отправки студента {row.get('username') or '(не указан)'}"
+    return submission, None
+
+
+def parse_row_change(row, submission):
+    """
+    Оценка и отзыв из строки.
+
+    Returns:
+        tuple: (оценка, отзыв)
+
+    Raises:
+        ValueError: Если оценка некорректна
+    """
+    try:
+        grade = parse_grade(row.get("grade"))
+    except TypeError as exc:
+        raise ValueError(row.get("grade")) from exc
+    # Отсутствующий отзыв (колонки нет) не меняет прежний
+    feedback = submission.feedback if row.get("feedback") is None else str(row["feedback"])
+    return grade, feedback
+
+
+def validate_grade_rows(homework, rows):
+    """
+    Проверяет строки оценок задания.
+
+    Args:
+        homework: Задание
+        rows: Строки {"submission" или "username", "grade", "feedback"}
+
+    Returns:
+        tuple: (список (отправка, оценка, отзыв) только с изменениями,
+        список ошибок "Строка N: ...")
+    """
+    if len(rows) > MAX_GRADE_ROWS:
+        return [], [f"Слишком много строк: {len(rows)} (не больше {MAX_GRADE_ROWS})"]
+
+    submissions = {submission.pk: submission for submission in homework.submissions.select_related("student")}
+    by_username = {submission.student.username: submission for submission in submissions.values()}
+
+    changes = []
+    errors = []
+    seen = set()
+    for number, row in enumerate(rows, start=1):
+        submission, error = resolve_submission(row, submissions, by_username)
+        if submission is not None and submission.pk in seen:
+            error = f"отправка студента {submission.student.username} указана повторно"
+        if error:
+            errors.append(f"Строка {number}: {error}")
+            continue
+        seen.add(submission.pk)
+
+        try:
+            grade, feedback = parse_row_change(row, submission)
+        except ValueError:
+            errors.append(f"Строка {number}: оценка должна быть целым числом от {MIN_GRADE} до {MAX_GRADE}")
+            continue
+        if (grade, feedback) != (submission.grade, submission.feedback):
+            changes.append((submission, grade, feedback))
+    return changes, errors
+
+
+def apply_grades(homework, changes):
+    """
+    Сохраняет оценки одним bulk_update и обновляет статистику.
+
+    Приращения статистики считаются от оценок, перечитанных под блокировкой
+    строк (select_for_update) в той же транзакции, а не от значений,
+    прочитанных при проверке: оценка, сохраненная параллельно между
+    проверкой и записью, не нарушает счетчики.
+
+    Args:
+        homework: Задание
+        changes: Список (отправка, оценка, отзыв) из validate_grade_rows
+
+    Returns:
+        int: Число обновленных отправок
+    """
+    if not changes:
+        return 0
+
+    with transaction.atomic():
+        locked = dict(
+            Submission.objects.select_for_update()
+            .filter(pk__in=[submission.pk for submission, _, _ in changes])
+            .values_list("pk", "grade")
+        )
+        students = Counter()
+        student_sums = Counter()
+        updated = []
+        for submission, grade, feedback in changes:
+            if submission.pk not in locked:
+                # Отправка удалена после проверки строк
+                continue
+            previous = locked[submission.pk]
+            students[submission.student_id] += (grade is not None) - (previous is not None)
+            student_sums[submission.student_id] += (grade or 0) - (previous or 0)
+            submission.grade = grade
+            submission.feedback = feedback
+            updated.append(submission)
+
+        Submission.objects.bulk_update(updated, ["grade", "feedback"], batch_size=GRADE_BATCH_SIZE)
+        # Сигналы не вызывались: приращения статистики применяются здесь
+        graded, grade_sum = sum(students.values()), sum(student_sums.values())
+        HomeworkGradeStats.apply_delta({"homework_id": homework.pk}, 0, graded, grade_sum)
+        CourseGradeStats.apply_delta({"course_id": homework.course_id}, 0, graded, grade_sum)
+        for student_id in students.keys() | student_sums.keys():
+            if students[student_id] or student_sums[student_id]:
+                StudentCourseGradeStats.apply_delta(
+                    {"course_id": homework.course_id, "student_id": student_id},
+                    0,
+                    students[student_id],
+                    student_sums[student_id],
+                )
+        teachers = Course.teachers.through.objects.filter(course_id=homework.course_id).values_list("user_id", flat=True)
+        invalidate_dashboards({*students, *teachers})
+        touch_courses([homework.course_id])
+
+    for submission in updated:
+        submission._loaded_state = submission.stats_state()  # pylint: disable=protected-access
+    return len(updated)
+
+
+def grade_rows_csv(homework):
+    """
+    CSV-шаблон для заполнения оценок задания (текущие оценки и отзывы).
+
+    Текст, похожий на формулу, экранируется (см. exports.csv_cell);
+    parse_csv_rows снимает экранирование при загрузке шаблона обратно.
+    """
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(["submission", "username", "full_name", "grade", "feedback"])
+    for submission in homework.submissions.select_related("student").order_by("student__username"):
+        student = submission.student
+        grade = "" if submission.grade is None else submission.grade
+        writer.writerow(csv_row([submission.pk, student.username, student.get_full_name(), grade, submission.feedback]))
+    return output.getvalue()
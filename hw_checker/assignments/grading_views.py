@@ -0,0 +1,127 @@
+"""
+Представления для массового выставления оценок по заданию.
+
+Оценки принимаются из таблицы на странице, загруженного CSV/JSON-файла
+или JSON-тела запроса; разбор и сохранение выполняются в grading.py.
+"""
+
+import json
+
+from django.contrib import messages
+from django.contrib.auth.decorators import login_required
+from django.http import HttpResponse, JsonResponse
+from django.shortcuts import get_object_or_404, redirect, render
+from django.utils.http import content_disposition_header
+
+from .decorators import teacher_required
+from .forms import BulkGradeFormSet, GradeFileForm
+from .grading import GradeImportError, apply_grades, grade_rows_csv, parse_grade_file, parse_json_rows, validate_grade_rows
+from .models import Homework
+from .permissions import is_course_teacher
+
+
+def bulk_grade_json(request, homework):
+    """Массовое выставление оценок через API: тело - JSON со строками оценок"""
+    try:
+        rows = parse_json_rows(json.loads(request.body))
+    except (ValueError, GradeImportError) as error:
+        message = str(error) if isinstance(error, GradeImportError) else "Некорректный JSON"
+        return JsonResponse({"errors": [message]}, status=400)
+
+    changes, errors = validate_grade_rows(homework, rows)
+    if errors:
+        return JsonResponse({"errors": errors}, status=400)
+    return JsonResponse({"updated": apply_grades(homework, changes)})
+
+
+def bulk_grade_csv(homework):
+    """CSV-шаблон оценок задания для скачивания"""
+    # BOM нужен Excel, чтобы открыть файл в UTF-8
+    response = HttpResponse("\ufeff" + grade_rows_csv(homework), content_type="text/csv; charset=utf-8")
+    response["Content-Disposition"] = content_disposition_header(True, f"homework_{homework.pk}_grades.csv")
+    return response
+
+
+def bulk_grade_file_rows(request):
+    """
+    Строки оценок из загруженного файла.
+
+    Returns:
+        tuple: (форма файла, строки или None, ошибки разбора)
+    """
+    file_form = GradeFileForm(request.POST, request.FILES)
+    if not file_form.is_valid():
+        return file_form, None, []
+    try:
+        return file_form, parse_grade_file(file_form.cleaned_data["grades_file"]), []
+    except GradeImportError as error:
+        return file_form, None, [str(error)]
+
+
+def bulk_grade_formset_rows(request, initial):
+    """
+    Строки оценок из заполненной таблицы.
+
+    Returns:
+        tuple: (formset, строки или None, если таблица заполнена с ошибками)
+    """
+    formset = BulkGradeFormSet(request.POST, initial=initial)
+    if not formset.is_valid():
+        return formset, None
+    return formset, [form.cleaned_data for form in formset.forms]
+
+
+@login_required
+@teacher_required
+def teacher_bulk_grade(request, pk):
+    """
+    Массовое выставление оценок по заданию.
+
+    GET - таблица всех отправок с полями оценки и отзыва (?format=csv -
+    CSV-шаблон с текущими оценками). POST принимает заполненную таблицу,
+    загруженный CSV/JSON-файл (поле grades_file) или JSON-тело
+    (Content-Type: application/json). Строки проверяются вместе и
+    сохраняются одной транзакцией: при ошибке не сохраняется ни одна.
+    """
+    homework = get_object_or_404(Homework.objects.select_related("course"), pk=pk)
+    is_json = request.content_type == "application/json"
+
+    # Проверка доступа
+    if not is_course_teacher(request, homework.course_id):
+        if is_json:
+            return JsonResponse({"errors": ["У вас нет доступа к этому заданию"]}, status=403)
+        messages.error(request, "У вас нет доступа к этому заданию")
+        return redirect("teacher_dashboard")
+
+    if request.method == "POST" and is_json:
+        return bulk_grade_json(request, homework)
+
+    if request.method == "GET" and request.GET.get("format") == "csv":
+        return bulk_grade_csv(homework)
+
+    submissions = list(homework.submissions.select_related("student").order_by("student__username", "pk"))
+    initial = [{"submission": s.pk, "grade": s.grade, "feedback": s.feedback} for s in submissions]
+    formset = BulkGradeFormSet(initial=initial)
+    file_form = GradeFileForm()
+    rows, errors = None, []
+
+    if request.method == "POST" and "grades_file" in request.FILES:
+        file_form, rows, errors = bulk_grade_file_rows(request)
+    elif request.method == "POST":
+        formset, rows = bulk_grade_formset_rows(request, initial)
+
+    if rows is not None:
+        changes, errors = validate_grade_rows(homework, rows)
+        if not errors:
+            updated = apply_grades(homework, changes)
+            messages.success(request, f"Оценок сохранено: {updated}")
+            return redirect("teacher_homework_submissions", pk=homework.pk)
+
+    context = {
+        "homework": homework,
+        "formset": formset,
+        "rows": list(zip(formset.forms, submissions)),
+        "file_form": file_form,
+        "errors": errors,
+    }
+    return render(request, "assignments/teacher_bulk_grade.html", context)
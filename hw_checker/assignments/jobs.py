@@ -0,0 +1,216 @@
+"""
+Очередь фоновых задач на основе БД.
+
+Задача - функция, зарегистрированная декоратором ``@task`` (см. tasks.py)
+и поставленная в очередь через ``Job.enqueue``. Воркер:
+
+1. захватывает готовые задачи условным UPDATE (статус "queued" и наступил
+   run_after, либо "running" с истекшим visibility timeout) - это работает
+   одинаково в SQLite и PostgreSQL и не дает двум воркерам взять одну задачу;
+2. выполняет функцию задачи (по умолчанию в транзакции);
+   Перед запуском каждой задачи захват продлевается, чтобы долгие задачи
+   в начале пачки не отдавали следующие другому воркеру;
+3. помечает задачу выполненной либо возвращает в очередь с экспоненциальной
+   задержкой, пока не исчерпано max_attempts.
+
+Результат, который вернула функция, сохраняется в ``Job.result``.
+"""
+
+import logging
+import traceback
+from contextlib import nullcontext
+from datetime import timedelta
+from importlib import import_module
+
+from django.db import close_old_connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+# Время, на которое воркер захватывает задачу
+DEFAULT_VISIBILITY_TIMEOUT = timedelta(minutes=5)
+
+# Задержка перед первым повтором (удваивается с каждой попыткой)
+RETRY_DELAY = timedelta(seconds=30)
+
+# Выполненные и неудачные задачи старше этого срока удаляются воркером
+FINISHED_JOB_TTL = timedelta(days=7)
+
+TASKS = {}
+
+
+def task(name=None, atomic=True):
+    """
+    Регистрирует функцию как фоновую задачу.
+
+    Args:
+        name: Имя задачи в очереди (по умолчанию имя функции)
+        atomic: Выполнять ли задачу в транзакции. Долгим задачам, которые
+            ждут внешний процесс, транзакция не нужна: она держала бы
+            блокировку БД (в SQLite) все время ожидания
+    """
+
+    def decorator(func):
+        func.atomic = atomic
+        TASKS[name or func.__name__] = func
+        return func
+
+    return decorator
+
+
+def get_task(name):
+    """Функция задачи по имени (None, если задача не зарегистрирована)"""
+    # Регистрация задач происходит при импорте модуля tasks
+    import_module(f"{__package__}.tasks")
+    return TASKS.get(name)
+
+
+def ready_jobs(now):
+    """Условие готовности задачи к захвату"""
+    return Q(status="queued", run_after__lte=now) | Q(status="running", locked_until__lt=now)
+
+
+def claim_jobs(worker_id, limit=1, visibility_timeout=DEFAULT_VISIBILITY_TIMEOUT):
+    """
+    Захватывает до limit готовых задач.
+
+    Args:
+        worker_id: Идентификатор воркера
+        limit: Максимальное число задач
+        visibility_timeout: На сколько захватить задачи
+
+    Returns:
+        list: Захваченные задачи в порядке очереди
+    """
+    now = timezone.now()
+    candidates = Job.objects.filter(ready_jobs(now)).order_by("run_after", "id").values_list("pk", flat=True)
+    claimed = []
+    for pk in candidates[: limit * 2]:
+        # Условный UPDATE: задачу, которую уже захватил другой воркер, он не затронет
+        updated = Job.objects.filter(ready_jobs(now), pk=pk).update(
+            status="running",
+            locked_by=worker_id,
+            locked_until=now + visibility_timeout,
+            attempts=F("attempts") + 1,
+        )
+        if updated:
+            claimed.append(pk)
+            if len(claimed) == limit:
+                break
+    return list(Job.objects.filter(pk__in=claimed, locked_by=worker_id).order_by("run_after", "id"))
+
+
+def retry_delay(attempts):
+    """Задержка перед следующей попыткой"""
+    return RETRY_DELAY * 2 ** max(attempts - 1, 0)
+
+
+def run_job(job, worker_id, visibility_timeout=DEFAULT_VISIBILITY_TIMEOUT):
+    """
+    Выполняет захваченную задачу и сохраняет итог.
+
+    Задачи захватываются пачкой, поэтому перед запуском захват продлевается
+    на visibility_timeout от текущего момента: предыдущие задачи пачки не
+    съедают время этой. Если захват истек и задачу уже забрал другой воркер,
+    она не запускается, а итог опоздавшего воркера отбрасывается.
+
+    Returns:
+        bool: True, если задача выполнена успешно
+    """
+    owned = Job.objects.filter(pk=job.pk, status="running", locked_by=worker_id)
+    if not owned.update(locked_until=timezone.now() + visibility_timeout):
+        return False
+    func = get_task(job.name)
+    if func is None or job.attempts > job.max_attempts:
+        error = "Задача не зарегистрирована" if func is None else "Исчерпаны попытки (задача не завершилась вовремя)"
+        owned.update(status="failed", last_error=error, locked_until=None, finished_at=timezone.now())
+        logger.error("Задача %s #%s: %s", job.name, job.pk, error)
+        return False
+
+    try:
+        with transaction.atomic() if func.atomic else nullcontext():
+            result = func(**job.payload)
+    except Exception:
+        error = traceback.format_exc()
+        if job.attempts >= job.max_attempts:
+            owned.update(status="failed", last_error=error, locked_until=None, finished_at=timezone.now())
+            logger.error("Задача %s #%s завершилась ошибкой:\n%s", job.name, job.pk, error)
+        else:
+            owned.update(
+                status="queued",
+                last_error=error,
+                locked_by="",
+                locked_until=None,
+                run_after=timezone.now() + retry_delay(job.attempts),
+            )
+            logger.warning("Задача %s #%s будет повторена:\n%s", job.name, job.pk, error)
+        return False
+
+    owned.update(status="done", result=result, locked_until=None, finished_at=timezone.now())
+    return True
+
+
+def run_pending(worker_id="inline", batch=10, visibility_timeout=DEFAULT_VISIBILITY_TIMEOUT):
+    """
+    Выполняет в текущем процессе все готовые задачи.
+
+    Используется в тестах и командой ``run_workers --once``. Задачи,
+    отложенные для повтора, не выполняются до наступления run_after.
+
+    Returns:
+        int: Число выполненных (в том числе неудачно) задач
+    """
+    processed = 0
+    while True:
+        jobs = claim_jobs(worker_id, limit=batch, visibility_timeout=visibility_timeout)
+        if not jobs:
+            return processed
+        for job in jobs:
+            run_job(job, worker_id, visibility_timeout)
+            processed += 1
+
+
+def work(worker_id, stop, poll_interval=1.0, batch=10, visibility_timeout=DEFAULT_VISIBILITY_TIMEOUT):
+    """
+    Цикл воркера: выполняет задачи, пока не установлено событие stop.
+
+    Args:
+        worker_id: Идентификатор воркера
+        stop: Событие остановки (threading.Event или multiprocessing.Event)
+        poll_interval: Пауза в секундах, когда очередь пуста
+        batch: Сколько задач захватывать за раз
+        visibility_timeout: На сколько захватывать задачи
+    """
+    while not stop.is_set():
+        close_old_connections()
+        jobs = claim_jobs(worker_id, limit=batch, visibility_timeout=visibility_timeout)
+        if not jobs:
+            stop.wait(poll_interval)
+            continue
+        for index, job in enumerate(jobs):
+            if stop.is_set():
+                release_jobs(jobs[index:], worker_id)
+                break
+            run_job(job, worker_id, visibility_timeout)
+    close_old_connections()
+
+
+def release_jobs(jobs, worker_id):
+    """Возвращает в очередь захваченные, но не начатые задачи (без траты попытки)"""
+    Job.objects.filter(pk__in=[job.pk for job in jobs], status="running", locked_by=worker_id).update(
+        status="queued", locked_by="", locked_until=None, attempts=F("attempts") - 1
+    )
+
+
+def purge_finished_jobs(ttl=FINISHED_JOB_TTL):
+    """
+    Удаляет давно завершенные задачи.
+
+    Returns:
+        int: Число удаленных задач
+    """
+    deleted, _ = Job.objects.filter(status__in=["done", "failed"], finished_at__lt=timezone.now() - ttl).delete()
+    return deleted
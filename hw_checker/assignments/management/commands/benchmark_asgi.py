@@ -0,0 +1,56 @@
+"""
+Management-команда для нагрузочного теста асинхронных страниц.
+
+Команда создает отдельную тестовую БД, заполняет ее синтетическими данными,
+после чего заданное число одновременных пользователей запрашивает
+dashboard и списки работ студента и преподавателя сначала через
+WSGI-обработчик (пул потоков), затем через ASGI-обработчик (цикл событий).
+Выводит запросов в секунду и p50/p95 времени ответа для каждого режима.
+
+Использование:
+    python manage.py benchmark_asgi --users 500 --requests 4 --threads 32
+    python manage.py benchmark_asgi --output load.json
+"""
+
+from django.core.management.base import CommandError
+
+from assignments.benchmarks import benchmark_database, run_load_benchmark, seed_dataset
+from assignments.benchmarks.command import BenchmarkCommand
+
+
+class Command(BenchmarkCommand):
+    """Сравнивает пропускную способность страниц под WSGI и ASGI."""
+
+    help = "Нагрузочный тест асинхронных страниц: WSGI (пул потоков) против ASGI (цикл событий)"
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        self.add_scale_arguments(parser, courses=5, students=100, homeworks=10)
+        parser.add_argument("--users", type=int, default=500, help="Число одновременных пользователей")
+        parser.add_argument("--requests", type=int, default=4, help="Число запросов каждого пользователя")
+        parser.add_argument("--threads", type=int, default=32, help="Число потоков WSGI-сервера")
+
+    def collect(self, scale):
+        """Создает тестовую БД, заполняет ее и запускает нагрузку"""
+        with benchmark_database():
+            data = seed_dataset(courses=scale["courses"], students=scale["students"], homeworks=scale["homeworks"])
+            return run_load_benchmark(
+                data, users=scale["users"], requests_per_user=scale["requests"], threads=scale["threads"]
+            )
+
+    def handle(self, *args, **options):
+        scale = {key: options[key] for key in ("courses", "students", "homeworks", "users", "requests", "threads")}
+        modes = self.collect(scale)
+
+        for mode, metrics in modes.items():
+            self.stdout.write(
+                f"{mode.upper():5} запросов={metrics['requests']} ошибок={metrics['errors']} "
+                f"время={metrics['elapsed_s']:.1f}с запросов/с={metrics['rps']} "
+                f"p50={metrics['p50_ms']:.1f}мс p95={metrics['p95_ms']:.1f}мс"
+            )
+
+        self.save_report({"scale": scale, "modes": modes}, options["output"])
+
+        errors = sum(metrics["errors"] for metrics in modes.values())
+        if errors:
+            raise CommandError(f"Запросов с ошибкой: {errors}")
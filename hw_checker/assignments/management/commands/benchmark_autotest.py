@@ -0,0 +1,53 @@
+"""
+Management-команда для замера пропускной способности автопроверки.
+
+Проверяет в песочнице заданное число синтетических решений (верных, с
+ошибкой и зависающих) с заданной степенью параллельности и выводит время
+прогона, число проверок в секунду и p50/p95 длительности одной проверки.
+Помогает подобрать число воркеров (``run_workers --processes``) под
+ожидаемый поток отправок перед сроком сдачи.
+
+Использование:
+    python manage.py benchmark_autotest --submissions 500 --concurrency 16
+    python manage.py benchmark_autotest --timeout-rate 0.05 --output autotest.json
+"""
+
+from django.core.management.base import CommandError
+
+from assignments.benchmarks import run_autotest_benchmark
+from assignments.benchmarks.command import BenchmarkCommand
+
+
+class Command(BenchmarkCommand):
+    """Замеряет пропускную способность автопроверки решений."""
+
+    help = "Замеряет пропускную способность песочницы автопроверки на синтетических решениях"
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument("--submissions", type=int, default=300, help="Число решений")
+        parser.add_argument("--concurrency", type=int, default=8, help="Число одновременных проверок")
+        parser.add_argument("--timeout", type=int, default=5, help="Предел времени одной проверки, сек")
+        parser.add_argument("--failed-rate", type=float, default=0.2, help="Доля решений с ошибкой")
+        parser.add_argument("--timeout-rate", type=float, default=0.0, help="Доля зависающих решений")
+
+    def handle(self, *args, **options):
+        report = run_autotest_benchmark(
+            submissions=options["submissions"],
+            concurrency=options["concurrency"],
+            timeout=options["timeout"],
+            failed_rate=options["failed_rate"],
+            timeout_rate=options["timeout_rate"],
+        )
+        self.stdout.write(
+            f"Решений: {report['submissions']}, параллельно: {report['concurrency']}, "
+            f"время: {report['elapsed_s']:.1f}с, проверок/с: {report['throughput_per_s']}, "
+            f"p50={report['p50_s']:.2f}с p95={report['p95_s']:.2f}с"
+        )
+        self.stdout.write(f"Статусы: {report['statuses']}")
+
+        self.save_report(report, options["output"])
+
+        # Синтетические решения проверяются детерминированно: расхождение - ошибка песочницы
+        if report["statuses"] != report["expected"]:
+            raise CommandError(f"Статусы проверок {report['statuses']} не совпадают с ожидаемыми {report['expected']}")
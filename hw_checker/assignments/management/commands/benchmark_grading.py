@@ -0,0 +1,50 @@
+"""
+Management-команда для сравнения способов выставления оценок.
+
+Команда создает отдельную тестовую БД с курсом и заданием, которое сдали
+все студенты, и выставляет одни и те же оценки сначала по одной работе
+(страница проверки и форма для каждой отправки), затем одним CSV-файлом
+на странице массового выставления оценок. Выводит число HTTP-запросов,
+SQL-запросов и время каждого способа.
+
+Использование:
+    python manage.py benchmark_grading --students 500
+    python manage.py benchmark_grading --output grading.json
+"""
+
+from django.core.management.base import CommandError
+
+from assignments.benchmarks import benchmark_database, run_bulk_grading_benchmark
+from assignments.benchmarks.command import BenchmarkCommand
+
+
+class Command(BenchmarkCommand):
+    """Сравнивает выставление оценок по одной работе и списком."""
+
+    help = "Сравнивает выставление оценок по одной работе и загрузкой одного CSV-файла"
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument("--students", type=int, default=500, help="Число студентов (отправок)")
+
+    def collect(self, students):
+        """Создает тестовую БД и запускает замер"""
+        with benchmark_database():
+            return run_bulk_grading_benchmark(students=students)
+
+    def handle(self, *args, **options):
+        report = self.collect(options["students"])
+
+        for mode, title in (("single", "По одной"), ("bulk", "Списком")):
+            metrics = report[mode]
+            self.stdout.write(
+                f"{title:9} HTTP-запросов={metrics['requests']} SQL-запросов={metrics['queries']} "
+                f"время={metrics['elapsed_s']:.2f}с"
+            )
+        self.stdout.write(f"Ускорение: {report['speedup']}x")
+
+        self.save_report({"students": options["students"], **report}, options["output"])
+
+        inconsistent = [mode for mode in ("single", "bulk") if not report[mode]["consistent"]]
+        if inconsistent:
+            raise CommandError(f"Оценки или статистика не совпадают с ожидаемыми: {', '.join(inconsistent)}")
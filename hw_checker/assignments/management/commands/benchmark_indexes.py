@@ -0,0 +1,50 @@
+"""
+Management-команда для замера влияния индексов на горячие запросы.
+
+Команда создает отдельную тестовую БД (как при запуске тестов), заполняет
+ее синтетическими данными, выполняет запросы представлений без индексов
+моделей и с ними и печатает планы запросов и медианное время.
+
+Использование:
+    python manage.py benchmark_indexes --courses 20 --students 300 --homeworks 40
+    python manage.py benchmark_indexes --no-plans --output indexes.json
+"""
+
+from assignments.benchmarks import benchmark_database, run_index_benchmark, seed_dataset
+from assignments.benchmarks.command import BenchmarkCommand
+
+
+class Command(BenchmarkCommand):
+    """Сравнивает планы и время горячих запросов до и после индексов."""
+
+    help = "Заполняет тестовую БД синтетическими данными и сравнивает запросы без индексов и с индексами"
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        self.add_scale_arguments(parser, courses=10, students=300, homeworks=20)
+        parser.add_argument("--repeat", type=int, default=5, help="Число повторов каждого запроса")
+        parser.add_argument("--no-plans", action="store_true", help="Не печатать планы запросов")
+
+    def collect(self, scale):
+        """Создает тестовую БД, заполняет ее и сравнивает запросы"""
+        with benchmark_database():
+            self.stdout.write("Заполнение тестовой БД...")
+            data = seed_dataset(courses=scale["courses"], students=scale["students"], homeworks=scale["homeworks"])
+            return run_index_benchmark(data, repeat=scale["repeat"])
+
+    def handle(self, *args, **options):
+        scale = {key: options[key] for key in ("courses", "students", "homeworks", "repeat")}
+        report = self.collect(scale)
+
+        for name, result in report.items():
+            before, after = result["before"], result["after"]
+            self.stdout.write(self.style.MIGRATE_HEADING(name))
+            self.stdout.write(f"  без индексов: {before['median_ms']:.3f} мс")
+            self.stdout.write(f"  с индексами:  {after['median_ms']:.3f} мс")
+            if not options["no_plans"]:
+                self.stdout.write("  план без индексов:")
+                self.stdout.write("    " + before["plan"].replace("\n", "\n    "))
+                self.stdout.write("  план с индексами:")
+                self.stdout.write("    " + after["plan"].replace("\n", "\n    "))
+
+        self.save_report({"scale": scale, "queries": report}, options["output"])
@@ -0,0 +1,43 @@
+"""
+Management-команда для замера масштабирования антиплагиата.
+
+Генерирует синтетические решения с долей списанных копий для каждого
+размера задания и выводит время вычисления отпечатков и поиска пар,
+число обновлений счетчиков пар (растет линейно, а не как n²), полноту
+поиска копий и число ложных пар. БД не используется.
+
+Использование:
+    python manage.py benchmark_similarity --sizes 250 500 1000 2000
+    python manage.py benchmark_similarity --output similarity.json
+"""
+
+from django.core.management.base import CommandError
+
+from assignments.benchmarks import run_similarity_benchmark
+from assignments.benchmarks.command import BenchmarkCommand
+
+
+class Command(BenchmarkCommand):
+    """Замеряет время антиплагиата для заданий разного размера."""
+
+    help = "Замеряет масштабирование антиплагиата на синтетических решениях"
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument("--sizes", type=int, nargs="+", default=[250, 500, 1000], help="Числа решений в задании")
+        parser.add_argument("--copy-rate", type=float, default=0.05, help="Доля списанных решений")
+
+    def handle(self, *args, **options):
+        report = run_similarity_benchmark(sizes=options["sizes"], copy_rate=options["copy_rate"])
+        for row in report:
+            self.stdout.write(
+                f"решений={row['documents']:<6} время={row['total_s']:.2f}с (отпечатки {row['fingerprint_s']:.2f}с, "
+                f"пары {row['pairs_s']:.2f}с) обновлений={row['pair_updates']} из {row['all_pairs']} пар, "
+                f"полнота={row['recall']:.0%} ложных={row['false_pairs']}"
+            )
+
+        self.save_report(report, options["output"])
+
+        missed = [row["documents"] for row in report if row["recall"] < 1 or row["false_pairs"]]
+        if missed:
+            raise CommandError(f"Копии найдены не полностью или найдены ложные пары для размеров: {missed}")
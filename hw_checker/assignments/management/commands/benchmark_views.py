@@ -0,0 +1,72 @@
+"""
+Management-команда для замера всех представлений приложения.
+
+Команда создает отдельную тестовую БД, заполняет ее синтетическими данными
+заданного масштаба, запрашивает каждый URL приложения от лица студента и
+преподавателя и сохраняет число запросов, p50/p95 времени ответа и пиковую
+память в JSON-отчет. Если передан эталонный отчет, при превышении порогов
+команда завершается с ошибкой.
+
+Использование:
+    python manage.py benchmark_views --output bench.json
+    python manage.py benchmark_views --baseline bench.json --latency-tolerance 0.3
+"""
+
+import json
+
+from django.core.management.base import CommandError
+
+from assignments.benchmarks import benchmark_database, compare_reports, run_view_benchmark, seed_dataset
+from assignments.benchmarks.command import BenchmarkCommand
+
+
+class Command(BenchmarkCommand):
+    """Замеряет все представления и сравнивает результат с эталоном."""
+
+    help = "Замеряет число запросов, время ответа и память всех представлений на синтетических данных"
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        self.add_scale_arguments(parser, courses=5, students=100, homeworks=10)
+        parser.add_argument("--iterations", type=int, default=10, help="Число повторов каждого запроса")
+        parser.add_argument("--baseline", help="Эталонный JSON-отчет для поиска регрессий")
+        parser.add_argument("--query-slack", type=int, default=0, help="Допустимый прирост числа запросов")
+        parser.add_argument("--latency-tolerance", type=float, default=0.5, help="Допустимый рост p95 (доля)")
+        parser.add_argument("--memory-tolerance", type=float, default=0.5, help="Допустимый рост пиковой памяти (доля)")
+
+    def collect(self, scale):
+        """Создает тестовую БД, заполняет ее и замеряет представления"""
+        with benchmark_database():
+            data = seed_dataset(courses=scale["courses"], students=scale["students"], homeworks=scale["homeworks"])
+            return run_view_benchmark(data, iterations=scale["iterations"])
+
+    def handle(self, *args, **options):
+        scale = {key: options[key] for key in ("courses", "students", "homeworks", "iterations")}
+        views = self.collect(scale)
+
+        report = {"scale": scale, "views": views}
+        for key, metrics in views.items():
+            self.stdout.write(
+                f"{key:48} {metrics['status']:>4} запросов={metrics['queries']:<4} "
+                f"p50={metrics['p50_ms']:.1f}мс p95={metrics['p95_ms']:.1f}мс память={metrics['peak_kb']:.0f}КБ"
+            )
+
+        self.save_report(report, options["output"])
+
+        if options["baseline"]:
+            with open(options["baseline"], encoding="utf-8") as f:
+                baseline = json.load(f)
+            if baseline.get("scale") != scale:
+                self.stderr.write(f"Масштаб эталона {baseline.get('scale')} отличается от текущего {scale}")
+            regressions = compare_reports(
+                baseline["views"],
+                views,
+                query_slack=options["query_slack"],
+                latency_tolerance=options["latency_tolerance"],
+                memory_tolerance=options["memory_tolerance"],
+            )
+            for regression in regressions:
+                self.stderr.write(regression)
+            if regressions:
+                raise CommandError(f"Найдено регрессий: {len(regressions)}")
+            self.stdout.write(self.style.SUCCESS("Регрессий не найдено"))
@@ -0,0 +1,47 @@
+"""
+Management-команда для пересборки индекса антиплагиата задания.
+
+Заново вычисляет отпечатки всех решений задания (``.py`` и ``.txt``),
+находит похожие пары и выводит их. Обычно индекс обновляется фоновой
+задачей после каждой загрузки; команда нужна после изменения алгоритма
+или для заданий, загруженных до его появления.
+
+Использование:
+    python manage.py detect_similarity 42
+    python manage.py detect_similarity 42 --min-score 0.8
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from assignments.models import Homework
+from assignments.similarity import REPORT_SCORE, rebuild_homework_index, similar_pairs
+
+
+class Command(BaseCommand):
+    """Пересобирает индекс отпечатков задания и выводит похожие решения."""
+
+    help = "Пересобирает индекс антиплагиата задания и выводит похожие пары решений"
+
+    def add_arguments(self, parser):
+        parser.add_argument("homework_id", type=int, help="ID задания")
+        parser.add_argument("--min-score", type=float, default=REPORT_SCORE, help="Минимальная похожесть для вывода")
+
+    def handle(self, *args, **options):
+        homework = Homework.objects.filter(pk=options["homework_id"]).first()
+        if homework is None:
+            raise CommandError(f"Задание {options['homework_id']} не найдено")
+
+        started = time.perf_counter()
+        result = rebuild_homework_index(homework)
+        elapsed = time.perf_counter() - started
+
+        for pair in similar_pairs(homework, min_score=options["min_score"], limit=None):
+            self.stdout.write(f"{pair.score:6.0%}  {pair.first.student.username} ~ {pair.second.student.username}")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Решений: {result['documents']}, отпечатков: {result['fingerprints']}, "
+                f"похожих пар: {result['pairs']}, время: {elapsed:.1f}с"
+            )
+        )
@@ -0,0 +1,40 @@
+"""
+Management-команда для перевода файлов решений в контентно-адресуемое хранилище.
+
+Переносит файлы, сохраненные со старыми именами (``submissions/<имя>``),
+в дерево по SHA-256, сливает одинаковые файлы, пересобирает счетчики
+ссылок и удаляет файлы, на которые не ссылается ни одна отправка.
+
+Использование:
+    python manage.py migrate_submission_files --dry-run  # показать, что будет сделано
+    python manage.py migrate_submission_files
+"""
+
+from django.core.management.base import BaseCommand
+
+from assignments.file_refs import collect_orphan_files, convert_legacy_files
+
+
+class Command(BaseCommand):
+    """Переносит старые файлы решений и собирает неиспользуемые файлы."""
+
+    help = "Переводит файлы решений в контентно-адресуемое хранилище и удаляет файлы без ссылок"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="Только показать файлы для переноса и удаления")
+
+    def handle(self, *args, **options):
+        dry_run = options["dry_run"]
+
+        result = convert_legacy_files(dry_run=dry_run)
+        for old_name, new_name in result["renamed"].items():
+            self.stdout.write(f"{old_name} -> {new_name or '?'}")
+        for name in result["missing"]:
+            self.stderr.write(f"Файл отсутствует в хранилище: {name}")
+
+        orphans = collect_orphan_files(dry_run=dry_run)
+        for name in orphans:
+            self.stdout.write(f"Без ссылок: {name}")
+
+        verb = "Будет перенесено" if dry_run else "Перенесено"
+        self.stdout.write(self.style.SUCCESS(f"{verb} файлов: {result['converted']}, файлов без ссылок: {len(orphans)}"))
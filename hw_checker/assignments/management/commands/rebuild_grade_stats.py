@@ -0,0 +1,43 @@
+"""
+Management-команда для пересборки и проверки статистики оценок.
+
+Использование:
+    python manage.py rebuild_grade_stats           # пересобрать статистику
+    python manage.py rebuild_grade_stats --verify  # только проверить расхождения
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from assignments.dashboard_cache import invalidate_dashboards
+from assignments.grade_stats import rebuild_grade_stats, verify_grade_stats
+from assignments.models import Course
+
+
+class Command(BaseCommand):
+    """Пересобирает агрегированную статистику оценок из таблицы отправок."""
+
+    help = "Пересобирает или проверяет агрегированную статистику оценок по курсам, заданиям и студентам"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--verify",
+            action="store_true",
+            help="Только проверить статистику, завершиться с ошибкой при расхождениях",
+        )
+
+    def handle(self, *args, **options):
+        if options["verify"]:
+            mismatches = verify_grade_stats()
+            for model_name, key, expected, stored in mismatches:
+                self.stderr.write(f"{model_name} {key}: ожидалось {expected}, сохранено {stored}")
+            if mismatches:
+                raise CommandError(f"Найдено расхождений: {len(mismatches)}")
+            self.stdout.write(self.style.SUCCESS("Статистика оценок согласована"))
+            return
+
+        created = rebuild_grade_stats()
+        # Счетчики работ на dashboard преподавателей берутся из статистики
+        invalidate_dashboards(Course.teachers.through.objects.values_list("user_id", flat=True))
+        for model_name, count in created.items():
+            self.stdout.write(f"{model_name}: {count}")
+        self.stdout.write(self.style.SUCCESS("Статистика оценок пересобрана"))
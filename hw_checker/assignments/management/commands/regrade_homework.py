@@ -0,0 +1,49 @@
+"""
+Management-команда для перепроверки всех решений задания тестами.
+
+Результаты берутся из кеша автопроверки, если решение, тесты и параметры
+песочницы не изменились; остальные решения проверяются заново. Команда
+выводит число проверок по статусам и долю попаданий в кеш.
+
+Использование:
+    python manage.py regrade_homework 42
+    python manage.py regrade_homework 42 --concurrency 8
+    python manage.py regrade_homework 42 --no-cache  # перепроверить все решения
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from assignments.autotest import evict_test_results, regrade_homework
+from assignments.models import Homework
+
+
+class Command(BaseCommand):
+    """Перепроверяет решения задания с использованием кеша результатов."""
+
+    help = "Перепроверяет все решения задания тестами и сообщает долю попаданий в кеш"
+
+    def add_arguments(self, parser):
+        parser.add_argument("homework_id", type=int, help="ID задания")
+        parser.add_argument("--concurrency", type=int, default=1, help="Число одновременных проверок")
+        parser.add_argument("--no-cache", action="store_true", help="Не использовать кеш результатов")
+
+    def handle(self, *args, **options):
+        homework = Homework.objects.filter(pk=options["homework_id"]).first()
+        if homework is None:
+            raise CommandError(f"Задание {options['homework_id']} не найдено")
+        if not homework.test_file:
+            raise CommandError(f'У задания "{homework.title}" нет тестов')
+
+        evicted = evict_test_results()
+        if evicted:
+            self.stdout.write(f"Вытеснено результатов из кеша: {evicted}")
+
+        report = regrade_homework(homework, use_cache=not options["no_cache"], concurrency=options["concurrency"])
+        for status, count in sorted(report["statuses"].items()):
+            self.stdout.write(f"{status:8} {count}")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Проверено решений: {report['checked']}, из кеша: {report['hits']}, запущено: {report['executed']}, "
+                f"доля попаданий: {report['hit_rate']:.1%}, время: {report['elapsed_s']:.1f}с"
+            )
+        )
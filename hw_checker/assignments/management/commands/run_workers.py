@@ -0,0 +1,110 @@
+"""
+Management-команда для запуска воркеров очереди фоновых задач.
+
+Запускает пул процессов, каждый из которых выбирает задачи из таблицы
+Job и выполняет их (см. assignments/jobs.py). SIGINT/SIGTERM завершают
+воркеры после текущей задачи.
+
+Использование:
+    python manage.py run_workers --processes 4
+    python manage.py run_workers --once  # выполнить готовые задачи в текущем процессе и выйти
+"""
+
+import multiprocessing
+import os
+import signal
+import socket
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+# Модели импортируются внутри функций: при запуске процессов методом spawn
+# этот модуль импортируется в дочернем процессе до django.setup()
+# pylint: disable=import-outside-toplevel
+
+
+def _worker_process(worker_id, stop, options):
+    """Точка входа процесса-воркера"""
+    # Остановкой управляет родительский процесс через событие stop
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+
+    import django
+
+    django.setup()
+
+    from assignments.jobs import work
+
+    work(
+        worker_id,
+        stop,
+        poll_interval=options["poll_interval"],
+        batch=options["batch"],
+        visibility_timeout=timedelta(seconds=options["visibility_timeout"]),
+    )
+
+
+class Command(BaseCommand):
+    """Запускает воркеры очереди фоновых задач."""
+
+    help = "Запускает пул процессов, выполняющих фоновые задачи из очереди в БД"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--processes", type=int, default=2, help="Число процессов-воркеров")
+        parser.add_argument("--batch", type=int, default=10, help="Сколько задач воркер захватывает за раз")
+        parser.add_argument("--poll-interval", type=float, default=1.0, help="Пауза при пустой очереди, сек")
+        parser.add_argument("--visibility-timeout", type=int, default=300, help="На сколько секунд воркер захватывает задачу")
+        parser.add_argument("--once", action="store_true", help="Выполнить готовые задачи в текущем процессе и выйти")
+
+    def handle(self, *args, **options):
+        from assignments.autotest import evict_test_results
+        from assignments.jobs import purge_finished_jobs, run_pending
+
+        purged = purge_finished_jobs()
+        if purged:
+            self.stdout.write(f"Удалено завершенных задач: {purged}")
+        evicted = evict_test_results()
+        if evicted:
+            self.stdout.write(f"Вытеснено результатов автопроверки из кеша: {evicted}")
+
+        if options["once"]:
+            processed = run_pending(
+                worker_id=f"{socket.gethostname()}:{os.getpid()}",
+                batch=options["batch"],
+                visibility_timeout=timedelta(seconds=options["visibility_timeout"]),
+            )
+            self.stdout.write(self.style.SUCCESS(f"Выполнено задач: {processed}"))
+            return
+
+        # Дочерние процессы открывают собственные соединения с БД
+        connections.close_all()
+        stop = multiprocessing.Event()
+        worker_options = {key: options[key] for key in ("poll_interval", "batch", "visibility_timeout")}
+        workers = [
+            multiprocessing.Process(
+                target=_worker_process,
+                args=(f"{socket.gethostname()}:{os.getpid()}:{index}", stop, worker_options),
+                daemon=True,
+            )
+            for index in range(options["processes"])
+        ]
+        for worker in workers:
+            worker.start()
+        self.stdout.write(self.style.SUCCESS(f"Запущено воркеров: {len(workers)}"))
+
+        # Обработчик только выставляет флаг: вызывать stop.set() из обработчика
+        # сигнала нельзя, пока основной поток может держать блокировку события
+        terminated = []
+        signal.signal(signal.SIGTERM, lambda signum, frame: terminated.append(signum))
+        try:
+            while not terminated and any(worker.is_alive() for worker in workers):
+                time.sleep(0.5)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            stop.set()
+            for worker in workers:
+                worker.join()
+        self.stdout.write("Воркеры остановлены")
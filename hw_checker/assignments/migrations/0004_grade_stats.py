@@ -0,0 +1,99 @@
+# Generated by Django 5.2.7 on 2026-10-17 12:24
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+from assignments.grade_stats import rebuild_grade_stats
+
+
+def populate_grade_stats(apps, schema_editor):
+    rebuild_grade_stats(apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("assignments", "0003_courseenrollmentrequest"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CourseGradeStats",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("submitted_count", models.PositiveIntegerField(default=0, verbose_name="Сдано работ")),
+                ("graded_count", models.PositiveIntegerField(default=0, verbose_name="Оценено работ")),
+                ("grade_sum", models.BigIntegerField(default=0, verbose_name="Сумма оценок")),
+                (
+                    "course",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="grade_stats",
+                        to="assignments.course",
+                        verbose_name="Курс",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Статистика курса",
+                "verbose_name_plural": "Статистика курсов",
+            },
+        ),
+        migrations.CreateModel(
+            name="HomeworkGradeStats",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("submitted_count", models.PositiveIntegerField(default=0, verbose_name="Сдано работ")),
+                ("graded_count", models.PositiveIntegerField(default=0, verbose_name="Оценено работ")),
+                ("grade_sum", models.BigIntegerField(default=0, verbose_name="Сумма оценок")),
+                (
+                    "homework",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="grade_stats",
+                        to="assignments.homework",
+                        verbose_name="Домашнее задание",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Статистика задания",
+                "verbose_name_plural": "Статистика заданий",
+            },
+        ),
+        migrations.CreateModel(
+            name="StudentCourseGradeStats",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("submitted_count", models.PositiveIntegerField(default=0, verbose_name="Сдано работ")),
+                ("graded_count", models.PositiveIntegerField(default=0, verbose_name="Оценено работ")),
+                ("grade_sum", models.BigIntegerField(default=0, verbose_name="Сумма оценок")),
+                (
+                    "course",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="student_grade_stats",
+                        to="assignments.course",
+                        verbose_name="Курс",
+                    ),
+                ),
+                (
+                    "student",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="course_grade_stats",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Студент",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Статистика студента по курсу",
+                "verbose_name_plural": "Статистика студентов по курсам",
+                "unique_together": {("course", "student")},
+            },
+        ),
+        migrations.RunPython(populate_grade_stats, migrations.RunPython.noop),
+    ]
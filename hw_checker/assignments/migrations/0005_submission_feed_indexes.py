@@ -0,0 +1,29 @@
+# Generated by Django 5.2.7 on 2026-10-17 12:35
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("assignments", "0004_grade_stats"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="submission",
+            index=models.Index(fields=["-submitted_at", "-id"], name="submission_recent_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="submission",
+            index=models.Index(
+                condition=models.Q(("grade__isnull", True)), fields=["-submitted_at", "-id"], name="submission_pending_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="submission",
+            index=models.Index(fields=["homework", "-submitted_at", "-id"], name="submission_hw_recent_idx"),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.7 on 2026-10-17 12:37
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("assignments", "0005_submission_feed_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="courseenrollmentrequest",
+            index=models.Index(
+                condition=models.Q(("status", "pending")), fields=["course", "-created_at"], name="enrollment_pending_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="courseenrollmentrequest",
+            index=models.Index(fields=["course", "status", "-processed_at"], name="enrollment_processed_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="homework",
+            index=models.Index(fields=["course", "due_date"], name="homework_course_due_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="homework",
+            index=models.Index(fields=["course", "-created_at"], name="homework_course_recent_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="submission",
+            index=models.Index(fields=["student", "-submitted_at"], name="submission_student_recent_idx"),
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.7 on 2026-10-17 12:48
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("assignments", "0006_hot_path_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="UploadSession",
+            fields=[
+                ("id", models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ("filename", models.CharField(max_length=255, verbose_name="Имя файла")),
+                ("size", models.PositiveIntegerField(verbose_name="Заявленный размер")),
+                ("received", models.PositiveIntegerField(default=0, verbose_name="Получено байт")),
+                ("chunk_count", models.PositiveIntegerField(default=0, verbose_name="Получено порций")),
+                ("created_at", models.DateTimeField(auto_now_add=True, verbose_name="Дата начала")),
+                ("updated_at", models.DateTimeField(auto_now=True, verbose_name="Последняя порция")),
+                (
+                    "homework",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="upload_sessions",
+                        to="assignments.homework",
+                        verbose_name="Домашнее задание",
+                    ),
+                ),
+                (
+                    "student",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="upload_sessions",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Студент",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Загрузка файла",
+                "verbose_name_plural": "Загрузки файлов",
+                "ordering": ["-created_at"],
+            },
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.7 on 2026-10-17 12:52
+
+import assignments.models
+import assignments.storage
+from django.db import migrations, models
+
+from assignments.file_refs import rebuild_file_refs
+
+
+def populate_file_refs(apps, schema_editor):
+    rebuild_file_refs(apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("assignments", "0007_upload_session"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="StoredFile",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("name", models.CharField(max_length=255, unique=True, verbose_name="Путь в хранилище")),
+                ("ref_count", models.PositiveIntegerField(default=0, verbose_name="Число ссылок")),
+            ],
+            options={
+                "verbose_name": "Файл решения",
+                "verbose_name_plural": "Файлы решений",
+            },
+        ),
+        migrations.AlterField(
+            model_name="submission",
+            name="solution_file",
+            field=models.FileField(
+                max_length=255,
+                storage=assignments.storage.get_submission_storage,
+                upload_to="submissions/",
+                validators=[assignments.models.validate_file_size, assignments.models.validate_file_extension],
+                verbose_name="Файл с решением",
+            ),
+        ),
+        migrations.RunPython(populate_file_refs, migrations.RunPython.noop),
+    ]
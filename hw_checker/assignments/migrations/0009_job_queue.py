@@ -0,0 +1,51 @@
+# Generated by Django 5.2.7 on 2026-10-17 13:02
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("assignments", "0008_content_addressed_files"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Job",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("name", models.CharField(max_length=100, verbose_name="Задача")),
+                ("payload", models.JSONField(blank=True, default=dict, verbose_name="Параметры")),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("queued", "В очереди"),
+                            ("running", "Выполняется"),
+                            ("done", "Выполнена"),
+                            ("failed", "Ошибка"),
+                        ],
+                        default="queued",
+                        max_length=10,
+                        verbose_name="Статус",
+                    ),
+                ),
+                ("attempts", models.PositiveIntegerField(default=0, verbose_name="Попыток")),
+                ("max_attempts", models.PositiveIntegerField(default=3, verbose_name="Максимум попыток")),
+                ("run_after", models.DateTimeField(default=django.utils.timezone.now, verbose_name="Выполнить после")),
+                ("locked_by", models.CharField(blank=True, max_length=100, verbose_name="Воркер")),
+                ("locked_until", models.DateTimeField(blank=True, null=True, verbose_name="Захвачена до")),
+                ("result", models.JSONField(blank=True, null=True, verbose_name="Результат")),
+                ("last_error", models.TextField(blank=True, verbose_name="Последняя ошибка")),
+                ("created_at", models.DateTimeField(auto_now_add=True, verbose_name="Дата постановки")),
+                ("finished_at", models.DateTimeField(blank=True, null=True, verbose_name="Дата завершения")),
+            ],
+            options={
+                "verbose_name": "Фоновая задача",
+                "verbose_name_plural": "Фоновые задачи",
+                "ordering": ["-created_at"],
+                "indexes": [models.Index(fields=["status", "run_after"], name="job_ready_idx")],
+            },
+        ),
+    ]
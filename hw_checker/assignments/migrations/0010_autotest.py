@@ -0,0 +1,66 @@
+# Generated by Django 5.2.7 on 2026-10-17 13:14
+
+import assignments.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("assignments", "0009_job_queue"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="homework",
+            name="test_file",
+            field=models.FileField(
+                blank=True,
+                upload_to="homework_tests/",
+                validators=[assignments.models.validate_test_file],
+                verbose_name="Тесты для автоматической проверки",
+            ),
+        ),
+        migrations.AddField(
+            model_name="homework",
+            name="test_timeout",
+            field=models.PositiveIntegerField(default=10, verbose_name="Время на тесты, сек"),
+        ),
+        migrations.AddField(
+            model_name="submission",
+            name="test_output",
+            field=models.TextField(blank=True, verbose_name="Вывод тестов"),
+        ),
+        migrations.AddField(
+            model_name="submission",
+            name="test_status",
+            field=models.CharField(
+                blank=True,
+                choices=[
+                    ("", "Не проверялась"),
+                    ("queued", "В очереди"),
+                    ("passed", "Тесты пройдены"),
+                    ("failed", "Есть ошибки"),
+                    ("error", "Ошибка запуска"),
+                    ("timeout", "Превышено время"),
+                ],
+                max_length=10,
+                verbose_name="Результат автопроверки",
+            ),
+        ),
+        migrations.AddField(
+            model_name="submission",
+            name="tested_at",
+            field=models.DateTimeField(blank=True, null=True, verbose_name="Дата автопроверки"),
+        ),
+        migrations.AddField(
+            model_name="submission",
+            name="tests_passed",
+            field=models.PositiveIntegerField(blank=True, null=True, verbose_name="Пройдено тестов"),
+        ),
+        migrations.AddField(
+            model_name="submission",
+            name="tests_total",
+            field=models.PositiveIntegerField(blank=True, null=True, verbose_name="Всего тестов"),
+        ),
+    ]
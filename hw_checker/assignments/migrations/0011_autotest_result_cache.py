@@ -0,0 +1,58 @@
+# Generated by Django 5.2.7 on 2026-10-17 13:22
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("assignments", "0010_autotest"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AutotestResult",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("solution_hash", models.CharField(max_length=64, verbose_name="SHA-256 решения")),
+                ("tests_hash", models.CharField(max_length=64, verbose_name="SHA-256 тестов")),
+                ("runner_version", models.CharField(max_length=64, verbose_name="Версия песочницы")),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("", "Не проверялась"),
+                            ("queued", "В очереди"),
+                            ("passed", "Тесты пройдены"),
+                            ("failed", "Есть ошибки"),
+                            ("error", "Ошибка запуска"),
+                            ("timeout", "Превышено время"),
+                        ],
+                        max_length=10,
+                        verbose_name="Результат",
+                    ),
+                ),
+                ("tests_passed", models.PositiveIntegerField(default=0, verbose_name="Пройдено тестов")),
+                ("tests_total", models.PositiveIntegerField(default=0, verbose_name="Всего тестов")),
+                ("output", models.TextField(blank=True, verbose_name="Вывод тестов")),
+                ("duration", models.FloatField(default=0, verbose_name="Длительность, сек")),
+                ("hits", models.PositiveIntegerField(default=0, verbose_name="Попаданий")),
+                ("created_at", models.DateTimeField(auto_now_add=True, verbose_name="Дата проверки")),
+                (
+                    "last_used_at",
+                    models.DateTimeField(default=django.utils.timezone.now, verbose_name="Последнее использование"),
+                ),
+            ],
+            options={
+                "verbose_name": "Результат автопроверки",
+                "verbose_name_plural": "Кеш результатов автопроверки",
+                "indexes": [models.Index(fields=["last_used_at"], name="autotest_result_lru_idx")],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("solution_hash", "tests_hash", "runner_version"), name="autotest_result_key"
+                    )
+                ],
+            },
+        ),
+    ]
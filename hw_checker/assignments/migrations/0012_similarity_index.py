@@ -0,0 +1,88 @@
+# Generated by Django 5.2.7 on 2026-10-17 13:26
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("assignments", "0011_autotest_result_cache"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Fingerprint",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("value", models.BigIntegerField(verbose_name="Хеш")),
+                (
+                    "homework",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="assignments.homework",
+                        verbose_name="Домашнее задание",
+                    ),
+                ),
+                (
+                    "submission",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="fingerprints",
+                        to="assignments.submission",
+                        verbose_name="Отправка",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Отпечаток решения",
+                "verbose_name_plural": "Отпечатки решений",
+                "indexes": [models.Index(fields=["homework", "value"], name="fingerprint_lookup_idx")],
+                "constraints": [models.UniqueConstraint(fields=("submission", "value"), name="fingerprint_unique")],
+            },
+        ),
+        migrations.CreateModel(
+            name="SimilarityMatch",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("shared", models.PositiveIntegerField(verbose_name="Общих отпечатков")),
+                ("score", models.FloatField(verbose_name="Похожесть")),
+                ("updated_at", models.DateTimeField(auto_now=True, verbose_name="Дата обновления")),
+                (
+                    "first",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="assignments.submission",
+                        verbose_name="Первая отправка",
+                    ),
+                ),
+                (
+                    "homework",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="similarity_matches",
+                        to="assignments.homework",
+                        verbose_name="Домашнее задание",
+                    ),
+                ),
+                (
+                    "second",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="assignments.submission",
+                        verbose_name="Вторая отправка",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Похожие решения",
+                "verbose_name_plural": "Похожие решения",
+                "ordering": ["-score"],
+                "indexes": [models.Index(fields=["homework", "-score"], name="similarity_hw_score_idx")],
+                "constraints": [models.UniqueConstraint(fields=("first", "second"), name="similarity_match_pair")],
+            },
+        ),
+    ]
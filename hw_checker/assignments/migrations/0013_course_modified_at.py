@@ -0,0 +1,20 @@
+# Generated by Django 5.2.7 on 2026-10-17 18:40
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("assignments", "0012_similarity_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="course",
+            name="modified_at",
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now, verbose_name="Дата изменения"),
+            preserve_default=False,
+        ),
+    ]
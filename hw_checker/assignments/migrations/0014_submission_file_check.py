@@ -0,0 +1,28 @@
+# Generated by Django 5.2.7 on 2026-10-17 15:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("assignments", "0013_course_modified_at"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="submission",
+            name="file_check",
+            field=models.CharField(
+                blank=True,
+                choices=[("", "Не проверялся"), ("ok", "Файл в порядке"), ("rejected", "Файл отклонен")],
+                max_length=10,
+                verbose_name="Проверка файла",
+            ),
+        ),
+        migrations.AddField(
+            model_name="submission",
+            name="file_check_message",
+            field=models.CharField(blank=True, max_length=255, verbose_name="Причина отклонения файла"),
+        ),
+    ]
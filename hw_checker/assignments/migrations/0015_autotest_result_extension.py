@@ -0,0 +1,28 @@
+# Generated by Django 5.2.7 on 2026-10-17 16:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("assignments", "0014_submission_file_check"),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name="autotestresult",
+            name="autotest_result_key",
+        ),
+        migrations.AddField(
+            model_name="autotestresult",
+            name="solution_extension",
+            field=models.CharField(default="", max_length=10, verbose_name="Расширение решения"),
+        ),
+        migrations.AddConstraint(
+            model_name="autotestresult",
+            constraint=models.UniqueConstraint(
+                fields=("solution_hash", "solution_extension", "tests_hash", "runner_version"), name="autotest_result_key"
+            ),
+        ),
+    ]
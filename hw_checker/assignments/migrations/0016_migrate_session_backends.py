@@ -0,0 +1,25 @@
+# Generated by Django 5.2.7 on 2026-10-17 18:40
+
+from django.db import migrations
+
+from assignments.backends import LEGACY_BACKEND, PROFILE_BACKEND, migrate_session_backends
+
+
+def forwards(apps, schema_editor):
+    migrate_session_backends(apps)
+
+
+def backwards(apps, schema_editor):
+    migrate_session_backends(apps, old=PROFILE_BACKEND, new=LEGACY_BACKEND)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("assignments", "0015_autotest_result_extension"),
+        ("sessions", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, backwards),
+    ]
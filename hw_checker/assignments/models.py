@@ -4,19 +4,40 @@
 Содержит модели для:
 - Профилей пользователей (студенты и преподаватели)
 - Домашних заданий
-- Отправленных работ студентов
+- Отправленных работ студентов и результатов их автоматической проверки
+- Кеша результатов автопроверки
+- Индекса отпечатков решений и найденных похожих пар (антиплагиат)
+- Агрегированной статистики оценок (курс, задание, студент на курсе)
+- Учета ссылок на файлы решений в контентно-адресуемом хранилище
+- Очереди фоновых задач
+
+Обработчики сигналов, которые обновляют статистику, ссылки на файлы,
+отметку изменения курса и кеш dashboard, находятся в signals.py.
 """
 
 import os
+import uuid
 
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
 from django.db.models.signals import post_save
 from django.dispatch import receiver
+from django.utils import timezone
+
+from .sandbox import AUTOTEST_EXTENSIONS
+from .storage import get_submission_storage
 
 User = get_user_model()
 
+# Расширения решений, которые сравниваются антиплагиатом (см. similarity.py)
+SIMILARITY_EXTENSIONS = [".py", ".txt"]
+
+# Ограничения на файл решения (проверяются и при порционной загрузке)
+MAX_SOLUTION_SIZE_MB = 10
+ALLOWED_SOLUTION_EXTENSIONS = [".pdf", ".doc", ".docx", ".txt", ".py", ".zip", ".jpg", ".jpeg", ".png"]
+
 
 def validate_file_size(file):
     """
@@ -28,7 +49,7 @@ def validate_file_size(file):
     Raises:
         ValidationError: Если размер файла превышает лимит
     """
-    max_size_mb = 10
+    max_size_mb = MAX_SOLUTION_SIZE_MB
     if file.size > max_size_mb * 1024 * 1024:
         raise ValidationError(f"Максимальный размер файла {max_size_mb}МБ. Ваш файл: {file.size / (1024 * 1024):.2f}МБ")
 
@@ -44,11 +65,24 @@ def validate_file_extension(file):
         ValidationError: Если расширение файла не разрешено
     """
     ext = os.path.splitext(file.name)[1].lower()
-    valid_extensions = [".pdf", ".doc", ".docx", ".txt", ".py", ".zip", ".jpg", ".jpeg", ".png"]
+    valid_extensions = ALLOWED_SOLUTION_EXTENSIONS
     if ext not in valid_extensions:
         raise ValidationError(f"Неподдерживаемый формат файла. Разрешены: {', '.join(valid_extensions)}")
 
 
+def validate_test_file(file):
+    """
+    Валидатор файла тестов задания (модуль Python с тестами unittest).
+
+    Raises:
+        ValidationError: Если файл не .py или больше 1 МБ
+    """
+    if os.path.splitext(file.name)[1].lower() != ".py":
+        raise ValidationError("Файл тестов должен быть модулем Python (.py)")
+    if file.size > 1024 * 1024:
+        raise ValidationError("Максимальный размер файла тестов 1МБ")
+
+
 class UserProfile(models.Model):
     """Профиль пользователя с ролью"""
 
@@ -109,6 +143,8 @@ class Course(models.Model):
         limit_choices_to={"profile__role": "student"},
     )
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Дата создания")
+    # Обновляется и при изменении заданий, работ, оценок и состава курса (см. touch_courses)
+    modified_at = models.DateTimeField(auto_now=True, verbose_name="Дата изменения")
 
     class Meta:
         verbose_name = "Курс"
@@ -127,11 +163,24 @@ class Homework(models.Model):
     description = models.TextField(verbose_name="Описание")
     due_date = models.DateTimeField(verbose_name="Срок сдачи")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Дата создания")
+    test_file = models.FileField(
+        upload_to="homework_tests/",
+        blank=True,
+        verbose_name="Тесты для автоматической проверки",
+        validators=[validate_test_file],
+    )
+    test_timeout = models.PositiveIntegerField(default=10, verbose_name="Время на тесты, сек")
 
     class Meta:
         verbose_name = "Домашнее задание"
         verbose_name_plural = "Домашние задания"
         ordering = ["-created_at"]
+        indexes = [
+            # Задания курса по сроку сдачи (таблица оценок, отчет студента)
+            models.Index(fields=["course", "due_date"], name="homework_course_due_idx"),
+            # Задания курса, новые сверху (страницы курса)
+            models.Index(fields=["course", "-created_at"], name="homework_course_recent_idx"),
+        ]
 
     def __str__(self):
         return f"{self.course.title} - {self.title}"
@@ -140,28 +189,88 @@ class Homework(models.Model):
 class Submission(models.Model):
     """Модель отправки работы студентом"""
 
+    TEST_STATUS_CHOICES = [
+        ("", "Не проверялась"),
+        ("queued", "В очереди"),
+        ("passed", "Тесты пройдены"),
+        ("failed", "Есть ошибки"),
+        ("error", "Ошибка запуска"),
+        ("timeout", "Превышено время"),
+    ]
+
+    FILE_CHECK_CHOICES = [
+        ("", "Не проверялся"),
+        ("ok", "Файл в порядке"),
+        ("rejected", "Файл отклонен"),
+    ]
+
     homework = models.ForeignKey(
         Homework, on_delete=models.CASCADE, related_name="submissions", verbose_name="Домашнее задание"
     )
     student = models.ForeignKey(User, on_delete=models.CASCADE, related_name="submissions", verbose_name="Студент")
     solution_file = models.FileField(
         upload_to="submissions/",
+        storage=get_submission_storage,
+        max_length=255,
         verbose_name="Файл с решением",
         validators=[validate_file_size, validate_file_extension],
     )
     submitted_at = models.DateTimeField(auto_now_add=True, verbose_name="Дата отправки")
     grade = models.IntegerField(null=True, blank=True, verbose_name="Оценка")
     feedback = models.TextField(blank=True, verbose_name="Отзыв преподавателя")
+    test_status = models.CharField(
+        max_length=10, choices=TEST_STATUS_CHOICES, blank=True, verbose_name="Результат автопроверки"
+    )
+    tests_passed = models.PositiveIntegerField(null=True, blank=True, verbose_name="Пройдено тестов")
+    tests_total = models.PositiveIntegerField(null=True, blank=True, verbose_name="Всего тестов")
+    test_output = models.TextField(blank=True, verbose_name="Вывод тестов")
+    tested_at = models.DateTimeField(null=True, blank=True, verbose_name="Дата автопроверки")
+    # Заполняются фоновой проверкой файла (tasks.inspect_submission)
+    file_check = models.CharField(max_length=10, choices=FILE_CHECK_CHOICES, blank=True, verbose_name="Проверка файла")
+    file_check_message = models.CharField(max_length=255, blank=True, verbose_name="Причина отклонения файла")
 
     class Meta:
         verbose_name = "Отправка работы"
         verbose_name_plural = "Отправки работ"
         ordering = ["-submitted_at"]
         unique_together = ["homework", "student"]
+        indexes = [
+            # Лента работ преподавателя с keyset-пагинацией по (submitted_at, id)
+            models.Index(fields=["-submitted_at", "-id"], name="submission_recent_idx"),
+            # Та же лента с фильтром "На проверке"
+            models.Index(
+                fields=["-submitted_at", "-id"],
+                condition=models.Q(grade__isnull=True),
+                name="submission_pending_idx",
+            ),
+            # Работы по заданию, новые сверху
+            models.Index(fields=["homework", "-submitted_at", "-id"], name="submission_hw_recent_idx"),
+            # Работы студента, новые сверху (my_submissions)
+            models.Index(fields=["student", "-submitted_at"], name="submission_student_recent_idx"),
+        ]
 
     def __str__(self):
         return f"{self.student.username} - {self.homework.title}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Запоминаем загруженное состояние для инкрементального пересчета статистики
+        # pylint: disable=no-member,protected-access
+        instance._loaded_state = instance.stats_state()
+        instance._loaded_file = instance.solution_file.name
+        return instance
+
+    def save(self, *args, **kwargs):
+        # Файл сохраняется в хранилище под блокировкой записи StoredFile (см. storage.py),
+        # которая должна держаться, пока сигнал сохранения не учтет ссылку на него
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+    def stats_state(self):
+        """Вклад отправки в статистику: (homework_id, student_id, grade)"""
+        return self.homework_id, self.student_id, self.grade
+
 
 class CourseEnrollmentRequest(models.Model):
     """Модель заявки студента на зачисление на курс"""
@@ -212,6 +321,468 @@ class CourseEnrollmentRequest(models.Model):
         verbose_name_plural = "Заявки на курсы"
         ordering = ["-created_at"]
         unique_together = ["course", "student"]
+        indexes = [
+            # Ожидающие заявки курса, новые сверху (manage_students)
+            models.Index(
+                fields=["course", "-created_at"],
+                condition=models.Q(status="pending"),
+                name="enrollment_pending_idx",
+            ),
+            # История обработанных заявок курса
+            models.Index(fields=["course", "status", "-processed_at"], name="enrollment_processed_idx"),
+        ]
 
     def __str__(self):
         return f"{self.student.username} → {self.course.title} ({self.get_status_display()})"
+
+
+class UploadSession(models.Model):
+    """
+    Незавершенная порционная (возобновляемая) загрузка файла решения.
+
+    Каждая принятая порция хранится отдельным файлом в хранилище; при
+    завершении загрузки порции склеиваются в файл отправки.
+    """
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    homework = models.ForeignKey(
+        Homework, on_delete=models.CASCADE, related_name="upload_sessions", verbose_name="Домашнее задание"
+    )
+    student = models.ForeignKey(User, on_delete=models.CASCADE, related_name="upload_sessions", verbose_name="Студент")
+    filename = models.CharField(max_length=255, verbose_name="Имя файла")
+    size = models.PositiveIntegerField(verbose_name="Заявленный размер")
+    received = models.PositiveIntegerField(default=0, verbose_name="Получено байт")
+    chunk_count = models.PositiveIntegerField(default=0, verbose_name="Получено порций")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Дата начала")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Последняя порция")
+
+    class Meta:
+        verbose_name = "Загрузка файла"
+        verbose_name_plural = "Загрузки файлов"
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"{self.student.username} - {self.filename} ({self.received}/{self.size})"
+
+    def chunk_name(self, index):
+        """Путь порции с номером index в хранилище"""
+        return f"uploads/{self.pk}/{index:06d}.part"
+
+    @property
+    def is_complete(self):
+        return self.received == self.size
+
+
+class StoredFile(models.Model):
+    """
+    Учет ссылок на файл в контентно-адресуемом хранилище решений.
+
+    Один файл может принадлежать нескольким отправкам с одинаковым
+    содержимым; файл удаляется, когда на него не остается ссылок.
+    Счетчик поддерживается сигналами ``Submission`` и может быть пересобран
+    командой ``migrate_submission_files``.
+    """
+
+    name = models.CharField(max_length=255, unique=True, verbose_name="Путь в хранилище")
+    ref_count = models.PositiveIntegerField(default=0, verbose_name="Число ссылок")
+
+    class Meta:
+        verbose_name = "Файл решения"
+        verbose_name_plural = "Файлы решений"
+
+    def __str__(self):
+        return f"{self.name} ({self.ref_count})"
+
+    @classmethod
+    def lock(cls, name):
+        """
+        Запись файла, заблокированная до конца текущей транзакции.
+
+        Если записи нет, она создается без ссылок. Хранилище проверяет
+        наличие файла и переносит его на место, а сборщик удаляет файл под
+        этой блокировкой, поэтому повторно сохраненный файл не может быть
+        удален между проверкой и учетом ссылки.
+        """
+        # UPDATE блокирует строку и там, где select_for_update не поддерживается (SQLite)
+        if cls.objects.filter(name=name).update(ref_count=F("ref_count")):
+            return cls.objects.select_for_update().get(name=name)
+        stored, _ = cls.objects.select_for_update().get_or_create(name=name)
+        return stored
+
+    @classmethod
+    def acquire(cls, name):
+        """Увеличивает счетчик ссылок на файл (создает запись при первой ссылке)"""
+        if not cls.objects.filter(name=name).update(ref_count=F("ref_count") + 1):
+            cls.objects.create(name=name, ref_count=1)
+
+    @classmethod
+    def release(cls, name):
+        """Уменьшает счетчик ссылок; файл без ссылок удаляется фоновой задачей"""
+        cls.objects.filter(name=name, ref_count__gt=0).update(ref_count=F("ref_count") - 1)
+        Job.enqueue("collect_stored_file", file_name=name)
+
+
+def collect_stored_file(name):
+    """
+    Удаляет файл из хранилища, если на него больше никто не ссылается.
+
+    Returns:
+        bool: True, если файл был удален
+    """
+    with transaction.atomic():
+        stored = StoredFile.lock(name)
+        # Файлы, отправленные до появления учета ссылок, учитываются только в отправках
+        if stored.ref_count or Submission.objects.filter(solution_file=name).exists():
+            return False
+        # Файл удаляется под блокировкой записи: сохранение тех же байтов ждет конца транзакции
+        get_submission_storage().delete(name)
+        stored.delete()
+    return True
+
+
+class Job(models.Model):
+    """
+    Фоновая задача в очереди на основе БД.
+
+    Задачи выполняются воркерами (``manage.py run_workers``, см. jobs.py).
+    Воркер захватывает задачу на время visibility timeout; если он не
+    завершил ее за это время (например, упал), задачу захватит другой.
+    """
+
+    STATUS_CHOICES = [
+        ("queued", "В очереди"),
+        ("running", "Выполняется"),
+        ("done", "Выполнена"),
+        ("failed", "Ошибка"),
+    ]
+
+    name = models.CharField(max_length=100, verbose_name="Задача")
+    payload = models.JSONField(default=dict, blank=True, verbose_name="Параметры")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="queued", verbose_name="Статус")
+    attempts = models.PositiveIntegerField(default=0, verbose_name="Попыток")
+    max_attempts = models.PositiveIntegerField(default=3, verbose_name="Максимум попыток")
+    run_after = models.DateTimeField(default=timezone.now, verbose_name="Выполнить после")
+    locked_by = models.CharField(max_length=100, blank=True, verbose_name="Воркер")
+    locked_until = models.DateTimeField(null=True, blank=True, verbose_name="Захвачена до")
+    result = models.JSONField(null=True, blank=True, verbose_name="Результат")
+    last_error = models.TextField(blank=True, verbose_name="Последняя ошибка")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Дата постановки")
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name="Дата завершения")
+
+    class Meta:
+        verbose_name = "Фоновая задача"
+        verbose_name_plural = "Фоновые задачи"
+        ordering = ["-created_at"]
+        indexes = [
+            # Выбор готовых к выполнению задач воркерами
+            models.Index(fields=["status", "run_after"], name="job_ready_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.get_status_display()})"
+
+    @classmethod
+    def enqueue(cls, name, /, delay=None, max_attempts=3, **payload):
+        """
+        Ставит задачу в очередь.
+
+        Задача создается в текущей транзакции: при ее откате задача
+        не будет выполнена.
+
+        Args:
+            name: Имя зарегистрированной задачи (см. jobs.task)
+            delay: Отложить выполнение на timedelta
+            max_attempts: Число попыток до признания задачи неудачной
+            **payload: Параметры задачи (JSON-сериализуемые)
+
+        Returns:
+            Job: Созданная задача
+        """
+        run_after = timezone.now() + delay if delay else timezone.now()
+        return cls.objects.create(name=name, payload=payload, max_attempts=max_attempts, run_after=run_after)
+
+
+class AutotestResult(models.Model):
+    """
+    Закешированный результат запуска тестов (см. autotest.py).
+
+    Результат определяется содержимым решения, способом его размещения
+    (расширение файла: .py кладется модулем, .zip распаковывается),
+    содержимым тестов и параметрами песочницы - это и есть ключ кеша.
+    """
+
+    solution_hash = models.CharField(max_length=64, verbose_name="SHA-256 решения")
+    solution_extension = models.CharField(max_length=10, default="", verbose_name="Расширение решения")
+    tests_hash = models.CharField(max_length=64, verbose_name="SHA-256 тестов")
+    runner_version = models.CharField(max_length=64, verbose_name="Версия песочницы")
+    status = models.CharField(max_length=10, choices=Submission.TEST_STATUS_CHOICES, verbose_name="Результат")
+    tests_passed = models.PositiveIntegerField(default=0, verbose_name="Пройдено тестов")
+    tests_total = models.PositiveIntegerField(default=0, verbose_name="Всего тестов")
+    output = models.TextField(blank=True, verbose_name="Вывод тестов")
+    duration = models.FloatField(default=0, verbose_name="Длительность, сек")
+    hits = models.PositiveIntegerField(default=0, verbose_name="Попаданий")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Дата проверки")
+    last_used_at = models.DateTimeField(default=timezone.now, verbose_name="Последнее использование")
+
+    class Meta:
+        verbose_name = "Результат автопроверки"
+        verbose_name_plural = "Кеш результатов автопроверки"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["solution_hash", "solution_extension", "tests_hash", "runner_version"], name="autotest_result_key"
+            ),
+        ]
+        indexes = [
+            # Вытеснение давно не использованных результатов
+            models.Index(fields=["last_used_at"], name="autotest_result_lru_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.solution_hash[:12]} / {self.tests_hash[:12]}: {self.get_status_display()}"
+
+
+class Fingerprint(models.Model):
+    """
+    Отпечаток решения в инвертированном индексе задания (см. similarity.py).
+
+    Индекс (homework, value) позволяет найти все решения задания с заданным
+    отпечатком, не сравнивая решения попарно.
+    """
+
+    homework = models.ForeignKey(Homework, on_delete=models.CASCADE, related_name="+", verbose_name="Домашнее задание")
+    submission = models.ForeignKey(Submission, on_delete=models.CASCADE, related_name="fingerprints", verbose_name="Отправка")
+    value = models.BigIntegerField(verbose_name="Хеш")
+
+    class Meta:
+        verbose_name = "Отпечаток решения"
+        verbose_name_plural = "Отпечатки решений"
+        constraints = [
+            models.UniqueConstraint(fields=["submission", "value"], name="fingerprint_unique"),
+        ]
+        indexes = [
+            # Поиск решений задания с общими отпечатками
+            models.Index(fields=["homework", "value"], name="fingerprint_lookup_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.submission_id}: {self.value:x}"
+
+
+class SimilarityMatch(models.Model):
+    """Пара похожих решений задания (first - отправка с меньшим id)"""
+
+    homework = models.ForeignKey(
+        Homework, on_delete=models.CASCADE, related_name="similarity_matches", verbose_name="Домашнее задание"
+    )
+    first = models.ForeignKey(Submission, on_delete=models.CASCADE, related_name="+", verbose_name="Первая отправка")
+    second = models.ForeignKey(Submission, on_delete=models.CASCADE, related_name="+", verbose_name="Вторая отправка")
+    shared = models.PositiveIntegerField(verbose_name="Общих отпечатков")
+    score = models.FloatField(verbose_name="Похожесть")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Дата обновления")
+
+    class Meta:
+        verbose_name = "Похожие решения"
+        verbose_name_plural = "Похожие решения"
+        ordering = ["-score"]
+        constraints = [
+            models.UniqueConstraint(fields=["first", "second"], name="similarity_match_pair"),
+        ]
+        indexes = [
+            # Самые похожие пары задания
+            models.Index(fields=["homework", "-score"], name="similarity_hw_score_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.first_id} ~ {self.second_id}: {self.score:.0%}"
+
+
+class GradeStats(models.Model):
+    """
+    Базовая модель агрегированной статистики по отправкам.
+
+    Хранит счетчики, которые поддерживаются инкрементально сигналами
+    ``Submission`` и могут быть пересобраны командой ``rebuild_grade_stats``.
+
+    QuerySet.update(), bulk_update() и bulk_create() отправок сигналы не
+    вызывают: код, который ими пользуется, должен сам прибавить приращения
+    (apply_submission_stats/apply_delta) или пересобрать статистику
+    (grade_stats.rebuild_grade_stats), иначе счетчики разойдутся с данными.
+
+    Attributes:
+        key_fields: Поля отправки (course_id, homework_id, student_id),
+            идентифицирующие строку статистики
+    """
+
+    key_fields = ()
+
+    submitted_count = models.PositiveIntegerField(default=0, verbose_name="Сдано работ")
+    graded_count = models.PositiveIntegerField(default=0, verbose_name="Оценено работ")
+    grade_sum = models.BigIntegerField(default=0, verbose_name="Сумма оценок")
+
+    class Meta:
+        abstract = True
+
+    @property
+    def pending_count(self):
+        """Число работ, ожидающих проверки"""
+        return self.submitted_count - self.graded_count
+
+    @property
+    def average(self):
+        """Средняя оценка (0, если оценок нет)"""
+        return round(self.grade_sum / self.graded_count, 1) if self.graded_count else 0
+
+    @classmethod
+    def key_for(cls, course_id, homework_id, student_id):
+        """Возвращает поля, идентифицирующие строку статистики (см. key_fields)"""
+        values = {"course_id": course_id, "homework_id": homework_id, "student_id": student_id}
+        return {field: values[field] for field in cls.key_fields}
+
+    @classmethod
+    def apply_delta(cls, key, submitted, graded, grade_sum, *, create=True):  # pylint: disable=too-many-arguments
+        """
+        Атомарно прибавляет приращения к счетчикам строки статистики.
+
+        Args:
+            key: Поля, идентифицирующие строку (см. key_for)
+            submitted: Приращение числа сданных работ
+            graded: Приращение числа оцененных работ
+            grade_sum: Приращение суммы оценок
+            create: Создать строку, если ее еще нет
+        """
+        updated = cls.objects.filter(**key).update(
+            submitted_count=F("submitted_count") + submitted,
+            graded_count=F("graded_count") + graded,
+            grade_sum=F("grade_sum") + grade_sum,
+        )
+        if not updated and create:
+            cls.objects.create(submitted_count=submitted, graded_count=graded, grade_sum=grade_sum, **key)
+
+    @classmethod
+    def get_for(cls, **key):
+        """Возвращает строку статистики или пустую (несохраненную), если ее нет"""
+        return cls.objects.filter(**key).first() or cls(**key)
+
+
+class CourseGradeStats(GradeStats):
+    """Статистика отправок по курсу"""
+
+    course = models.OneToOneField(Course, on_delete=models.CASCADE, related_name="grade_stats", verbose_name="Курс")
+
+    key_fields = ("course_id",)
+
+    class Meta:
+        verbose_name = "Статистика курса"
+        verbose_name_plural = "Статистика курсов"
+
+    def __str__(self):
+        return f"{self.course.title}: {self.submitted_count}/{self.graded_count}"
+
+
+class HomeworkGradeStats(GradeStats):
+    """Статистика отправок по домашнему заданию"""
+
+    homework = models.OneToOneField(
+        Homework, on_delete=models.CASCADE, related_name="grade_stats", verbose_name="Домашнее задание"
+    )
+
+    key_fields = ("homework_id",)
+
+    class Meta:
+        verbose_name = "Статистика задания"
+        verbose_name_plural = "Статистика заданий"
+
+    def __str__(self):
+        return f"{self.homework.title}: {self.submitted_count}/{self.graded_count}"
+
+
+class StudentCourseGradeStats(GradeStats):
+    """Статистика отправок студента в рамках курса"""
+
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name="student_grade_stats", verbose_name="Курс")
+    student = models.ForeignKey(User, on_delete=models.CASCADE, related_name="course_grade_stats", verbose_name="Студент")
+
+    key_fields = ("course_id", "student_id")
+
+    class Meta:
+        verbose_name = "Статистика студента по курсу"
+        verbose_name_plural = "Статистика студентов по курсам"
+        unique_together = ["course", "student"]
+
+    def __str__(self):
+        return f"{self.student.username} - {self.course.title}: {self.submitted_count}/{self.graded_count}"
+
+
+GRADE_STATS_MODELS = (CourseGradeStats, HomeworkGradeStats, StudentCourseGradeStats)
+
+
+def apply_submission_stats(  # pylint: disable=too-many-arguments
+    homework_id, student_id, submitted, graded, grade_sum, *, create=True
+):
+    """
+    Прибавляет приращения счетчиков ко всем таблицам статистики отправки.
+
+    Args:
+        homework_id: id задания
+        student_id: id студента
+        submitted: Приращение числа сданных работ
+        graded: Приращение числа оцененных работ
+        grade_sum: Приращение суммы оценок
+        create: Создавать отсутствующие строки статистики
+    """
+    if not (submitted or graded or grade_sum):
+        return
+    course_id = Homework.objects.filter(pk=homework_id).values_list("course_id", flat=True).first()
+    if course_id is None:
+        # Задание уже удалено каскадно вместе со статистикой
+        return
+    for model in GRADE_STATS_MODELS:
+        model.apply_delta(model.key_for(course_id, homework_id, student_id), submitted, graded, grade_sum, create=create)
+
+
+def submission_stats_delta(state, sign):
+    """Переводит состояние отправки (homework_id, student_id, grade) в приращения счетчиков"""
+    homework_id, student_id, grade = state
+    return homework_id, student_id, sign, sign * (grade is not None), sign * (grade or 0)
+
+
+# ============= Отметка изменения курса =============
+#
+# Course.modified_at - время последнего изменения данных, которые видны на
+# страницах курса и dashboard его участников. Отметку обновляют обработчики
+# сигналов (см. signals.py); массовые операции без сигналов (grading.py,
+# enrollment.py) вызывают touch_courses сами.
+
+
+def touch_courses(course_ids):
+    """Обновляет отметку изменения курсов"""
+    Course.objects.filter(pk__in=course_ids).update(modified_at=timezone.now())
+
+
+def schedule_submission_tests(submission):
+    """
+    Сбрасывает результаты автопроверки отправки и ставит тесты в очередь.
+
+    Тесты запускаются, если у задания есть файл тестов, а решение имеет
+    проверяемое расширение (см. sandbox.AUTOTEST_EXTENSIONS).
+    """
+    name = submission.solution_file.name
+    testable = (
+        bool(name)
+        and os.path.splitext(name)[1].lower() in AUTOTEST_EXTENSIONS
+        and Homework.objects.filter(pk=submission.homework_id).exclude(test_file="").exists()
+    )
+    fields = {
+        "test_status": "queued" if testable else "",
+        "tests_passed": None,
+        "tests_total": None,
+        "test_output": "",
+        "tested_at": None,
+    }
+    # update() не вызывает сигналы сохранения отправки
+    Submission.objects.filter(pk=submission.pk).update(**fields)
+    for field, value in fields.items():
+        setattr(submission, field, value)
+    if testable:
+        Job.enqueue("run_submission_tests", submission_id=submission.pk)
+    return testable
@@ -0,0 +1,150 @@
+"""
+Keyset (курсорная) пагинация.
+
+В отличие от OFFSET-пагинации, следующая страница выбирается условием
+"строго после последней строки предыдущей страницы" по упорядоченному
+набору полей, поэтому глубокие страницы обходятся так же дешево, как
+первая, и не "съезжают" при вставке новых строк. Позиция передается
+в URL непрозрачной строкой-курсором.
+"""
+
+import base64
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+
+class InvalidCursor(ValueError):
+    """Курсор поврежден или не соответствует порядку сортировки"""
+
+
+class KeysetPage:
+    """
+    Страница результатов keyset-пагинации.
+
+    Attributes:
+        object_list: Объекты страницы
+        next_cursor: Курсор следующей страницы (None, если страница последняя)
+        cursor: Курсор, по которому получена страница (None для первой)
+    """
+
+    def __init__(self, object_list, next_cursor, cursor):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.cursor = cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+def encode_cursor(values):
+    """Кодирует значения полей сортировки в строку для URL"""
+    raw = json.dumps([value.isoformat() if hasattr(value, "isoformat") else value for value in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor, model, fields):
+    """
+    Декодирует курсор в значения полей сортировки.
+
+    Raises:
+        InvalidCursor: Если курсор не удается разобрать
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list) or len(values) != len(fields):
+            raise InvalidCursor(cursor)
+        values = [model._meta.get_field(name).to_python(value) for name, value in zip(fields, values)]
+    except (ValueError, TypeError, ValidationError) as exc:
+        # to_python сообщает о значении не того типа через ValidationError
+        raise InvalidCursor(cursor) from exc
+    # Поля сортировки не бывают NULL, а keyset_filter не может сравнивать с None
+    if any(value is None for value in values):
+        raise InvalidCursor(cursor)
+    return values
+
+
+def keyset_filter(ordering, values):
+    """
+    Строит условие "строка идет после values" для лексикографического порядка.
+
+    Args:
+        ordering: Поля сортировки, например ["-submitted_at", "-id"]
+        values: Значения этих полей у последней строки предыдущей страницы
+
+    Returns:
+        Q: (f1 > v1) OR (f1 = v1 AND f2 > v2) OR ... с учетом направления
+    """
+    condition = Q()
+    equal = Q()
+    for field, value in zip(ordering, values):
+        name = field.lstrip("-")
+        lookup = "lt" if field.startswith("-") else "gt"
+        condition |= equal & Q(**{f"{name}__{lookup}": value})
+        equal &= Q(**{name: value})
+    return condition
+
+
+def keyset_query(queryset, ordering, cursor=None):
+    """Упорядоченный queryset строк после позиции cursor"""
+    fields = [field.lstrip("-") for field in ordering]
+    queryset = queryset.order_by(*ordering)
+    if cursor:
+        queryset = queryset.filter(keyset_filter(ordering, decode_cursor(cursor, queryset.model, fields)))
+    return queryset
+
+
+def build_page(rows, ordering, cursor, per_page):
+    """
+    Страница из первых per_page + 1 строк (лишняя строка означает, что есть следующая).
+
+    Строки - объекты моделей или словари queryset.values() с полями сортировки.
+    """
+    object_list = rows[:per_page]
+    next_cursor = None
+    if len(rows) > per_page:
+        last = object_list[-1]
+        names = [field.lstrip("-") for field in ordering]
+        if isinstance(last, dict):
+            next_cursor = encode_cursor([last[name] for name in names])
+        else:
+            next_cursor = encode_cursor([getattr(last, name) for name in names])
+    return KeysetPage(object_list, next_cursor, cursor or None)
+
+
+def keyset_paginate(queryset, ordering, cursor=None, per_page=50):
+    """
+    Возвращает страницу queryset после позиции cursor.
+
+    Последнее поле ordering должно быть уникальным (обычно "id"), чтобы
+    порядок был строгим.
+
+    Args:
+        queryset: Исходный queryset
+        ordering: Поля сортировки, например ["-submitted_at", "-id"]
+        cursor: Курсор из предыдущей страницы (None или "" - первая страница)
+        per_page: Размер страницы
+
+    Returns:
+        KeysetPage: Страница результатов
+
+    Raises:
+        InvalidCursor: Если курсор поврежден
+    """
+    rows = list(keyset_query(queryset, ordering, cursor)[: per_page + 1])
+    return build_page(rows, ordering, cursor, per_page)
+
+
+async def akeyset_paginate(queryset, ordering, cursor=None, per_page=50):
+    """Асинхронная версия keyset_paginate (для асинхронных представлений)"""
+    rows = [row async for row in keyset_query(queryset, ordering, cursor)[: per_page + 1]]
+    return build_page(rows, ordering, cursor, per_page)
@@ -0,0 +1,72 @@
+"""
+Проверка роли пользователя и его принадлежности к курсу.
+
+Вместо загрузки всего списка преподавателей или студентов курса
+(``request.user in course.teachers.all()``) членство проверяется одним
+EXISTS-запросом к промежуточной таблице связи, где пара (course_id, user_id)
+покрыта уникальным индексом. Результат запоминается на объекте запроса,
+поэтому повторные проверки в рамках одного запроса бесплатны.
+
+Роль пользователя берется из профиля, который ProfileModelBackend
+загружает вместе с пользователем сессии, поэтому get_user_role не
+обращается к БД.
+"""
+
+from .models import Course
+
+# Роль -> промежуточная модель связи курса с пользователями
+ROLE_RELATIONS = {
+    "teacher": Course.teachers.through,
+    "student": Course.students.through,
+}
+
+
+def get_user_role(user):
+    """
+    Возвращает роль пользователя ("student" / "teacher") или None.
+
+    Args:
+        user: Пользователь (в том числе анонимный или без профиля)
+    """
+    if not user.is_authenticated or not hasattr(user, "profile"):
+        return None
+    return user.profile.role
+
+
+def has_course_role(request, course_id, role):
+    """
+    Проверяет, является ли текущий пользователь преподавателем или студентом курса.
+
+    Args:
+        request: HTTP-запрос (на нем кэшируется результат)
+        course_id: id курса
+        role: "teacher" или "student"
+
+    Returns:
+        bool: True, если пользователь связан с курсом в указанной роли
+    """
+    user = request.user
+    if not user.is_authenticated:
+        return False
+
+    cache = request.__dict__.setdefault("_course_roles", {})
+    key = (role, int(course_id))
+    if key not in cache:
+        relation = ROLE_RELATIONS[role]
+        cache[key] = relation.objects.filter(course_id=course_id, user_id=user.pk).exists()
+    return cache[key]
+
+
+def is_course_teacher(request, course_id):
+    """Является ли текущий пользователь преподавателем курса"""
+    return has_course_role(request, course_id, "teacher")
+
+
+def is_course_student(request, course_id):
+    """Записан ли текущий пользователь на курс"""
+    return has_course_role(request, course_id, "student")
+
+
+def forget_course_roles(request):
+    """Сбрасывает кэш проверок членства (после изменения состава курса)"""
+    request.__dict__.pop("_course_roles", None)
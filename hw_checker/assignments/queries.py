@@ -0,0 +1,14 @@
+"""
+Общие выражения для запросов к БД.
+
+Используются представлениями страниц (views.py) и JSON API (api.py).
+"""
+
+from django.db.models import Func, IntegerField, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_subquery(queryset):
+    """Коррелированный подзапрос COUNT(*) по queryset (0, если строк нет)"""
+    counted = queryset.order_by().annotate(count=Func("pk", function="COUNT")).values("count")
+    return Coalesce(Subquery(counted, output_field=IntegerField()), 0)
@@ -0,0 +1,247 @@
+"""
+Автоматическая проверка решений тестами преподавателя.
+
+Решение (``.py`` или ``.zip``) и файл тестов задания копируются во
+временный каталог, после чего тесты запускаются отдельным процессом
+интерпретатора (sandbox_runner.py) с ограничениями ресурсов, таймаутом,
+пустым окружением и без доступа к сети. Процессы запускаются воркерами
+очереди задач (``manage.py run_workers --processes N``), поэтому число
+одновременных проверок равно размеру пула воркеров.
+
+Итог считает воркер по подписанным событиям процесса тестов, а код
+решения выполняется под хуком аудита: без сети, процессов, ctypes и
+sqlite3, с записью только в рабочий каталог и без возможности подменить
+unittest (см. sandbox_runner.py). Если есть утилита unshare, процесс
+дополнительно запускается в пустом сетевом пространстве имен. Решение
+проходит проверку, только если пройден хотя бы один тест. Для
+недоверенного кода воркеры стоит дополнительно запускать в контейнере
+без сети от отдельного пользователя.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from functools import cache
+
+from django.conf import settings
+
+from .sandbox_runner import KEY_SIZE, read_events, summarize
+
+# Расширения решений, которые проверяются автоматически
+AUTOTEST_EXTENSIONS = [".py", ".zip"]
+
+# Имя, под которым в рабочий каталог кладется решение-файл .py и тесты
+SOLUTION_MODULE = "solution.py"
+TESTS_MODULE = "test_homework.py"
+
+# Сколько байтов вывода тестов сохраняется в отправке
+MAX_OUTPUT_SIZE = 16 * 1024
+
+# Предел суммарного размера распакованного архива решения
+MAX_EXTRACTED_SIZE = 50 * 1024 * 1024
+
+RUNNER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sandbox_runner.py")
+
+# Увеличивается при изменениях песочницы, влияющих на результат проверки
+# (изменения sandbox_runner.py учитываются автоматически, см. runner_version)
+RUNNER_VERSION = 2
+
+DEFAULT_LIMITS = {
+    "memory_bytes": 512 * 1024 * 1024,
+    "file_size_bytes": 16 * 1024 * 1024,
+    "open_files": 64,
+    "processes": None,
+}
+
+
+class SandboxError(Exception):
+    """Решение нельзя подготовить к запуску (например, поврежденный архив)"""
+
+
+def sandbox_limits(timeout):
+    """Ограничения ресурсов процесса тестов с учетом настройки AUTOTEST_LIMITS"""
+    limits = {**DEFAULT_LIMITS, **getattr(settings, "AUTOTEST_LIMITS", {})}
+    # Процессорное время не больше таймаута: зависший процесс снимет ядро
+    limits.setdefault("cpu_seconds", max(int(timeout), 1))
+    return limits
+
+
+@cache
+def network_isolation():
+    """
+    Префикс команды, запускающий процесс в пустом сетевом пространстве имен.
+
+    Используется утилита unshare (util-linux). Без прав root пространство
+    создается вместе с пользовательским; если ядро не разрешает ни того, ни
+    другого, префикс пуст и сеть запрещает только хук аудита.
+    """
+    unshare = shutil.which("unshare")
+    if unshare is None:
+        return []
+    for prefix in ([unshare, "--net"], [unshare, "--net", "--map-root-user"]):
+        probe = subprocess.run([*prefix, "true"], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        if probe.returncode == 0:
+            return prefix
+    return []
+
+
+def runner_version(timeout, limits=None):
+    """
+    Отпечаток параметров песочницы, от которых зависит результат проверки.
+
+    Учитывает RUNNER_VERSION, текст запускающего скрипта, интерпретатор,
+    таймаут и ограничения ресурсов.
+    """
+    limits = sandbox_limits(timeout) if limits is None else limits
+    digest = hashlib.sha256()
+    with open(RUNNER_PATH, "rb") as f:
+        digest.update(f.read())
+    interpreter = getattr(settings, "AUTOTEST_PYTHON", None) or sys.executable
+    digest.update(json.dumps([RUNNER_VERSION, interpreter, timeout, limits], sort_keys=True).encode())
+    return digest.hexdigest()
+
+
+def extract_archive(source, workdir):
+    """
+    Безопасно распаковывает ZIP-архив решения в workdir.
+
+    Raises:
+        SandboxError: Если архив поврежден, слишком велик или содержит пути вне workdir
+    """
+    try:
+        with zipfile.ZipFile(source) as archive:
+            entries = archive.infolist()
+            if sum(entry.file_size for entry in entries) > MAX_EXTRACTED_SIZE:
+                raise SandboxError("Архив слишком велик после распаковки")
+            root = os.path.realpath(workdir)
+            for entry in entries:
+                target = os.path.realpath(os.path.join(root, entry.filename))
+                if os.path.commonpath([root, target]) != root:
+                    raise SandboxError(f"Недопустимый путь в архиве: {entry.filename}")
+            archive.extractall(root)
+    except (zipfile.BadZipFile, EOFError) as exc:
+        raise SandboxError("Поврежденный ZIP-архив") from exc
+
+
+def prepare_workdir(workdir, solution_name, solution, tests):
+    """
+    Размещает решение и тесты в рабочем каталоге.
+
+    Файл .py кладется как модуль ``solution``, архив распаковывается в корень
+    каталога. Тесты кладутся последними, чтобы решение не могло их подменить.
+    """
+    if os.path.splitext(solution_name)[1].lower() == ".zip":
+        extract_archive(solution, workdir)
+    else:
+        with open(os.path.join(workdir, SOLUTION_MODULE), "wb") as f:
+            shutil.copyfileobj(solution, f)
+    with open(os.path.join(workdir, TESTS_MODULE), "wb") as f:
+        shutil.copyfileobj(tests, f)
+
+
+def read_output(path, limit=MAX_OUTPUT_SIZE):
+    """Начало файла вывода (не больше limit байтов)"""
+    with open(path, "rb") as f:
+        data = f.read(limit + 1)
+    text = data[:limit].decode("utf-8", errors="replace")
+    return text + "\n... (вывод обрезан)" if len(data) > limit else text
+
+
+def run_process(command, workdir, output, timeout):
+    """
+    Запускает процесс тестов и читает его подписанные события.
+
+    Ключ подписи передается через stdin, события приходят по отдельному
+    каналу (его номер - последний аргумент команды) и читаются в потоке,
+    чтобы процесс не блокировался на заполненном канале.
+
+    Returns:
+        tuple: (события или None, если они поддельные, превышен ли таймаут)
+    """
+    key = os.urandom(KEY_SIZE)
+    read_fd, write_fd = os.pipe()
+    env = {"PATH": os.defpath, "HOME": workdir, "TMPDIR": workdir, "LANG": "C.UTF-8", "PYTHONDONTWRITEBYTECODE": "1"}
+    with os.fdopen(read_fd, "rb") as stream, ThreadPoolExecutor(max_workers=1) as reader:
+        try:
+            # Отдельная группа процессов: по таймауту снимаются и порожденные процессы
+            process = subprocess.Popen(
+                [*command, str(write_fd)],
+                cwd=workdir,
+                env=env,
+                stdin=subprocess.PIPE,
+                stdout=output,
+                stderr=output,
+                pass_fds=[write_fd],
+                start_new_session=True,
+            )
+        finally:
+            os.close(write_fd)
+        events = reader.submit(read_events, stream, key)
+        try:
+            process.stdin.write(key)
+            process.stdin.close()
+        except BrokenPipeError:
+            pass
+        try:
+            process.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            os.killpg(process.pid, signal.SIGKILL)
+            process.wait()
+            return None, True
+        return events.result(), False
+
+
+def run_tests(solution_name, solution, tests, timeout=10, limits=None):
+    """
+    Запускает тесты для решения в изолированном процессе.
+
+    Args:
+        solution_name: Имя файла решения (по расширению выбирается способ размещения)
+        solution: Файловый объект решения
+        tests: Файловый объект тестов (unittest)
+        timeout: Предел времени выполнения, сек
+        limits: Ограничения ресурсов (по умолчанию sandbox_limits(timeout))
+
+    Returns:
+        dict: status ("passed", "failed", "error" или "timeout"), passed, total,
+        output (начало вывода) и duration (сек)
+    """
+    limits = sandbox_limits(timeout) if limits is None else limits
+    started = time.monotonic()
+    with tempfile.TemporaryDirectory(prefix="hw-sandbox-") as root:
+        workdir = os.path.join(root, "work")
+        os.mkdir(workdir)
+        output_path = os.path.join(root, "output.txt")
+        try:
+            prepare_workdir(workdir, solution_name, solution, tests)
+        except SandboxError as exc:
+            return {"status": "error", "passed": 0, "total": 0, "output": str(exc), "duration": 0.0}
+
+        command = [*network_isolation(), getattr(settings, "AUTOTEST_PYTHON", None) or sys.executable, "-I", RUNNER_PATH]
+        command += [workdir, os.path.join(workdir, TESTS_MODULE), json.dumps(limits)]
+        with open(output_path, "wb") as output:
+            events, timed_out = run_process(command, workdir, output, timeout)
+        report = {"output": read_output(output_path), "duration": round(time.monotonic() - started, 3)}
+        summary = summarize(events)
+
+    if timed_out:
+        return {"status": "timeout", "passed": 0, "total": 0, **report}
+    if summary is None or summary["total"] == 0:
+        # Процесс упал (ограничение памяти, ошибка импорта) или тестов не найдено
+        return {"status": "error", "passed": 0, "total": summary["total"] if summary else 0, **report}
+    passed = summary["total"] - summary["failed"] - summary["skipped"]
+    # Решение, пропустившее все тесты (SkipTest), не проходит проверку
+    return {
+        "status": "passed" if not summary["failed"] and passed > 0 else "failed",
+        "passed": passed,
+        "total": summary["total"],
+        **report,
+    }
@@ -0,0 +1,782 @@
+"""
+Запуск тестов решения внутри изолированного процесса.
+
+Скрипт запускается интерпретатором в отдельном процессе (см. sandbox.py)
+и не зависит от Django. Воркер, запустивший процесс, передает ему ключ
+подписи и сам подсчитывает итог по подписанным событиям о тестах
+(parse_event, read_events и summarize ниже): неподписанное событие,
+нарушенный порядок событий или отсутствие события о завершении означают
+ошибку запуска. Поддельный итог код решения записать не может.
+
+Процесс тестов:
+
+1. выставляет ограничения ресурсов (setrlimit) - мягкий и жесткий пределы
+   совпадают, поэтому код решения не может их поднять;
+2. до загрузки тестов (они импортируют решение) снимает состояние unittest,
+   traceback, builtins и устанавливает хук аудита, который:
+
+   - запрещает сеть, запуск процессов, сигналы другим процессам, импорт
+     ctypes, sqlite3 и двоичных модулей вне каталогов установки Python;
+   - разрешает запись только в рабочем каталоге, а чтение - еще и в
+     каталогах установки Python (открыть каталог и сменить текущий каталог
+     нельзя, поэтому пути проверяются так же, как их разрешает ядро);
+   - запрещает коду решения доступ к кадрам стека, обход объектов сборщика
+     мусора, трассировку и подмену кода функций unittest и тестов;
+
+3. после запуска отправляет события о тестах по результату unittest,
+   недоступному коду решения.
+
+После загрузки тестов, при каждом доступе к кадрам (форматирование ошибок)
+и после запуска состояние сверяется со снимком: подмененная проверка
+(например, assertEqual, который ничего не проверяет) дает ошибку запуска,
+а не пройденные тесты. Ключ подписи хранится только в замыкании, модуль
+скрипта убирается из sys.modules, а классов скрипт не определяет: иначе
+их методы открыли бы коду решения глобальные переменные скрипта.
+
+Хук аудита - не граница безопасности уровня ОС: для недоверенного кода
+воркеры по-прежнему стоит запускать в контейнере от отдельного пользователя.
+
+Использование (ключ подписи - первые KEY_SIZE байтов stdin):
+    python -I sandbox_runner.py <рабочий каталог> <файл тестов> <ограничения JSON> <дескриптор событий>
+"""
+
+import builtins
+import hashlib
+import hmac
+import importlib
+import json
+import logging
+import os
+import resource
+import socket
+import sys
+import sysconfig
+import traceback
+import types
+import unittest
+from _thread import get_ident
+from itertools import count
+from json.encoder import encode_basestring_ascii
+from operator import is_
+
+LIMITS = {
+    "cpu_seconds": resource.RLIMIT_CPU,
+    "memory_bytes": resource.RLIMIT_AS,
+    "file_size_bytes": resource.RLIMIT_FSIZE,
+    "open_files": resource.RLIMIT_NOFILE,
+    "processes": resource.RLIMIT_NPROC,
+}
+
+# Размер ключа подписи событий и предел длины одного события
+KEY_SIZE = 32
+MAX_EVENT_SIZE = 64 * 1024
+
+# Исходы, при которых тест считается непройденным
+FAILED_OUTCOMES = {"failure", "error", "unexpected_success"}
+
+# Функции и типы, которыми процесс тестов пользуется после запуска кода
+# решения. Они связаны с именами модуля заранее: подмена атрибутов os,
+# hashlib или sys кодом решения их не затрагивает.
+write = os.write
+fspath = os.fspath
+getcwd = os.getcwd
+blake2b = hashlib.blake2b
+getframe = sys._getframe  # pylint: disable=protected-access  # единственный способ найти вызывающий код в хуке
+FunctionType = types.FunctionType
+ModuleType = types.ModuleType
+DESCRIPTOR_TYPES = (types.GetSetDescriptorType, types.MemberDescriptorType)
+TestCase = unittest.TestCase
+TestLoader = unittest.TestLoader
+TextTestResult = unittest.TextTestResult
+# Внутренние классы unittest: результат теста строится так же, как в TextTestRunner
+WritelnDecorator = unittest.runner._WritelnDecorator  # pylint: disable=protected-access
+ErrorHolder = unittest.suite._ErrorHolder  # pylint: disable=protected-access
+SubTest = unittest.case._SubTest  # pylint: disable=protected-access
+strclass = unittest.util.strclass
+DEVNULL = os.devnull
+FS_ENCODING = sys.getfilesystemencoding()
+ACCESS_FLAGS = os.O_WRONLY | os.O_RDWR
+WRITE_FLAGS = ACCESS_FLAGS | os.O_APPEND | os.O_CREAT | os.O_TRUNC
+NETWORK_FAMILIES = {socket.AF_INET, socket.AF_INET6}
+
+
+def apply_limits(limits):
+    """Выставляет ограничения ресурсов процесса (None - без ограничения)"""
+    for key, value in limits.items():
+        if value is not None and key in LIMITS:
+            resource.setrlimit(LIMITS[key], (value, value))
+
+
+def sign(key, payload):
+    """Подпись события (BLAKE2b с ключом)"""
+    return blake2b(payload, key=key).hexdigest().encode()
+
+
+# ============= Проверка событий (в воркере) =============
+
+
+def parse_event(line, key, sequence):
+    """
+    Проверяет подпись и номер события.
+
+    Returns:
+        tuple: (событие, id теста, исход) или None, если событие поддельное
+    """
+    if not line.endswith(b"\n"):
+        return None
+    mac, _, payload = line[:-1].partition(b" ")
+    if not hmac.compare_digest(mac, sign(key, payload)):
+        return None
+    try:
+        number, event, outcome, test = payload.decode().split("\t")
+        if int(number) != sequence:
+            return None
+        return event, json.loads(test), outcome
+    except ValueError:
+        return None
+
+
+def read_events(stream, key):
+    """
+    Читает события процесса тестов до закрытия канала.
+
+    Returns:
+        list: События или None, если хотя бы одно из них поддельное
+    """
+    events = []
+    for line in iter(lambda: stream.readline(MAX_EVENT_SIZE), b""):
+        # После поддельного события канал дочитывается, чтобы не блокировать запись
+        if events is not None:
+            event = parse_event(line, key, len(events))
+            if event is None:
+                events = None
+            else:
+                events.append(event)
+    return events
+
+
+def summarize(events):
+    """
+    Итог тестов по событиям: у каждого теста учитывается худший исход.
+
+    Returns:
+        dict: total, failed и skipped или None, если запуск не завершился штатно
+    """
+    if not events or events[-1][0] != "done":
+        return None
+    outcomes = {}
+    for event, test, outcome in events[:-1]:
+        if event == "start":
+            outcomes.setdefault(test, set())
+        elif event == "outcome":
+            # Ошибки setUpClass и setUpModule приходят без начала теста
+            outcomes.setdefault(test, set()).add(outcome)
+        else:
+            return None
+    if not all(outcomes.values()):
+        return None
+    failed = sum(1 for results in outcomes.values() if results & FAILED_OUTCOMES)
+    skipped = sum(1 for results in outcomes.values() if results == {"skip"})
+    return {"total": len(outcomes), "failed": failed, "skipped": skipped}
+
+
+# ============= Процесс тестов: правила и снимок =============
+
+# События аудита, запрещенные коду решения
+DENIED_EVENTS = {
+    # сеть (дополнительно к сетевому пространству имен)
+    "socket.getaddrinfo",
+    "socket.gethostbyname",
+    "socket.gethostbyaddr",
+    "socket.connect",
+    "socket.bind",
+    "socket.sendto",
+    # процессы и сигналы
+    "subprocess.Popen",
+    "os.system",
+    "os.exec",
+    "os.posix_spawn",
+    "os.spawn",
+    "os.fork",
+    "os.forkpty",
+    "os.kill",
+    "os.killpg",
+    "signal.pthread_kill",
+    # ссылки, через которые можно выйти из рабочего каталога
+    "os.symlink",
+    "os.link",
+    # библиотеки и базы данных
+    "ctypes.dlopen",
+    "sqlite3.connect",
+    # доступ к чужим кадрам стека и объектам
+    "sys._current_frames",
+    "sys.settrace",
+    "sys.setprofile",
+    "gc.get_objects",
+    "gc.get_referrers",
+    "gc.get_referents",
+}
+
+# Модули, импорт которых запрещен коду решения
+DENIED_MODULES = {
+    "ctypes",
+    "_ctypes",
+    "sqlite3",
+    "_sqlite3",
+    "_posixsubprocess",
+    "_testcapi",
+    "_testinternalcapi",
+    "_xxsubinterpreters",
+    "_xxinterpchannels",
+}
+
+# События изменения файлов и позиции аргументов-путей (пути только в рабочем каталоге)
+WRITE_EVENTS = {
+    "os.remove": (0,),
+    "os.rmdir": (0,),
+    "os.rename": (0, 1),
+    "os.mkdir": (0,),
+    "os.chmod": (0,),
+    "os.chown": (0,),
+    "os.truncate": (0,),
+    "os.utime": (0,),
+}
+
+# Атрибуты, через которые доступны кадры стека
+FRAME_ATTRIBUTES = {"tb_frame", "gi_frame", "cr_frame", "ag_frame"}
+
+# Функции traceback, которые отдают кадры вызывающему коду
+FRAME_GENERATORS = ["walk_tb", "walk_stack", "_walk_tb_with_full_positions"]
+
+# Модули, которым разрешен доступ к кадрам: форматирование ошибок тестов и
+# определение модуля вызывающего кода (namedtuple, Enum, typing). Кадры они
+# не отдают, а их состояние входит в снимок.
+TRUSTED_MODULES = ["unittest", "unittest._log", "traceback", "linecache", "collections", "enum", "typing"]
+
+# Доверенные модули, которые импортируются, только если их упоминают тесты
+# (импорт asyncio заметно удлиняет запуск). IsolatedAsyncioTestCase работает
+# в отладочном режиме asyncio, который запоминает место создания задач, а
+# описание задачи читает кадр сопрограммы (в отличие от Task.get_stack,
+# кадры не отдаются).
+OPTIONAL_TRUSTED_MODULES = {
+    b"mock": ["unittest.mock"],
+    b"IsolatedAsyncioTestCase": [
+        "unittest.async_case",
+        "asyncio.coroutines",
+        "asyncio.events",
+        "asyncio.format_helpers",
+        "asyncio.futures",
+    ],
+}
+
+# Атрибуты, которые unittest меняет у классов тестов во время запуска
+RUNTIME_ATTRIBUTES = {"__warningregistry__", "_classSetupFailed", "tearDown_exceptions"}
+
+
+def is_exact(value, cls):
+    """
+    Тип value - ровно cls.
+
+    isinstance здесь не подходит: подкласс из кода решения (например, str
+    с переопределенными методами) не должен проходить проверки.
+    """
+    return type(value) is cls  # pylint: disable=unidiomatic-typecheck
+
+
+def exact_path(path):
+    """
+    Путь из аргумента события как точная строка (или номер дескриптора).
+
+    Подклассы str и bytes приводятся к точным типам, чтобы их методы не
+    участвовали в проверке.
+    """
+    if is_exact(path, int):
+        return path
+    path = fspath(path)
+    if isinstance(path, bytes):
+        return bytes.decode(path, FS_ENCODING, "surrogateescape")
+    return bytes.decode(str.encode(path, "utf-8", "surrogatepass"), "utf-8", "surrogatepass")
+
+
+def normalize(path):
+    """Абсолютный путь без "." и ".." (только строковые операции)"""
+    if not str.startswith(path, "/"):
+        path = getcwd() + "/" + path
+    parts = []
+    for part in str.split(path, "/"):
+        if part == "..":
+            if parts:
+                parts.pop()
+        elif part and part != ".":
+            parts.append(part)
+    return "/" + "/".join(parts)
+
+
+def is_inside(path, roots):
+    """Путь находится в одном из каталогов roots"""
+    return any(path == root or str.startswith(path, root + "/") for root in roots)
+
+
+def install_roots():
+    """Каталоги установки Python, из которых разрешено чтение"""
+    paths = {sys.prefix, sys.base_prefix, sys.exec_prefix, sys.base_exec_prefix}
+    paths.update(sysconfig.get_paths()[name] for name in ("stdlib", "platstdlib", "purelib", "platlib"))
+    return {normalize(variant) for path in paths for variant in (path, os.path.realpath(path))}
+
+
+def collect_codes(code, codes):
+    """Добавляет в codes объект кода и все вложенные в него (ключ - id)"""
+    codes[id(code)] = code
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            collect_codes(const, codes)
+
+
+def attribute_functions(value):
+    """Функции, из которых состоит атрибут класса или модуля"""
+    if isinstance(value, (staticmethod, classmethod)):
+        value = value.__func__
+    if isinstance(value, property):
+        return [func for func in (value.fget, value.fset, value.fdel) if isinstance(func, FunctionType)]
+    return [value] if isinstance(value, FunctionType) else []
+
+
+def module_classes(module):
+    """Классы, определенные в модуле"""
+    return [value for value in vars(module).values() if is_exact(value, type) and value.__module__ == module.__name__]
+
+
+# Снимок - список (словарь, select, ключи, значения) словарей модулей, классов и
+# sys.modules, от которых зависит итог тестов. Сравнение идет по идентичности
+# ключей и значений, поэтому ни один метод подмененного объекта при проверке не
+# вызывается, а исходные объекты удерживаются снимком и их id не достанется подмене.
+
+
+def mapping_state(mapping, select):
+    """Сверяемые ключи и значения словаря (select(key, value) отбирает элементы)"""
+    if select is None and RUNTIME_ATTRIBUTES.isdisjoint(mapping):
+        return list(mapping), list(mapping.values())
+    select = select or (lambda key, value: key not in RUNTIME_ATTRIBUTES)
+    items = [(key, value) for key, value in mapping.items() if select(key, value)]
+    return [key for key, value in items], [value for key, value in items]
+
+
+def snapshot_add(snapshot, mapping, select=None):
+    """Добавляет словарь в снимок"""
+    snapshot.append((mapping, select, *mapping_state(mapping, select)))
+
+
+def snapshot_add_module(snapshot, module):
+    """Добавляет в снимок модуль вместе с его классами"""
+    snapshot_add(snapshot, vars(module))
+    for cls in module_classes(module):
+        snapshot_add(snapshot, vars(cls))
+
+
+def snapshot_intact(snapshot):
+    """Все словари снимка не изменились"""
+    for mapping, select, saved_keys, saved_values in snapshot:
+        keys, values = mapping_state(mapping, select)
+        if len(keys) != len(saved_keys) or not all(map(is_, keys, saved_keys)) or not all(map(is_, values, saved_values)):
+            return False
+    return True
+
+
+# ============= Процесс тестов: хук аудита =============
+#
+# Классы доступны коду решения через object.__subclasses__(), а их методы - и
+# глобальные переменные модуля, поэтому скрипт не определяет классов: состояние
+# хука хранится в SimpleNamespace, а сам хук - замыкание.
+
+
+def new_guard(workdir, snapshot):
+    """
+    Состояние хука аудита.
+
+    Доступ к кадрам стека разрешен только коду доверенных модулей (с их
+    исходными глобальными переменными) при нетронутом снимке. Генераторы,
+    отдающие кадры, дополнительно должен перебирать доверенный код.
+    """
+    return types.SimpleNamespace(
+        workdir=normalize(workdir),
+        install=install_roots(),
+        snapshot=snapshot,
+        # id кода -> (код, словарь глобальных переменных его модуля)
+        trusted={},
+        frame_generators=set(),
+        # Код, который нельзя подменять через __code__ и __defaults__
+        protected={},
+        # Классы unittest, от которых наследуются тесты
+        base_classes={},
+        # Собственный код хука: его кадры пропускаются при поиске вызывающего
+        own={id(function.__code__): function.__code__ for function in (check_getattr, check_frame_access)},
+        # Потоки, в которых хук сам обращается к кадрам
+        inside=set(),
+    )
+
+
+def trust_module(guard, module):
+    """Разрешает коду модуля доступ к кадрам"""
+    namespace = vars(module)
+    codes = {}
+    for value in [*namespace.values(), *(attr for cls in module_classes(module) for attr in vars(cls).values())]:
+        # Функции, импортированные из других модулей, выполняются с их глобальными переменными
+        for function in attribute_functions(value):
+            if function.__globals__ is namespace:
+                collect_codes(function.__code__, codes)
+    guard.trusted.update((key, (code, namespace)) for key, code in codes.items())
+    guard.protected.update(codes)
+
+
+def is_protected(guard, function):
+    code = function.__code__
+    return guard.protected.get(id(code)) is code
+
+
+def is_writable(guard, path):
+    return is_inside(path, [guard.workdir, DEVNULL])
+
+
+def is_readable(guard, path):
+    return is_writable(guard, path) or is_inside(path, guard.install)
+
+
+def check_socket(_guard, _event, args):
+    if args[1] in NETWORK_FAMILIES:
+        raise PermissionError("Сетевой доступ запрещен")
+
+
+def check_import(guard, _event, args):
+    name, path = exact_path(args[0]), args[1]
+    if str.partition(name, ".")[0] in DENIED_MODULES:
+        raise PermissionError(f"Импорт запрещен в песочнице: {name}")
+    # Второе событие импорта двоичного модуля содержит путь к файлу библиотеки
+    if path is not None and not is_inside(normalize(exact_path(path)), guard.install):
+        raise PermissionError(f"Двоичные модули запрещены в песочнице: {name}")
+
+
+def check_open(guard, _event, args):
+    path, mode, flags = args
+    if path is None or is_exact(path, int):
+        return
+    path = normalize(exact_path(path))
+    if mode is None:
+        # os.open только на запись: дескриптор каталога позволил бы обойти проверку путей (dir_fd)
+        allowed = flags & ACCESS_FLAGS and is_writable(guard, path)
+    elif is_exact(mode, str) and not any(char in mode for char in "wax+") and not flags & WRITE_FLAGS:
+        allowed = is_readable(guard, path)
+    else:
+        allowed = is_writable(guard, path)
+    if not allowed:
+        raise PermissionError(f"Доступ к файлу запрещен в песочнице: {path}")
+
+
+def check_write(guard, event, args):
+    for position in WRITE_EVENTS[event]:
+        path = args[position]
+        if is_exact(path, int) or not is_writable(guard, normalize(exact_path(path))):
+            raise PermissionError(f"Запрещено в песочнице: {event}")
+
+
+def check_chdir(guard, event, args):
+    # Постоянный текущий каталог: относительные пути проверяются так же, как открываются
+    if is_exact(args[0], int) or normalize(exact_path(args[0])) != guard.workdir:
+        raise PermissionError(f"Запрещено в песочнице: {event}")
+
+
+def check_listing(guard, event, args):
+    path = args[0]
+    if path is not None and not is_exact(path, int) and not is_readable(guard, normalize(exact_path(path))):
+        raise PermissionError(f"Запрещено в песочнице: {event}")
+
+
+def check_setattr(guard, _event, args):
+    target, name = args[0], args[1]
+    if name == "__code__" or (
+        name in ("__defaults__", "__kwdefaults__") and isinstance(target, FunctionType) and is_protected(guard, target)
+    ):
+        raise PermissionError(f"Подмена {name} запрещена в песочнице")
+
+
+def check_getattr(guard, event, args):
+    if args[1] in FRAME_ATTRIBUTES:
+        check_frame_access(guard, event, args)
+
+
+def check_frame_access(guard, _event, _args):
+    if not snapshot_intact(guard.snapshot) or not trusted_caller(guard):
+        raise PermissionError("Доступ к кадрам стека запрещен в песочнице")
+
+
+def trusted_caller(guard):
+    """Код, обратившийся к кадрам стека, доверенный"""
+    thread = get_ident()
+    guard.inside.add(thread)
+    try:
+        frame = getframe(1)
+        while frame is not None and guard.own.get(id(frame.f_code)) is frame.f_code:
+            frame = frame.f_back
+        if not is_trusted(guard, frame):
+            return False
+        # Кадры, которые выдает генератор, получает тот, кто его перебирает
+        return id(frame.f_code) not in guard.frame_generators or is_trusted(guard, frame.f_back)
+    finally:
+        guard.inside.discard(thread)
+
+
+def is_trusted(guard, frame):
+    entry = guard.trusted.get(id(frame.f_code)) if frame is not None else None
+    return entry is not None and entry[0] is frame.f_code and entry[1] is frame.f_globals
+
+
+HANDLERS = {
+    "open": check_open,
+    "import": check_import,
+    "socket.__new__": check_socket,
+    "sys._getframe": check_frame_access,
+    "object.__getattr__": check_getattr,
+    "object.__setattr__": check_setattr,
+    "object.__delattr__": check_setattr,
+    "os.listdir": check_listing,
+    "os.scandir": check_listing,
+    "os.chdir": check_chdir,
+    **{event: check_write for event in WRITE_EVENTS},
+}
+
+
+def audit_hook(guard):
+    """Хук аудита: замыкание, недоступное коду решения"""
+
+    def hook(event, args):
+        if get_ident() in guard.inside:
+            return
+        if event in DENIED_EVENTS:
+            raise PermissionError(f"Запрещено в песочнице: {event}")
+        handler = HANDLERS.get(event)
+        if handler is not None:
+            handler(guard, event, args)
+
+    guard.own[id(hook.__code__)] = hook.__code__
+    return hook
+
+
+# ============= Процесс тестов: запуск =============
+
+
+def event_reporter(key, fd):
+    """
+    Функция отправки подписанных событий воркеру.
+
+    Ключ и дескриптор канала хранятся только в замыкании.
+    """
+    sequence = count()
+
+    def report(event, test="", outcome=""):
+        payload = f"{next(sequence)}\t{event}\t{outcome}\t{encode_basestring_ascii(test)}".encode()
+        write(fd, sign(key, payload) + b" " + payload + b"\n")
+
+    return report
+
+
+def prepare_child(workdir, source):
+    """
+    Готовит процесс к запуску кода решения.
+
+    Args:
+        workdir: Рабочий каталог
+        source: Исходный текст тестов (по нему выбираются доверенные модули)
+
+    Returns:
+        tuple: (состояние хука, снимок) - хук еще не установлен
+    """
+    trusted = list(TRUSTED_MODULES)
+    for marker, names in OPTIONAL_TRUSTED_MODULES.items():
+        if marker in source:
+            trusted += names
+    for name in trusted:
+        importlib.import_module(name)
+    # Значения, которые unittest и asyncio добавляют в свои словари лениво, при первом обращении
+    if "unittest.async_case" in sys.modules:
+        vars(unittest).setdefault("IsolatedAsyncioTestCase", sys.modules["unittest.async_case"].IsolatedAsyncioTestCase)
+    if "asyncio.events" in sys.modules:
+        sys.modules["asyncio.events"].get_event_loop_policy()
+    # Двоичный модуль subprocess запускает процессы без событий аудита. Поэтому subprocess
+    # импортируется заранее (Popen запрещен хуком), а двоичный модуль убирается из sys.modules:
+    # повторно импортировать его хук не даст
+    importlib.import_module("subprocess").__dict__["_posixsubprocess"] = None
+    sys.modules.pop("_posixsubprocess", None)
+    # Открывать каталоги хук не дает: shutil.rmtree (и TemporaryDirectory) удаляет по путям
+    importlib.import_module("shutil")._use_fd_functions = False  # pylint: disable=protected-access
+    # Без поиска вызывающего кадра logging работает без доступа к кадрам
+    logging._srcfile = None  # pylint: disable=protected-access
+    sys.dont_write_bytecode = True
+
+    snapshot = []
+    guard = new_guard(workdir, snapshot)
+    names = {name for name in sys.modules if name == "unittest" or name.startswith("unittest.")}
+    names.update(trusted)
+    for name in names:
+        trust_module(guard, sys.modules[name])
+        snapshot_add_module(snapshot, sys.modules[name])
+        guard.base_classes.update((id(cls), cls) for cls in module_classes(sys.modules[name]))
+    guard.frame_generators.update(id(getattr(traceback, name).__code__) for name in FRAME_GENERATORS)
+    snapshot_add(snapshot, vars(builtins))
+    snapshot_add(snapshot, sys.modules, lambda key, value: key in names)
+    return guard, snapshot
+
+
+def is_own_class(klass, guard):
+    """Класс определен модулем тестов: его методы - код тестов, а атрибуты - данные"""
+    for value in vars(klass).values():
+        codes = [function.__code__ for function in attribute_functions(value)]
+        if codes and not all(guard.protected.get(id(code)) is code for code in codes):
+            return False
+        # Вызываемые объекты и дескрипторы решения выполнили бы его код при сборке тестов
+        if not codes and not is_exact(value, type) and type(value) not in DESCRIPTOR_TYPES:
+            if callable(value) or hasattr(type(value), "__get__"):
+                return False
+    return True
+
+
+def is_test_class(cls, guard):
+    """Класс тестов построен из классов unittest и кода тестов, а не подменен решением"""
+    for klass in cls.__mro__:
+        if not is_exact(klass, type):
+            return False
+        if klass is object or guard.base_classes.get(id(klass)) is klass:
+            continue
+        if not is_own_class(klass, guard):
+            return False
+    return True
+
+
+def load_tests(tests_path, source, guard, snapshot):
+    """
+    Выполняет модуль тестов и собирает из него набор тестов.
+
+    Returns:
+        tuple: (набор тестов, список тестов) или None, если классы тестов подменены
+    """
+    name = os.path.splitext(os.path.basename(tests_path))[0]
+    code = compile(source, tests_path, "exec")
+    collect_codes(code, guard.protected)
+    module = ModuleType(name)
+    module.__file__ = tests_path
+    sys.modules[name] = module
+    # Модуль тестов выполняется как при импорте, но с кодом, собранным в guard.protected
+    exec(code, vars(module))  # pylint: disable=exec-used
+    # Решение, импортированное тестами, могло подменить загрузчик тестов
+    if not snapshot_intact(snapshot):
+        return None
+
+    loader = TestLoader()
+    suite = loader.suiteClass()
+    tests = []
+    for cls in [value for key, value in sorted(vars(module).items()) if isinstance(value, type)]:
+        if issubclass(cls, TestCase):
+            if not is_test_class(cls, guard):
+                return None
+            cases = loader.loadTestsFromTestCase(cls)
+            suite.addTests(cases)
+            tests += list(cases)
+            for klass in cls.__mro__:
+                if klass is not object and guard.base_classes.get(id(klass)) is not klass:
+                    snapshot_add(snapshot, vars(klass))
+    snapshot_add(snapshot, vars(module), lambda key, value: type(value) in (FunctionType, type, ModuleType))
+    snapshot_add(snapshot, sys.modules, lambda key, value: key == name)
+    return suite, tests
+
+
+def test_outcomes(result):
+    """
+    Исходы из результата unittest.
+
+    Returns:
+        tuple: (список (тест, исход), тесты, не запущенные из-за ошибки setUpClass или setUpModule)
+    """
+    outcomes = [(test, "failure") for test, _ in result.failures]
+    outcomes += [(test, "error") for test, _ in result.errors]
+    outcomes += [(test, "skip") for test, _ in result.skipped]
+    outcomes += [(test, "expected_failure") for test, _ in result.expectedFailures]
+    outcomes += [(test, "unexpected_success") for test in result.unexpectedSuccesses]
+    not_started = set()
+    for test, outcome in outcomes:
+        if is_exact(test, ErrorHolder):
+            # Описание ошибки setUpClass: "setUpClass (модуль.Класс)", setUpModule: "setUpModule (модуль)"
+            fixture, _, parent = str.partition(test.description, " (")
+            if fixture in ("setUpClass", "setUpModule"):
+                not_started.add(parent[:-1])
+    return [(test.test_case if is_exact(test, SubTest) else test, outcome) for test, outcome in outcomes], not_started
+
+
+def report_result(report, tests, result):
+    """
+    Сообщает воркеру о запущенных тестах и их исходах.
+
+    Запущенные тесты сверяются с числом тестов, которое насчитал unittest.
+    """
+    outcomes, not_started = test_outcomes(result)
+    started = [test for test in tests if strclass(type(test)) not in not_started and type(test).__module__ not in not_started]
+    if len(started) != result.testsRun:
+        report("tampered")
+        return
+    finished = set()
+    for test in started:
+        report("start", str(test.id()))
+    for test, outcome in outcomes:
+        finished.add(id(test))
+        report("outcome", str(test.id()), outcome)
+    for test in started:
+        if id(test) not in finished:
+            report("outcome", str(test.id()), "success")
+    report("done")
+
+
+def run(workdir, tests_path, limits, events_fd):
+    """Запускает тесты из tests_path и сообщает о них воркеру через дескриптор events_fd"""
+    apply_limits(limits)
+    report = event_reporter(sys.stdin.buffer.read(KEY_SIZE), events_fd)
+    sys.stdin.close()
+    with open(tests_path, "rb") as f:
+        source = f.read()
+    guard, snapshot = prepare_child(workdir, source)
+    stream = WritelnDecorator(sys.stderr)
+    result = TextTestResult(stream, True, 2)
+
+    # Код решения не должен видеть модуль скрипта и подменять встроенные функции, которыми он пользуется
+    globals().update({name: value for name, value in vars(builtins).items() if not name.startswith("_")})
+    sys.modules["__main__"] = ModuleType("__main__")
+    sys.addaudithook(audit_hook(guard))
+
+    os.chdir(workdir)
+    sys.path.insert(0, workdir)
+    name = os.path.splitext(os.path.basename(tests_path))[0]
+    try:
+        loaded = load_tests(tests_path, source, guard, snapshot)
+    except BaseException:  # pylint: disable=broad-exception-caught  # любая ошибка импорта решения - итог "error"
+        traceback.print_exc()
+        report("start", name)
+        report("outcome", name, "error")
+        report("done" if snapshot_intact(snapshot) else "tampered")
+        return
+    if loaded is None:
+        stream.writeln("Тесты или unittest подменены кодом решения")
+        report("tampered")
+        return
+
+    suite, tests = loaded
+    result.startTestRun()
+    suite(result)
+    result.stopTestRun()
+    result.printErrors()
+    stream.writeln(f"Ran {result.testsRun} tests")
+    # Подмена unittest или тестов делает итог недостоверным
+    if snapshot_intact(snapshot):
+        report_result(report, tests, result)
+    else:
+        stream.writeln("Тесты или unittest подменены кодом решения")
+        report("tampered")
+
+
+if __name__ == "__main__":
+    run(sys.argv[1], sys.argv[2], json.loads(sys.argv[3]), int(sys.argv[4]))
@@ -0,0 +1,290 @@
+"""
+Обработчики сигналов моделей приложения assignments.
+
+Подключаются при загрузке приложения (AssignmentsConfig.ready) и
+поддерживают производные данные в согласованном состоянии:
+- отметку изменения курса для условных GET-запросов (Course.modified_at);
+- агрегированную статистику оценок, ссылки на файлы решений и очередь
+  проверок отправок;
+- кеш dashboard пользователей, чьи страницы зависят от изменения.
+
+Порядок обработчиков post_save отправки важен: отметка курса и сброс кеша
+читают прежнее состояние отправки до того, как пересчет статистики его
+обновит.
+"""
+
+import os
+
+from django.contrib.auth import get_user_model
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from .dashboard_cache import invalidate_dashboards
+from .models import (
+    SIMILARITY_EXTENSIONS,
+    Course,
+    CourseEnrollmentRequest,
+    Homework,
+    Job,
+    StoredFile,
+    Submission,
+    apply_submission_stats,
+    schedule_submission_tests,
+    submission_stats_delta,
+    touch_courses,
+)
+
+User = get_user_model()
+
+# Обработчики сигналов ниже хранят на экземплярах моделей состояние, прочитанное
+# до изменения (_loaded_state, _loaded_file, _cleared_*)
+# pylint: disable=protected-access
+
+# ============= Отметка изменения курса =============
+#
+# Course.modified_at - время последнего изменения данных, которые видны на
+# страницах курса и dashboard его участников: самого курса, его заданий,
+# работ и оценок, заявок и состава. По этой отметке страницы отвечают на
+# условные GET-запросы (см. conditional.py). Обработчики ниже обновляют
+# отметку одним UPDATE; массовые операции без сигналов (grading.py,
+# enrollment.py) вызывают touch_courses сами.
+
+
+@receiver(post_save, sender=Submission)
+def touch_course_on_submission_save(sender, instance, created, raw=False, **kwargs):
+    """Отправка или оценка меняет страницы курса (прежнего и нового задания)"""
+    # Обработчик подключен раньше пересчета статистики, который обновляет _loaded_state
+    if raw:
+        return
+    previous = None if created else getattr(instance, "_loaded_state", None)
+    homeworks = {instance.homework_id} | ({previous[0]} if previous else set())
+    touch_courses(Homework.objects.filter(pk__in=homeworks).values("course_id"))
+
+
+@receiver(post_delete, sender=Submission)
+def touch_course_on_submission_delete(sender, instance, **kwargs):
+    """Удаление отправки меняет страницы курса"""
+    touch_courses(Homework.objects.filter(pk=instance.homework_id).values("course_id"))
+
+
+@receiver(post_save, sender=Homework)
+@receiver(post_delete, sender=Homework)
+@receiver(post_save, sender=CourseEnrollmentRequest)
+@receiver(post_delete, sender=CourseEnrollmentRequest)
+def touch_course_on_change(sender, instance, **kwargs):
+    """Задание (в том числе правка) или заявка на зачисление меняет страницы курса"""
+    if kwargs.get("raw"):
+        return
+    touch_courses([instance.course_id])
+
+
+@receiver(post_save, sender=User)
+def touch_courses_on_teacher_change(sender, instance, created, raw=False, **kwargs):
+    """Имя преподавателя показывается в списке курсов студентов"""
+    update_fields = kwargs.get("update_fields")
+    if raw or created or (update_fields and set(update_fields) == {"last_login"}):
+        return
+    touch_courses(Course.teachers.through.objects.filter(user_id=instance.pk).values("course_id"))
+
+
+@receiver(m2m_changed, sender=Course.students.through)
+@receiver(m2m_changed, sender=Course.teachers.through)
+def touch_courses_on_membership_change(sender, instance, action, reverse, pk_set, **kwargs):
+    """Изменение состава меняет число студентов и список преподавателей курса"""
+    if action == "pre_clear" and reverse:
+        # После очистки связи пользователя с курсами уже не найти
+        instance._cleared_courses = list(sender.objects.filter(user_id=instance.pk).values_list("course_id", flat=True))
+    elif action == "post_clear":
+        touch_courses(getattr(instance, "_cleared_courses", []) if reverse else [instance.pk])
+    elif action in ("post_add", "post_remove") and pk_set:
+        touch_courses(pk_set if reverse else [instance.pk])
+
+
+# ============= Статистика, файлы и проверки отправок =============
+
+
+@receiver(pre_save, sender=Submission)
+def load_submission_state(sender, instance, **kwargs):
+    """Подгружаем прежнее состояние отправки, если экземпляр создан не из БД"""
+    if instance.pk and not hasattr(instance, "_loaded_state"):
+        previous = (
+            Submission.objects.filter(pk=instance.pk)
+            .values_list("homework_id", "student_id", "grade", "solution_file")
+            .first()
+        )
+        instance._loaded_state = tuple(previous[:3]) if previous else None
+        instance._loaded_file = previous[3] if previous else None
+
+
+@receiver(post_save, sender=Submission)
+def invalidate_dashboards_on_submission_save(sender, instance, created, raw=False, **kwargs):
+    """Сбрасываем dashboard студента и преподавателей курса (прежнего и нового)"""
+    # Обработчик подключен раньше пересчета статистики, который обновляет _loaded_state
+    if raw:
+        return
+    previous = None if created else getattr(instance, "_loaded_state", None)
+    states = [instance.stats_state()] + ([previous] if previous else [])
+    invalidate_dashboards(submission_dashboard_users(states))
+
+
+@receiver(post_save, sender=Submission)
+def update_stats_on_submission_save(sender, instance, created, raw=False, **kwargs):
+    """Инкрементально обновляем статистику при сохранении отправки"""
+    if raw:
+        return
+    previous = None if created else getattr(instance, "_loaded_state", None)
+    current = instance.stats_state()
+    if previous is None:
+        apply_submission_stats(*submission_stats_delta(current, 1))
+    elif previous[:2] == current[:2]:
+        # Изменилась только оценка (проверка или сброс при переотправке)
+        old_grade, new_grade = previous[2], current[2]
+        apply_submission_stats(
+            current[0],
+            current[1],
+            submitted=0,
+            graded=(new_grade is not None) - (old_grade is not None),
+            grade_sum=(new_grade or 0) - (old_grade or 0),
+        )
+    else:
+        apply_submission_stats(*submission_stats_delta(previous, -1))
+        apply_submission_stats(*submission_stats_delta(current, 1))
+    instance._loaded_state = current
+
+
+@receiver(post_delete, sender=Submission)
+def update_stats_on_submission_delete(sender, instance, **kwargs):
+    """Вычитаем удаленную отправку из статистики"""
+    state = getattr(instance, "_loaded_state", None) or instance.stats_state()
+    apply_submission_stats(*submission_stats_delta(state, -1), create=False)
+    invalidate_dashboards(submission_dashboard_users([state]))
+
+
+@receiver(post_save, sender=Submission)
+def update_file_refs_on_submission_save(sender, instance, created, raw=False, **kwargs):
+    """Переносим ссылку на файл и ставим проверки в очередь при замене файла решения"""
+    if raw:
+        return
+    previous = None if created else getattr(instance, "_loaded_file", None)
+    current = instance.solution_file.name
+    if previous != current:
+        if instance.file_check or instance.file_check_message:
+            # Итог проверки прежнего файла к новому не относится
+            Submission.objects.filter(pk=instance.pk).update(file_check="", file_check_message="")
+            instance.file_check = instance.file_check_message = ""
+        if current:
+            StoredFile.acquire(current)
+            Job.enqueue("inspect_submission", submission_id=instance.pk)
+        schedule_submission_tests(instance)
+        if any(os.path.splitext(name)[1].lower() in SIMILARITY_EXTENSIONS for name in (previous, current) if name):
+            # Индекс отпечатков обновляется и при замене на файл другого типа
+            Job.enqueue("index_submission_similarity", submission_id=instance.pk)
+        if previous:
+            StoredFile.release(previous)
+    instance._loaded_file = current
+
+
+@receiver(post_delete, sender=Submission)
+def release_file_on_submission_delete(sender, instance, **kwargs):
+    """Освобождаем ссылку на файл удаленной отправки"""
+    name = getattr(instance, "_loaded_file", None) or instance.solution_file.name
+    if name:
+        StoredFile.release(name)
+
+
+# ============= Кеш dashboard =============
+#
+# Dashboard студента показывает его курсы (с преподавателями и числом
+# заданий) и счетчики его работ, dashboard преподавателя - его курсы (с
+# числом студентов, заданий и заявок) и счетчики работ по ним. Обработчики
+# ниже сбрасывают кеш только тех пользователей, чьи dashboard зависят от
+# изменения (см. dashboard_cache.py).
+
+
+def course_member_ids(course_ids):
+    """id студентов и преподавателей курсов"""
+    members = set()
+    for relation in (Course.students.through, Course.teachers.through):
+        members.update(relation.objects.filter(course_id__in=course_ids).values_list("user_id", flat=True))
+    return members
+
+
+def submission_dashboard_users(states):
+    """Студенты и преподаватели курсов отправок по их состояниям (homework_id, student_id, grade)"""
+    users = {student_id for _, student_id, _ in states}
+    users.update(
+        Course.teachers.through.objects.filter(
+            course__homeworks__in={homework_id for homework_id, _, _ in states}
+        ).values_list("user_id", flat=True)
+    )
+    return users
+
+
+@receiver(post_save, sender=User)
+@receiver(pre_delete, sender=User)
+def invalidate_dashboards_on_user_change(sender, instance, **kwargs):
+    """Сбрасываем dashboard пользователя и студентов его курсов (имя преподавателя в списке курсов)"""
+    update_fields = kwargs.get("update_fields")
+    if kwargs.get("raw") or (update_fields and set(update_fields) == {"last_login"}):
+        return
+    # id удаленного пользователя может достаться новому (SQLite), поэтому сбрасывается и при создании
+    users = {instance.pk}
+    if not kwargs.get("created"):
+        users |= course_member_ids(Course.teachers.through.objects.filter(user_id=instance.pk).values("course_id"))
+    invalidate_dashboards(users)
+
+
+@receiver(post_save, sender=Course)
+@receiver(pre_delete, sender=Course)
+def invalidate_dashboards_on_course_change(sender, instance, **kwargs):
+    """Сбрасываем dashboard участников курса при изменении или перед удалением курса"""
+    if kwargs.get("created") or kwargs.get("raw"):
+        return
+    invalidate_dashboards(course_member_ids([instance.pk]))
+
+
+@receiver(post_save, sender=Homework)
+@receiver(post_delete, sender=Homework)
+def invalidate_dashboards_on_homework_change(sender, instance, **kwargs):
+    """Сбрасываем dashboard участников курса при добавлении или удалении задания"""
+    if kwargs.get("raw") or not kwargs.get("created", True):
+        # Правка задания не меняет dashboard
+        return
+    invalidate_dashboards(course_member_ids([instance.course_id]))
+
+
+@receiver(post_save, sender=CourseEnrollmentRequest)
+@receiver(post_delete, sender=CourseEnrollmentRequest)
+def invalidate_dashboards_on_enrollment_request(sender, instance, **kwargs):
+    """Сбрасываем dashboard студента и преподавателей курса (число заявок)"""
+    if kwargs.get("raw"):
+        return
+    teachers = Course.teachers.through.objects.filter(course_id=instance.course_id).values_list("user_id", flat=True)
+    invalidate_dashboards({instance.student_id, *teachers})
+
+
+@receiver(m2m_changed, sender=Course.students.through)
+@receiver(m2m_changed, sender=Course.teachers.through)
+def invalidate_dashboards_on_membership_change(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Сбрасываем dashboard при изменении состава курса.
+
+    Добавленные и удаленные пользователи теряют или получают курс, а
+    остальные участники видят новое число студентов и список преподавателей.
+    """
+    if action == "pre_clear":
+        # После очистки связи участников уже не найти
+        courses = sender.objects.filter(user_id=instance.pk).values("course_id") if reverse else [instance.pk]
+        instance._cleared_members = course_member_ids(courses)
+        return
+    if action == "post_clear":
+        invalidate_dashboards(getattr(instance, "_cleared_members", set()))
+        return
+    if action not in ("post_add", "post_remove") or not pk_set:
+        return
+    if reverse:
+        # instance - пользователь, pk_set - id курсов
+        users = {instance.pk} | course_member_ids(pk_set)
+    else:
+        users = set(pk_set) | course_member_ids([instance.pk])
+    invalidate_dashboards(users)
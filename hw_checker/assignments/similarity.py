@@ -0,0 +1,347 @@
+"""
+Поиск похожих решений (антиплагиат) внутри домашнего задания.
+
+Алгоритм повторяет подход MOSS:
+
+1. Решение разбивается на токены. В коде Python имена переменных, строки
+   и числа заменяются обобщенными токенами, комментарии и отступы
+   отбрасываются, поэтому переименование переменных и правка комментариев
+   не скрывают совпадений. Текст разбивается на слова в нижнем регистре.
+2. Из последовательностей по K токенов (k-граммов) вычисляются хеши, а
+   из каждого окна по WINDOW хешей отбирается минимальный (winnowing).
+   Любое совпадение длиной не меньше K + WINDOW - 1 токенов гарантированно
+   дает общий отпечаток.
+3. Отпечатки хранятся в инвертированном индексе задания (модель
+   Fingerprint, индекс по (homework, value)). Для нового решения из
+   индекса выбираются только решения с общими отпечатками, поэтому
+   сравнение не квадратично по числу решений. Отпечатки, которые есть
+   больше чем у COMMON_MAX_DOCS решений (общий шаблон из условия), не
+   учитываются.
+
+Похожесть пары - доля общих отпечатков от числа отпечатков меньшего из
+двух решений (частые отпечатки не учитываются). Пары с похожестью не ниже MIN_STORED_SCORE сохраняются в
+модели SimilarityMatch и показываются преподавателю.
+"""
+
+import hashlib
+import io
+import keyword
+import os
+import re
+import tokenize
+from collections import Counter, defaultdict, namedtuple
+from itertools import combinations
+
+from django.db import transaction
+from django.db.models import Q
+
+from .models import SIMILARITY_EXTENSIONS, Fingerprint, SimilarityMatch, Submission
+from .storage import get_submission_storage
+
+# Длина k-грамма и окна winnowing (в токенах)
+K = 10
+WINDOW = 6
+
+# Отпечаток, который встречается у большего числа решений, считается общим
+# местом или шаблоном из условия (как параметр -m у MOSS). Предел не зависит
+# от числа решений задания: иначе в маленьком задании группа одинаковых
+# решений сама становилась бы "шаблоном". Постоянный предел ограничивает
+# длину списков индекса, поэтому число сравниваемых пар растет линейно с
+# числом решений
+COMMON_MAX_DOCS = 10
+
+# Пары с меньшим числом общих отпечатков не сохраняются
+MIN_SHARED = 5
+
+# Пороги похожести: для сохранения пары и для показа преподавателю
+MIN_STORED_SCORE = 0.3
+REPORT_SCORE = 0.5
+
+# Предел размера сравниваемого файла (большие файлы обрезаются)
+MAX_DOCUMENT_SIZE = 512 * 1024
+
+# Размер пакета значений в запросе "value IN (...)" (ограничение SQLite)
+LOOKUP_BATCH = 500
+
+SimilarPair = namedtuple("SimilarPair", ["first", "second", "shared", "score"])
+
+WORD_RE = re.compile(r"\w+")
+CODE_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+
+# Токены Python, не влияющие на структуру программы
+SKIPPED_TOKENS = {tokenize.COMMENT, tokenize.NL, tokenize.ENCODING, tokenize.ENDMARKER}
+
+# Обобщенные токены Python: строки, числа и границы строк и блоков
+CODE_TOKEN_CLASSES = {
+    tokenize.STRING: "S",
+    tokenize.NUMBER: "0",
+    tokenize.NEWLINE: ";",
+    tokenize.INDENT: "{",
+    tokenize.DEDENT: "}",
+}
+
+
+def supports(name):
+    """Сравнивается ли файл с таким именем"""
+    return os.path.splitext(name)[1].lower() in SIMILARITY_EXTENSIONS
+
+
+def normalize_code_token(token_type, text):
+    """Обобщенный токен Python: имена, строки и числа заменяются классом"""
+    if token_type == tokenize.NAME:
+        return text if keyword.iskeyword(text) else "V"
+    return CODE_TOKEN_CLASSES.get(token_type, text)
+
+
+def tokenize_code(text):
+    """Токены кода Python; код с синтаксическими ошибками разбирается регулярным выражением"""
+    try:
+        return [
+            normalize_code_token(token.type, token.string)
+            for token in tokenize.generate_tokens(io.StringIO(text).readline)
+            if token.type not in SKIPPED_TOKENS
+        ]
+    except (tokenize.TokenError, IndentationError, SyntaxError):
+        tokens = []
+        for token in CODE_TOKEN_RE.findall(text):
+            if token[0].isdigit():
+                tokens.append("0")
+            elif token[0].isalpha() or token[0] == "_":
+                tokens.append(token if keyword.iskeyword(token) else "V")
+            else:
+                tokens.append(token)
+        return tokens
+
+
+def tokenize_text(text):
+    """Слова текста в нижнем регистре"""
+    return WORD_RE.findall(text.lower())
+
+
+def tokenize_document(name, data):
+    """Токены файла решения по его расширению"""
+    text = data[:MAX_DOCUMENT_SIZE].decode("utf-8", errors="replace")
+    if os.path.splitext(name)[1].lower() == ".py":
+        return tokenize_code(text)
+    return tokenize_text(text)
+
+
+def kgram_hash(tokens):
+    """Устойчивый 63-битный хеш k-грамма (помещается в BigIntegerField)"""
+    digest = hashlib.blake2b("\x1f".join(tokens).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big") >> 1
+
+
+def winnow(tokens, k=K, window=WINDOW):
+    """
+    Отпечатки последовательности токенов.
+
+    Returns:
+        set: Хеши, выбранные winnowing (минимум каждого окна)
+    """
+    hashes = [kgram_hash(tokens[i : i + k]) for i in range(len(tokens) - k + 1)]
+    if len(hashes) <= window:
+        return set(hashes[:1]) if hashes else set()
+    selected = set()
+    for start in range(len(hashes) - window + 1):
+        selected.add(min(hashes[start : start + window]))
+    return selected
+
+
+def document_fingerprints(name, data):
+    """Отпечатки файла решения"""
+    return winnow(tokenize_document(name, data))
+
+
+def is_common(documents):
+    """Отпечаток, который есть у documents решений, считается шаблоном"""
+    return documents > COMMON_MAX_DOCS
+
+
+def pair_score(shared, first_size, second_size):
+    """Похожесть пары: доля общих отпечатков от меньшего решения"""
+    return shared / max(min(first_size, second_size), 1)
+
+
+def similar_pair(ids, shared, score, min_score=MIN_STORED_SCORE, min_shared=MIN_SHARED):
+    """SimilarPair с упорядоченными id пары ids или None, если пара недостаточно похожа"""
+    if shared < min_shared or score < min_score:
+        return None
+    first, second = sorted(ids)
+    return SimilarPair(first, second, shared, round(score, 4))
+
+
+def posting_lists(documents):
+    """Инвертированный индекс {отпечаток: список id документов}"""
+    postings = defaultdict(list)
+    for doc_id, values in documents.items():
+        for value in values:
+            postings[value].append(doc_id)
+    return postings
+
+
+def find_similar_pairs(documents, min_score=MIN_STORED_SCORE, min_shared=MIN_SHARED):
+    """
+    Находит похожие пары среди документов по инвертированному индексу.
+
+    Пары перебираются только внутри списков инвертированного индекса, а
+    длина списка ограничена COMMON_MAX_DOCS, поэтому работа растет линейно
+    с числом документов, а не квадратично. Частые отпечатки не учитываются
+    ни в числе общих отпечатков, ни в размере документа.
+
+    Args:
+        documents: {id документа: множество отпечатков}
+
+    Returns:
+        tuple: (список SimilarPair по убыванию похожести, число обновлений счетчиков пар)
+    """
+    sizes = Counter()
+    shared = Counter()
+    updates = 0
+    for doc_ids in posting_lists(documents).values():
+        if is_common(len(doc_ids)):
+            continue
+        sizes.update(doc_ids)
+        for pair in combinations(sorted(doc_ids), 2):
+            shared[pair] += 1
+            updates += 1
+
+    pairs = [
+        similar_pair((first, second), count, pair_score(count, sizes[first], sizes[second]), min_score, min_shared)
+        for (first, second), count in shared.items()
+    ]
+    pairs = sorted(filter(None, pairs), key=lambda pair: (-pair.score, pair.first, pair.second))
+    return pairs, updates
+
+
+def read_solution(name):
+    """Содержимое файла решения (не больше MAX_DOCUMENT_SIZE байтов)"""
+    with get_submission_storage().open(name, "rb") as f:
+        return f.read(MAX_DOCUMENT_SIZE)
+
+
+def index_rows(homework_id, values, exclude=None):
+    """Строки (value, submission_id) индекса задания для набора отпечатков"""
+    ordered = sorted(values)
+    for start in range(0, len(ordered), LOOKUP_BATCH):
+        rows = Fingerprint.objects.filter(homework_id=homework_id, value__in=ordered[start : start + LOOKUP_BATCH])
+        if exclude is not None:
+            rows = rows.exclude(submission_id=exclude)
+        yield from rows.values_list("value", "submission_id")
+
+
+def distinctive_sizes(homework_id, submission_ids):
+    """Число отпечатков каждой отправки без частых (см. is_common)"""
+    submission_values = defaultdict(list)
+    for submission_id, value in Fingerprint.objects.filter(submission_id__in=submission_ids).values_list(
+        "submission_id", "value"
+    ):
+        submission_values[submission_id].append(value)
+    frequency = Counter(value for value, _ in index_rows(homework_id, set().union(*submission_values.values())))
+    return {
+        submission_id: sum(not is_common(frequency[value]) for value in submission_values[submission_id])
+        for submission_id in submission_ids
+    }
+
+
+def index_submission(submission):
+    """
+    Обновляет отпечатки отправки в индексе задания и ее похожие пары.
+
+    Returns:
+        int: Число сохраненных похожих пар
+    """
+    homework_id = submission.homework_id
+    with transaction.atomic():
+        Fingerprint.objects.filter(submission=submission).delete()
+        SimilarityMatch.objects.filter(Q(first=submission) | Q(second=submission)).delete()
+        name = submission.solution_file.name
+        if not name or not supports(name):
+            return 0
+
+        values = document_fingerprints(name, read_solution(name))
+        Fingerprint.objects.bulk_create(
+            [Fingerprint(homework_id=homework_id, submission=submission, value=value) for value in values], batch_size=1000
+        )
+
+        # Списки инвертированного индекса для отпечатков этой отправки
+        postings = defaultdict(list)
+        for value, submission_id in index_rows(homework_id, values, exclude=submission.pk):
+            postings[value].append(submission_id)
+
+        # То же правило, что в find_similar_pairs: список учитывается вместе с самой отправкой
+        distinctive = [value for value in values if not is_common(len(postings[value]) + 1)]
+        shared = Counter()
+        for value in distinctive:
+            shared.update(postings[value])
+        candidates = {submission_id: count for submission_id, count in shared.items() if count >= MIN_SHARED}
+        sizes = distinctive_sizes(homework_id, candidates)
+
+        pairs = [
+            similar_pair((submission.pk, other_id), count, pair_score(count, len(distinctive), sizes[other_id]))
+            for other_id, count in candidates.items()
+        ]
+        matches = [
+            SimilarityMatch(
+                homework_id=homework_id, first_id=pair.first, second_id=pair.second, shared=pair.shared, score=pair.score
+            )
+            for pair in pairs
+            if pair
+        ]
+        SimilarityMatch.objects.bulk_create(matches)
+    return len(matches)
+
+
+def rebuild_homework_index(homework):
+    """
+    Пересобирает индекс отпечатков и похожие пары всего задания.
+
+    Returns:
+        dict: documents - число проиндексированных решений, fingerprints -
+        число отпечатков, pairs - число сохраненных пар
+    """
+    documents = {}
+    for submission_id, name in (
+        Submission.objects.filter(homework=homework).exclude(solution_file="").values_list("pk", "solution_file")
+    ):
+        if supports(name):
+            try:
+                documents[submission_id] = document_fingerprints(name, read_solution(name))
+            except FileNotFoundError:
+                continue
+
+    pairs, _ = find_similar_pairs(documents)
+    with transaction.atomic():
+        Fingerprint.objects.filter(homework=homework).delete()
+        SimilarityMatch.objects.filter(homework=homework).delete()
+        Fingerprint.objects.bulk_create(
+            (
+                Fingerprint(homework=homework, submission_id=submission_id, value=value)
+                for submission_id, values in documents.items()
+                for value in values
+            ),
+            batch_size=1000,
+        )
+        SimilarityMatch.objects.bulk_create(
+            [
+                SimilarityMatch(
+                    homework=homework, first_id=pair.first, second_id=pair.second, shared=pair.shared, score=pair.score
+                )
+                for pair in pairs
+            ],
+            batch_size=1000,
+        )
+    return {
+        "documents": len(documents),
+        "fingerprints": sum(len(values) for values in documents.values()),
+        "pairs": len(pairs),
+    }
+
+
+def similar_pairs(homework, min_score=REPORT_SCORE, limit=50):
+    """Самые похожие пары решений задания для показа преподавателю"""
+    return (
+        SimilarityMatch.objects.filter(homework=homework, score__gte=min_score)
+        .select_related("first__student", "second__student")
+        .order_by("-score", "-shared")[:limit]
+    )
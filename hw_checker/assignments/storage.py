@@ -0,0 +1,95 @@
+"""
+Контентно-адресуемое хранилище файлов решений.
+
+Файл сохраняется под именем, вычисленным из SHA-256 его содержимого, в
+дереве каталогов, разбитом по первым символам хеша::
+
+    submissions/3f/a2/3fa2...e9.py
+
+Одинаковые файлы (общие шаблоны, повторная отправка тех же байтов)
+хранятся в единственном экземпляре. Учет ссылок на файл и удаление
+неиспользуемых файлов выполняются моделью StoredFile (см. models.py).
+Наличие файла проверяется под блокировкой его записи StoredFile, под
+которой сборщик и удаляет файлы, поэтому файл, сохраненный повторно, не
+может быть удален до того, как на него будет учтена ссылка.
+"""
+
+import hashlib
+import os
+import tempfile
+
+from django.apps import apps
+from django.core.files.move import file_move_safe
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+
+# Число уровней каталогов и символов хеша на уровень
+SHARD_DEPTH = 2
+SHARD_WIDTH = 2
+
+
+def content_name(prefix, digest, ext):
+    """Имя файла в хранилище по хешу содержимого"""
+    shards = [digest[i * SHARD_WIDTH : (i + 1) * SHARD_WIDTH] for i in range(SHARD_DEPTH)]
+    return "/".join(part for part in [prefix.strip("/"), *shards, f"{digest}{ext.lower()}"] if part)
+
+
+def is_content_name(name):
+    """Проверяет, что имя уже построено по хешу содержимого"""
+    parts = name.split("/")
+    digest, _ = os.path.splitext(parts[-1])
+    if len(digest) != 64 or len(parts) < SHARD_DEPTH + 1:
+        return False
+    return content_name("/".join(parts[: -SHARD_DEPTH - 1]), digest, os.path.splitext(name)[1]) == name
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Файловое хранилище с адресацией по содержимому.
+
+    Из имени, предложенного полем (``upload_to`` + имя загруженного файла),
+    используются только каталог и расширение. Содержимое за один проход
+    хешируется и пишется во временный файл, который затем переносится на
+    место или удаляется, если такой файл уже есть. Поэтому поддерживаются
+    и неперематываемые источники (например, склейка порций загрузки).
+    """
+
+    def get_available_name(self, name, max_length=None):
+        # Имя определяется содержимым, суффиксы для уникальности не нужны
+        return name
+
+    def _save(self, name, content):
+        prefix, ext = os.path.dirname(name), os.path.splitext(name)[1]
+        digest = hashlib.sha256()
+        os.makedirs(self.location, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.location, prefix=".upload-")
+        try:
+            with os.fdopen(fd, "wb") as tmp:
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    tmp.write(chunk)
+
+            name = content_name(prefix, digest.hexdigest(), ext)
+            full_path = self.path(name)
+            with transaction.atomic():
+                # Блокировка держится до конца внешней транзакции (Submission.save)
+                apps.get_model("assignments", "StoredFile").lock(name)
+                if os.path.exists(full_path):
+                    return name
+                os.makedirs(os.path.dirname(full_path), exist_ok=True)
+                # Одновременная запись тех же байтов безопасна: содержимое совпадает
+                file_move_safe(tmp_path, full_path, allow_overwrite=True)
+                if self.file_permissions_mode is not None:
+                    os.chmod(full_path, self.file_permissions_mode)
+            return name
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+
+submission_storage = ContentAddressedStorage()
+
+
+def get_submission_storage():
+    """Хранилище файлов решений (callable, чтобы не сериализовать его в миграции)"""
+    return submission_storage
@@ -0,0 +1,131 @@
+"""
+Фоновые задачи приложения assignments.
+
+Задачи ставятся в очередь сигналами ``Submission`` (см. signals.py) и
+выполняются воркерами ``manage.py run_workers`` вне цикла запроса.
+"""
+
+import hashlib
+import logging
+import os
+import zipfile
+
+from .autotest import check_submission, save_test_result
+from .jobs import task
+from .models import Homework, Submission, collect_stored_file, touch_courses
+from .similarity import index_submission
+from .storage import is_content_name
+
+logger = logging.getLogger(__name__)
+
+# Размер блока чтения файла при хешировании
+HASH_CHUNK_SIZE = 64 * 1024
+
+# Предел суммарного распакованного размера архива (защита от zip-бомб)
+MAX_ARCHIVE_UNCOMPRESSED_SIZE = 200 * 1024 * 1024
+
+
+@task("collect_stored_file")
+def collect_stored_file_task(file_name):
+    """Удаляет файл решения, на который больше нет ссылок"""
+    return {"file_name": file_name, "deleted": collect_stored_file(file_name)}
+
+
+def inspect_archive(f):
+    """Проверяет целостность ZIP-архива и его распакованный размер"""
+    try:
+        with zipfile.ZipFile(f) as archive:
+            entries = archive.infolist()
+            uncompressed = sum(entry.file_size for entry in entries)
+            if uncompressed > MAX_ARCHIVE_UNCOMPRESSED_SIZE:
+                return {"entries": len(entries), "uncompressed_size": uncompressed, "archive_ok": False}
+            broken = archive.testzip()
+    except (zipfile.BadZipFile, EOFError):
+        return {"archive_ok": False}
+    return {"entries": len(entries), "uncompressed_size": uncompressed, "archive_ok": broken is None}
+
+
+def file_problem(report):
+    """
+    Причина отклонения файла по отчету проверки.
+
+    Returns:
+        str: Сообщение для студента и преподавателя или пустая строка, если файл в порядке
+    """
+    if not report.get("hash_ok", True):
+        return "Файл поврежден при сохранении, отправьте его заново"
+    if not report.get("archive_ok", True):
+        if report.get("uncompressed_size", 0) > MAX_ARCHIVE_UNCOMPRESSED_SIZE:
+            megabytes = MAX_ARCHIVE_UNCOMPRESSED_SIZE // (1024 * 1024)
+            return f"Архив распаковывается больше чем в {megabytes}МБ"
+        return "Архив поврежден или не является ZIP-файлом"
+    return ""
+
+
+@task()
+def inspect_submission(submission_id):
+    """
+    Проверяет файл отправки: хеш содержимого и, для ZIP, целостность архива.
+
+    Хеш вычисляется при сохранении файла (имя файла в хранилище - это хеш,
+    см. storage.py); здесь сохраненные байты сверяются с именем. Итог
+    записывается в отправку (file_check), если за время проверки файл не
+    заменили: отклоненный файл показывается студенту и преподавателю.
+
+    Returns:
+        dict: Отчет о проверке (сохраняется в Job.result)
+    """
+    submission = Submission.objects.filter(pk=submission_id).first()
+    if submission is None or not submission.solution_file:
+        return {"skipped": True}
+
+    name = submission.solution_file.name
+    digest = hashlib.sha256()
+    size = 0
+    with submission.solution_file.open("rb") as f:
+        for chunk in f.chunks(HASH_CHUNK_SIZE):
+            digest.update(chunk)
+            size += len(chunk)
+
+        report = {"name": name, "size": size, "sha256": digest.hexdigest()}
+        if is_content_name(name):
+            report["hash_ok"] = os.path.basename(name).startswith(report["sha256"])
+        if os.path.splitext(name)[1].lower() == ".zip":
+            f.seek(0)
+            report.update(inspect_archive(f))
+
+    problem = file_problem(report)
+    if problem:
+        logger.warning("Файл отправки #%s не прошел проверку: %s", submission_id, report)
+    report["file_check"] = "rejected" if problem else "ok"
+    if Submission.objects.filter(pk=submission_id, solution_file=name).update(
+        file_check=report["file_check"], file_check_message=problem
+    ):
+        touch_courses(Homework.objects.filter(pk=submission.homework_id).values("course_id"))
+    return report
+
+
+@task(atomic=False)
+def run_submission_tests(submission_id):
+    """
+    Запускает тесты задания для отправки (или берет результат из кеша) и сохраняет его в ней.
+
+    Returns:
+        dict: Итог проверки без вывода тестов (сохраняется в Job.result)
+    """
+    submission = Submission.objects.select_related("homework").filter(pk=submission_id).first()
+    if submission is None or not submission.homework.test_file or not submission.solution_file:
+        return {"skipped": True}
+
+    report, cached = check_submission(submission)
+    save_test_result(submission, report)
+    return {**{key: value for key, value in report.items() if key != "output"}, "cached": cached}
+
+
+@task()
+def index_submission_similarity(submission_id):
+    """Обновляет отпечатки отправки в индексе задания и ищет похожие решения"""
+    submission = Submission.objects.filter(pk=submission_id).first()
+    if submission is None:
+        return {"skipped": True}
+    return {"matches": index_submission(submission)}
@@ -0,0 +1,187 @@
+"""
+Tests for the synthetic dataset seeding and benchmark harnesses.
+
+Covers the index benchmark (benchmark_indexes) and the per-view benchmark
+suite (benchmark_views): every URL is measured for both roles, reports are
+JSON-serializable and regressions beyond the thresholds fail the run.
+The autotest benchmark checks concurrent sandbox runs end with the
+expected statuses, and the similarity benchmark checks that plagiarism
+detection finds planted copies with work growing linearly. The load
+benchmark checks every request of the WSGI and ASGI runs succeeds, and
+the grading benchmark checks both grading paths store the same grades.
+"""
+
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import SimpleTestCase, TransactionTestCase
+
+from .benchmarks import (
+    compare_reports,
+    run_autotest_benchmark,
+    run_bulk_grading_benchmark,
+    run_index_benchmark,
+    run_load_benchmark,
+    run_similarity_benchmark,
+    run_view_benchmark,
+    seed_dataset,
+    url_kwargs,
+    view_names,
+)
+from .grade_stats import verify_grade_stats
+from .management.commands.benchmark_views import Command as BenchmarkViewsCommand
+from .models import Homework, Submission
+
+
+class IndexBenchmarkTest(TransactionTestCase):
+    """Tests for synthetic seeding and the index benchmark"""
+
+    def test_seed_dataset_scale(self):
+        """Test seeding creates the requested scale with consistent aggregates"""
+        data = seed_dataset(courses=2, students=5, homeworks=3, submission_rate=1.0)
+        self.assertEqual(len(data.courses), 2)
+        self.assertEqual(Homework.objects.count(), 6)
+        self.assertEqual(Submission.objects.count(), 30)
+        self.assertEqual(data.students[0].profile.role, "student")
+        self.assertEqual(verify_grade_stats(), [])
+
+    def test_index_benchmark_reports_plans_and_restores_indexes(self):
+        """Test benchmark reports before/after plans and leaves indexes in place"""
+        data = seed_dataset(courses=2, students=5, homeworks=3)
+        report = run_index_benchmark(data, repeat=1)
+        self.assertIn("my_submissions", report)
+        for result in report.values():
+            self.assertIn("plan", result["before"])
+            self.assertGreaterEqual(result["after"]["median_ms"], 0)
+        self.assertIn("submission_student_recent_idx", report["my_submissions"]["after"]["plan"])
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(cursor, Submission._meta.db_table)
+        self.assertIn("submission_student_recent_idx", constraints)
+
+
+class ViewBenchmarkTest(TransactionTestCase):
+    """Tests for the per-view benchmark suite"""
+
+    def test_every_url_is_benchmarked_for_both_roles(self):
+        """Test the suite covers every route of the app as student and teacher"""
+        data = seed_dataset(courses=2, students=4, homeworks=2)
+        self.assertEqual(set(url_kwargs(data)), set(view_names()))
+        report = run_view_benchmark(data, iterations=2)
+        self.assertEqual(len(report), 2 * len(view_names()))
+        for key, metrics in report.items():
+            self.assertIn(metrics["status"], (200, 302, 404, 405), key)
+            self.assertLessEqual(metrics["p50_ms"], metrics["p95_ms"])
+            self.assertGreater(metrics["peak_kb"], 0)
+        self.assertEqual(report["teacher_grades_table:teacher"]["status"], 200)
+        self.assertEqual(report["course_detail:student"]["status"], 200)
+        self.assertEqual(report["teacher_dashboard:student"]["status"], 302)
+        json.dumps(report)
+
+    def test_compare_reports_thresholds(self):
+        """Test regressions are reported only beyond the configured thresholds"""
+        baseline = {"view:teacher": {"queries": 5, "p50_ms": 5.0, "p95_ms": 10.0, "peak_kb": 100.0}}
+        within = {"view:teacher": {"queries": 5, "p50_ms": 6.0, "p95_ms": 14.0, "peak_kb": 140.0}}
+        worse = {"view:teacher": {"queries": 7, "p50_ms": 9.0, "p95_ms": 16.0, "peak_kb": 160.0}}
+        self.assertEqual(compare_reports(baseline, within), [])
+        self.assertEqual(len(compare_reports(baseline, worse)), 3)
+        self.assertEqual(compare_reports(baseline, worse, query_slack=2, latency_tolerance=1, memory_tolerance=1), [])
+
+    def test_command_writes_report_and_fails_on_regression(self):
+        """Test benchmark_views writes a JSON report and fails against a stricter baseline"""
+        data = seed_dataset(courses=1, students=3, homeworks=2)
+        views = run_view_benchmark(data, iterations=1)
+        args = ["--courses", "1", "--students", "3", "--homeworks", "2", "--iterations", "1"]
+
+        # The command creates its own test database; inside a test feed it measurements from this one
+        with mock.patch.object(BenchmarkViewsCommand, "collect", return_value=views), tempfile.TemporaryDirectory() as tmp:
+            output = os.path.join(tmp, "report.json")
+            call_command("benchmark_views", *args, "--output", output, stdout=StringIO())
+            with open(output, encoding="utf-8") as f:
+                report = json.load(f)
+            self.assertEqual(report["scale"]["students"], 3)
+            self.assertIn("my_grades:student", report["views"])
+
+            call_command("benchmark_views", *args, "--baseline", output, "--latency-tolerance", "100", stdout=StringIO())
+
+            for metrics in report["views"].values():
+                metrics["queries"] = 0
+            baseline = os.path.join(tmp, "baseline.json")
+            with open(baseline, "w", encoding="utf-8") as f:
+                json.dump(report, f)
+            with self.assertRaises(CommandError):
+                call_command("benchmark_views", *args, "--baseline", baseline, stdout=StringIO(), stderr=StringIO())
+
+
+class AutotestBenchmarkTest(SimpleTestCase):
+    """Tests for the sandbox throughput benchmark"""
+
+    def test_concurrent_checks_have_expected_statuses(self):
+        """Test concurrent sandbox runs report every submission with the right status"""
+        report = run_autotest_benchmark(submissions=12, concurrency=4, timeout=1, failed_rate=0.3, timeout_rate=0.1)
+        self.assertEqual(report["statuses"], report["expected"])
+        self.assertEqual(sum(report["statuses"].values()), 12)
+        self.assertGreater(report["throughput_per_s"], 0)
+        self.assertLessEqual(report["p50_s"], report["p95_s"])
+
+    def test_command_saves_report(self):
+        """Test benchmark_autotest writes a JSON report"""
+        with tempfile.TemporaryDirectory() as tmp:
+            output = os.path.join(tmp, "autotest.json")
+            call_command(
+                "benchmark_autotest", "--submissions", "4", "--concurrency", "2", "--output", output, stdout=StringIO()
+            )
+            with open(output, encoding="utf-8") as f:
+                self.assertEqual(json.load(f)["submissions"], 4)
+
+
+class SimilarityBenchmarkTest(SimpleTestCase):
+    """Tests for the plagiarism detection scaling benchmark"""
+
+    def test_work_grows_linearly_and_copies_are_found(self):
+        """Test quadrupling the submissions roughly quadruples the pair updates, not 16x"""
+        report = run_similarity_benchmark(sizes=(100, 400))
+        small, large = report[0], report[-1]
+        for row in report:
+            self.assertEqual((row["recall"], row["false_pairs"]), (1.0, 0))
+            self.assertGreater(row["copies"], 0)
+        self.assertLess(large["pair_updates"], 8 * small["pair_updates"])
+
+    def test_command_saves_report(self):
+        """Test benchmark_similarity writes a JSON report"""
+        with tempfile.TemporaryDirectory() as tmp:
+            output = os.path.join(tmp, "similarity.json")
+            call_command("benchmark_similarity", "--sizes", "40", "--output", output, stdout=StringIO())
+            with open(output, encoding="utf-8") as f:
+                self.assertEqual(json.load(f)[0]["documents"], 40)
+
+
+class LoadBenchmarkTest(TransactionTestCase):
+    """Tests for the WSGI vs ASGI load benchmark"""
+
+    def test_both_handlers_serve_every_request(self):
+        """Test concurrent users get successful responses through both handlers"""
+        data = seed_dataset(courses=2, students=4, homeworks=2)
+        report = run_load_benchmark(data, users=20, requests_per_user=2, threads=4)
+        self.assertEqual(set(report), {"wsgi", "asgi"})
+        for metrics in report.values():
+            self.assertEqual((metrics["requests"], metrics["errors"]), (40, 0))
+            self.assertGreater(metrics["rps"], 0)
+            self.assertLessEqual(metrics["p50_ms"], metrics["p95_ms"])
+
+
+class BulkGradingBenchmarkTest(TransactionTestCase):
+    """Tests for the per-submission vs bulk grading benchmark"""
+
+    def test_both_paths_store_the_same_grades(self):
+        """Test both grading paths end consistent and the bulk path needs far fewer requests"""
+        report = run_bulk_grading_benchmark(students=10)
+        self.assertTrue(report["single"]["consistent"])
+        self.assertTrue(report["bulk"]["consistent"])
+        self.assertEqual((report["single"]["requests"], report["bulk"]["requests"]), (20, 2))
+        self.assertLess(report["bulk"]["queries"], report["single"]["queries"])
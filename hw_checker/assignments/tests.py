@@ -3,17 +3,68 @@ Comprehensive test suite for the Homework Checker application.
 Tests follow TDD principles covering models, views, forms, and decorators.
 """
 
+import csv
+import hashlib
+import os
 import tempfile
+import zipfile
 from datetime import timedelta
-
-from django.contrib.auth import get_user_model
+from io import BytesIO, StringIO
+from itertools import combinations
+from unittest import mock
+from xml.etree import ElementTree
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
 from django.core.files.uploadedfile import SimpleUploadedFile
-from django.test import Client, TestCase, override_settings
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.db.models.fields.files import FieldFile
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils import timezone
-
-from .forms import GradeForm, HomeworkForm, RegisterForm, SubmissionForm
-from .models import Course, Homework, Submission, UserProfile
+from django.utils.http import http_date
+
+from asgiref.sync import iscoroutinefunction
+
+from . import views
+from .autotest import check_submission, evict_test_results, regrade_homework, save_test_result
+from .backends import LEGACY_BACKEND, PROFILE_BACKEND, migrate_session_backends
+from .dashboard_cache import dashboard_cache, invalidate_dashboards, stats_key
+from .enrollment import RosterImportError, import_roster, parse_roster, process_enrollment_requests
+from .exports import csv_cell, gradebook_rows, stream_gradebook_csv, stream_gradebook_xlsx, stream_homework_archive
+from .forms import BulkGradeFormSet, GradeForm, HomeworkForm, RegisterForm, SubmissionForm
+from .grade_stats import GROUPINGS, verify_grade_stats
+from .gradebook import Gradebook, student_grade_report
+from .grading import GradeImportError, apply_grades, parse_grade_file, validate_grade_rows
+from .jobs import TASKS, claim_jobs, run_job, run_pending, task
+from .models import (
+    GRADE_STATS_MODELS,
+    AutotestResult,
+    Course,
+    CourseEnrollmentRequest,
+    CourseGradeStats,
+    Fingerprint,
+    Homework,
+    HomeworkGradeStats,
+    Job,
+    SimilarityMatch,
+    StoredFile,
+    StudentCourseGradeStats,
+    Submission,
+    UploadSession,
+    UserProfile,
+    collect_stored_file,
+)
+from .pagination import InvalidCursor, decode_cursor, encode_cursor
+from .permissions import has_course_role
+from .sandbox import run_tests
+from .similarity import COMMON_MAX_DOCS, document_fingerprints, find_similar_pairs
+from .uploads import append_chunk, commit_upload, start_upload
 
 User = get_user_model()
 
@@ -120,6 +171,7 @@ class HomeworkModelTest(TestCase):
         self.assertLessEqual(self.homework.created_at, timezone.now())
 
 
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
 class SubmissionModelTest(TestCase):
     """Tests for Submission model"""
 
@@ -337,6 +389,7 @@ class SubmissionFormTest(TestCase):
         self.assertFalse(form.is_valid())
 
 
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
 class GradeFormTest(TestCase):
     """Tests for GradeForm"""
 
@@ -935,3 +988,2807 @@ class SignalTest(TestCase):
         user.save()
         user.refresh_from_db()
         self.assertEqual(user.profile.role, "teacher")
+
+
+# ============================================================================
+# GRADEBOOK TESTS
+# ============================================================================
+
+
+class GradebookTest(TestCase):
+    """Tests for the course gradebook engine and teacher_grades_table view"""
+
+    def setUp(self):
+        """Set up a teacher and an empty course"""
+        self.client = Client()
+        self.teacher = User.objects.create_user(username="teacher", password="test123")
+        self.teacher.profile.role = "teacher"
+        self.teacher.profile.save()
+        self.course = Course.objects.create(title="Test Course", description="Test course description")
+        self.course.teachers.add(self.teacher)
+
+    def populate(self, students_count, homeworks_count, prefix="student"):
+        """Enroll students, create homeworks and a submission for every other cell"""
+        students = []
+        for i in range(students_count):
+            student = User.objects.create(username=f"{prefix}{i}", first_name=f"S{i}", last_name=f"{prefix}{i:03d}")
+            students.append(student)
+        self.course.students.add(*students)
+        homeworks = [
+            Homework.objects.create(
+                course=self.course,
+                title=f"{prefix} HW {j}",
+                description="Description",
+                due_date=timezone.now() + timedelta(days=j + 1),
+            )
+            for j in range(homeworks_count)
+        ]
+        for i, student in enumerate(students):
+            for j, hw in enumerate(homeworks):
+                if (i + j) % 2 == 0:
+                    Submission.objects.create(
+                        homework=hw, student=student, solution_file="submissions/s.txt", grade=(i + j) * 5 if j % 3 else None
+                    )
+        return students, homeworks
+
+    def test_gradebook_matrix_and_summary(self):
+        """Test gradebook cells, totals, averages and completed counts"""
+        students, homeworks = self.populate(3, 4)
+        gradebook = Gradebook.for_course(self.course)
+
+        self.assertEqual(gradebook.students, students)
+        self.assertEqual(gradebook.homeworks, homeworks)
+        self.assertEqual(gradebook.size, 12)
+
+        for row, student in zip(gradebook.rows(), students):
+            submissions = {s.homework_id: s for s in Submission.objects.filter(student=student, homework__course=self.course)}
+            grades = [s.grade for s in submissions.values() if s.grade is not None]
+            self.assertEqual(row.student, student)
+            self.assertEqual(row.total, sum(grades))
+            self.assertEqual(row.completed, len(grades))
+            self.assertEqual(row.average, round(sum(grades) / len(grades), 1) if grades else 0)
+            for cell in row.grades:
+                submission = submissions.get(cell.homework.pk)
+                if submission is None:
+                    self.assertEqual(cell.status, "missing")
+                    self.assertIsNone(cell.submission_id)
+                elif submission.grade is None:
+                    self.assertEqual(cell.status, "submitted")
+                    self.assertEqual(cell.submission_id, submission.pk)
+                else:
+                    self.assertEqual(cell.status, "graded")
+                    self.assertEqual(cell.grade, submission.grade)
+
+    def test_gradebook_ignores_unenrolled_students(self):
+        """Test submissions of students removed from the course are skipped"""
+        students, _ = self.populate(2, 2)
+        self.course.students.remove(students[0])
+        gradebook = Gradebook.for_course(self.course)
+        self.assertEqual([row.student for row in gradebook.rows()], [students[1]])
+
+    def test_grades_table_view(self):
+        """Test grades table view renders the gradebook"""
+        self.populate(2, 3)
+        self.client.login(username="teacher", password="test123")
+        response = self.client.get(reverse("teacher_grades_table", kwargs={"course_pk": self.course.pk}))
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, "assignments/teacher_grades_table.html")
+        self.assertEqual(len(response.context["grades_table"]), 2)
+        self.assertEqual(response.context["cells_count"], 6)
+
+    def test_grades_table_constant_query_count(self):
+        """Test grades table issues the same number of queries regardless of course size"""
+        self.client.login(username="teacher", password="test123")
+        url = reverse("teacher_grades_table", kwargs={"course_pk": self.course.pk})
+
+        self.populate(2, 2)
+        with CaptureQueriesContext(connection) as small:
+            self.client.get(url)
+
+        self.populate(8, 6, prefix="extra")
+        with CaptureQueriesContext(connection) as large:
+            response = self.client.get(url)
+
+        self.assertEqual(len(response.context["grades_table"]), 10)
+        self.assertEqual(len(small), len(large))
+
+
+# ============================================================================
+# GRADE STATS TESTS
+# ============================================================================
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class GradeStatsTest(TestCase):
+    """Tests for incrementally maintained grade aggregates"""
+
+    def setUp(self):
+        """Set up a course with two homeworks and two students"""
+        self.client = Client()
+        self.teacher = User.objects.create_user(username="teacher", password="test123")
+        self.teacher.profile.role = "teacher"
+        self.teacher.profile.save()
+        self.student = User.objects.create_user(username="student", password="test123")
+        self.other = User.objects.create(username="other")
+        self.course = Course.objects.create(title="Test Course", description="Test course description")
+        self.course.teachers.add(self.teacher)
+        self.course.students.add(self.student, self.other)
+        self.hw1 = Homework.objects.create(
+            course=self.course, title="HW 1", description="Description", due_date=timezone.now() + timedelta(days=7)
+        )
+        self.hw2 = Homework.objects.create(
+            course=self.course, title="HW 2", description="Description", due_date=timezone.now() + timedelta(days=7)
+        )
+
+    def assertStats(self, stats, submitted, graded, grade_sum):
+        """Assert counters of a stats row"""
+        self.assertEqual((stats.submitted_count, stats.graded_count, stats.grade_sum), (submitted, graded, grade_sum))
+
+    def test_stats_follow_submission_lifecycle(self):
+        """Test stats are updated on create, grade, regrade and delete"""
+        sub1 = Submission.objects.create(homework=self.hw1, student=self.student, solution_file="submissions/a.txt")
+        Submission.objects.create(homework=self.hw2, student=self.student, solution_file="submissions/b.txt", grade=70)
+        Submission.objects.create(homework=self.hw1, student=self.other, solution_file="submissions/c.txt", grade=50)
+
+        self.assertStats(CourseGradeStats.get_for(course=self.course), 3, 2, 120)
+        self.assertStats(HomeworkGradeStats.get_for(homework=self.hw1), 2, 1, 50)
+        self.assertStats(StudentCourseGradeStats.get_for(course=self.course, student=self.student), 2, 1, 70)
+
+        sub1.grade = 90
+        sub1.save()
+        self.assertStats(CourseGradeStats.get_for(course=self.course), 3, 3, 210)
+
+        sub1 = Submission.objects.get(pk=sub1.pk)
+        sub1.grade = 80
+        sub1.save()
+        self.assertStats(HomeworkGradeStats.get_for(homework=self.hw1), 2, 2, 130)
+        self.assertEqual(CourseGradeStats.get_for(course=self.course).pending_count, 0)
+
+        sub1.delete()
+        self.assertStats(CourseGradeStats.get_for(course=self.course), 2, 2, 120)
+        self.assertStats(StudentCourseGradeStats.get_for(course=self.course, student=self.student), 1, 1, 70)
+        self.assertEqual(verify_grade_stats(), [])
+
+    def test_stats_reset_on_resubmission(self):
+        """Test resubmission through homework_detail resets graded counters"""
+        submission = Submission.objects.create(
+            homework=self.hw1,
+            student=self.student,
+            solution_file=SimpleUploadedFile("old.txt", b"old", content_type="text/plain"),
+            grade=60,
+        )
+        self.client.login(username="student", password="test123")
+        file = SimpleUploadedFile("new.txt", b"new", content_type="text/plain")
+        self.client.post(reverse("homework_detail", kwargs={"pk": self.hw1.pk}), {"solution_file": file})
+
+        submission.refresh_from_db()
+        self.assertIsNone(submission.grade)
+        self.assertStats(HomeworkGradeStats.get_for(homework=self.hw1), 1, 0, 0)
+        self.assertEqual(verify_grade_stats(), [])
+
+    def test_stats_survive_cascade_delete(self):
+        """Test deleting a homework removes its stats and keeps course stats consistent"""
+        Submission.objects.create(homework=self.hw1, student=self.student, solution_file="submissions/a.txt", grade=40)
+        Submission.objects.create(homework=self.hw2, student=self.student, solution_file="submissions/b.txt", grade=30)
+        self.hw1.delete()
+        self.assertFalse(HomeworkGradeStats.objects.filter(homework_id=self.hw1.pk).exists())
+        self.assertEqual(verify_grade_stats(), [])
+        self.course.delete()
+        self.assertFalse(CourseGradeStats.objects.exists())
+
+    def test_rebuild_command_fixes_drift(self):
+        """Test rebuild_grade_stats command detects and repairs drift"""
+        Submission.objects.create(homework=self.hw1, student=self.student, solution_file="submissions/a.txt", grade=40)
+        # Bypassing signals makes the aggregates drift
+        Submission.objects.update(grade=100)
+        with self.assertRaises(CommandError):
+            call_command("rebuild_grade_stats", "--verify", stdout=StringIO(), stderr=StringIO())
+
+        call_command("rebuild_grade_stats", stdout=StringIO())
+        self.assertEqual(verify_grade_stats(), [])
+        self.assertStats(CourseGradeStats.get_for(course=self.course), 1, 1, 100)
+
+    def test_key_fields_match_rebuild_groupings(self):
+        """Test incremental keys and the rebuild groupings identify rows by the same fields"""
+        for model in GRADE_STATS_MODELS:
+            self.assertEqual(tuple(GROUPINGS[model.__name__]), model.key_fields)
+        self.assertEqual(StudentCourseGradeStats.key_for(1, 2, 3), {"course_id": 1, "student_id": 3})
+
+    def test_teacher_views_read_stats(self):
+        """Test teacher dashboard and course pages use aggregate rows"""
+        Submission.objects.create(homework=self.hw1, student=self.student, solution_file="submissions/a.txt")
+        Submission.objects.create(homework=self.hw2, student=self.student, solution_file="submissions/b.txt", grade=70)
+        self.client.login(username="teacher", password="test123")
+
+        response = self.client.get(reverse("teacher_dashboard"))
+        self.assertEqual(response.context["total_submissions"], 2)
+        self.assertEqual(response.context["pending_count"], 1)
+
+        response = self.client.get(reverse("teacher_course_detail", kwargs={"pk": self.course.pk}))
+        self.assertEqual(response.context["total_submissions"], 2)
+        self.assertEqual(response.context["pending_count"], 1)
+
+        response = self.client.get(reverse("teacher_homework_submissions", kwargs={"pk": self.hw2.pk}))
+        self.assertEqual(response.context["total_count"], 1)
+        self.assertEqual(response.context["graded_count"], 1)
+        self.assertEqual(response.context["pending_count"], 0)
+
+    def test_student_dashboard_reads_stats(self):
+        """Test the student dashboard counters come from the per-student course rows"""
+        Submission.objects.create(homework=self.hw1, student=self.student, solution_file="submissions/a.txt")
+        Submission.objects.create(homework=self.hw2, student=self.student, solution_file="submissions/b.txt", grade=70)
+        Submission.objects.create(homework=self.hw1, student=self.other, solution_file="submissions/c.txt", grade=50)
+        self.client.login(username="student", password="test123")
+
+        response = self.client.get(reverse("student_dashboard"))
+        self.assertEqual((response.context["submitted_count"], response.context["graded_count"]), (2, 1))
+
+        # Counters are read from the aggregate row, not recounted over submissions
+        StudentCourseGradeStats.objects.filter(student=self.student).update(submitted_count=5)
+        invalidate_dashboards([self.student.pk])
+        self.assertEqual(self.client.get(reverse("student_dashboard")).context["submitted_count"], 5)
+
+
+# ============================================================================
+# STUDENT PAGE QUERY TESTS
+# ============================================================================
+
+
+class CourseDetailQueryTest(TestCase):
+    """Tests for the constant-query student course page"""
+
+    def setUp(self):
+        """Set up a course with one enrolled student"""
+        self.client = Client()
+        self.student = User.objects.create_user(username="student", password="test123")
+        self.course = Course.objects.create(title="Test Course", description="Test course description")
+        self.course.students.add(self.student)
+        self.url = reverse("course_detail", kwargs={"pk": self.course.pk})
+
+    def add_homeworks(self, count):
+        """Create homeworks and submit every other one"""
+        for i in range(count):
+            hw = Homework.objects.create(
+                course=self.course, title=f"HW {i}", description="Description", due_date=timezone.now() + timedelta(days=i)
+            )
+            if i % 2 == 0:
+                Submission.objects.create(homework=hw, student=self.student, solution_file="submissions/s.txt", grade=i)
+
+    def test_course_detail_shows_own_submissions(self):
+        """Test course detail pairs each homework with the student's submission"""
+        other = User.objects.create(username="other")
+        self.course.students.add(other)
+        self.add_homeworks(3)
+        Submission.objects.create(
+            homework=Homework.objects.get(title="HW 1"), student=other, solution_file="submissions/o.txt"
+        )
+        self.client.login(username="student", password="test123")
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["total_homeworks"], 3)
+        self.assertEqual(response.context["submitted_count"], 2)
+        for item in response.context["homework_status"]:
+            if item["submission"] is not None:
+                self.assertEqual(item["submission"].student, self.student)
+                self.assertEqual(item["submission"].homework, item["homework"])
+
+    def test_course_detail_denies_unenrolled_student(self):
+        """Test course detail redirects students not enrolled in the course"""
+        User.objects.create_user(username="outsider", password="test123")
+        self.client.login(username="outsider", password="test123")
+        response = self.client.get(self.url)
+        self.assertRedirects(response, reverse("student_dashboard"))
+
+    def test_course_detail_constant_query_count(self):
+        """Test course detail issues the same number of queries for 2 and 20 homeworks"""
+        self.client.login(username="student", password="test123")
+        self.add_homeworks(2)
+        with CaptureQueriesContext(connection) as small:
+            self.client.get(self.url)
+        self.add_homeworks(18)
+        with CaptureQueriesContext(connection) as large:
+            response = self.client.get(self.url)
+        self.assertEqual(response.context["total_homeworks"], 20)
+        self.assertEqual(len(small), len(large))
+
+
+class StudentGradeReportTest(TestCase):
+    """Tests and query-count benchmark for the cross-course student grade report"""
+
+    def setUp(self):
+        """Set up a student enrolled in two courses"""
+        self.client = Client()
+        self.student = User.objects.create_user(username="student", password="test123")
+        self.courses = [Course.objects.create(title=f"Course {i}", description="Description") for i in range(2)]
+        self.student.enrolled_courses.add(*self.courses)
+
+    def add_homeworks(self, count):
+        """Spread homeworks over the courses and submit every other one"""
+        for i in range(count):
+            hw = Homework.objects.create(
+                course=self.courses[i % 2],
+                title=f"HW {i}",
+                description="Description",
+                due_date=timezone.now() + timedelta(days=i),
+            )
+            if i % 2 == 0:
+                Submission.objects.create(
+                    homework=hw, student=self.student, solution_file="submissions/s.txt", grade=i if i % 4 else None
+                )
+
+    def legacy_grade_report(self):
+        """The previous per-homework query loop of my_grades, kept for comparison"""
+        report = []
+        for course in self.student.enrolled_courses.all():
+            homeworks = []
+            for hw in course.homeworks.all().order_by("due_date"):
+                submission = Submission.objects.filter(homework=hw, student=self.student).first()
+                homeworks.append({"homework": hw, "submission": submission})
+            report.append({"course": course, "homeworks": homeworks})
+        return report
+
+    def test_report_groups_homeworks_by_course(self):
+        """Test report matches the legacy per-homework lookup"""
+        self.add_homeworks(6)
+        report = student_grade_report(self.student)
+        legacy = self.legacy_grade_report()
+        self.assertEqual([c["course"] for c in report], [c["course"] for c in legacy])
+        for course_data, legacy_data in zip(report, legacy):
+            self.assertEqual(
+                [(h["homework"], h["submission"]) for h in course_data["homeworks"]],
+                [(h["homework"], h["submission"]) for h in legacy_data["homeworks"]],
+            )
+        statuses = {h["homework"].title: h["status"] for c in report for h in c["homeworks"]}
+        self.assertEqual(statuses["HW 0"], "На проверке")
+        self.assertEqual(statuses["HW 1"], "Не сдано")
+        self.assertEqual(statuses["HW 2"], "Оценено")
+
+    def test_my_grades_view(self):
+        """Test my_grades view renders the report"""
+        self.add_homeworks(4)
+        self.client.login(username="student", password="test123")
+        response = self.client.get(reverse("my_grades"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context["grades_data"]), 2)
+
+    def test_query_count_benchmark(self):
+        """Benchmark: legacy path grows with homeworks, new path stays at three queries"""
+        created = 0
+        for size in (10, 50, 200):
+            self.add_homeworks(size - created)
+            created = size
+            with CaptureQueriesContext(connection) as legacy:
+                self.legacy_grade_report()
+            with CaptureQueriesContext(connection) as bulk:
+                student_grade_report(self.student)
+            self.assertEqual(len(legacy), 1 + len(self.courses) + size)
+            self.assertEqual(len(bulk), 3)
+
+
+# ============================================================================
+# COURSE AUTHORIZATION TESTS
+# ============================================================================
+
+
+class CourseAuthorizationTest(TestCase):
+    """Tests for EXISTS-based course membership guards"""
+
+    def setUp(self):
+        """Set up a course with a large roster, a teacher and a homework"""
+        self.client = Client()
+        self.teacher = User.objects.create_user(username="teacher", password="test123")
+        self.teacher.profile.role = "teacher"
+        self.teacher.profile.save()
+        self.student = User.objects.create_user(username="student", password="test123")
+        self.course = Course.objects.create(title="Test Course", description="Test course description")
+        self.course.teachers.add(self.teacher)
+        self.course.students.add(self.student, *[User.objects.create(username=f"s{i}") for i in range(20)])
+        self.homework = Homework.objects.create(
+            course=self.course, title="HW", description="Description", due_date=timezone.now() + timedelta(days=7)
+        )
+        self.submission = Submission.objects.create(
+            homework=self.homework, student=self.student, solution_file="submissions/s.txt"
+        )
+        self.other_course = Course.objects.create(title="Other", description="Other course")
+
+    def guard_queries(self, queries, role):
+        """Queries touching the course membership link table of the given role"""
+        table = f"assignments_course_{role}s"
+        return [q["sql"] for q in queries if table in q["sql"]]
+
+    def test_has_course_role_is_memoized_per_request(self):
+        """Test repeated checks within a request cost a single query"""
+        request = RequestFactory().get("/")
+        request.user = self.teacher
+        with CaptureQueriesContext(connection) as queries:
+            self.assertTrue(has_course_role(request, self.course.pk, "teacher"))
+            self.assertTrue(has_course_role(request, str(self.course.pk), "teacher"))
+            self.assertFalse(has_course_role(request, self.other_course.pk, "teacher"))
+            self.assertFalse(has_course_role(request, self.course.pk, "student"))
+        self.assertEqual(len(queries), 3)
+
+    def test_teacher_guards_cost_one_query(self):
+        """Test each teacher view guard runs at most one membership query"""
+        self.client.login(username="teacher", password="test123")
+        urls = [
+            reverse("teacher_course_detail", kwargs={"pk": self.course.pk}),
+            reverse("edit_course", kwargs={"pk": self.course.pk}),
+            reverse("teacher_grades_table", kwargs={"course_pk": self.course.pk}),
+            reverse("teacher_create_homework", kwargs={"course_pk": self.course.pk}),
+            reverse("teacher_edit_homework", kwargs={"pk": self.homework.pk}),
+            reverse("teacher_homework_submissions", kwargs={"pk": self.homework.pk}),
+            reverse("teacher_grade_submission", kwargs={"pk": self.submission.pk}),
+        ]
+        for url in urls:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200, url)
+            self.assertLessEqual(len(self.guard_queries(queries, "teacher")), 1, url)
+
+    def test_student_guards_cost_one_query(self):
+        """Test student view guards run at most one membership query"""
+        self.client.login(username="student", password="test123")
+        for url in (
+            reverse("course_detail", kwargs={"pk": self.course.pk}),
+            reverse("homework_detail", kwargs={"pk": self.homework.pk}),
+        ):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200, url)
+            self.assertEqual(len(self.guard_queries(queries, "student")), 1, url)
+
+    def test_guard_denies_foreign_course(self):
+        """Test guard redirects non-members and returns 404 for missing courses"""
+        self.client.login(username="teacher", password="test123")
+        response = self.client.get(reverse("teacher_course_detail", kwargs={"pk": self.other_course.pk}))
+        self.assertRedirects(response, reverse("teacher_dashboard"))
+        response = self.client.get(reverse("teacher_course_detail", kwargs={"pk": 999999}))
+        self.assertEqual(response.status_code, 404)
+
+
+class RoleLoadingTest(TestCase):
+    """Tests for loading the session user together with the profile"""
+
+    def setUp(self):
+        """Set up users of both roles"""
+        self.client = Client()
+        self.student = User.objects.create_user(username="student", password="test123")
+        self.teacher = User.objects.create_user(username="teacher", password="test123")
+        self.teacher.profile.role = "teacher"
+        self.teacher.profile.save()
+
+    def profile_queries(self, queries):
+        """Standalone queries against the profile table"""
+        return [q["sql"] for q in queries if 'FROM "assignments_userprofile"' in q["sql"]]
+
+    def test_role_checks_do_not_query_profile(self):
+        """Test role decorators and dashboard redirect reuse the joined profile"""
+        for username, url in (("student", "student_dashboard"), ("teacher", "teacher_dashboard")):
+            self.client.login(username=username, password="test123")
+            with CaptureQueriesContext(connection) as queries:
+                self.assertEqual(self.client.get(reverse("dashboard")).status_code, 302)
+                self.assertEqual(self.client.get(reverse(url)).status_code, 200)
+            self.assertEqual(self.profile_queries(queries), [])
+            self.client.logout()
+
+    def test_role_change_applies_on_next_request(self):
+        """Test a changed role is picked up by the next request"""
+        self.client.login(username="student", password="test123")
+        self.assertEqual(self.client.get(reverse("student_dashboard")).status_code, 200)
+        self.student.profile.role = "teacher"
+        self.student.profile.save()
+        self.assertEqual(self.client.get(reverse("student_dashboard")).status_code, 302)
+        self.assertEqual(self.client.get(reverse("teacher_dashboard")).status_code, 200)
+
+    def test_sessions_of_model_backend_are_migrated(self):
+        """Test sessions stored by the stock ModelBackend are moved to ProfileModelBackend"""
+        with self.settings(AUTHENTICATION_BACKENDS=[PROFILE_BACKEND, LEGACY_BACKEND]):
+            self.client.force_login(self.student, backend=LEGACY_BACKEND)
+        self.assertEqual(migrate_session_backends(), 1)
+        self.assertEqual(self.client.session[BACKEND_SESSION_KEY], PROFILE_BACKEND)
+        self.assertEqual(self.client.get(reverse("student_dashboard")).status_code, 200)
+        self.assertEqual(migrate_session_backends(), 0)
+
+    def test_failed_login_checks_the_password_once(self):
+        """Test a wrong password is hashed by a single authentication backend"""
+        with mock.patch("django.contrib.auth.hashers.PBKDF2PasswordHasher.verify", return_value=False) as verify:
+            self.assertFalse(self.client.login(username="student", password="wrong"))
+        self.assertEqual(verify.call_count, 1)
+
+
+class AvailableCoursesQueryTest(TestCase):
+    """Tests for the annotated, paginated course catalog"""
+
+    def setUp(self):
+        """Set up a student, a teacher and a few courses"""
+        self.client = Client()
+        self.student = User.objects.create_user(username="student", password="test123")
+        self.teacher = User.objects.create(username="teacher", first_name="Jane", last_name="Smith")
+        self.url = reverse("available_courses")
+
+    def add_courses(self, count, prefix="Course"):
+        """Create courses with a teacher, two students and a homework each"""
+        courses = []
+        for i in range(count):
+            course = Course.objects.create(title=f"{prefix} {i:03d}", description="Description")
+            course.teachers.add(self.teacher)
+            course.students.add(*[User.objects.create(username=f"{prefix}-{i}-{j}") for j in range(2)])
+            Homework.objects.create(course=course, title="HW", description="Description", due_date=timezone.now())
+            courses.append(course)
+        return courses
+
+    def test_catalog_annotations(self):
+        """Test counts, enrollment flag and request status come from annotations"""
+        enrolled, requested, other = self.add_courses(3)
+        enrolled.students.add(self.student)
+        enrollment_request = CourseEnrollmentRequest.objects.create(course=requested, student=self.student)
+        self.client.login(username="student", password="test123")
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        courses = {course.pk: course for course in response.context["courses"]}
+        self.assertEqual(courses[enrolled.pk].students_count, 3)
+        self.assertEqual(courses[other.pk].students_count, 2)
+        self.assertEqual(courses[other.pk].homeworks_count, 1)
+        self.assertTrue(courses[enrolled.pk].is_enrolled)
+        self.assertFalse(courses[requested.pk].is_enrolled)
+        self.assertEqual(courses[requested.pk].request_status, "pending")
+        self.assertEqual(courses[requested.pk].request_id, enrollment_request.pk)
+        self.assertIsNone(courses[other.pk].request_status)
+        self.assertContains(response, "Jane Smith")
+
+    def test_catalog_is_paginated(self):
+        """Test catalog pages hold at most COURSES_PER_PAGE courses"""
+        self.add_courses(25)
+        self.client.login(username="student", password="test123")
+        response = self.client.get(self.url)
+        self.assertEqual(len(response.context["courses"]), 20)
+        response = self.client.get(self.url, {"page": 2})
+        self.assertEqual(len(response.context["courses"]), 5)
+
+    def test_catalog_constant_query_count(self):
+        """Test catalog query count does not depend on the number of courses"""
+        self.client.login(username="student", password="test123")
+        self.add_courses(2)
+        with CaptureQueriesContext(connection) as small:
+            self.client.get(self.url)
+        self.add_courses(15, prefix="More")
+        with CaptureQueriesContext(connection) as large:
+            response = self.client.get(self.url)
+        self.assertEqual(len(response.context["courses"]), 17)
+        self.assertEqual(len(small), len(large))
+
+
+# ============================================================================
+# KEYSET PAGINATION TESTS
+# ============================================================================
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class TeacherAllSubmissionsPaginationTest(TestCase):
+    """Tests for keyset pagination of teacher_all_submissions"""
+
+    def setUp(self):
+        """Set up a teacher with 120 submissions, some sharing a timestamp"""
+        self.client = Client()
+        self.teacher = User.objects.create_user(username="teacher", password="test123")
+        self.teacher.profile.role = "teacher"
+        self.teacher.profile.save()
+        self.course = Course.objects.create(title="Test Course", description="Test course description")
+        self.course.teachers.add(self.teacher)
+        homeworks = [
+            Homework.objects.create(course=self.course, title=f"HW {j}", description="D", due_date=timezone.now())
+            for j in range(4)
+        ]
+        base = timezone.now()
+        for i in range(30):
+            student = User.objects.create(username=f"student{i}")
+            for j, hw in enumerate(homeworks):
+                submission = Submission.objects.create(
+                    homework=hw, student=student, solution_file="submissions/s.txt", grade=None if j % 2 else 80
+                )
+                # Every pair of submissions shares a timestamp to exercise the id tie-breaker
+                Submission.objects.filter(pk=submission.pk).update(submitted_at=base - timedelta(minutes=(i * 4 + j) // 2))
+        self.client.login(username="teacher", password="test123")
+        self.url = reverse("teacher_all_submissions")
+
+    def walk(self, params):
+        """Follow next cursors and collect submission ids of every page"""
+        ids, cursor, pages = [], None, 0
+        while True:
+            query = dict(params, **({"cursor": cursor} if cursor else {}))
+            response = self.client.get(self.url, query)
+            ids.extend(s.pk for s in response.context["submissions"])
+            pages += 1
+            page = response.context["page"]
+            if not page.has_next:
+                return ids, pages
+            cursor = page.next_cursor
+
+    def test_pages_cover_feed_in_order(self):
+        """Test walking all pages yields every submission once in feed order"""
+        ids, pages = self.walk({})
+        expected = list(Submission.objects.order_by("-submitted_at", "-id").values_list("pk", flat=True))
+        self.assertEqual(ids, expected)
+        self.assertEqual(pages, 3)
+
+    def test_pages_respect_filters(self):
+        """Test cursors keep the status filter"""
+        ids, _ = self.walk({"status": "pending", "course": str(self.course.pk)})
+        expected = list(
+            Submission.objects.filter(grade__isnull=True).order_by("-submitted_at", "-id").values_list("pk", flat=True)
+        )
+        self.assertEqual(ids, expected)
+
+    def test_invalid_cursor_falls_back_to_first_page(self):
+        """Test a corrupted cursor shows the first page"""
+        response = self.client.get(self.url, {"cursor": "not-a-cursor"})
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.context["page"].cursor)
+        self.assertEqual(len(response.context["submissions"]), 50)
+
+    def test_cursor_with_wrong_value_type_falls_back_to_first_page(self):
+        """Test a well-formed cursor holding a non-date value shows the first page"""
+        response = self.client.get(self.url, {"cursor": encode_cursor(["garbage", 1])})
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.context["page"].cursor)
+        with self.assertRaises(InvalidCursor):
+            decode_cursor(encode_cursor(["garbage", 1]), Submission, ["submitted_at", "id"])
+
+    def test_cursor_with_missing_values_falls_back_to_first_page(self):
+        """Test cursors holding nulls or a wrong number of values show the first page"""
+        cursors = [
+            encode_cursor([None, None]),
+            encode_cursor(["2024-01-01T00:00:00+00:00", None]),
+            encode_cursor(["2024-01-01T00:00:00+00:00"]),
+            encode_cursor(["2024-01-01T00:00:00+00:00", 1, 2]),
+        ]
+        for cursor in cursors:
+            with self.subTest(cursor=cursor):
+                response = self.client.get(self.url, {"cursor": cursor})
+                self.assertEqual(response.status_code, 200)
+                self.assertIsNone(response.context["page"].cursor)
+                with self.assertRaises(InvalidCursor):
+                    decode_cursor(cursor, Submission, ["submitted_at", "id"])
+
+    def test_deep_page_query_count(self):
+        """Test deep pages cost the same number of queries as the first page"""
+        with CaptureQueriesContext(connection) as first:
+            response = self.client.get(self.url)
+        cursor = response.context["page"].next_cursor
+        response = self.client.get(self.url, {"cursor": cursor})
+        with CaptureQueriesContext(connection) as deep:
+            self.client.get(self.url, {"cursor": response.context["page"].next_cursor})
+        self.assertEqual(len(first), len(deep))
+
+
+# ============================================================================
+# EXPORT TESTS
+# ============================================================================
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class HomeworkArchiveTest(TestCase):
+    """Tests for the streaming ZIP export of homework submissions"""
+
+    def setUp(self):
+        """Set up a homework with one graded and one pending submission"""
+        self.client = Client()
+        self.teacher = User.objects.create_user(username="teacher", password="test123")
+        self.teacher.profile.role = "teacher"
+        self.teacher.profile.save()
+        self.course = Course.objects.create(title="Test Course", description="Test course description")
+        self.course.teachers.add(self.teacher)
+        self.homework = Homework.objects.create(
+            course=self.course, title="HW", description="D", due_date=timezone.now() + timedelta(days=7)
+        )
+        self.alice = User.objects.create_user(username="alice", first_name="Alice", last_name="A")
+        self.bob = User.objects.create_user(username="bob", first_name="Bob", last_name="B")
+        self.payload = bytes(range(256)) * 1024
+        Submission.objects.create(
+            homework=self.homework,
+            student=self.alice,
+            solution_file=SimpleUploadedFile("solution.py", self.payload),
+            grade=90,
+            feedback="Good",
+        )
+        Submission.objects.create(
+            homework=self.homework, student=self.bob, solution_file=SimpleUploadedFile("answer.txt", b"bob")
+        )
+        self.url = reverse("teacher_homework_download", kwargs={"pk": self.homework.pk})
+
+    def download(self):
+        """Download the archive and open it"""
+        self.client.login(username="teacher", password="test123")
+        response = self.client.get(self.url)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Type"], "application/zip")
+        self.assertIn("attachment", response["Content-Disposition"])
+        return zipfile.ZipFile(BytesIO(b"".join(response.streaming_content)))
+
+    def test_archive_contains_files_and_manifest(self):
+        """Test every submission file and the grades manifest are in the archive"""
+        archive = self.download()
+        self.assertIsNone(archive.testzip())
+        names = archive.namelist()
+        self.assertEqual(len(names), 3)
+        alice_name = next(name for name in names if name.startswith("alice_"))
+        self.assertTrue(alice_name.endswith(".py"))
+        self.assertEqual(archive.read(alice_name), self.payload)
+
+        manifest = list(csv.reader(StringIO(archive.read("grades.csv").decode("utf-8-sig"))))
+        self.assertEqual(len(manifest), 3)
+        by_login = {row[0]: row for row in manifest[1:]}
+        self.assertEqual(by_login["alice"][3], alice_name)
+        self.assertEqual(by_login["alice"][4], "90")
+        self.assertEqual(by_login["bob"][4], "")
+        self.assertEqual(by_login["bob"][5], "На проверке")
+
+    def test_missing_file_is_listed_in_manifest_only(self):
+        """Test a submission whose file is gone does not break the export"""
+        Submission.objects.filter(student=self.bob).update(solution_file="submissions/missing.txt")
+        archive = self.download()
+        self.assertEqual(len(archive.namelist()), 2)
+        manifest = list(csv.reader(StringIO(archive.read("grades.csv").decode("utf-8-sig"))))
+        self.assertEqual({row[0]: row[3] for row in manifest[1:]}["bob"], "")
+
+    def test_archive_is_streamed_in_chunks(self):
+        """Test the generator yields the archive piece by piece instead of one buffer"""
+        chunks = list(stream_homework_archive(self.homework, chunk_size=4096))
+        self.assertGreater(len(chunks), len(self.payload) // 4096 // 2)
+        self.assertLess(max(len(chunk) for chunk in chunks), len(self.payload))
+        self.assertIsNone(zipfile.ZipFile(BytesIO(b"".join(chunks))).testzip())
+
+    def test_other_teacher_is_redirected(self):
+        """Test a teacher of another course cannot download the archive"""
+        other = User.objects.create_user(username="other", password="test123")
+        other.profile.role = "teacher"
+        other.profile.save()
+        self.client.login(username="other", password="test123")
+        response = self.client.get(self.url)
+        self.assertRedirects(response, reverse("teacher_dashboard"))
+
+
+class GradebookExportTest(TestCase):
+    """Tests for the streaming CSV/XLSX export of the course grade matrix"""
+
+    def setUp(self):
+        """Set up a course with three students, two homeworks and mixed submissions"""
+        self.client = Client()
+        self.teacher = User.objects.create_user(username="teacher", password="test123")
+        self.teacher.profile.role = "teacher"
+        self.teacher.profile.save()
+        self.course = Course.objects.create(title="Test Course", description="Test course description")
+        self.course.teachers.add(self.teacher)
+        now = timezone.now()
+        self.hw1 = Homework.objects.create(course=self.course, title="HW 1", description="D", due_date=now)
+        self.hw2 = Homework.objects.create(course=self.course, title="HW 2", description="D", due_date=now + timedelta(days=1))
+        self.students = {}
+        for username, last_name in (("carol", "C"), ("alice", "A"), ("bob", "B")):
+            self.students[username] = User.objects.create_user(
+                username=username, first_name=username.title(), last_name=last_name
+            )
+            self.course.students.add(self.students[username])
+        grades = {("alice", self.hw1): 90, ("alice", self.hw2): 70, ("bob", self.hw1): None, ("carol", self.hw2): 50}
+        for (username, homework), grade in grades.items():
+            Submission.objects.create(
+                homework=homework, student=self.students[username], solution_file="submissions/s.txt", grade=grade
+            )
+        # Submission of a student who has left the course
+        gone = User.objects.create_user(username="gone")
+        Submission.objects.create(homework=self.hw1, student=gone, solution_file="submissions/s.txt", grade=10)
+
+    def test_rows_match_gradebook(self):
+        """Test the streamed rows equal the in-memory gradebook, whatever the chunk size"""
+        rows = list(gradebook_rows(self.course, chunk_size=1))
+        self.assertEqual(rows[0], ["Логин", "Студент", "HW 1", "HW 2", "Сумма", "Средняя", "Оценено"])
+        self.assertEqual(rows[1], ["alice", "Alice A", 90, 70, 160, 80.0, 2])
+        self.assertEqual(rows[2], ["bob", "Bob B", "", "", 0, 0, 0])
+        gradebook = Gradebook.for_course(self.course)
+        expected = [[row.student.username, row.total, row.average, row.completed] for row in gradebook.rows()]
+        self.assertEqual([[row[0], *row[-3:]] for row in rows[1:]], expected)
+
+    def test_query_count_does_not_depend_on_students(self):
+        """Test the export reads homeworks and then students with their submissions in one query"""
+        with CaptureQueriesContext(connection) as queries:
+            list(gradebook_rows(self.course, chunk_size=1))
+        self.assertEqual(len(queries), 2)
+
+    def test_submission_of_unenrolled_student_keeps_later_grades(self):
+        """Test a submission of a student outside the course does not blank out the students after them"""
+        left = User.objects.create_user(username="left", first_name="Left", last_name="AB")
+        Submission.objects.create(homework=self.hw2, student=left, solution_file="submissions/s.txt", grade=30)
+        rows = list(gradebook_rows(self.course, chunk_size=1))
+        self.assertEqual([row[0] for row in rows[1:]], ["alice", "bob", "carol"])
+        self.assertEqual(rows[1], ["alice", "Alice A", 90, 70, 160, 80.0, 2])
+        self.assertEqual(rows[3], ["carol", "Carol C", "", 50, 50, 50.0, 1])
+
+    def test_csv_is_streamed_in_bounded_chunks(self):
+        """Test the CSV download streams chunks and opens in Excel encoding"""
+        self.client.login(username="teacher", password="test123")
+        response = self.client.get(reverse("teacher_grades_export", kwargs={"course_pk": self.course.pk}))
+        self.assertTrue(response.streaming)
+        self.assertIn("attachment", response["Content-Disposition"])
+        content = b"".join(response.streaming_content)
+        self.assertTrue(content.startswith(b"\xef\xbb\xbf"))
+        rows = list(csv.reader(StringIO(content.decode("utf-8-sig"))))
+        self.assertEqual(rows[3], ["carol", "Carol C", "", "50", "50", "50.0", "1"])
+
+        chunks = list(stream_gradebook_csv(self.course, chunk_size=32))
+        self.assertGreater(len(chunks), 2)
+        self.assertEqual(b"".join(chunks), content)
+
+    def test_csv_escapes_formula_cells(self):
+        """Test text cells that spreadsheets would evaluate as formulas are prefixed with an apostrophe"""
+        self.students["alice"].first_name = '=HYPERLINK("http://evil")'
+        self.students["alice"].save()
+        self.hw2.title = "@SUM(A1)"
+        self.hw2.save()
+        content = b"".join(stream_gradebook_csv(self.course)).decode("utf-8-sig")
+        rows = list(csv.reader(StringIO(content)))
+        self.assertEqual(rows[0][3], "'@SUM(A1)")
+        self.assertEqual(rows[1][:3], ["alice", '\'=HYPERLINK("http://evil") A', "90"])
+        for value in ("+1", "-1", "\tx", "\rx"):
+            self.assertEqual(csv_cell(value), "'" + value)
+        self.assertEqual((csv_cell("a=b"), csv_cell(-1)), ("a=b", -1))
+
+    def test_xlsx_is_a_valid_workbook(self):
+        """Test the XLSX download is a zip with a worksheet holding numbers and inline strings"""
+        self.client.login(username="teacher", password="test123")
+        url = reverse("teacher_grades_export", kwargs={"course_pk": self.course.pk})
+        response = self.client.get(url, {"format": "xlsx"})
+        self.assertEqual(response["Content-Type"], "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+        archive = zipfile.ZipFile(BytesIO(b"".join(response.streaming_content)))
+        self.assertIsNone(archive.testzip())
+        self.assertIn("[Content_Types].xml", archive.namelist())
+        sheet = ElementTree.fromstring(archive.read("xl/worksheets/sheet1.xml"))
+        namespace = {"s": "http://schemas.openxmlformats.org/spreadsheetml/2006/main"}
+        rows = sheet.findall("s:sheetData/s:row", namespace)
+        self.assertEqual(len(rows), 4)
+        alice = {cell.get("r"): cell for cell in rows[1]}
+        self.assertEqual(alice["A2"].find("s:is/s:t", namespace).text, "alice")
+        self.assertEqual(alice["E2"].find("s:v", namespace).text, "160")
+        self.assertEqual(b"".join(stream_gradebook_xlsx(self.course, chunk_size=16))[:2], b"PK")
+
+    def test_other_teacher_has_no_access(self):
+        """Test the export is available only to the course teachers"""
+        other = User.objects.create_user(username="other", password="test123")
+        other.profile.role = "teacher"
+        other.profile.save()
+        self.client.login(username="other", password="test123")
+        response = self.client.get(reverse("teacher_grades_export", kwargs={"course_pk": self.course.pk}))
+        self.assertFalse(getattr(response, "streaming", False))
+
+
+# ============================================================================
+# CHUNKED UPLOAD TESTS
+# ============================================================================
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class ChunkedUploadTest(TestCase):
+    """Tests for the init/append/commit solution upload API"""
+
+    def setUp(self):
+        """Set up an enrolled student and a homework"""
+        self.client = Client()
+        self.student = User.objects.create_user(username="student", password="test123")
+        self.course = Course.objects.create(title="Test Course", description="Test course description")
+        self.course.students.add(self.student)
+        self.homework = Homework.objects.create(
+            course=self.course, title="HW", description="D", due_date=timezone.now() + timedelta(days=7)
+        )
+        self.client.login(username="student", password="test123")
+        self.payload = bytes(range(256)) * 10000
+
+    def start(self, filename="solution.zip", size=None):
+        """Start an upload through the API"""
+        size = len(self.payload) if size is None else size
+        url = reverse("start_submission_upload", kwargs={"pk": self.homework.pk})
+        return self.client.post(url, {"filename": filename, "size": size})
+
+    def append(self, state, offset, data):
+        """Send one chunk through the API"""
+        return self.client.post(f"{state['append_url']}?offset={offset}", data=data, content_type="application/octet-stream")
+
+    def upload(self, payload):
+        """Upload payload chunk by chunk and return the start response data"""
+        state = self.start(size=len(payload)).json()
+        offset = 0
+        while offset < len(payload):
+            response = self.append(state, offset, payload[offset : offset + state["chunk_size"]])
+            self.assertEqual(response.status_code, 200)
+            offset = response.json()["offset"]
+        return state
+
+    def test_full_upload_creates_submission(self):
+        """Test chunks are assembled into the submission file on commit"""
+        state = self.upload(self.payload)
+        upload = UploadSession.objects.get()
+        self.assertEqual(upload.chunk_count, 3)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(state["commit_url"])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["redirect"], reverse("course_detail", kwargs={"pk": self.course.pk}))
+
+        submission = Submission.objects.get(homework=self.homework, student=self.student)
+        self.assertTrue(submission.solution_file.name.endswith(".zip"))
+        with submission.solution_file.open("rb") as f:
+            self.assertEqual(f.read(), self.payload)
+        self.assertFalse(UploadSession.objects.exists())
+        self.assertFalse(default_storage.exists(upload.chunk_name(0)))
+        self.assertEqual(HomeworkGradeStats.get_for(homework=self.homework).submitted_count, 1)
+
+    def test_resume_after_offset_mismatch(self):
+        """Test a repeated or skipped chunk is refused with the accepted offset"""
+        state = self.start().json()
+        self.assertEqual(self.append(state, 0, self.payload[:1000]).json()["offset"], 1000)
+
+        response = self.append(state, 0, self.payload[:1000])
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()["offset"], 1000)
+        self.assertEqual(self.client.get(state["status_url"]).json()["offset"], 1000)
+
+        self.assertEqual(self.append(state, 1000, self.payload[1000:2000]).json()["offset"], 2000)
+
+    def test_limits_are_enforced_before_commit(self):
+        """Test extension, declared size and per-chunk limits"""
+        self.assertEqual(self.start(filename="virus.exe").status_code, 400)
+        self.assertEqual(self.start(size=11 * 1024 * 1024).status_code, 413)
+
+        state = self.start(size=10).json()
+        self.assertEqual(self.append(state, 0, b"x" * 11).status_code, 413)
+        self.assertEqual(UploadSession.objects.get().received, 0)
+
+        state = self.start(size=10 * 1024 * 1024).json()
+        self.assertEqual(self.append(state, 0, b"x" * (state["chunk_size"] + 1)).status_code, 413)
+
+    def test_incomplete_upload_cannot_be_committed(self):
+        """Test commit is refused until every declared byte arrives"""
+        state = self.start().json()
+        self.append(state, 0, self.payload[:100])
+        response = self.client.post(state["commit_url"])
+        self.assertEqual(response.status_code, 409)
+        self.assertFalse(Submission.objects.exists())
+
+    def test_resubmission_resets_grade(self):
+        """Test committing over an existing submission replaces the file and resets the grade"""
+        old = Submission.objects.create(
+            homework=self.homework, student=self.student, solution_file=SimpleUploadedFile("old.txt", b"old"), grade=70
+        )
+        old_name = old.solution_file.name
+        state = self.upload(self.payload[:5000])
+        self.client.post(state["commit_url"])
+        run_pending()
+
+        old.refresh_from_db()
+        self.assertIsNone(old.grade)
+        self.assertNotEqual(old.solution_file.name, old_name)
+        self.assertFalse(default_storage.exists(old_name))
+        self.assertEqual(Submission.objects.count(), 1)
+
+    def test_commit_racing_another_commit_updates_its_submission(self):
+        """Test a submission created by a parallel commit is updated instead of failing on uniqueness"""
+        state = self.upload(self.payload[:5000])
+        save_file = FieldFile.save
+
+        def save_after_parallel_commit(field_file, name, content, save=True):
+            Submission.objects.create(
+                homework=self.homework, student=self.student, solution_file="submissions/parallel.txt", grade=80
+            )
+            return save_file(field_file, name, content, save)
+
+        with mock.patch.object(FieldFile, "save", autospec=True, side_effect=save_after_parallel_commit):
+            response = self.client.post(state["commit_url"])
+        self.assertEqual(response.status_code, 200)
+        submission = Submission.objects.get(homework=self.homework, student=self.student)
+        self.assertIsNone(submission.grade)
+        with submission.solution_file.open("rb") as f:
+            self.assertEqual(f.read(), self.payload[:5000])
+        self.assertFalse(UploadSession.objects.exists())
+
+    def test_chunk_is_read_before_the_upload_is_locked(self):
+        """Test the request body is read before the transaction that locks the upload starts"""
+        upload = start_upload(self.homework, self.student, "solution.py", 3)
+        depth = len(connection.savepoint_ids)
+        stream = mock.Mock()
+        stream.read.side_effect = lambda size: self.assertEqual(len(connection.savepoint_ids), depth) or b"abc"
+        self.assertEqual(append_chunk(upload, 0, stream), 3)
+
+    def test_access_is_limited_to_owner_and_enrolled_students(self):
+        """Test other students cannot use an upload or start one for a foreign course"""
+        state = self.start().json()
+        other = User.objects.create_user(username="other", password="test123")
+        self.client.login(username="other", password="test123")
+        self.assertEqual(self.client.get(state["status_url"]).status_code, 404)
+        self.assertEqual(self.append(state, 0, b"x").status_code, 404)
+        self.assertEqual(self.start().status_code, 403)
+        self.assertFalse(other.upload_sessions.exists())
+
+
+# ============================================================================
+# CONTENT-ADDRESSED STORAGE TESTS
+# ============================================================================
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class SubmissionFileStorageTest(TestCase):
+    """Tests for deduplicated submission storage and reference counting"""
+
+    def setUp(self):
+        """Set up a course with two enrolled students"""
+        self.client = Client()
+        self.course = Course.objects.create(title="Test Course", description="Test course description")
+        self.homework = Homework.objects.create(
+            course=self.course, title="HW", description="D", due_date=timezone.now() + timedelta(days=7)
+        )
+        self.alice = User.objects.create_user(username="alice", password="test123")
+        self.bob = User.objects.create_user(username="bob", password="test123")
+        self.course.students.add(self.alice, self.bob)
+        self.storage = Submission._meta.get_field("solution_file").storage
+
+    def submit(self, student, content, filename="solution.py"):
+        """Create a submission with an uploaded file"""
+        return Submission.objects.create(
+            homework=self.homework, student=student, solution_file=SimpleUploadedFile(filename, content)
+        )
+
+    def test_identical_files_are_stored_once(self):
+        """Test equal content shares one sharded SHA-256 path"""
+        first = self.submit(self.alice, b"print(42)\n", "a.py")
+        second = self.submit(self.bob, b"print(42)\n", "b.PY")
+        digest = hashlib.sha256(b"print(42)\n").hexdigest()
+        self.assertEqual(first.solution_file.name, f"submissions/{digest[:2]}/{digest[2:4]}/{digest}.py")
+        self.assertEqual(second.solution_file.name, first.solution_file.name)
+        self.assertEqual(StoredFile.objects.get(name=first.solution_file.name).ref_count, 2)
+        self.assertEqual(self.storage.listdir(f"submissions/{digest[:2]}/{digest[2:4]}")[1], [f"{digest}.py"])
+
+    def test_resubmission_keeps_shared_file_and_collects_unused(self):
+        """Test replacing a file deletes it only when nobody else references it"""
+        shared = self.submit(self.alice, b"shared").solution_file.name
+        self.submit(self.bob, b"shared")
+        self.client.login(username="alice", password="test123")
+        url = reverse("homework_detail", kwargs={"pk": self.homework.pk})
+
+        self.client.post(url, {"solution_file": SimpleUploadedFile("v2.py", b"version 2")})
+        run_pending()
+        self.assertTrue(self.storage.exists(shared))
+        self.assertEqual(StoredFile.objects.get(name=shared).ref_count, 1)
+
+        version2 = Submission.objects.get(student=self.alice).solution_file.name
+        self.client.post(url, {"solution_file": SimpleUploadedFile("v3.py", b"version 3")})
+        self.assertTrue(self.storage.exists(version2))
+        run_pending()
+        self.assertFalse(self.storage.exists(version2))
+        self.assertFalse(StoredFile.objects.filter(name=version2).exists())
+
+    def test_delete_releases_file(self):
+        """Test deleting the last submission removes its file"""
+        submission = self.submit(self.alice, b"only mine")
+        name = submission.solution_file.name
+        submission.delete()
+        run_pending()
+        self.assertFalse(self.storage.exists(name))
+        self.assertFalse(StoredFile.objects.exists())
+
+    def commit_failing_upload(self, student, content):
+        """Upload content in one chunk and fail the commit after the file is stored"""
+        upload = start_upload(self.homework, student, "solution.py", len(content))
+        append_chunk(upload, 0, BytesIO(content))
+        with mock.patch("assignments.uploads.delete_upload", side_effect=RuntimeError("boom")):
+            with self.assertRaises(RuntimeError):
+                commit_upload(upload)
+
+    def test_failed_upload_commit_keeps_shared_file(self):
+        """Test a failed commit of already stored bytes does not delete the shared file"""
+        shared = self.submit(self.bob, b"shared").solution_file.name
+        self.commit_failing_upload(self.alice, b"shared")
+        run_pending()
+        self.assertTrue(self.storage.exists(shared))
+        self.assertEqual(StoredFile.objects.get(name=shared).ref_count, 1)
+        self.assertFalse(Submission.objects.filter(student=self.alice).exists())
+
+    def test_failed_upload_commit_collects_new_file(self):
+        """Test the file assembled by a failed commit is collected once nothing references it"""
+        self.commit_failing_upload(self.alice, b"new bytes")
+        digest = hashlib.sha256(b"new bytes").hexdigest()
+        name = f"submissions/{digest[:2]}/{digest[2:4]}/{digest}.py"
+        self.assertTrue(self.storage.exists(name))
+        run_pending()
+        self.assertFalse(self.storage.exists(name))
+        self.assertFalse(StoredFile.objects.exists())
+
+    def test_collect_keeps_file_with_references(self):
+        """Test the collector skips a file that is referenced again after the release"""
+        name = self.submit(self.alice, b"again").solution_file.name
+        self.assertFalse(collect_stored_file(name))
+        self.assertTrue(self.storage.exists(name))
+        self.assertEqual(StoredFile.objects.get(name=name).ref_count, 1)
+
+    def test_migrate_command_converts_legacy_files(self):
+        """Test migrate_submission_files moves, merges and collects old files"""
+        for name in ("submissions/old1.txt", "submissions/old2.txt"):
+            path = self.storage.path(name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as f:
+                f.write(b"same bytes")
+        Submission.objects.create(homework=self.homework, student=self.alice, solution_file="submissions/old1.txt")
+        Submission.objects.create(homework=self.homework, student=self.bob, solution_file="submissions/old2.txt")
+        orphan = self.storage.save("submissions/orphan.txt", ContentFile(b"nobody"))
+
+        call_command("migrate_submission_files", stdout=StringIO(), stderr=StringIO())
+
+        names = set(Submission.objects.values_list("solution_file", flat=True))
+        self.assertEqual(len(names), 1)
+        name = names.pop()
+        self.assertTrue(name.endswith(hashlib.sha256(b"same bytes").hexdigest() + ".txt"))
+        self.assertTrue(self.storage.exists(name))
+        self.assertEqual(StoredFile.objects.get().ref_count, 2)
+        self.assertFalse(self.storage.exists("submissions/old1.txt"))
+        self.assertFalse(self.storage.exists("submissions/old2.txt"))
+        self.assertFalse(self.storage.exists(orphan))
+
+
+# ============================================================================
+# PROTECTED DOWNLOAD TESTS
+# ============================================================================
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class SubmissionDownloadTest(TestCase):
+    """Tests for the permission-checked submission download"""
+
+    def setUp(self):
+        """Set up a submission, its author, the course teacher and an outsider"""
+        self.client = Client()
+        self.teacher = User.objects.create_user(username="teacher", password="test123")
+        self.teacher.profile.role = "teacher"
+        self.teacher.profile.save()
+        self.student = User.objects.create_user(username="student", password="test123")
+        self.outsider = User.objects.create_user(username="outsider", password="test123")
+        course = Course.objects.create(title="Test Course", description="Test course description")
+        course.teachers.add(self.teacher)
+        course.students.add(self.student, self.outsider)
+        homework = Homework.objects.create(
+            course=course, title="HW", description="D", due_date=timezone.now() + timedelta(days=7)
+        )
+        self.content = b"0123456789" * 100
+        self.submission = Submission.objects.create(
+            homework=homework, student=self.student, solution_file=SimpleUploadedFile("solution.txt", self.content)
+        )
+        self.url = reverse("download_submission", kwargs={"pk": self.submission.pk})
+
+    def get(self, username, **headers):
+        """Log in as username and request the file"""
+        self.client.login(username=username, password="test123")
+        return self.client.get(self.url, headers=headers)
+
+    def test_author_and_teacher_can_download(self):
+        """Test the author and the course teacher receive the file"""
+        for username in ("student", "teacher"):
+            response = self.get(username)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(b"".join(response.streaming_content), self.content)
+            self.assertIn("attachment", response["Content-Disposition"])
+            self.assertIn("student_", response["Content-Disposition"])
+            self.assertEqual(response["ETag"], f'"{hashlib.sha256(self.content).hexdigest()}"')
+            self.assertEqual(response["Accept-Ranges"], "bytes")
+
+    def test_other_users_are_refused(self):
+        """Test another student of the course cannot download the file"""
+        response = self.get("outsider")
+        self.assertRedirects(response, reverse("dashboard"), fetch_redirect_response=False)
+
+    def test_range_requests(self):
+        """Test single ranges, suffix ranges, unsatisfiable ranges and If-Range"""
+        response = self.get("student", Range="bytes=10-19")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b"".join(response.streaming_content), self.content[10:20])
+        self.assertEqual(response["Content-Range"], f"bytes 10-19/{len(self.content)}")
+
+        response = self.get("student", Range="bytes=-5")
+        self.assertEqual(b"".join(response.streaming_content), self.content[-5:])
+
+        response = self.get("student", Range="bytes=5000-")
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response["Content-Range"], f"bytes */{len(self.content)}")
+
+        response = self.get("student", Range="bytes=0-4", **{"If-Range": '"stale"'})
+        self.assertEqual(response.status_code, 200)
+
+    def test_conditional_get(self):
+        """Test a matching ETag or Last-Modified yields 304"""
+        first = self.get("student")
+        self.assertEqual(self.get("student", **{"If-None-Match": first["ETag"]}).status_code, 304)
+        self.assertEqual(self.get("student", **{"If-Modified-Since": first["Last-Modified"]}).status_code, 304)
+
+    def test_front_end_server_headers(self):
+        """Test the transfer is delegated to the front-end server when configured"""
+        name = self.submission.solution_file.name
+        with override_settings(SENDFILE_BACKEND="x-accel-redirect", SENDFILE_URL_PREFIX="/internal/"):
+            response = self.get("teacher")
+        self.assertEqual(response["X-Accel-Redirect"], f"/internal/{name}")
+        self.assertEqual(response.content, b"")
+
+        with override_settings(SENDFILE_BACKEND="x-sendfile"):
+            response = self.get("teacher")
+        self.assertEqual(response["X-Sendfile"], self.submission.solution_file.path)
+
+    def test_missing_file_is_404(self):
+        """Test a submission whose file is gone returns 404"""
+        Submission.objects.filter(pk=self.submission.pk).update(solution_file="submissions/missing.txt")
+        self.assertEqual(self.get("teacher").status_code, 404)
+
+    def test_homework_tests_are_linked_to_protected_download(self):
+        """Test the edit form links the current test file to the teacher-only download, not MEDIA_URL"""
+        homework = self.submission.homework
+        homework.test_file = SimpleUploadedFile("tests.py", b"import unittest\n")
+        homework.save()
+        tests_url = reverse("teacher_homework_tests", kwargs={"pk": homework.pk})
+
+        self.client.login(username="teacher", password="test123")
+        response = self.client.get(reverse("teacher_edit_homework", kwargs={"pk": homework.pk}))
+        self.assertContains(response, f'href="{tests_url}"')
+        self.assertNotContains(response, homework.test_file.url)
+
+        response = self.client.get(tests_url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b"".join(response.streaming_content), b"import unittest\n")
+
+        self.client.login(username="student", password="test123")
+        self.assertNotEqual(self.client.get(tests_url).status_code, 200)
+
+
+# ============================================================================
+# JOB QUEUE TESTS
+# ============================================================================
+
+CALLS = []
+
+
+@task("test_flaky")
+def flaky_task(fail_times, value):
+    """Fail the first fail_times runs, then return value"""
+    CALLS.append(value)
+    if len(CALLS) <= fail_times:
+        raise RuntimeError("boom")
+    return {"value": value}
+
+
+@task("test_slow")
+def slow_task():
+    """Run past the visibility timeout of every claimed job"""
+    CALLS.append("slow")
+    Job.objects.filter(status="running").update(locked_until=timezone.now() - timedelta(seconds=1))
+
+
+@task("test_reclaim")
+def reclaim_task():
+    """Record what another worker manages to claim while this job runs"""
+    CALLS.append(claim_jobs("worker-b"))
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class JobQueueTest(TestCase):
+    """Tests for the database-backed job queue, with workers running in-process"""
+
+    def setUp(self):
+        """Reset recorded task calls"""
+        CALLS.clear()
+
+    def make_ready(self, job):
+        """Move a delayed job to the past so it can be claimed now"""
+        Job.objects.filter(pk=job.pk).update(run_after=timezone.now() - timedelta(seconds=1))
+
+    def test_job_runs_and_stores_result(self):
+        """Test a queued job is executed once and its result saved"""
+        job = Job.enqueue("test_flaky", fail_times=0, value=7)
+        self.assertEqual(run_pending(), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, "done")
+        self.assertEqual(job.result, {"value": 7})
+        self.assertEqual(job.attempts, 1)
+        self.assertEqual(run_pending(), 0)
+
+    def test_failed_job_is_retried_with_backoff(self):
+        """Test a failing job is delayed, retried and finally succeeds"""
+        job = Job.enqueue("test_flaky", fail_times=1, value=1)
+        run_pending()
+        job.refresh_from_db()
+        self.assertEqual(job.status, "queued")
+        self.assertGreater(job.run_after, timezone.now())
+        self.assertIn("boom", job.last_error)
+        self.assertEqual(run_pending(), 0)
+
+        self.make_ready(job)
+        run_pending()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ("done", 2))
+
+    def test_job_fails_after_max_attempts(self):
+        """Test a job that keeps failing ends up failed"""
+        job = Job.enqueue("test_flaky", max_attempts=2, fail_times=5, value=1)
+        run_pending()
+        self.make_ready(job)
+        run_pending()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ("failed", 2))
+        self.assertIsNotNone(job.finished_at)
+
+    def test_unknown_task_fails(self):
+        """Test a job without a registered task fails immediately"""
+        job = Job.enqueue("no_such_task")
+        run_pending()
+        job.refresh_from_db()
+        self.assertEqual(job.status, "failed")
+        self.assertNotIn("no_such_task", TASKS)
+
+    def test_visibility_timeout(self):
+        """Test a job held by a crashed worker is reclaimed and the late result ignored"""
+        job = Job.enqueue("test_flaky", fail_times=0, value=3)
+        (claimed,) = claim_jobs("worker-a", visibility_timeout=timedelta(minutes=5))
+        self.assertEqual(claim_jobs("worker-b"), [])
+
+        Job.objects.filter(pk=job.pk).update(locked_until=timezone.now() - timedelta(seconds=1))
+        (reclaimed,) = claim_jobs("worker-b")
+        self.assertEqual(reclaimed.attempts, 2)
+        self.assertTrue(run_job(reclaimed, "worker-b"))
+
+        run_job(claimed, "worker-a")
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.locked_by), ("done", "worker-b"))
+
+    def test_slow_job_does_not_hand_the_rest_of_the_batch_to_another_worker(self):
+        """Test each job of a batch renews its lease and is skipped once another worker reclaims it"""
+        Job.enqueue("test_slow")
+        fast = Job.enqueue("test_flaky", fail_times=0, value=5)
+        slow_claimed, fast_claimed = claim_jobs("worker-a", limit=10)
+
+        self.assertTrue(run_job(slow_claimed, "worker-a"))
+        (reclaimed,) = claim_jobs("worker-b")
+        self.assertEqual(reclaimed.pk, fast.pk)
+        self.assertFalse(run_job(fast_claimed, "worker-a"))
+        self.assertTrue(run_job(reclaimed, "worker-b"))
+        self.assertEqual(CALLS, ["slow", 5])
+
+        CALLS.clear()
+        Job.enqueue("test_slow")
+        Job.enqueue("test_reclaim")
+        self.assertEqual(run_pending("worker-a"), 2)
+        # The lease of the second job was renewed when it started, after the first used up the timeout
+        self.assertEqual(CALLS, ["slow", []])
+
+    def test_submission_enqueues_inspection(self):
+        """Test saving a submission queues the file inspection off the request path"""
+        course = Course.objects.create(title="Test Course", description="Test course description")
+        homework = Homework.objects.create(course=course, title="HW", description="D", due_date=timezone.now())
+        student = User.objects.create_user(username="student")
+        buffer = BytesIO()
+        with zipfile.ZipFile(buffer, "w") as archive:
+            archive.writestr("main.py", "print(1)")
+        Submission.objects.create(
+            homework=homework, student=student, solution_file=SimpleUploadedFile("solution.zip", buffer.getvalue())
+        )
+        job = Job.objects.get(name="inspect_submission")
+        self.assertEqual(job.status, "queued")
+
+        call_command("run_workers", "--once", stdout=StringIO())
+        job.refresh_from_db()
+        self.assertEqual(job.status, "done")
+        self.assertTrue(job.result["hash_ok"])
+        self.assertEqual((job.result["entries"], job.result["archive_ok"]), (1, True))
+        self.assertEqual(Submission.objects.get().file_check, "ok")
+
+    def test_oversized_archive_is_rejected_and_shown(self):
+        """Test an archive that unpacks too large is marked rejected until the file is replaced"""
+        course = Course.objects.create(title="Test Course", description="Test course description")
+        homework = Homework.objects.create(
+            course=course, title="HW", description="D", due_date=timezone.now() + timedelta(days=7)
+        )
+        student = User.objects.create_user(username="student", password="test123")
+        course.students.add(student)
+        buffer = BytesIO()
+        with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+            archive.writestr("data.txt", "0" * 4096)
+        submission = Submission.objects.create(
+            homework=homework, student=student, solution_file=SimpleUploadedFile("solution.zip", buffer.getvalue())
+        )
+
+        with mock.patch("assignments.tasks.MAX_ARCHIVE_UNCOMPRESSED_SIZE", 1024):
+            run_pending()
+        submission.refresh_from_db()
+        self.assertEqual(submission.file_check, "rejected")
+        self.assertIn("Архив распаковывается", submission.file_check_message)
+
+        client = Client()
+        client.login(username="student", password="test123")
+        response = client.get(reverse("homework_detail", kwargs={"pk": homework.pk}))
+        self.assertContains(response, "Файл отклонен")
+
+        submission.solution_file = SimpleUploadedFile("solution.py", b"print(1)")
+        submission.save()
+        submission.refresh_from_db()
+        self.assertEqual((submission.file_check, submission.file_check_message), ("", ""))
+        run_pending()
+        submission.refresh_from_db()
+        self.assertEqual(submission.file_check, "ok")
+
+
+# ============================================================================
+# AUTOMATIC TEST RUNNER TESTS
+# ============================================================================
+
+HOMEWORK_TESTS = b"""import unittest
+
+import solution
+
+
+class AddTest(unittest.TestCase):
+    def test_small(self):
+        self.assertEqual(solution.add(2, 3), 5)
+
+    def test_negative(self):
+        self.assertEqual(solution.add(-2, -3), -5)
+"""
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class AutoTestRunnerTest(TestCase):
+    """Tests for running teacher tests against submissions in the sandbox"""
+
+    def setUp(self):
+        """Set up a course whose homework has a test suite"""
+        self.client = Client()
+        self.teacher = User.objects.create_user(username="teacher", password="test123")
+        self.teacher.profile.role = "teacher"
+        self.teacher.profile.save()
+        self.student = User.objects.create_user(username="student", password="test123")
+        self.course = Course.objects.create(title="Test Course", description="Test course description")
+        self.course.teachers.add(self.teacher)
+        self.course.students.add(self.student)
+        self.homework = Homework.objects.create(
+            course=self.course,
+            title="HW",
+            description="D",
+            due_date=timezone.now() + timedelta(days=7),
+            test_file=SimpleUploadedFile("tests.py", HOMEWORK_TESTS),
+            test_timeout=3,
+        )
+
+    def run_sandbox(self, code, timeout=3):
+        """Run the homework tests against a .py solution"""
+        return run_tests("solution.py", BytesIO(code), BytesIO(HOMEWORK_TESTS), timeout=timeout)
+
+    def test_passing_and_failing_solutions(self):
+        """Test results count passed tests and keep the test output"""
+        report = self.run_sandbox(b"def add(a, b):\n    return a + b\n")
+        self.assertEqual((report["status"], report["passed"], report["total"]), ("passed", 2, 2))
+
+        report = self.run_sandbox(b"def add(a, b):\n    return abs(a + b)\n")
+        self.assertEqual((report["status"], report["passed"], report["total"]), ("failed", 1, 2))
+        self.assertIn("AssertionError", report["output"])
+
+    def test_infinite_loop_times_out(self):
+        """Test a hanging solution is killed after the timeout"""
+        report = self.run_sandbox(b"while True:\n    pass\n", timeout=1)
+        self.assertEqual(report["status"], "timeout")
+        self.assertLess(report["duration"], 5)
+
+    def test_network_and_processes_are_blocked(self):
+        """Test solution code can neither open sockets nor start processes"""
+        report = self.run_sandbox(b"import socket\nsocket.create_connection(('127.0.0.1', 80))\n")
+        self.assertEqual(report["status"], "failed")
+        self.assertIn("PermissionError", report["output"])
+
+        report = self.run_sandbox(b"import subprocess\nsubprocess.run(['true'])\n")
+        self.assertIn("subprocess.Popen", report["output"])
+
+    def test_memory_limit(self):
+        """Test a solution cannot allocate beyond the memory limit"""
+        report = self.run_sandbox(b"data = bytearray(4 * 1024 ** 3)\n")
+        self.assertEqual(report["status"], "failed")
+        self.assertIn("MemoryError", report["output"])
+
+    def test_solution_cannot_fake_passing_tests(self):
+        """Test patching unittest, reading stack frames or forging events never yields a pass"""
+        patched = (
+            b"import unittest\nunittest.TestCase.assertEqual = lambda *args, **kwargs: None\ndef add(a, b):\n    return 0\n"
+        )
+        self.assertEqual(self.run_sandbox(patched)["status"], "error")
+
+        frames = b"import sys\ndef add(a, b):\n    sys._getframe(1)\n    return a + b\n"
+        report = self.run_sandbox(frames)
+        self.assertEqual(report["status"], "failed")
+        self.assertIn("PermissionError", report["output"])
+
+        forged = b"import os\nfor fd in range(3, 16):\n    try:\n        os.write(fd, b'0\\tdone\\t\\t\"\"\\n')\n"
+        forged += b"    except OSError:\n        pass\ndef add(a, b):\n    return a + b\n"
+        self.assertEqual(self.run_sandbox(forged)["status"], "error")
+
+        skipped = b"import unittest\nraise unittest.SkipTest('no')\n"
+        self.assertEqual(self.run_sandbox(skipped)["status"], "failed")
+
+    def test_files_outside_workdir_and_unsafe_modules_are_blocked(self):
+        """Test solution code cannot write outside its directory, read the project or load sqlite3 and ctypes"""
+        fake = b'open("../result.json", "w").write(\'{"total": 2, "failed": 0, "skipped": 0}\')\n'
+        report = self.run_sandbox(fake)
+        self.assertEqual(report["status"], "failed")
+        self.assertIn("PermissionError", report["output"])
+
+        report = self.run_sandbox(f"open({str(settings.BASE_DIR / 'manage.py')!r}).read()\n".encode())
+        self.assertIn("PermissionError", report["output"])
+
+        for module in ("sqlite3", "ctypes"):
+            report = self.run_sandbox(f"import {module}\n".encode())
+            self.assertEqual(report["status"], "failed")
+            self.assertIn(f"PermissionError: Импорт запрещен в песочнице: {module}", report["output"])
+
+    def test_zip_solution_and_path_traversal(self):
+        """Test archives are extracted next to the tests and unsafe paths are rejected"""
+        buffer = BytesIO()
+        with zipfile.ZipFile(buffer, "w") as archive:
+            archive.writestr("solution.py", "from helpers import add\n")
+            archive.writestr("helpers.py", "def add(a, b):\n    return a + b\n")
+        report = run_tests("solution.zip", BytesIO(buffer.getvalue()), BytesIO(HOMEWORK_TESTS))
+        self.assertEqual(report["status"], "passed")
+
+        buffer = BytesIO()
+        with zipfile.ZipFile(buffer, "w") as archive:
+            archive.writestr("../escape.py", "")
+        report = run_tests("solution.zip", BytesIO(buffer.getvalue()), BytesIO(HOMEWORK_TESTS))
+        self.assertEqual(report["status"], "error")
+        self.assertIn("escape.py", report["output"])
+
+    def test_submission_is_tested_by_worker(self):
+        """Test submitting a .py file queues the tests and stores the result on the submission"""
+        self.client.login(username="student", password="test123")
+        url = reverse("homework_detail", kwargs={"pk": self.homework.pk})
+        self.client.post(url, {"solution_file": SimpleUploadedFile("solution.py", b"def add(a, b):\n    return a + b\n")})
+        submission = Submission.objects.get(student=self.student)
+        self.assertEqual(submission.test_status, "queued")
+        self.assertTrue(Job.objects.filter(name="run_submission_tests", status="queued").exists())
+
+        run_pending()
+        submission.refresh_from_db()
+        self.assertEqual((submission.test_status, submission.tests_passed, submission.tests_total), ("passed", 2, 2))
+        self.assertIsNotNone(submission.tested_at)
+
+        # Resubmission resets the result until the new file is tested
+        self.client.post(url, {"solution_file": SimpleUploadedFile("v2.py", b"def add(a, b):\n    return 0\n")})
+        submission.refresh_from_db()
+        self.assertEqual((submission.test_status, submission.tests_total), ("queued", None))
+        run_pending()
+        submission.refresh_from_db()
+        self.assertEqual((submission.test_status, submission.tests_passed), ("failed", 0))
+
+        self.client.login(username="teacher", password="test123")
+        response = self.client.get(reverse("teacher_grade_submission", kwargs={"pk": submission.pk}))
+        self.assertContains(response, "0 из 2")
+
+    def test_untestable_files_are_not_queued(self):
+        """Test files other than .py/.zip and homeworks without tests are skipped"""
+        submission = Submission.objects.create(
+            homework=self.homework, student=self.student, solution_file=SimpleUploadedFile("report.pdf", b"%PDF")
+        )
+        self.assertEqual(submission.test_status, "")
+        self.assertFalse(Job.objects.filter(name="run_submission_tests").exists())
+
+    def test_uploading_tests_retests_existing_submissions(self):
+        """Test replacing the homework tests queues every submission again"""
+        submission = Submission.objects.create(
+            homework=self.homework, student=self.student, solution_file=SimpleUploadedFile("s.py", b"add = max\n")
+        )
+        run_pending()
+        submission.refresh_from_db()
+        self.assertEqual(submission.test_status, "failed")
+
+        max_tests = HOMEWORK_TESTS.replace(b"solution.add(2, 3), 5", b"solution.add(2, 3), 3").replace(b"-5", b"-2")
+        self.client.login(username="teacher", password="test123")
+        response = self.client.post(
+            reverse("teacher_edit_homework", kwargs={"pk": self.homework.pk}),
+            {
+                "title": "HW",
+                "description": "D",
+                "due_date": (timezone.now() + timedelta(days=7)).strftime("%Y-%m-%dT%H:%M"),
+                "test_file": SimpleUploadedFile("tests.py", max_tests),
+                "test_timeout": 3,
+            },
+        )
+        self.assertEqual(response.status_code, 302)
+        submission.refresh_from_db()
+        self.assertEqual(submission.test_status, "queued")
+        run_pending()
+        submission.refresh_from_db()
+        self.assertEqual((submission.test_status, submission.tests_passed), ("passed", 2))
+
+    def test_form_rejects_non_python_tests(self):
+        """Test the homework form only accepts .py test files"""
+        form = HomeworkForm(
+            data={"title": "HW", "description": "D", "due_date": "2030-01-01T10:00", "test_timeout": 10},
+            files={"test_file": SimpleUploadedFile("tests.txt", b"")},
+        )
+        self.assertFalse(form.is_valid())
+        self.assertIn("test_file", form.errors)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class AutotestResultCacheTest(TestCase):
+    """Tests for caching test results by solution, tests and sandbox hashes"""
+
+    def setUp(self):
+        """Set up a homework with tests and three submissions, two of them identical"""
+        self.course = Course.objects.create(title="Test Course", description="Test course description")
+        self.homework = Homework.objects.create(
+            course=self.course,
+            title="HW",
+            description="D",
+            due_date=timezone.now() + timedelta(days=7),
+            test_file=SimpleUploadedFile("tests.py", HOMEWORK_TESTS),
+            test_timeout=3,
+        )
+        solutions = [b"def add(a, b):\n    return a + b\n", b"def add(a, b):\n    return a + b\n", b"add = max\n"]
+        for index, code in enumerate(solutions):
+            student = User.objects.create_user(username=f"student{index}")
+            Submission.objects.create(homework=self.homework, student=student, solution_file=SimpleUploadedFile("s.py", code))
+        Job.objects.all().delete()
+
+    def test_regrade_executes_only_changed_inputs(self):
+        """Test identical solutions share a result and unchanged inputs are not re-run"""
+        with mock.patch("assignments.autotest.run_tests", wraps=run_tests) as runner:
+            report = regrade_homework(self.homework)
+            self.assertEqual((report["checked"], report["hits"], report["executed"]), (3, 1, 2))
+            self.assertEqual(report["statuses"], {"passed": 2, "failed": 1})
+            self.assertEqual(runner.call_count, 2)
+
+            report = regrade_homework(self.homework)
+            self.assertEqual((report["hits"], report["hit_rate"]), (3, 1.0))
+            self.assertEqual(runner.call_count, 2)
+
+        statuses = sorted(Submission.objects.values_list("test_status", flat=True))
+        self.assertEqual(statuses, ["failed", "passed", "passed"])
+        self.assertEqual(AutotestResult.objects.count(), 2)
+
+    def test_changed_tests_or_runner_invalidate(self):
+        """Test editing the tests or the sandbox parameters produces new cache keys"""
+        regrade_homework(self.homework)
+        self.homework.test_file = SimpleUploadedFile("tests.py", HOMEWORK_TESTS + b"\n# edited\n")
+        self.homework.save()
+        self.assertEqual(regrade_homework(self.homework)["hits"], 1)
+
+        with mock.patch("assignments.sandbox.RUNNER_VERSION", 999):
+            self.assertEqual(regrade_homework(self.homework)["hits"], 1)
+        self.assertEqual(regrade_homework(self.homework, use_cache=False)["executed"], 3)
+
+    def test_solution_extension_is_part_of_the_key(self):
+        """Test the same bytes uploaded as .py and as .zip are checked separately"""
+        regrade_homework(self.homework)
+        submission = Submission.objects.first()
+        submission.solution_file = SimpleUploadedFile("s.zip", submission.solution_file.read())
+        submission.save()
+        report, cached = check_submission(Submission.objects.get(pk=submission.pk))
+        self.assertFalse(cached)
+        self.assertEqual(report["status"], "error")
+        self.assertEqual(AutotestResult.objects.filter(solution_extension=".zip").count(), 1)
+
+    def test_timeouts_are_not_cached(self):
+        """Test load-dependent timeouts are re-run next time"""
+        submission = Submission.objects.first()
+        timeout = {"status": "timeout", "passed": 0, "total": 0, "output": "", "duration": 3.0}
+        with mock.patch("assignments.autotest.run_tests", return_value=timeout):
+            self.assertEqual(check_submission(submission), (timeout, False))
+        self.assertFalse(AutotestResult.objects.exists())
+
+    def test_eviction(self):
+        """Test stale and least recently used results are evicted"""
+        regrade_homework(self.homework)
+        self.assertEqual(evict_test_results(max_results=1), 1)
+        AutotestResult.objects.update(last_used_at=timezone.now() - timedelta(days=60))
+        self.assertEqual(evict_test_results(), 1)
+        self.assertFalse(AutotestResult.objects.exists())
+
+    def test_eviction_keeps_max_results_on_equal_timestamps(self):
+        """Test LRU eviction keeps exactly max_results rows even when they were used at the same time"""
+        regrade_homework(self.homework)
+        AutotestResult.objects.update(last_used_at=timezone.now())
+        newest = AutotestResult.objects.order_by("-pk").first()
+        self.assertEqual(evict_test_results(max_results=1), 1)
+        self.assertEqual(list(AutotestResult.objects.all()), [newest])
+        AutotestResult.objects.update(last_used_at=timezone.now() - timedelta(days=60))
+        self.assertEqual(evict_test_results(), 1)
+        self.assertFalse(AutotestResult.objects.exists())
+
+    def test_worker_uses_cache_and_command_reports_hit_rate(self):
+        """Test the upload job reuses cached results and regrade_homework prints the hit rate"""
+        regrade_homework(self.homework)
+        student = User.objects.create_user(username="late")
+        submission = Submission.objects.create(
+            homework=self.homework, student=student, solution_file=SimpleUploadedFile("late.py", b"add = max\n")
+        )
+        run_pending()
+        self.assertTrue(Job.objects.get(name="run_submission_tests").result["cached"])
+        submission.refresh_from_db()
+        self.assertEqual(submission.test_status, "failed")
+
+        out = StringIO()
+        call_command("regrade_homework", str(self.homework.pk), stdout=out)
+        self.assertIn("100.0%", out.getvalue())
+        with self.assertRaises(CommandError):
+            call_command("regrade_homework", "999999", stdout=StringIO())
+
+
+# ============================================================================
+# SIMILARITY DETECTION TESTS
+# ============================================================================
+
+ORIGINAL_SOLUTION = b'''def merge_sorted(left, right):
+    """Merge two sorted lists"""
+    result = []
+    i = j = 0
+    while i < len(left) and j < len(right):
+        if left[i] <= right[j]:
+            result.append(left[i])
+            i += 1
+        else:
+            result.append(right[j])
+            j += 1
+    result.extend(left[i:])
+    result.extend(right[j:])
+    return result
+
+
+def merge_sort(items):
+    if len(items) <= 1:
+        return items
+    middle = len(items) // 2
+    return merge_sorted(merge_sort(items[:middle]), merge_sort(items[middle:]))
+'''
+
+# Same program with renamed identifiers, different comments and formatting
+RENAMED_SOLUTION = b"""# My own work!
+def combine(a, b):
+    out = []
+    p = q = 0
+    while p < len(a) and q < len(b):  # loop
+        if a[p] <= b[q]:
+            out.append(a[p])
+            p += 1
+        else:
+            out.append(b[q])
+            q += 1
+    out.extend(a[p:])
+    out.extend(b[q:])
+    return out
+
+
+def sort_list(values):
+    if len(values) <= 1:
+        return values
+    half = len(values) // 2
+    return combine(sort_list(values[:half]), sort_list(values[half:]))
+"""
+
+UNRELATED_SOLUTION = b"""import math
+
+
+def is_prime(number):
+    if number < 2:
+        return False
+    for divisor in range(2, int(math.sqrt(number)) + 1):
+        if number % divisor == 0:
+            return False
+    return True
+
+
+print([n for n in range(100) if is_prime(n)])
+total = sum(n * n for n in range(10) if n % 3)
+"""
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class SimilarityDetectionTest(TestCase):
+    """Tests for winnowed fingerprints and the per-homework inverted index"""
+
+    def setUp(self):
+        """Set up a homework and its teacher"""
+        self.client = Client()
+        self.teacher = User.objects.create_user(username="teacher", password="test123")
+        self.teacher.profile.role = "teacher"
+        self.teacher.profile.save()
+        self.course = Course.objects.create(title="Test Course", description="Test course description")
+        self.course.teachers.add(self.teacher)
+        self.homework = Homework.objects.create(
+            course=self.course, title="HW", description="D", due_date=timezone.now() + timedelta(days=7)
+        )
+
+    def submit(self, username, content, filename="solution.py"):
+        """Create a submission for a new student"""
+        student = User.objects.create_user(username=username)
+        return Submission.objects.create(
+            homework=self.homework, student=student, solution_file=SimpleUploadedFile(filename, content)
+        )
+
+    def test_renaming_and_comments_do_not_hide_copies(self):
+        """Test normalized tokens make a renamed copy share its fingerprints"""
+        original = document_fingerprints("a.py", ORIGINAL_SOLUTION)
+        renamed = document_fingerprints("b.py", RENAMED_SOLUTION)
+        unrelated = document_fingerprints("c.py", UNRELATED_SOLUTION)
+        self.assertGreater(len(original & renamed) / len(original), 0.9)
+        self.assertLess(len(original & unrelated) / len(original), 0.1)
+
+    def test_text_fingerprints(self):
+        """Test text submissions are compared by words regardless of case"""
+        essay = b"The quick brown fox jumps over the lazy dog while the cat sleeps on the warm mat all day long"
+        self.assertEqual(document_fingerprints("a.txt", essay), document_fingerprints("b.txt", essay.upper()))
+
+    def test_upload_job_reports_similar_pair(self):
+        """Test indexing after upload finds the copied pair and the teacher sees it"""
+        first = self.submit("alice", ORIGINAL_SOLUTION)
+        second = self.submit("bob", RENAMED_SOLUTION)
+        self.submit("carol", UNRELATED_SOLUTION)
+        self.submit("dave", b"%PDF", filename="report.pdf")
+        self.assertEqual(Job.objects.filter(name="index_submission_similarity").count(), 3)
+        run_pending()
+
+        match = SimilarityMatch.objects.get()
+        self.assertEqual((match.first, match.second), (first, second))
+        self.assertGreater(match.score, 0.9)
+
+        self.client.login(username="teacher", password="test123")
+        response = self.client.get(reverse("teacher_homework_submissions", kwargs={"pk": self.homework.pk}))
+        self.assertEqual(list(response.context["similar_pairs"]), [match])
+        self.assertContains(response, "Похожие работы")
+
+    def test_resubmission_and_deletion_update_index(self):
+        """Test replacing or deleting a submission removes its stale fingerprints and pairs"""
+        self.submit("alice", ORIGINAL_SOLUTION)
+        copy = self.submit("bob", RENAMED_SOLUTION)
+        run_pending()
+        self.assertTrue(SimilarityMatch.objects.exists())
+
+        copy.solution_file = SimpleUploadedFile("v2.py", UNRELATED_SOLUTION)
+        copy.save()
+        run_pending()
+        self.assertFalse(SimilarityMatch.objects.exists())
+
+        copy.delete()
+        self.assertFalse(Fingerprint.objects.filter(submission_id=copy.pk).exists())
+
+    def test_common_template_is_ignored(self):
+        """Test fingerprints shared by more than COMMON_MAX_DOCS submissions (the task template) do not create pairs"""
+        documents = {index: document_fingerprints("t.py", ORIGINAL_SOLUTION) for index in range(COMMON_MAX_DOCS + 1)}
+        documents[COMMON_MAX_DOCS + 1] = document_fingerprints("u.py", UNRELATED_SOLUTION)
+        pairs, updates = find_similar_pairs(documents)
+        self.assertEqual((pairs, updates), ([], 0))
+
+    def test_group_of_copies_is_reported(self):
+        """Test every pair of a small homework's identical submissions is found, not mistaken for a template"""
+        fingerprints = document_fingerprints("a.py", ORIGINAL_SOLUTION)
+        pairs, _ = find_similar_pairs({index: fingerprints for index in range(3)})
+        self.assertEqual([(pair.first, pair.second, pair.score) for pair in pairs], [(0, 1, 1.0), (0, 2, 1.0), (1, 2, 1.0)])
+
+    def test_copier_groups_match_between_incremental_and_rebuild(self):
+        """Test identical and renamed copies give the same pairs through upload jobs and detect_similarity"""
+        copies = [self.submit(f"copier{index}", ORIGINAL_SOLUTION) for index in range(3)]
+        renamed = self.submit("renamer", RENAMED_SOLUTION)
+        self.submit("honest", UNRELATED_SOLUTION)
+        run_pending()
+        incremental = set(SimilarityMatch.objects.values_list("first", "second", "shared", "score"))
+        members = [copy.pk for copy in copies] + [renamed.pk]
+        self.assertEqual({(first, second) for first, second, _, _ in incremental}, set(combinations(members, 2)))
+
+        call_command("detect_similarity", str(self.homework.pk), stdout=StringIO())
+        self.assertEqual(set(SimilarityMatch.objects.values_list("first", "second", "shared", "score")), incremental)
+
+    def test_rebuild_command_matches_incremental_index(self):
+        """Test detect_similarity rebuilds the same pairs as the upload jobs"""
+        self.submit("alice", ORIGINAL_SOLUTION)
+        self.submit("bob", RENAMED_SOLUTION)
+        self.submit("carol", UNRELATED_SOLUTION)
+        run_pending()
+        incremental = list(SimilarityMatch.objects.values_list("first", "second", "shared", "score"))
+
+        out = StringIO()
+        call_command("detect_similarity", str(self.homework.pk), stdout=out)
+        self.assertEqual(list(SimilarityMatch.objects.values_list("first", "second", "shared", "score")), incremental)
+        self.assertIn("alice ~ bob", out.getvalue())
+
+
+# ============================================================================
+# ASYNC VIEW TESTS
+# ============================================================================
+
+
+class AsyncDashboardViewsTest(TestCase):
+    """Tests for the async dashboards and submission lists"""
+
+    def setUp(self):
+        """Set up a student and a teacher sharing a course with graded and pending work"""
+        self.student = User.objects.create_user(username="student", password="test123", first_name="Ann")
+        self.teacher = User.objects.create_user(username="teacher", password="test123", first_name="Jane")
+        self.teacher.profile.role = "teacher"
+        self.teacher.profile.save()
+        self.add_courses(2)
+
+    def add_courses(self, count, prefix="Course"):
+        """Create courses taught by the teacher with a graded and a pending submission of the student"""
+        for i in range(count):
+            course = Course.objects.create(title=f"{prefix} {i}", description="Description")
+            course.teachers.add(self.teacher)
+            course.students.add(self.student, User.objects.create(username=f"{prefix}-{i}"))
+            for j, grade in enumerate([90, None]):
+                homework = Homework.objects.create(
+                    course=course, title=f"{prefix} {i} HW {j}", description="D", due_date=timezone.now()
+                )
+                Submission.objects.create(
+                    homework=homework, student=self.student, solution_file="submissions/s.txt", grade=grade
+                )
+
+    def test_views_are_async(self):
+        """Test the read-heavy pages stay coroutine functions through the access decorators"""
+        for view in (views.student_dashboard, views.my_submissions, views.teacher_dashboard, views.teacher_all_submissions):
+            self.assertTrue(iscoroutinefunction(view), view.__name__)
+
+    async def test_student_pages_through_async_client(self):
+        """Test student dashboard statistics and submission list under the async handler"""
+        await self.async_client.aforce_login(self.student)
+        response = await self.async_client.get(reverse("student_dashboard"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["total_courses"], 2)
+        self.assertEqual(response.context["total_homeworks"], 4)
+        self.assertEqual((response.context["submitted_count"], response.context["graded_count"]), (4, 2))
+        self.assertContains(response, "2 заданий", count=2)
+        self.assertContains(response, "Jane")
+
+        response = await self.async_client.get(reverse("my_submissions"))
+        self.assertEqual(len(response.context["submissions"]), 4)
+        self.assertContains(response, "Course 1 HW 1")
+
+        response = await self.async_client.get(reverse("teacher_dashboard"))
+        self.assertEqual(response.status_code, 302)
+
+    async def test_teacher_pages_through_async_client(self):
+        """Test teacher dashboard statistics and the submission feed under the async handler"""
+        await self.async_client.aforce_login(self.teacher)
+        response = await self.async_client.get(reverse("teacher_dashboard"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.context["total_courses"], response.context["total_homeworks"]), (2, 4))
+        self.assertEqual((response.context["total_submissions"], response.context["pending_count"]), (4, 2))
+        self.assertContains(response, "Студентов: 2", count=2)
+
+        response = await self.async_client.get(reverse("teacher_all_submissions"), {"status": "pending"})
+        self.assertEqual(len(response.context["submissions"]), 2)
+        self.assertEqual(len(response.context["courses"]), 2)
+
+        response = await self.async_client.get(reverse("teacher_all_submissions"), {"cursor": "not-a-cursor"})
+        self.assertEqual(len(response.context["submissions"]), 4)
+        self.assertEqual(len(response.context["messages"]), 1)
+
+    def test_constant_query_count(self):
+        """Test dashboard and list query counts do not depend on the number of courses"""
+        client = Client()
+        urls = {
+            self.student: [reverse("student_dashboard"), reverse("my_submissions")],
+            self.teacher: [reverse("teacher_dashboard"), reverse("teacher_all_submissions")],
+        }
+        small = {}
+        for user, user_urls in urls.items():
+            client.force_login(user)
+            for url in user_urls:
+                with CaptureQueriesContext(connection) as captured:
+                    client.get(url)
+                small[url] = len(captured)
+        self.add_courses(5, prefix="More")
+        for user, user_urls in urls.items():
+            client.force_login(user)
+            for url in user_urls:
+                with CaptureQueriesContext(connection) as captured:
+                    client.get(url)
+                self.assertEqual(len(captured), small[url], url)
+
+
+# ============================================================================
+# DASHBOARD CACHE TESTS
+# ============================================================================
+
+
+class DashboardCacheTest(TestCase):
+    """Tests for cached dashboard statistics and course fragments"""
+
+    def setUp(self):
+        """Set up a teacher and a student sharing a course with one homework"""
+        self.student_client = Client()
+        self.teacher_client = Client()
+        self.student = User.objects.create_user(username="student", password="test123", first_name="Ann")
+        self.teacher = User.objects.create_user(username="teacher", password="test123", first_name="Jane", last_name="Smith")
+        self.teacher.profile.role = "teacher"
+        self.teacher.profile.save()
+        self.course = Course.objects.create(title="Algorithms", description="Description")
+        self.course.teachers.add(self.teacher)
+        self.course.students.add(self.student)
+        self.homework = Homework.objects.create(course=self.course, title="HW 1", description="D", due_date=timezone.now())
+        self.student_client.force_login(self.student)
+        self.teacher_client.force_login(self.teacher)
+
+    def student_page(self):
+        return self.student_client.get(reverse("student_dashboard"))
+
+    def teacher_page(self):
+        return self.teacher_client.get(reverse("teacher_dashboard"))
+
+    def warm(self):
+        """Render both dashboards so their entries are cached"""
+        self.student_page()
+        self.teacher_page()
+        self.assertIsNotNone(dashboard_cache().get(stats_key("student", self.student.pk)))
+        self.assertIsNotNone(dashboard_cache().get(stats_key("teacher", self.teacher.pk)))
+
+    def test_repeat_request_is_served_from_cache(self):
+        """Test a repeated dashboard request skips the statistics and course list queries"""
+        with CaptureQueriesContext(connection) as cold:
+            first = self.student_page()
+        with CaptureQueriesContext(connection) as warm:
+            second = self.student_page()
+        self.assertLess(len(warm), len(cold))
+        self.assertFalse([q for q in warm if "assignments_homework" in q["sql"]])
+        self.assertEqual(first.context["total_homeworks"], second.context["total_homeworks"])
+        self.assertContains(second, "Algorithms")
+
+    def test_submission_and_grade_refresh_both_dashboards(self):
+        """Test a new submission and its grade reach the student and the teacher immediately"""
+        self.warm()
+        submission = Submission.objects.create(homework=self.homework, student=self.student, solution_file="submissions/s.txt")
+        self.assertEqual(self.student_page().context["submitted_count"], 1)
+        self.assertEqual(self.teacher_page().context["pending_count"], 1)
+
+        submission.grade = 95
+        submission.save()
+        self.assertEqual(self.student_page().context["graded_count"], 1)
+        self.assertEqual(self.teacher_page().context["pending_count"], 0)
+
+        submission.delete()
+        self.assertEqual(self.student_page().context["submitted_count"], 0)
+        self.assertEqual(self.teacher_page().context["total_submissions"], 0)
+
+    def test_enrollment_flow_refreshes_dashboards(self):
+        """Test requesting and approving enrollment updates both dashboards"""
+        other = Course.objects.create(title="Databases", description="Description")
+        other.teachers.add(self.teacher)
+        self.warm()
+
+        self.student_client.post(reverse("request_enrollment", kwargs={"course_pk": other.pk}))
+        self.assertContains(self.teacher_page(), "Заявок на зачисление: 1")
+
+        enrollment_request = CourseEnrollmentRequest.objects.get(course=other)
+        self.teacher_client.post(reverse("approve_enrollment_request", kwargs={"request_pk": enrollment_request.pk}))
+        response = self.student_page()
+        self.assertEqual(response.context["total_courses"], 2)
+        self.assertContains(response, "Databases")
+        response = self.teacher_page()
+        self.assertNotContains(response, "Заявок на зачисление")
+        self.assertContains(response, "Студентов: 1", count=2)
+
+        self.teacher_client.post(
+            reverse("remove_student_from_course", kwargs={"course_pk": other.pk, "student_pk": self.student.pk})
+        )
+        self.assertNotContains(self.student_page(), "Databases")
+
+    def test_course_changes_refresh_fragments(self):
+        """Test course edits, new homeworks and teacher changes never show stale fragments"""
+        self.warm()
+        self.course.title = "Advanced Algorithms"
+        self.course.save()
+        self.assertContains(self.student_page(), "Advanced Algorithms")
+
+        Homework.objects.create(course=self.course, title="HW 2", description="D", due_date=timezone.now())
+        self.assertEqual(self.student_page().context["total_homeworks"], 2)
+        self.assertContains(self.teacher_page(), "Заданий: 2")
+
+        self.assertContains(self.student_page(), "Jane Smith")
+        self.teacher.first_name = "Joan"
+        self.teacher.save()
+        self.assertContains(self.student_page(), "Joan Smith")
+
+        self.course.teachers.clear()
+        self.assertNotContains(self.student_page(), "Joan Smith")
+        self.assertEqual(self.teacher_page().context["total_courses"], 0)
+
+        self.student.enrolled_courses.clear()
+        self.assertEqual(self.student_page().context["total_courses"], 0)
+
+    def test_course_delete_refreshes_members(self):
+        """Test deleting a course drops it from every member's dashboard"""
+        self.warm()
+        self.course.delete()
+        self.assertNotContains(self.student_page(), "Algorithms")
+        self.assertEqual(self.teacher_page().context["total_courses"], 0)
+
+    def test_invalidation_repeats_after_commit(self):
+        """Test entries cached by a concurrent request before commit are dropped on commit"""
+        self.warm()
+        with self.captureOnCommitCallbacks(execute=True):
+            Submission.objects.create(homework=self.homework, student=self.student, solution_file="submissions/s.txt")
+            # A concurrent request read the old data before the commit
+            dashboard_cache().set(stats_key("student", self.student.pk), {"submitted_count": 0})
+        self.assertIsNone(dashboard_cache().get(stats_key("student", self.student.pk)))
+        self.assertEqual(self.student_page().context["submitted_count"], 1)
+
+    def test_login_does_not_invalidate(self):
+        """Test last_login updates keep cached dashboards"""
+        self.warm()
+        self.student_client.login(username="student", password="test123")
+        self.assertIsNotNone(dashboard_cache().get(stats_key("student", self.student.pk)))
+
+    def test_file_based_backend(self):
+        """Test the cache works and is invalidated with the file-based backend"""
+        with (
+            tempfile.TemporaryDirectory() as location,
+            override_settings(
+                CACHES={"default": {"BACKEND": "django.core.cache.backends.filebased.FileBasedCache", "LOCATION": location}}
+            ),
+        ):
+            self.warm()
+            Submission.objects.create(homework=self.homework, student=self.student, solution_file="submissions/s.txt")
+            self.assertEqual(self.student_page().context["submitted_count"], 1)
+            self.assertTrue(os.listdir(location))
+
+
+# ============================================================================
+# BULK GRADING TESTS
+# ============================================================================
+
+
+class BulkGradingTest(TestCase):
+    """Tests for grading a whole homework from a table, a file or a JSON request"""
+
+    def setUp(self):
+        """Set up a course with three submitted students and two teachers"""
+        self.client = Client()
+        self.teacher = User.objects.create_user(username="teacher", password="test123")
+        self.teacher.profile.role = "teacher"
+        self.teacher.profile.save()
+        self.course = Course.objects.create(title="Algorithms", description="Description")
+        self.course.teachers.add(self.teacher)
+        self.homework = Homework.objects.create(course=self.course, title="HW 1", description="D", due_date=timezone.now())
+        self.students = []
+        self.submissions = []
+        for name in ("alice", "bob", "carol"):
+            student = User.objects.create_user(username=name, password="test123")
+            self.course.students.add(student)
+            self.students.append(student)
+            self.submissions.append(
+                Submission.objects.create(homework=self.homework, student=student, solution_file="submissions/s.txt")
+            )
+        self.submissions[2].grade = 50
+        self.submissions[2].feedback = "Old"
+        self.submissions[2].save()
+        self.url = reverse("teacher_bulk_grade", kwargs={"pk": self.homework.pk})
+        self.client.force_login(self.teacher)
+
+    def grades(self):
+        return dict(self.homework.submissions.values_list("student__username", "grade"))
+
+    def upload(self, name, content):
+        return self.client.post(self.url, {"grades_file": SimpleUploadedFile(name, content.encode())})
+
+    def formset_data(self, grades):
+        data = {"form-TOTAL_FORMS": len(grades), "form-INITIAL_FORMS": len(grades)}
+        for i, (submission, grade) in enumerate(zip(self.submissions, grades)):
+            data.update({f"form-{i}-submission": submission.pk, f"form-{i}-grade": grade, f"form-{i}-feedback": "Ok"})
+        return data
+
+    def test_concurrent_grade_between_validation_and_save_keeps_stats(self):
+        """Test deltas come from the locked rows, not from the values read during validation"""
+        rows = [{"submission": submission.pk, "grade": 90} for submission in self.submissions]
+        changes, errors = validate_grade_rows(self.homework, rows)
+        self.assertEqual(errors, [])
+
+        # Another teacher grades alice after the rows were validated
+        concurrent = Submission.objects.get(pk=self.submissions[0].pk)
+        concurrent.grade = 40
+        concurrent.save()
+
+        self.assertEqual(apply_grades(self.homework, changes), 3)
+        self.assertEqual(verify_grade_stats(), [])
+        stats = HomeworkGradeStats.get_for(homework=self.homework)
+        self.assertEqual((stats.graded_count, stats.grade_sum), (3, 270))
+
+    def test_page_lists_every_submission(self):
+        """Test the grading table has a row per submission with current grades"""
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context["rows"]), 3)
+        self.assertEqual(response.context["formset"].forms[2].initial["grade"], 50)
+
+    def test_formset_saves_all_grades(self):
+        """Test submitting the table grades every row in one go"""
+        response = self.client.post(self.url, self.formset_data([90, 80, ""]))
+        self.assertRedirects(response, reverse("teacher_homework_submissions", kwargs={"pk": self.homework.pk}))
+        self.assertEqual(self.grades(), {"alice": 90, "bob": 80, "carol": None})
+        self.assertEqual(verify_grade_stats(), [])
+        stats = HomeworkGradeStats.get_for(homework=self.homework)
+        self.assertEqual((stats.graded_count, stats.grade_sum), (2, 170))
+
+    def test_formset_rejects_out_of_range_grade(self):
+        """Test a grade above the maximum is shown as a field error and nothing is saved"""
+        response = self.client.post(self.url, self.formset_data([90, 101, 70]))
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.context["formset"].is_valid())
+        self.assertEqual(self.grades(), {"alice": None, "bob": None, "carol": 50})
+
+    def test_csv_upload_by_username(self):
+        """Test a semicolon-separated CSV keyed by username keeps feedback when the column is missing"""
+        response = self.upload("grades.csv", "username;grade\nalice;75\nbob;60\n")
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(self.grades(), {"alice": 75, "bob": 60, "carol": 50})
+        self.assertEqual(Submission.objects.get(pk=self.submissions[2].pk).feedback, "Old")
+        self.assertEqual(verify_grade_stats(), [])
+
+    def test_csv_template_round_trip(self):
+        """Test the downloaded CSV template can be edited and uploaded back"""
+        response = self.client.get(self.url, {"format": "csv"})
+        self.assertIn("attachment", response["Content-Disposition"])
+        rows = list(csv.DictReader(StringIO(response.content.decode("utf-8-sig"))))
+        self.assertEqual([row["username"] for row in rows], ["alice", "bob", "carol"])
+        for row in rows:
+            row["grade"] = "88"
+        output = StringIO()
+        writer = csv.DictWriter(output, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+        self.upload("grades.csv", output.getvalue())
+        self.assertEqual(set(self.grades().values()), {88})
+
+    def test_csv_template_escapes_formulas_and_round_trips(self):
+        """Test formula-like feedback is escaped in the template and restored on upload"""
+        Submission.objects.filter(pk=self.submissions[0].pk).update(feedback="=1+1")
+        response = self.client.get(self.url, {"format": "csv"})
+        rows = list(csv.DictReader(StringIO(response.content.decode("utf-8-sig"))))
+        self.assertEqual(rows[0]["feedback"], "'=1+1")
+        output = StringIO()
+        writer = csv.DictWriter(output, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+        self.upload("grades.csv", output.getvalue())
+        self.assertEqual(Submission.objects.get(pk=self.submissions[0].pk).feedback, "=1+1")
+
+    def test_csv_template_keeps_quoted_feedback(self):
+        """Test feedback that itself starts with an apostrophe before a formula character survives a round trip"""
+        feedback = ["'=1+1 is not a formula", "'+5 за стиль", "''@mention"]
+        for submission, text in zip(self.submissions, feedback):
+            Submission.objects.filter(pk=submission.pk).update(feedback=text)
+        response = self.client.get(self.url, {"format": "csv"})
+        rows = list(csv.DictReader(StringIO(response.content.decode("utf-8-sig"))))
+        for row in rows:
+            row["grade"] = "75"
+        output = StringIO()
+        writer = csv.DictWriter(output, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+        self.upload("grades.csv", output.getvalue())
+        self.assertEqual([Submission.objects.get(pk=submission.pk).feedback for submission in self.submissions], feedback)
+
+    def test_invalid_rows_save_nothing(self):
+        """Test one bad row rejects the whole file with per-row errors"""
+        content = "username,grade\nalice,70\nbob,abc\nmallory,10\nalice,20\n"
+        response = self.upload("grades.csv", content)
+        self.assertEqual(response.status_code, 200)
+        errors = response.context["errors"]
+        self.assertEqual(len(errors), 3)
+        self.assertTrue(errors[0].startswith("Строка 2:"))
+        self.assertEqual(self.grades(), {"alice": None, "bob": None, "carol": 50})
+
+    def test_unsupported_file(self):
+        """Test unsupported or malformed files are reported without saving"""
+        with self.assertRaises(GradeImportError):
+            parse_grade_file(SimpleUploadedFile("grades.xlsx", b"data"))
+        response = self.upload("grades.csv", "name,score\nalice,1\n")
+        self.assertEqual(len(response.context["errors"]), 1)
+
+    def test_submission_of_other_homework_is_rejected(self):
+        """Test rows cannot grade submissions of another homework"""
+        other = Homework.objects.create(course=self.course, title="HW 2", description="D", due_date=timezone.now())
+        foreign = Submission.objects.create(homework=other, student=self.students[0], solution_file="submissions/s.txt")
+        changes, errors = validate_grade_rows(self.homework, [{"submission": foreign.pk, "grade": 10}])
+        self.assertEqual(changes, [])
+        self.assertEqual(len(errors), 1)
+
+    def test_json_api(self):
+        """Test the JSON API grades by submission id and reports errors with status 400"""
+        payload = {"grades": [{"submission": self.submissions[0].pk, "grade": 65, "feedback": "Good"}]}
+        response = self.client.post(self.url, payload, content_type="application/json")
+        self.assertEqual(response.json(), {"updated": 1})
+        self.assertEqual(Submission.objects.get(pk=self.submissions[0].pk).feedback, "Good")
+
+        response = self.client.post(self.url, [{"username": "bob", "grade": -1}], content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(len(response.json()["errors"]), 1)
+        response = self.client.post(self.url, "{", content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(verify_grade_stats(), [])
+
+    def test_bulk_update_query_count_is_constant(self):
+        """Test the submissions are written with a single UPDATE regardless of their number"""
+        payload = [{"submission": submission.pk, "grade": 40} for submission in self.submissions]
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post(self.url, payload, content_type="application/json")
+        updates = [q for q in queries if q["sql"].startswith('UPDATE "assignments_submission"')]
+        self.assertEqual(len(updates), 1)
+
+    def test_dashboards_are_refreshed(self):
+        """Test bulk grading invalidates the student and teacher dashboards"""
+        student_client = Client()
+        student_client.force_login(self.students[0])
+        student_client.get(reverse("student_dashboard"))
+        self.client.get(reverse("teacher_dashboard"))
+        self.client.post(self.url, [{"username": "alice", "grade": 99}], content_type="application/json")
+        self.assertEqual(student_client.get(reverse("student_dashboard")).context["graded_count"], 1)
+        self.assertEqual(self.client.get(reverse("teacher_dashboard")).context["pending_count"], 1)
+
+    def test_other_teacher_has_no_access(self):
+        """Test a teacher of another course can neither view nor post grades"""
+        other = User.objects.create_user(username="other", password="test123")
+        other.profile.role = "teacher"
+        other.profile.save()
+        self.client.force_login(other)
+        self.assertRedirects(self.client.get(self.url), reverse("teacher_dashboard"), fetch_redirect_response=False)
+        response = self.client.post(self.url, [{"username": "alice", "grade": 1}], content_type="application/json")
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(self.grades()["alice"], None)
+
+    def test_formset_limits_rows(self):
+        """Test the formset refuses more rows than the configured maximum"""
+        data = {"form-TOTAL_FORMS": 10**6, "form-INITIAL_FORMS": 0}
+        self.assertFalse(BulkGradeFormSet(data).is_valid())
+
+
+# ============================================================================
+# BULK ENROLLMENT TESTS
+# ============================================================================
+
+
+class BulkEnrollmentTest(TestCase):
+    """Tests for batch processing of enrollment requests and roster import"""
+
+    def setUp(self):
+        """Set up a course, its teacher and students with pending requests"""
+        self.client = Client()
+        self.teacher = User.objects.create_user(username="teacher", password="test123")
+        self.teacher.profile.role = "teacher"
+        self.teacher.profile.save()
+        self.course = Course.objects.create(title="Algorithms", description="Description")
+        self.course.teachers.add(self.teacher)
+        self.students = [
+            User.objects.create_user(username=f"student{i}", password="test123", email=f"Student{i}@example.com")
+            for i in range(6)
+        ]
+        self.requests = [CourseEnrollmentRequest.objects.create(course=self.course, student=s) for s in self.students[:4]]
+        self.client.force_login(self.teacher)
+
+    def enrolled(self):
+        return set(self.course.students.values_list("username", flat=True))
+
+    def test_parse_roster_formats(self):
+        """Test CSV with headers, semicolons and plain lists are all accepted"""
+        self.assertEqual(parse_roster("username,name\nalice,Alice\nbob,Bob\n"), ["alice", "bob"])
+        self.assertEqual(parse_roster("\ufeffname;email\nA;a@x.org\nB;b@x.org"), ["a@x.org", "b@x.org"])
+        self.assertEqual(parse_roster("alice\n\nbob\nalice\n"), ["alice", "bob"])
+        with self.assertRaises(RosterImportError):
+            parse_roster("username\n")
+
+    def test_batch_approve(self):
+        """Test approving selected requests enrolls exactly those students"""
+        ids = [self.requests[0].pk, self.requests[1].pk]
+        response = self.client.post(
+            reverse("process_enrollment_requests_bulk", kwargs={"pk": self.course.pk}),
+            {"action": "approve", "request_ids": ids},
+        )
+        self.assertRedirects(response, reverse("manage_students", kwargs={"pk": self.course.pk}))
+        self.assertEqual(self.enrolled(), {"student0", "student1"})
+        statuses = dict(CourseEnrollmentRequest.objects.values_list("student__username", "status"))
+        self.assertEqual(statuses["student0"], "approved")
+        self.assertEqual(statuses["student2"], "pending")
+        self.assertEqual(CourseEnrollmentRequest.objects.get(pk=ids[0]).processed_by, self.teacher)
+
+    def test_batch_reject_skips_processed_and_foreign_requests(self):
+        """Test only pending requests of the course are rejected"""
+        other = Course.objects.create(title="Other", description="Description")
+        foreign = CourseEnrollmentRequest.objects.create(course=other, student=self.students[5])
+        self.requests[0].status = "approved"
+        self.requests[0].save()
+        processed = process_enrollment_requests(
+            self.course, [self.requests[0].pk, self.requests[1].pk, foreign.pk], False, self.teacher
+        )
+        self.assertEqual(processed, 1)
+        self.assertEqual(CourseEnrollmentRequest.objects.get(pk=foreign.pk).status, "pending")
+        self.assertEqual(CourseEnrollmentRequest.objects.get(pk=self.requests[1].pk).status, "rejected")
+        self.assertEqual(self.enrolled(), set())
+
+    def test_batch_query_count_is_constant(self):
+        """Test approving two or four requests takes the same number of queries"""
+        with CaptureQueriesContext(connection) as small:
+            process_enrollment_requests(self.course, [r.pk for r in self.requests[:2]], True, self.teacher)
+        course = Course.objects.create(title="Second", description="Description")
+        requests = [CourseEnrollmentRequest.objects.create(course=course, student=s) for s in self.students]
+        with CaptureQueriesContext(connection) as large:
+            process_enrollment_requests(course, [r.pk for r in requests], True, self.teacher)
+        self.assertEqual(len(small), len(large))
+
+    def test_roster_import(self):
+        """Test the roster resolves usernames and emails, approves requests and reports misses"""
+        self.course.students.add(self.students[3])
+        response = self.client.post(
+            reverse("import_course_roster", kwargs={"pk": self.course.pk}),
+            {"roster": "student0\nSTUDENT4@example.com\nstudent3\nghost\nteacher\n"},
+        )
+        self.assertRedirects(response, reverse("manage_students", kwargs={"pk": self.course.pk}))
+        self.assertEqual(self.enrolled(), {"student0", "student3", "student4"})
+        self.assertEqual(CourseEnrollmentRequest.objects.get(pk=self.requests[0].pk).status, "approved")
+        text = " ".join(str(m) for m in response.wsgi_request._messages)
+        self.assertIn("ghost", text)
+        self.assertIn("Не студенты: teacher", text)
+
+    def test_roster_import_from_file(self):
+        """Test a CSV file with username and email columns is imported"""
+        upload = SimpleUploadedFile("roster.csv", b"username,email\nstudent5,\n,student1@example.com\n")
+        self.client.post(reverse("import_course_roster", kwargs={"pk": self.course.pk}), {"roster_file": upload})
+        self.assertEqual(self.enrolled(), {"student1", "student5"})
+
+    def test_roster_query_count_is_constant(self):
+        """Test importing one or six students takes the same number of queries"""
+        with CaptureQueriesContext(connection) as small:
+            import_roster(self.course, ["student0"], self.teacher)
+        course = Course.objects.create(title="Second", description="Description")
+        with CaptureQueriesContext(connection) as large:
+            report = import_roster(course, [s.username for s in self.students], self.teacher)
+        self.assertEqual(report["enrolled"], 6)
+        self.assertEqual(len(small), len(large))
+
+    def test_dashboards_are_refreshed(self):
+        """Test enrolled students see the course on their cached dashboard"""
+        student_client = Client()
+        student_client.force_login(self.students[0])
+        self.assertEqual(student_client.get(reverse("student_dashboard")).context["total_courses"], 0)
+        process_enrollment_requests(self.course, [self.requests[0].pk], True, self.teacher)
+        self.assertEqual(student_client.get(reverse("student_dashboard")).context["total_courses"], 1)
+
+    def test_other_teacher_cannot_import(self):
+        """Test a teacher of another course cannot enroll students"""
+        other = User.objects.create_user(username="other", password="test123")
+        other.profile.role = "teacher"
+        other.profile.save()
+        self.client.force_login(other)
+        self.client.post(reverse("import_course_roster", kwargs={"pk": self.course.pk}), {"roster": "student0"})
+        self.client.post(
+            reverse("process_enrollment_requests_bulk", kwargs={"pk": self.course.pk}),
+            {"action": "approve", "request_ids": [self.requests[0].pk]},
+        )
+        self.assertEqual(self.enrolled(), set())
+
+
+# ============================================================================
+# JSON API TESTS
+# ============================================================================
+
+
+class JsonApiTest(TestCase):
+    """Tests for the versioned JSON API"""
+
+    def setUp(self):
+        """Set up two courses of one teacher, two students and graded submissions"""
+        self.client = Client()
+        self.teacher = User.objects.create_user(username="teacher", password="test123")
+        self.teacher.profile.role = "teacher"
+        self.teacher.profile.save()
+        self.alice = User.objects.create_user(username="alice", password="test123", first_name="Alice", last_name="A")
+        self.bob = User.objects.create_user(username="bob", password="test123", first_name="Bob", last_name="B")
+        self.algorithms = Course.objects.create(title="Algorithms", description="Long description")
+        self.databases = Course.objects.create(title="Databases", description="Description")
+        for course in (self.algorithms, self.databases):
+            course.teachers.add(self.teacher)
+        self.algorithms.students.add(self.alice, self.bob)
+        now = timezone.now()
+        self.hw1 = Homework.objects.create(course=self.algorithms, title="HW 1", description="D", due_date=now)
+        self.hw2 = Homework.objects.create(
+            course=self.algorithms, title="HW 2", description="D", due_date=now + timedelta(days=1)
+        )
+        self.alice_hw1 = Submission.objects.create(
+            homework=self.hw1, student=self.alice, solution_file="submissions/a.txt", grade=80
+        )
+        Submission.objects.create(homework=self.hw2, student=self.alice, solution_file="submissions/b.txt")
+        Submission.objects.create(homework=self.hw1, student=self.bob, solution_file="submissions/c.txt", grade=60)
+        CourseEnrollmentRequest.objects.create(course=self.databases, student=self.alice, message="Please")
+
+    def get(self, name, kwargs=None, **params):
+        return self.client.get(reverse(name, kwargs=kwargs), params)
+
+    def test_requires_authentication(self):
+        """Test anonymous requests get 401 JSON and non-GET methods are rejected"""
+        response = self.get("api_courses")
+        self.assertEqual(response.status_code, 401)
+        self.assertIn("error", response.json())
+        self.client.force_login(self.teacher)
+        self.assertEqual(self.client.post(reverse("api_courses")).status_code, 405)
+
+    def test_courses_by_role_with_cursor_pagination(self):
+        """Test teachers page through their courses and students see enrolled courses only"""
+        self.client.force_login(self.teacher)
+        first = self.get("api_courses", limit=1).json()
+        self.assertEqual([course["title"] for course in first["results"]], ["Algorithms"])
+        self.assertEqual(first["results"][0]["homeworks_count"], 2)
+        self.assertEqual(first["results"][0]["students_count"], 2)
+        self.assertEqual(self.client.get(first["next"]).json()["results"][0]["pending_requests_count"], 1)
+
+        self.client.force_login(self.alice)
+        results = self.get("api_courses").json()["results"]
+        self.assertEqual([course["title"] for course in results], ["Algorithms"])
+        self.assertNotIn("pending_requests_count", results[0])
+
+    def test_sparse_fields_limit_the_query(self):
+        """Test ?fields= returns only the requested keys and skips unneeded subqueries"""
+        self.client.force_login(self.teacher)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.get("api_courses", fields="id,title")
+        self.assertEqual(set(response.json()["results"][0]), {"id", "title"})
+        course_query = next(q["sql"] for q in queries if 'FROM "assignments_course"' in q["sql"])
+        self.assertNotIn("assignments_homework", course_query)
+        self.assertNotIn("description", course_query)
+
+        response = self.get("api_course", {"pk": self.algorithms.pk}, fields="description")
+        self.assertEqual(response.json(), {"description": "Long description"})
+
+    def test_unknown_fields_and_bad_cursor(self):
+        """Test invalid parameters are reported with status 400"""
+        self.client.force_login(self.alice)
+        response = self.get("api_courses", fields="id,pending_requests_count")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("pending_requests_count", response.json()["error"])
+        self.assertEqual(self.get("api_courses", cursor="!!!").status_code, 400)
+        self.assertEqual(self.get("api_submissions", cursor=encode_cursor(["garbage", 1])).status_code, 400)
+        self.assertEqual(self.get("api_submissions", cursor=encode_cursor([None, None])).status_code, 400)
+        self.assertEqual(
+            self.get("api_submissions", cursor=encode_cursor(["2024-01-01T00:00:00+00:00", None])).status_code, 400
+        )
+        self.assertEqual(self.get("api_submissions", limit=0).status_code, 400)
+
+    def test_etag_returns_not_modified(self):
+        """Test a repeated request with If-None-Match gets 304 until the data changes"""
+        self.client.force_login(self.teacher)
+        url = reverse("api_submissions")
+        response = self.client.get(url)
+        etag = response["ETag"]
+        self.assertIn("private", response["Cache-Control"])
+        self.assertEqual(self.client.get(url, headers={"if-none-match": etag}).status_code, 304)
+
+        self.alice_hw1.grade = 81
+        self.alice_hw1.save()
+        self.assertEqual(self.client.get(url, headers={"if-none-match": etag}).status_code, 200)
+
+    def test_not_modified_without_running_the_view(self):
+        """Test a matching ETag is checked with one aggregate query and differs per address and course state"""
+        self.client.force_login(self.alice)
+        url = reverse("api_course_homeworks", kwargs={"pk": self.algorithms.pk})
+        etag = self.client.get(url)["ETag"]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, headers={"if-none-match": etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertIn("private", response["Cache-Control"])
+        # Session, user with profile and the course state
+        self.assertEqual(len(queries), 3)
+        self.assertNotEqual(self.client.get(url, {"fields": "id"})["ETag"], etag)
+
+        save_test_result(self.alice_hw1, {"status": "failed", "passed": 0, "total": 1, "output": ""})
+        self.assertEqual(self.client.get(url, headers={"if-none-match": etag}).status_code, 200)
+
+    def test_foreign_course_is_not_found(self):
+        """Test users cannot read courses they are not members of"""
+        self.client.force_login(self.alice)
+        self.assertEqual(self.get("api_course", {"pk": self.databases.pk}).status_code, 404)
+        self.assertEqual(self.get("api_course_homeworks", {"pk": self.databases.pk}).status_code, 404)
+        self.assertEqual(self.get("api_homework_submissions", {"pk": 10**6}).status_code, 404)
+
+    def test_student_homeworks_include_own_submission(self):
+        """Test students get their own submission and grade for each homework"""
+        self.client.force_login(self.bob)
+        results = self.get("api_course_homeworks", {"pk": self.algorithms.pk}).json()["results"]
+        self.assertEqual([(hw["title"], hw["grade"]) for hw in results], [("HW 1", 60), ("HW 2", None)])
+        self.assertNotIn("submitted_count", results[0])
+
+        self.client.force_login(self.teacher)
+        results = self.get("api_course_homeworks", {"pk": self.algorithms.pk}).json()["results"]
+        self.assertEqual((results[0]["submitted_count"], results[0]["graded_count"]), (2, 2))
+
+    def test_submissions_filters_and_visibility(self):
+        """Test teachers filter submissions and students only see their own"""
+        self.client.force_login(self.teacher)
+        pending = self.get("api_submissions", status="pending").json()["results"]
+        self.assertEqual([s["student_username"] for s in pending], ["alice"])
+        self.assertEqual(pending[0]["download_url"], reverse("download_submission", kwargs={"pk": pending[0]["id"]}))
+        self.assertNotIn("test_output", pending[0])
+        homework = self.get("api_homework_submissions", {"pk": self.hw1.pk}).json()["results"]
+        self.assertEqual(len(homework), 2)
+
+        self.client.force_login(self.bob)
+        self.assertEqual(len(self.get("api_submissions").json()["results"]), 1)
+        self.assertEqual(len(self.get("api_homework_submissions", {"pk": self.hw1.pk}).json()["results"]), 1)
+
+    def test_grades(self):
+        """Test the teacher pages through grade rows and a student gets only their own"""
+        self.client.force_login(self.teacher)
+        data = self.get("api_course_grades", {"pk": self.algorithms.pk}, limit=1).json()
+        self.assertEqual([hw["title"] for hw in data["homeworks"]], ["HW 1", "HW 2"])
+        self.assertEqual(data["results"][0]["grades"], {str(self.hw1.pk): 80, str(self.hw2.pk): None})
+        self.assertEqual((data["results"][0]["total"], data["results"][0]["completed"]), (80, 1))
+        second = self.client.get(data["next"]).json()
+        self.assertEqual(second["results"][0]["username"], "bob")
+        self.assertIsNone(second["next"])
+
+        self.client.force_login(self.bob)
+        data = self.get("api_course_grades", {"pk": self.algorithms.pk}, fields="username,total").json()
+        self.assertEqual(data["results"], [{"username": "bob", "total": 60}])
+
+    def test_enrollment_requests(self):
+        """Test teachers see requests to their courses and students their own"""
+        self.client.force_login(self.teacher)
+        results = self.get("api_enrollment_requests", status="pending").json()["results"]
+        self.assertEqual([(r["student_username"], r["course_id"]) for r in results], [("alice", self.databases.pk)])
+        self.assertEqual(self.get("api_enrollment_requests", status="unknown").status_code, 400)
+
+        self.client.force_login(self.bob)
+        self.assertEqual(self.get("api_enrollment_requests").json()["results"], [])
+
+
+# ============================================================================
+# CONDITIONAL GET TESTS
+# ============================================================================
+
+
+class ConditionalPageTest(TestCase):
+    """Tests for ETag handling on dashboards and course pages"""
+
+    def setUp(self):
+        """Set up a course with a teacher, a student, a homework and a submission"""
+        self.client = Client()
+        self.teacher = User.objects.create_user(username="teacher", password="test123", first_name="Ivan")
+        self.teacher.profile.role = "teacher"
+        self.teacher.profile.save()
+        self.student = User.objects.create_user(username="student", password="test123", first_name="Anna")
+        self.other = User.objects.create_user(username="other", password="test123")
+        self.course = Course.objects.create(title="Algorithms", description="Description")
+        self.course.teachers.add(self.teacher)
+        self.course.students.add(self.student)
+        self.homework = Homework.objects.create(
+            course=self.course, title="HW 1", description="D", due_date=timezone.now() + timedelta(days=1)
+        )
+        self.submission = Submission.objects.create(
+            homework=self.homework, student=self.student, solution_file="submissions/a.txt"
+        )
+
+    def revalidate(self, name, kwargs=None):
+        """GET the page, then GET it again with the ETag of the first response"""
+        url = reverse(name, kwargs=kwargs)
+        # The first visit of a page with forms sets the CSRF cookie, which is part of the ETag
+        self.client.get(url)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response, self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+
+    def assertNotModified(self, name, kwargs=None):
+        first, second = self.revalidate(name, kwargs)
+        self.assertEqual(second.status_code, 304)
+        self.assertEqual(second["ETag"], first["ETag"])
+        return first["ETag"]
+
+    def test_pages_return_not_modified(self):
+        """Test repeat visits get 304 with private revalidation headers on every conditional page"""
+        self.client.force_login(self.student)
+        for name, kwargs in [("student_dashboard", None), ("course_detail", {"pk": self.course.pk}), ("my_grades", None)]:
+            first, second = self.revalidate(name, kwargs)
+            self.assertTrue(first["ETag"].startswith('W/"'))
+            self.assertNotIn("Last-Modified", first)
+            self.assertIn("private", first["Cache-Control"])
+            self.assertIn("no-cache", first["Cache-Control"])
+            self.assertEqual(second.status_code, 304, name)
+
+        self.client.force_login(self.teacher)
+        for name, kwargs in [
+            ("teacher_dashboard", None),
+            ("teacher_course_detail", {"pk": self.course.pk}),
+            ("teacher_grades_table", {"course_pk": self.course.pk}),
+        ]:
+            self.assertNotModified(name, kwargs)
+
+    def test_not_modified_skips_view_body(self):
+        """Test a 304 is answered without rendering the page"""
+        self.client.force_login(self.student)
+        url = reverse("course_detail", kwargs={"pk": self.course.pk})
+        etag = self.client.get(url)["ETag"]
+        with mock.patch.object(views, "render") as render:
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        render.assert_not_called()
+
+    def test_changes_invalidate_validators(self):
+        """Test grading, homework edits, enrollment requests and membership change the ETag"""
+        self.client.force_login(self.teacher)
+        course_kwargs = {"pk": self.course.pk}
+        etag = self.assertNotModified("teacher_course_detail", course_kwargs)
+
+        self.submission.grade = 90
+        self.submission.save()
+        changed = self.assertNotModified("teacher_course_detail", course_kwargs)
+        self.assertNotEqual(changed, etag)
+
+        self.homework.title = "HW 1 (updated)"
+        self.homework.save()
+        self.assertNotEqual(self.assertNotModified("teacher_course_detail", course_kwargs), changed)
+
+        etag = self.assertNotModified("teacher_dashboard")
+        request = CourseEnrollmentRequest.objects.create(course=self.course, student=self.other)
+        self.assertNotEqual(self.assertNotModified("teacher_dashboard"), etag)
+
+        self.client.force_login(self.student)
+        etag = self.assertNotModified("student_dashboard")
+        self.course.students.remove(self.student)
+        self.assertNotEqual(self.client.get(reverse("student_dashboard"), HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self.client.force_login(self.other)
+        etag = self.assertNotModified("student_dashboard")
+        request.delete()
+        self.course.students.add(self.other)
+        self.assertNotEqual(self.client.get(reverse("student_dashboard"), HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_removed_course_ignores_if_modified_since(self):
+        """Test losing a course re-renders the page for clients that only send If-Modified-Since"""
+        newer = Course.objects.create(title="Databases", description="Description")
+        newer.students.add(self.student)
+        self.client.force_login(self.student)
+        url = reverse("student_dashboard")
+        self.assertNotIn("Last-Modified", self.client.get(url))
+
+        # The remaining course is still the most recently modified one
+        self.course.students.remove(self.student)
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=http_date((timezone.now() + timedelta(hours=1)).timestamp()))
+        self.assertEqual(response.status_code, 200)
+
+    def test_bulk_operations_touch_course(self):
+        """Test bulk grading and roster import bump the course modification time"""
+        modified = Course.objects.values_list("modified_at", flat=True).get(pk=self.course.pk)
+        changes, errors = validate_grade_rows(self.homework, [{"submission": self.submission.pk, "grade": "70"}])
+        self.assertEqual(errors, [])
+        apply_grades(self.homework, changes)
+        graded = Course.objects.values_list("modified_at", flat=True).get(pk=self.course.pk)
+        self.assertGreater(graded, modified)
+
+        import_roster(self.course, ["other"], self.teacher)
+        self.assertGreater(Course.objects.values_list("modified_at", flat=True).get(pk=self.course.pk), graded)
+
+    def test_passed_deadline_changes_validators(self):
+        """Test a homework becoming overdue re-renders the page without any data change"""
+        self.client.force_login(self.student)
+        kwargs = {"pk": self.course.pk}
+        etag = self.assertNotModified("course_detail", kwargs)
+        later = timezone.now() + timedelta(days=2)
+        with mock.patch("assignments.conditional.timezone.now", return_value=later):
+            response = self.client.get(reverse("course_detail", kwargs=kwargs), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_pending_messages_and_access(self):
+        """Test pages with unread messages are rendered and foreign users never get 304"""
+        self.client.force_login(self.student)
+        url = reverse("course_detail", kwargs={"pk": self.course.pk})
+        etag = self.client.get(url)["ETag"]
+
+        # Requesting a course the student is already enrolled in leaves a warning message
+        self.client.post(reverse("request_enrollment", kwargs={"course_pk": self.course.pk}))
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("ETag", response)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self.client.force_login(self.other)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 302)
+
+        self.client.force_login(self.teacher)
+        self.assertEqual(self.client.get(reverse("student_dashboard"), HTTP_IF_NONE_MATCH=etag).status_code, 302)
@@ -0,0 +1,258 @@
+"""
+Порционная (возобновляемая) загрузка файлов решений.
+
+Вместо одного multipart-запроса, который Django целиком складывает во
+временный файл и только потом проверяет размер, клиент загружает файл
+последовательностью небольших запросов:
+
+1. ``start_upload`` - проверяет имя и заявленный размер и создает UploadSession;
+2. ``append_chunk`` - дописывает порцию по ожидаемому смещению, проверяя
+   размер по мере поступления байтов (повтор порции после обрыва связи
+   безопасен: смещение показывает, сколько байтов уже принято);
+3. ``commit_upload`` - склеивает порции в файл и атомарно создает или
+   обновляет Submission.
+
+Порции сразу пишутся в хранилище (default_storage), поэтому воркер держит
+в памяти не больше одной порции.
+"""
+
+import io
+import os
+from datetime import timedelta
+
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import ALLOWED_SOLUTION_EXTENSIONS, MAX_SOLUTION_SIZE_MB, Job, Submission, UploadSession
+
+# Максимальный размер одной порции
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Незавершенные загрузки старше этого срока удаляются
+UPLOAD_SESSION_TTL = timedelta(days=1)
+
+MAX_SOLUTION_SIZE = MAX_SOLUTION_SIZE_MB * 1024 * 1024
+
+
+class UploadError(Exception):
+    """
+    Ошибка порционной загрузки.
+
+    Attributes:
+        status: HTTP-статус ответа API
+        offset: Текущее смещение загрузки (для рассинхронизации клиента)
+    """
+
+    def __init__(self, message, status=400, offset=None):
+        super().__init__(message)
+        self.status = status
+        self.offset = offset
+
+
+class _ChunkReader(io.RawIOBase):
+    """Последовательное чтение порций загрузки как одного файла"""
+
+    def __init__(self, storage, names):
+        self._storage = storage
+        self._names = iter(names)
+        self._current = None
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while True:
+            if self._current is None:
+                name = next(self._names, None)
+                if name is None:
+                    return 0
+                self._current = self._storage.open(name, "rb")
+            data = self._current.read(len(buffer))
+            if data:
+                buffer[: len(data)] = data
+                return len(data)
+            self._current.close()
+            self._current = None
+
+    def close(self):
+        if self._current is not None:
+            self._current.close()
+            self._current = None
+        super().close()
+
+
+def _delete_files(names):
+    for name in names:
+        default_storage.delete(name)
+
+
+def delete_upload(upload):
+    """Удаляет загрузку, а после фиксации транзакции - ее порции из хранилища"""
+    names = [upload.chunk_name(index) for index in range(upload.chunk_count)]
+    upload.delete()
+    transaction.on_commit(lambda: _delete_files(names))
+
+
+def purge_stale_uploads(now=None):
+    """
+    Удаляет заброшенные загрузки.
+
+    Returns:
+        int: Число удаленных загрузок
+    """
+    now = now or timezone.now()
+    stale = list(UploadSession.objects.filter(updated_at__lt=now - UPLOAD_SESSION_TTL))
+    for upload in stale:
+        delete_upload(upload)
+    return len(stale)
+
+
+def start_upload(homework, student, filename, size):
+    """
+    Начинает загрузку файла решения.
+
+    Args:
+        homework: Домашнее задание
+        student: Студент
+        filename: Исходное имя файла
+        size: Заявленный размер файла в байтах
+
+    Returns:
+        UploadSession: Новая загрузка
+
+    Raises:
+        UploadError: Если расширение не разрешено или размер превышает лимит
+    """
+    filename = os.path.basename(filename or "")
+    ext = os.path.splitext(filename)[1].lower()
+    if ext not in ALLOWED_SOLUTION_EXTENSIONS:
+        raise UploadError(f"Неподдерживаемый формат файла. Разрешены: {', '.join(ALLOWED_SOLUTION_EXTENSIONS)}")
+    if size <= 0:
+        raise UploadError("Файл пуст")
+    if size > MAX_SOLUTION_SIZE:
+        raise UploadError(
+            f"Максимальный размер файла {MAX_SOLUTION_SIZE_MB}МБ. Ваш файл: {size / (1024 * 1024):.2f}МБ", status=413
+        )
+
+    purge_stale_uploads()
+    return UploadSession.objects.create(homework=homework, student=student, filename=filename, size=size)
+
+
+def append_chunk(upload, offset, stream):
+    """
+    Дописывает порцию к загрузке.
+
+    Порция читается из stream не больше чем на UPLOAD_CHUNK_SIZE + 1 байт,
+    поэтому слишком большая порция отклоняется, не будучи прочитанной целиком.
+    Чтение идет до блокировки загрузки, смещение проверяется после него.
+
+    Args:
+        upload: Загрузка
+        offset: Смещение, с которого клиент начинает порцию
+        stream: Источник байтов порции (объект с методом read)
+
+    Returns:
+        int: Новое смещение (число принятых байтов)
+
+    Raises:
+        UploadError: Если смещение не совпадает с принятым или порция
+            выходит за лимиты
+    """
+    # Порция читается из сети до начала транзакции: медленный клиент не
+    # должен держать блокировку загрузки (а в SQLite - всю базу на запись)
+    data = stream.read(UPLOAD_CHUNK_SIZE + 1)
+    if len(data) > UPLOAD_CHUNK_SIZE:
+        raise UploadError(f"Порция больше {UPLOAD_CHUNK_SIZE} байт", status=413, offset=upload.received)
+
+    with transaction.atomic():
+        upload = UploadSession.objects.select_for_update().get(pk=upload.pk)
+        if offset != upload.received:
+            raise UploadError("Неверное смещение порции", status=409, offset=upload.received)
+        if not data:
+            raise UploadError("Пустая порция", offset=upload.received)
+        if upload.received + len(data) > upload.size:
+            raise UploadError("Получено больше байтов, чем заявлено", status=413, offset=upload.received)
+
+        name = upload.chunk_name(upload.chunk_count)
+        # Остаток от оборванной попытки записи этой же порции
+        if default_storage.exists(name):
+            default_storage.delete(name)
+        default_storage.save(name, ContentFile(data))
+
+        upload.received += len(data)
+        upload.chunk_count += 1
+        upload.save(update_fields=["received", "chunk_count", "updated_at"])
+    return upload.received
+
+
+def _save_resubmission(submission):
+    """Сохраняет отправку с новым файлом, сбрасывая оценку и отзыв"""
+    submission.grade = None
+    submission.feedback = ""
+    submission.save()
+
+
+def commit_upload(upload):
+    """
+    Завершает загрузку: склеивает порции в файл решения и сохраняет отправку.
+
+    Если у студента уже есть отправка по заданию, ее файл заменяется, а
+    оценка и отзыв сбрасываются (как при переотправке через форму). Прежний
+    файл удаляется сигналами учета ссылок, если на него никто не ссылается.
+
+    Returns:
+        Submission: Созданная или обновленная отправка
+
+    Raises:
+        UploadError: Если получены не все байты
+    """
+    new_name = None
+    try:
+        with transaction.atomic():
+            upload = UploadSession.objects.select_for_update().get(pk=upload.pk)
+            if not upload.is_complete:
+                raise UploadError("Файл загружен не полностью", status=409, offset=upload.received)
+
+            submission = (
+                Submission.objects.select_for_update()
+                .filter(homework_id=upload.homework_id, student_id=upload.student_id)
+                .first()
+            )
+            if submission is None:
+                submission = Submission(homework_id=upload.homework_id, student_id=upload.student_id)
+
+            chunks = [upload.chunk_name(index) for index in range(upload.chunk_count)]
+            content = File(io.BufferedReader(_ChunkReader(default_storage, chunks)), name=upload.filename)
+            content.size = upload.size
+            with content:
+                submission.solution_file.save(upload.filename, content, save=False)
+            new_name = submission.solution_file.name
+            try:
+                with transaction.atomic():
+                    _save_resubmission(submission)
+            except IntegrityError:
+                # Параллельная фиксация другой загрузки успела создать отправку:
+                # файл этой загрузки заменяет ее файл
+                existing = None
+                if submission.pk is None:
+                    existing = (
+                        Submission.objects.select_for_update()
+                        .filter(homework_id=upload.homework_id, student_id=upload.student_id)
+                        .first()
+                    )
+                if existing is None:
+                    raise
+                submission = existing
+                submission.solution_file.name = new_name
+                _save_resubmission(submission)
+            delete_upload(upload)
+    except Exception:
+        if new_name:
+            # Тот же файл может быть общим с другими отправками: он удаляется сборщиком,
+            # только если после отката на него никто не ссылается
+            Job.enqueue("collect_stored_file", file_name=new_name)
+        raise
+    return submission
@@ -5,12 +5,13 @@ URL конфигурация для приложения assignments.
 - Авторизация и регистрация
 - Dashboard студента и преподавателя
 - Управление домашними заданиями
-- Отправка и проверка работ
+- Отправка (в том числе порционная загрузка) и проверка работ
+- JSON API версии 1 (api/v1/)
 """
 
 from django.urls import path
 
-from . import views
+from . import api, enrollment_views, file_views, grading_views, views
 
 urlpatterns = [
     # Главная и авторизация
@@ -34,7 +35,24 @@ urlpatterns = [
         name="cancel_enrollment_request",
     ),
     path("student/homework/<int:pk>/", views.homework_detail, name="homework_detail"),
+    path(
+        "student/homework/<int:pk>/upload/",
+        file_views.start_submission_upload,
+        name="start_submission_upload",
+    ),
+    path("student/upload/<uuid:upload_id>/", file_views.submission_upload, name="submission_upload"),
+    path(
+        "student/upload/<uuid:upload_id>/append/",
+        file_views.append_submission_upload,
+        name="append_submission_upload",
+    ),
+    path(
+        "student/upload/<uuid:upload_id>/commit/",
+        file_views.commit_submission_upload,
+        name="commit_submission_upload",
+    ),
     path("student/submissions/", views.my_submissions, name="my_submissions"),
+    path("submission/<int:pk>/file/", file_views.download_submission, name="download_submission"),
     path("student/grades/", views.my_grades, name="my_grades"),
     # Преподаватель
     path("teacher/", views.teacher_dashboard, name="teacher_dashboard"),
@@ -50,6 +68,16 @@ urlpatterns = [
         views.manage_students,
         name="manage_students",
     ),
+    path(
+        "teacher/course/<int:pk>/requests/",
+        enrollment_views.process_enrollment_requests_bulk,
+        name="process_enrollment_requests_bulk",
+    ),
+    path(
+        "teacher/course/<int:pk>/students/import/",
+        enrollment_views.import_course_roster,
+        name="import_course_roster",
+    ),
     path(
         "teacher/request/<int:request_pk>/approve/",
         views.approve_enrollment_request,
@@ -80,6 +108,21 @@ urlpatterns = [
         views.teacher_homework_submissions,
         name="teacher_homework_submissions",
     ),
+    path(
+        "teacher/homework/<int:pk>/download/",
+        file_views.teacher_homework_download,
+        name="teacher_homework_download",
+    ),
+    path(
+        "teacher/homework/<int:pk>/tests/",
+        file_views.teacher_homework_tests,
+        name="teacher_homework_tests",
+    ),
+    path(
+        "teacher/homework/<int:pk>/grades/",
+        grading_views.teacher_bulk_grade,
+        name="teacher_bulk_grade",
+    ),
     path(
         "teacher/submission/<int:pk>/grade/",
         views.teacher_grade_submission,
@@ -95,6 +138,11 @@ urlpatterns = [
         views.teacher_grades_table,
         name="teacher_grades_table",
     ),
+    path(
+        "teacher/course/<int:course_pk>/grades/export/",
+        file_views.teacher_grades_export,
+        name="teacher_grades_export",
+    ),
     path(
         "teacher/course/<int:pk>/delete/",
         views.delete_course,
@@ -105,4 +153,12 @@ urlpatterns = [
         views.delete_homework,
         name="delete_homework",
     ),
+    # JSON API
+    path("api/v1/courses/", api.api_courses, name="api_courses"),
+    path("api/v1/courses/<int:pk>/", api.api_course, name="api_course"),
+    path("api/v1/courses/<int:pk>/homeworks/", api.api_course_homeworks, name="api_course_homeworks"),
+    path("api/v1/courses/<int:pk>/grades/", api.api_course_grades, name="api_course_grades"),
+    path("api/v1/homeworks/<int:pk>/submissions/", api.api_homework_submissions, name="api_homework_submissions"),
+    path("api/v1/submissions/", api.api_submissions, name="api_submissions"),
+    path("api/v1/enrollment-requests/", api.api_enrollment_requests, name="api_enrollment_requests"),
 ]
@@ -4,24 +4,88 @@
 Содержит все представления для:
 - Авторизации и регистрации пользователей
 - Dashboard студента и преподавателя
-- Управления домашними заданиями
+- Управления курсами и домашними заданиями
 - Отправки и проверки работ
+
+Группы представлений для отдельных функций вынесены в свои модули:
+загрузка и скачивание файлов (file_views.py), массовое выставление оценок
+(grading_views.py), массовое зачисление студентов (enrollment_views.py) и
+JSON API (api.py).
 """
 
-import os
+import asyncio
 
 from django.contrib import messages
 from django.contrib.auth import authenticate, get_user_model, login, logout
 from django.contrib.auth.decorators import login_required
+from django.core.paginator import Paginator
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Prefetch, Subquery, Sum
+from django.db.models.functions import Coalesce
 from django.shortcuts import get_object_or_404, redirect, render
 from django.utils import timezone
 
-from .decorators import student_required, teacher_required
-from .forms import GradeForm, HomeworkForm, RegisterForm, SubmissionForm
-from .models import Course, CourseEnrollmentRequest, Homework, Submission
+from asgiref.sync import sync_to_async
+
+from .conditional import course_condition, student_courses, teacher_courses, url_course
+from .dashboard_cache import acached_stats, fragment_context
+from .decorators import course_role_required, student_required, teacher_required
+from .forms import GradeForm, HomeworkForm, RegisterForm, RosterImportForm, SubmissionForm
+from .gradebook import Gradebook, student_grade_report
+from .models import (
+    Course,
+    CourseEnrollmentRequest,
+    CourseGradeStats,
+    Homework,
+    HomeworkGradeStats,
+    StudentCourseGradeStats,
+    Submission,
+    schedule_submission_tests,
+)
+from .pagination import InvalidCursor, akeyset_paginate
+from .permissions import get_user_role, is_course_student, is_course_teacher
+from .queries import count_subquery
+from .similarity import similar_pairs
 
 User = get_user_model()
 
+# Размер страницы каталога курсов
+COURSES_PER_PAGE = 20
+
+# Keyset-пагинация списка работ преподавателя
+SUBMISSIONS_PER_PAGE = 50
+SUBMISSIONS_ORDERING = ["-submitted_at", "-id"]
+
+
+# Асинхронные представления.
+#
+# Списки и счетчики страниц загружаются асинхронным ORM, независимые запросы
+# запускаются одновременно через asyncio.gather. Шаблоны, контекст-процессоры
+# и хранилище сообщений синхронные, поэтому ответ рендерится в потоке
+# (arender). Данные для шаблона загружаются заранее; ленивыми остаются только
+# списки курсов dashboard внутри кешируемых фрагментов (см. dashboard_cache.py).
+
+
+async def arequest_user(request):
+    """
+    Пользователь запроса в асинхронном представлении.
+
+    request.user загружается лениво синхронным запросом к БД, поэтому
+    пользователь берется из request.auser() (декораторы доступа его уже
+    загрузили) и подставляется в request.user для шаблонов.
+    """
+    request.user = await request.auser()
+    return request.user
+
+
+async def alist(queryset):
+    """Результаты queryset списком (асинхронно)"""
+    return [obj async for obj in queryset]
+
+
+arender = sync_to_async(render)
+
+
 # ============= Авторизация =============
 
 
@@ -76,9 +140,10 @@ def logout_view(request):
 @login_required
 def dashboard_view(request):
     """Главная страница - перенаправление в зависимости от роли"""
-    if request.user.profile.is_student:
+    role = get_user_role(request.user)
+    if role == "student":
         return redirect("student_dashboard")
-    if request.user.profile.is_teacher:
+    if role == "teacher":
         return redirect("teacher_dashboard")
     return redirect("login")
 
@@ -88,56 +153,81 @@ def dashboard_view(request):
 
 @login_required
 @student_required
-def student_dashboard(request):
+@course_condition(student_courses)
+async def student_dashboard(request):
     """Dashboard студента - список курсов"""
-    courses = request.user.enrolled_courses.all()
+    user = await arequest_user(request)
+
+    async def compute_stats():
+        # Счетчики - независимые запросы
+        total_courses, total_homeworks, stats = await asyncio.gather(
+            user.enrolled_courses.acount(),
+            Homework.objects.filter(course__students=user).acount(),
+            StudentCourseGradeStats.objects.filter(student=user).aaggregate(
+                submitted=Coalesce(Sum("submitted_count"), 0),
+                graded=Coalesce(Sum("graded_count"), 0),
+            ),
+        )
+        return {
+            "total_courses": total_courses,
+            "total_homeworks": total_homeworks,
+            "submitted_count": stats["submitted"],
+            "graded_count": stats["graded"],
+        }
 
-    # Статистика по всем курсам
-    all_homeworks = Homework.objects.filter(course__in=courses)
-    student_submissions = Submission.objects.filter(student=request.user)
+    # Список курсов выполняется при рендеринге и только при промахе кеша фрагмента
+    courses = (
+        user.enrolled_courses.annotate(homeworks_count=count_subquery(Homework.objects.filter(course_id=OuterRef("pk"))))
+        .prefetch_related("teachers")
+        .order_by("title", "pk")
+    )
 
     context = {
         "courses": courses,
-        "total_courses": courses.count(),
-        "total_homeworks": all_homeworks.count(),
-        "submitted_count": student_submissions.count(),
-        "graded_count": student_submissions.filter(grade__isnull=False).count(),
+        **await acached_stats("student", user.pk, compute_stats),
+        **fragment_context(),
     }
 
-    return render(request, "assignments/student_dashboard.html", context)
+    return await arender(request, "assignments/student_dashboard.html", context)
 
 
 @login_required
 @student_required
+@course_role_required("student")
+@course_condition(url_course(), deadlines=True)
 def course_detail(request, pk):
     """Детальная страница курса для студента"""
     course = get_object_or_404(Course, pk=pk)
 
-    # Проверка доступа - студент должен быть записан на курс
-    if request.user not in course.students.all():
-        messages.error(request, "У вас нет доступа к этому курсу")
-        return redirect("student_dashboard")
-
-    homeworks = course.homeworks.all().order_by("-created_at")
-    course_submissions = Submission.objects.filter(student=request.user, homework__course=course)
+    # Задания курса вместе с отправкой текущего студента - два запроса на всю страницу
+    homeworks = course.homeworks.order_by("-created_at").prefetch_related(
+        Prefetch(
+            "submissions",
+            queryset=Submission.objects.filter(student=request.user),
+            to_attr="student_submissions",
+        )
+    )
 
     # Добавляем информацию о том, сдал ли студент каждое ДЗ
+    now = timezone.now()
     homework_status = []
+    submitted_count = 0
     for hw in homeworks:
-        submission = course_submissions.filter(homework=hw).first()
+        submission = hw.student_submissions[0] if hw.student_submissions else None
+        submitted_count += submission is not None
         homework_status.append(
             {
                 "homework": hw,
                 "submission": submission,
-                "is_overdue": hw.due_date < timezone.now(),
+                "is_overdue": hw.due_date < now,
             }
         )
 
     context = {
         "course": course,
         "homework_status": homework_status,
-        "total_homeworks": homeworks.count(),
-        "submitted_count": course_submissions.count(),
+        "total_homeworks": len(homework_status),
+        "submitted_count": submitted_count,
     }
 
     return render(request, "assignments/course_detail.html", context)
@@ -150,7 +240,7 @@ def homework_detail(request, pk):
     homework = get_object_or_404(Homework, pk=pk)
 
     # Проверка доступа - студент должен быть записан на курс
-    if request.user not in homework.course.students.all():
+    if not is_course_student(request, homework.course_id):
         messages.error(request, "У вас нет доступа к этому заданию")
         return redirect("student_dashboard")
 
@@ -162,10 +252,7 @@ def homework_detail(request, pk):
             # Обновляем существующую отправку
             form = SubmissionForm(request.POST, request.FILES, instance=submission)
             if form.is_valid():
-                # Удаляем старый файл перед сохранением нового
-                if submission.solution_file and os.path.isfile(submission.solution_file.path):
-                    os.remove(submission.solution_file.path)
-
+                # Старый файл удаляется сигналами учета ссылок, если на него никто не ссылается
                 submission = form.save(commit=False)
                 # Сбрасываем оценку при переотправке
                 submission.grade = None
@@ -198,43 +285,25 @@ def homework_detail(request, pk):
 
 @login_required
 @student_required
-def my_submissions(request):
+async def my_submissions(request):
     """Список всех отправленных работ студента"""
-    submissions = Submission.objects.filter(student=request.user).order_by("-submitted_at")
+    user = await arequest_user(request)
+    submissions = Submission.objects.filter(student=user).select_related("homework").order_by("-submitted_at")
 
     context = {
-        "submissions": submissions,
+        "submissions": await alist(submissions),
     }
 
-    return render(request, "assignments/my_submissions.html", context)
+    return await arender(request, "assignments/my_submissions.html", context)
 
 
 @login_required
 @student_required
+@course_condition(student_courses)
 def my_grades(request):
     """Таблица оценок студента по всем курсам"""
-    courses = request.user.enrolled_courses.all()
-
-    grades_data = []
-    for course in courses:
-        homeworks = course.homeworks.all().order_by("due_date")
-        course_grades = {"course": course, "homeworks": []}
-
-        for hw in homeworks:
-            submission = Submission.objects.filter(homework=hw, student=request.user).first()
-            course_grades["homeworks"].append(
-                {
-                    "homework": hw,
-                    "submission": submission,
-                    "grade": submission.grade if submission else None,
-                    "status": ("Оценено" if submission and submission.grade else "На проверке" if submission else "Не сдано"),
-                }
-            )
-
-        grades_data.append(course_grades)
-
     context = {
-        "grades_data": grades_data,
+        "grades_data": student_grade_report(request.user),
     }
 
     return render(request, "assignments/my_grades.html", context)
@@ -244,37 +313,28 @@ def my_grades(request):
 @student_required
 def available_courses(request):
     """Список всех доступных курсов для студента"""
-    # Курсы, на которые студент уже записан
-    enrolled_courses = request.user.enrolled_courses.all()
-
-    # Все курсы
-    all_courses = Course.objects.all()
-
-    # Заявки студента
-    student_requests = CourseEnrollmentRequest.objects.filter(student=request.user)
-    requests_dict = {req.course_id: req for req in student_requests}
-
-    # Подготавливаем информацию о каждом курсе
-    courses_info = []
-    for course in all_courses:
-        is_enrolled = course in enrolled_courses
-        request_status = None
-        enrollment_request = requests_dict.get(course.id)
-
-        if enrollment_request:
-            request_status = enrollment_request.status
-
-        courses_info.append(
-            {
-                "course": course,
-                "is_enrolled": is_enrolled,
-                "request_status": request_status,
-                "request_id": enrollment_request.id if enrollment_request else None,
-            }
+    # Заявка студента на курс (не более одной благодаря unique_together)
+    enrollment_request = CourseEnrollmentRequest.objects.filter(course=OuterRef("pk"), student=request.user)
+
+    # Весь каталог одним запросом: счетчики и статус заявки - коррелированные подзапросы,
+    # преподаватели - одним prefetch-запросом на страницу
+    courses = (
+        Course.objects.annotate(
+            students_count=count_subquery(Course.students.through.objects.filter(course_id=OuterRef("pk"))),
+            homeworks_count=count_subquery(Homework.objects.filter(course_id=OuterRef("pk"))),
+            is_enrolled=Exists(Course.students.through.objects.filter(course_id=OuterRef("pk"), user_id=request.user.pk)),
+            request_status=Subquery(enrollment_request.values("status")[:1]),
+            request_id=Subquery(enrollment_request.values("pk")[:1]),
         )
+        .prefetch_related("teachers")
+        .order_by("title", "pk")
+    )
+
+    page_obj = Paginator(courses, COURSES_PER_PAGE).get_page(request.GET.get("page"))
 
     context = {
-        "courses_info": courses_info,
+        "courses": page_obj.object_list,
+        "page_obj": page_obj,
     }
 
     return render(request, "assignments/available_courses.html", context)
@@ -287,7 +347,7 @@ def request_enrollment(request, course_pk):
     course = get_object_or_404(Course, pk=course_pk)
 
     # Проверяем, не записан ли студент уже на курс
-    if request.user in course.students.all():
+    if is_course_student(request, course.pk):
         messages.warning(request, "Вы уже записаны на этот курс")
         return redirect("available_courses")
 
@@ -338,46 +398,61 @@ def cancel_enrollment_request(request, request_pk):
 
 @login_required
 @teacher_required
-def teacher_dashboard(request):
+@course_condition(teacher_courses)
+async def teacher_dashboard(request):
     """Dashboard преподавателя - список его курсов"""
-    courses = request.user.teaching_courses.all()
+    user = await arequest_user(request)
+
+    async def compute_stats():
+        # Счетчики - независимые запросы
+        total_courses, total_homeworks, stats = await asyncio.gather(
+            user.teaching_courses.acount(),
+            Homework.objects.filter(course__teachers=user).acount(),
+            CourseGradeStats.objects.filter(course__teachers=user).aaggregate(
+                submitted=Coalesce(Sum("submitted_count"), 0),
+                graded=Coalesce(Sum("graded_count"), 0),
+            ),
+        )
+        return {
+            "total_courses": total_courses,
+            "total_homeworks": total_homeworks,
+            "total_submissions": stats["submitted"],
+            "pending_count": stats["submitted"] - stats["graded"],
+        }
 
-    # Статистика
-    all_homeworks = Homework.objects.filter(course__in=courses)
-    all_submissions = Submission.objects.filter(homework__in=all_homeworks)
-    pending_submissions = all_submissions.filter(grade__isnull=True)
+    # Список курсов выполняется при рендеринге и только при промахе кеша фрагмента
+    courses = user.teaching_courses.annotate(
+        students_count=count_subquery(Course.students.through.objects.filter(course_id=OuterRef("pk"))),
+        homeworks_count=count_subquery(Homework.objects.filter(course_id=OuterRef("pk"))),
+        pending_requests=count_subquery(CourseEnrollmentRequest.objects.filter(course_id=OuterRef("pk"), status="pending")),
+    ).order_by("title", "pk")
 
     context = {
         "courses": courses,
-        "total_courses": courses.count(),
-        "total_homeworks": all_homeworks.count(),
-        "total_submissions": all_submissions.count(),
-        "pending_count": pending_submissions.count(),
+        **await acached_stats("teacher", user.pk, compute_stats),
+        **fragment_context(),
     }
 
-    return render(request, "assignments/teacher_dashboard.html", context)
+    return await arender(request, "assignments/teacher_dashboard.html", context)
 
 
 @login_required
 @teacher_required
+@course_role_required("teacher")
+@course_condition(url_course())
 def teacher_course_detail(request, pk):
     """Детальная страница курса для преподавателя"""
     course = get_object_or_404(Course, pk=pk)
 
-    # Проверка доступа
-    if request.user not in course.teachers.all():
-        messages.error(request, "У вас нет доступа к этому курсу")
-        return redirect("teacher_dashboard")
-
     homeworks = course.homeworks.all().order_by("-created_at")
-    all_submissions = Submission.objects.filter(homework__course=course)
+    stats = CourseGradeStats.get_for(course=course)
 
     context = {
         "course": course,
         "homeworks": homeworks,
         "students_count": course.students.count(),
-        "total_submissions": all_submissions.count(),
-        "pending_count": all_submissions.filter(grade__isnull=True).count(),
+        "total_submissions": stats.submitted_count,
+        "pending_count": stats.pending_count,
     }
 
     return render(request, "assignments/teacher_course_detail.html", context)
@@ -403,15 +478,11 @@ def create_course(request):
 
 @login_required
 @teacher_required
+@course_role_required("teacher")
 def edit_course(request, pk):
     """Редактирование курса"""
     course = get_object_or_404(Course, pk=pk)
 
-    # Проверка доступа
-    if request.user not in course.teachers.all():
-        messages.error(request, "У вас нет доступа к этому курсу")
-        return redirect("teacher_dashboard")
-
     if request.method == "POST":
         course.title = request.POST.get("title", course.title)
         course.description = request.POST.get("description", course.description)
@@ -425,15 +496,11 @@ def edit_course(request, pk):
 
 @login_required
 @teacher_required
+@course_role_required("teacher")
 def manage_students(request, pk):
     """Управление студентами курса - просмотр зачисленных студентов и заявок"""
     course = get_object_or_404(Course, pk=pk)
 
-    # Проверка доступа
-    if request.user not in course.teachers.all():
-        messages.error(request, "У вас нет доступа к этому курсу")
-        return redirect("teacher_dashboard")
-
     # Текущие студенты
     current_students = course.students.all()
 
@@ -453,6 +520,7 @@ def manage_students(request, pk):
         "pending_requests": pending_requests,
         "processed_requests": processed_requests,
         "pending_count": pending_requests.count(),
+        "roster_form": RosterImportForm(),
     }
     return render(request, "assignments/manage_students.html", context)
 
@@ -464,7 +532,7 @@ def approve_enrollment_request(request, request_pk):
     enrollment_request = get_object_or_404(CourseEnrollmentRequest, pk=request_pk)
 
     # Проверка доступа
-    if request.user not in enrollment_request.course.teachers.all():
+    if not is_course_teacher(request, enrollment_request.course_id):
         messages.error(request, "У вас нет доступа к этой заявке")
         return redirect("teacher_dashboard")
 
@@ -499,7 +567,7 @@ def reject_enrollment_request(request, request_pk):
     enrollment_request = get_object_or_404(CourseEnrollmentRequest, pk=request_pk)
 
     # Проверка доступа
-    if request.user not in enrollment_request.course.teachers.all():
+    if not is_course_teacher(request, enrollment_request.course_id):
         messages.error(request, "У вас нет доступа к этой заявке")
         return redirect("teacher_dashboard")
 
@@ -523,15 +591,11 @@ def reject_enrollment_request(request, request_pk):
 
 @login_required
 @teacher_required
+@course_role_required("teacher", url_kwarg="course_pk")
 def remove_student_from_course(request, course_pk, student_pk):
     """Удалить студента с курса"""
     course = get_object_or_404(Course, pk=course_pk)
 
-    # Проверка доступа
-    if request.user not in course.teachers.all():
-        messages.error(request, "У вас нет доступа к этому курсу")
-        return redirect("teacher_dashboard")
-
     student = get_object_or_404(User, pk=student_pk)
 
     if request.method == "POST":
@@ -544,17 +608,13 @@ def remove_student_from_course(request, course_pk, student_pk):
 
 @login_required
 @teacher_required
+@course_role_required("teacher", url_kwarg="course_pk")
 def teacher_create_homework(request, course_pk):
     """Создание домашнего задания"""
     course = get_object_or_404(Course, pk=course_pk)
 
-    # Проверка доступа
-    if request.user not in course.teachers.all():
-        messages.error(request, "У вас нет доступа к этому курсу")
-        return redirect("teacher_dashboard")
-
     if request.method == "POST":
-        form = HomeworkForm(request.POST)
+        form = HomeworkForm(request.POST, request.FILES)
         if form.is_valid():
             homework = form.save(commit=False)
             homework.course = course
@@ -575,14 +635,20 @@ def teacher_edit_homework(request, pk):
     homework = get_object_or_404(Homework, pk=pk)
 
     # Проверка доступа
-    if request.user not in homework.course.teachers.all():
+    if not is_course_teacher(request, homework.course_id):
         messages.error(request, "У вас нет доступа к этому заданию")
         return redirect("teacher_dashboard")
 
     if request.method == "POST":
-        form = HomeworkForm(request.POST, instance=homework)
+        form = HomeworkForm(request.POST, request.FILES, instance=homework)
         if form.is_valid():
-            form.save()
+            with transaction.atomic():
+                form.save()
+                if "test_file" in form.changed_data:
+                    # Тесты изменились: перепроверяем все отправленные решения
+                    scheduled = sum(schedule_submission_tests(submission) for submission in homework.submissions.all())
+                    if scheduled:
+                        messages.info(request, f"Решений поставлено на автопроверку: {scheduled}")
             messages.success(request, "Задание успешно обновлено!")
             return redirect("teacher_course_detail", pk=homework.course.pk)
     else:
@@ -599,18 +665,20 @@ def teacher_homework_submissions(request, pk):
     homework = get_object_or_404(Homework, pk=pk)
 
     # Проверка доступа
-    if request.user not in homework.course.teachers.all():
+    if not is_course_teacher(request, homework.course_id):
         messages.error(request, "У вас нет доступа к этому заданию")
         return redirect("teacher_dashboard")
 
     submissions = homework.submissions.all().order_by("-submitted_at")
+    stats = HomeworkGradeStats.get_for(homework=homework)
 
     context = {
         "homework": homework,
         "submissions": submissions,
-        "total_count": submissions.count(),
-        "graded_count": submissions.filter(grade__isnull=False).count(),
-        "pending_count": submissions.filter(grade__isnull=True).count(),
+        "total_count": stats.submitted_count,
+        "graded_count": stats.graded_count,
+        "pending_count": stats.pending_count,
+        "similar_pairs": similar_pairs(homework),
     }
 
     return render(request, "assignments/teacher_homework_submissions.html", context)
@@ -620,10 +688,10 @@ def teacher_homework_submissions(request, pk):
 @teacher_required
 def teacher_grade_submission(request, pk):
     """Проверка и выставление оценки"""
-    submission = get_object_or_404(Submission, pk=pk)
+    submission = get_object_or_404(Submission.objects.select_related("homework"), pk=pk)
 
     # Проверка доступа
-    if request.user not in submission.homework.course.teachers.all():
+    if not is_course_teacher(request, submission.homework.course_id):
         messages.error(request, "У вас нет доступа к этой работе")
         return redirect("teacher_dashboard")
 
@@ -646,10 +714,13 @@ def teacher_grade_submission(request, pk):
 
 @login_required
 @teacher_required
-def teacher_all_submissions(request):
+async def teacher_all_submissions(request):
     """Все отправки преподавателя"""
-    courses = request.user.teaching_courses.all()
-    submissions = Submission.objects.filter(homework__course__in=courses).order_by("-submitted_at")
+    user = await arequest_user(request)
+    courses = user.teaching_courses.order_by("title", "pk")
+    submissions = Submission.objects.filter(homework__course__teachers=user).select_related(
+        "student", "homework", "homework__course"
+    )
 
     # Фильтрация
     status_filter = request.GET.get("status", "all")
@@ -661,29 +732,41 @@ def teacher_all_submissions(request):
         submissions = submissions.filter(grade__isnull=False)
 
     if course_filter != "all":
-        submissions = submissions.filter(homework__course_id=course_filter)
+        if not course_filter.isdigit():
+            course_filter = "all"
+        else:
+            submissions = submissions.filter(homework__course_id=course_filter)
+
+    # Keyset-пагинация по (submitted_at, id): глубокие страницы не дороже первой
+    async def load_page():
+        try:
+            return await akeyset_paginate(
+                submissions, SUBMISSIONS_ORDERING, cursor=request.GET.get("cursor"), per_page=SUBMISSIONS_PER_PAGE
+            )
+        except InvalidCursor:
+            messages.warning(request, "Некорректная ссылка на страницу, показана первая страница")
+            return await akeyset_paginate(submissions, SUBMISSIONS_ORDERING, per_page=SUBMISSIONS_PER_PAGE)
+
+    page, course_list = await asyncio.gather(load_page(), alist(courses))
 
     context = {
-        "submissions": submissions,
+        "submissions": page.object_list,
+        "page": page,
         "status_filter": status_filter,
         "course_filter": course_filter,
-        "courses": courses,
+        "courses": course_list,
     }
 
-    return render(request, "assignments/teacher_all_submissions.html", context)
+    return await arender(request, "assignments/teacher_all_submissions.html", context)
 
 
 @login_required
 @teacher_required
+@course_role_required("teacher")
 def delete_course(request, pk):
     """Удаление курса"""
     course = get_object_or_404(Course, pk=pk)
 
-    # Проверка доступа
-    if request.user not in course.teachers.all():
-        messages.error(request, "У вас нет доступа к этому курсу")
-        return redirect("teacher_dashboard")
-
     if request.method == "POST":
         course_title = course.title
         course.delete()
@@ -700,7 +783,7 @@ def delete_homework(request, pk):
     homework = get_object_or_404(Homework, pk=pk)
 
     # Проверка доступа
-    if request.user not in homework.course.teachers.all():
+    if not is_course_teacher(request, homework.course_id):
         messages.error(request, "У вас нет доступа к этому заданию")
         return redirect("teacher_dashboard")
 
@@ -716,62 +799,21 @@ def delete_homework(request, pk):
 
 @login_required
 @teacher_required
+@course_role_required("teacher", url_kwarg="course_pk")
+@course_condition(url_course("course_pk"))
 def teacher_grades_table(request, course_pk):
     """Сводная таблица оценок студентов по курсу"""
     course = get_object_or_404(Course, pk=course_pk)
 
-    # Проверка доступа
-    if request.user not in course.teachers.all():
-        messages.error(request, "У вас нет доступа к этому курсу")
-        return redirect("teacher_dashboard")
-
-    # Получаем всех студентов курса и все задания
-    students = course.students.all().order_by("last_name", "first_name")
-    homeworks = course.homeworks.all().order_by("due_date")
-
-    # Формируем таблицу оценок
-    grades_table = []
-    for student in students:
-        student_row = {
-            "student": student,
-            "grades": [],
-            "total": 0,
-            "average": 0,
-            "completed": 0,
-        }
-
-        total_grade = 0
-        graded_count = 0
-
-        for hw in homeworks:
-            submission = Submission.objects.filter(homework=hw, student=student).first()
-            grade_info = {
-                "homework": hw,
-                "submission": submission,
-                "grade": submission.grade if submission else None,
-                "status": (
-                    "graded" if submission and submission.grade is not None else "submitted" if submission else "missing"
-                ),
-            }
-            student_row["grades"].append(grade_info)
-
-            if submission and submission.grade is not None:
-                total_grade += submission.grade
-                graded_count += 1
-
-        if graded_count > 0:
-            student_row["average"] = round(total_grade / graded_count, 1)
-        student_row["completed"] = graded_count
-        student_row["total"] = total_grade
-
-        grades_table.append(student_row)
+    gradebook = Gradebook.for_course(course)
 
     context = {
         "course": course,
-        "homeworks": homeworks,
-        "grades_table": grades_table,
-        "students_count": students.count(),
-        "homeworks_count": homeworks.count(),
+        "homeworks": gradebook.homeworks,
+        "grades_table": list(gradebook.rows()),
+        "students_count": len(gradebook.students),
+        "homeworks_count": len(gradebook.homeworks),
+        "cells_count": gradebook.size,
     }
 
     return render(request, "assignments/teacher_grades_table.html", context)
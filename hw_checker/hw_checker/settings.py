@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -81,6 +82,40 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Бэкенд задается переменной окружения HW_CHECKER_CACHE_URL:
+#   не задана                 - память процесса (один процесс, разработка)
+#   file:///var/tmp/hw-cache  - файлы в каталоге (несколько процессов на одной машине)
+#   redis://127.0.0.1:6379/0  - Redis или совместимый сервер (нужен пакет redis)
+
+CACHE_URL = os.environ.get("HW_CHECKER_CACHE_URL", "")
+if CACHE_URL.startswith(("redis://", "rediss://")):
+    CACHES = {"default": {"BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": CACHE_URL}}
+elif CACHE_URL.startswith("file://"):
+    CACHES = {
+        "default": {"BACKEND": "django.core.cache.backends.filebased.FileBasedCache", "LOCATION": CACHE_URL[len("file://") :]}
+    }
+else:
+    CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "hw-checker"}}
+
+# Кеш dashboard студента и преподавателя (assignments/dashboard_cache.py):
+# алиас из CACHES и время жизни записей, сек
+DASHBOARD_CACHE_ALIAS = "default"
+DASHBOARD_CACHE_TIMEOUT = 300
+
+
+# Authentication backends
+# Пользователь сессии загружается вместе с профилем (роль проверяется без доп. запросов).
+# Сессии, созданные стандартным ModelBackend, переносятся на ProfileModelBackend
+# миграцией assignments 0016, поэтому второй бэкенд (и второй расчет хеша пароля
+# при каждом неудачном входе) не нужен
+
+AUTHENTICATION_BACKENDS = [
+    "assignments.backends.ProfileModelBackend",
+]
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -121,6 +156,24 @@ STATIC_URL = "static/"
 MEDIA_URL = "media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
+# Таблица массового выставления оценок (assignments/grading.py) передает по
+# 3 поля на отправку: стандартного предела Django (1000 полей) хватает лишь на ~330
+DATA_UPLOAD_MAX_NUMBER_FIELDS = 20000
+
+# Отдача файлов решений после проверки прав (assignments.downloads):
+# None - потоково силами Django (с поддержкой Range),
+# "x-sendfile" - заголовком X-Sendfile (Apache mod_xsendfile, lighttpd),
+# "x-accel-redirect" - заголовком X-Accel-Redirect (nginx)
+SENDFILE_BACKEND = None
+# Internal-location nginx, отображенный на MEDIA_ROOT (для "x-accel-redirect")
+SENDFILE_URL_PREFIX = "/protected-media/"
+
+# Автоматическая проверка решений (assignments/sandbox.py)
+# Интерпретатор для запуска тестов (None - тот же, что у воркера)
+AUTOTEST_PYTHON = None
+# Переопределение ограничений ресурсов процесса тестов, например {"memory_bytes": 256 * 1024 * 1024}
+AUTOTEST_LIMITS = {}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 